@@ -1,3 +1,3 @@
 from .llm_contract import GenerateRequest, GenerateResponse
 from .rag_contract import ChatRequest, ChatResponse
-from .vdb_contract import GetDocListResponse, AddDocRequest, CommonResponse
\ No newline at end of file
+from .vdb_contract import GetDocListResponse, AddDocRequest, CommonResponse, StatsResponse, SnapshotResponse, ReplicationResponse, CollectionListResponse
\ No newline at end of file
@@ -0,0 +1,59 @@
+# 实现Pydantic模型（独立向量库服务 vdb_service 的接口）
+# 向量以 float32 小端字节的 base64 编码传输，shape 给出 (n, dim)
+
+from pydantic import BaseModel
+from typing import Optional, Literal, List, Dict
+
+
+# 向量批量数据
+class VectorBatch(BaseModel):
+    vectors: str                        # base64(float32 bytes)
+    shape: List[int]                    # [n, dim]
+
+# 批量检索请求参数
+class StoreSearchRequest(VectorBatch):
+    top_k: int = 10
+    nprobe: Optional[int] = None        # IVF 探测聚类数（仅本次请求生效）
+    ef_search: Optional[int] = None     # HNSW 搜索宽度（仅本次请求生效）
+    min_score: Optional[float] = None   # 范围检索阈值
+    search_filter: Optional[dict] = None    # SearchFilter
+    with_meta: bool = True              # 同时返回命中 chunk 的元数据，省去逐条 get
+    with_text: bool = False             # 元数据中切出 chunk 文本（默认只返回偏移）
+
+# 批量检索响应参数
+class StoreSearchResponse(BaseModel):
+    results: List[List[dict]] = []      # 与查询一一对应的 [{chunk_id, file_id, score}]
+    metas: Dict[int, dict] = {}         # chunk_id -> ChunkMeta
+    epoch: str = ""                     # 服务实例标识（变化时客户端清空元数据缓存）
+
+# 添加向量请求参数
+class StoreAddRequest(VectorBatch):
+    metas: List[dict]                   # ChunkMeta
+
+# 按 id 批量获取请求参数
+class IdsRequest(BaseModel):
+    ids: List[str]
+
+# 按 chunk_id 批量获取请求参数
+class ChunkIdsRequest(BaseModel):
+    chunk_ids: List[int]
+    with_text: bool = False             # 元数据中切出 chunk 文本（默认只返回偏移）
+
+# chunk 元数据响应参数
+class ChunkMetasResponse(BaseModel):
+    metas: Dict[int, Optional[dict]] = {}   # chunk_id -> ChunkMeta（不存在为 None）
+    epoch: str = ""
+
+# 批量添加文章元数据请求参数
+class ArticlesRequest(BaseModel):
+    articles: List[dict]                # ArticleMeta
+
+# 文章向量批量数据
+class EmbeddingBatch(VectorBatch):
+    ids: List[str]                      # 与向量行一一对应的 article_id
+
+# 通用响应参数
+class StoreResponse(BaseModel):
+    status: Literal["ok", "error"] = "ok"
+    data: dict = {}                     # 查询结果（文件 / 文章元数据、计数、统计等）
+    error: str = ""
@@ -15,3 +15,23 @@ class AddDocRequest(BaseModel):
 # 通用响应参数
 class CommonResponse(BaseModel):
     status: Literal["ok", "error"] = "ok"
+
+# 快照导入响应参数
+class SnapshotResponse(BaseModel):
+    status: Literal["ok", "error"] = "ok"
+    manifest: dict = {}             # 快照 manifest（版本 / 索引描述 / 文件校验和）
+
+# 复制状态响应参数
+class ReplicationResponse(BaseModel):
+    role: Literal["writer", "follower"] = "writer"
+    generation: str = ""            # 知识库版本（副本为已应用的写入节点版本）
+    replication: dict = {}          # 副本复制状态（延迟 / 同步次数 / 最近错误等）
+
+# 集合列表响应参数
+class CollectionListResponse(BaseModel):
+    collections: List[dict] = []    # 集合名 / 是否已加载 / 估算内存
+    status: dict = {}               # 已加载数 / 内存合计 / 预算 / 加载与卸载次数
+
+# 统计信息响应参数
+class StatsResponse(BaseModel):
+    stats: dict = {}                # 向量库统计（文件 / chunk / 向量 / 墓碑 / 内存等）
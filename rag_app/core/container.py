@@ -1,4 +1,5 @@
-from typing import Dict, Any
+from typing import Dict, Any, Callable, Optional
+
 from rag_app.core.interface import (
     IVectorStore,
     IMetadataRepository,
@@ -7,9 +8,17 @@ from rag_app.core.interface import (
     IVectorStoreService
 )
 from rag_app.vector_store.service import VectorStoreService
+from rag_app.vector_store.raw_faiss.vectors import embed_matrix
 from shared.config import AppConfig, LLMConfig, RAGConfig, VectorStoreConfig
 
 
+# 随向量库文件一起替换的服务（快照导入 / 副本同步后重新加载）
+_VECTOR_STORE_SERVICES = (
+    "rag_service", "vector_store_service", "committer",
+    "vector_store", "metadata_repository", "article_store", "content_store",
+)
+
+
 class DIContainer:
     """依赖注入容器"""
 
@@ -31,19 +40,128 @@ class DIContainer:
     def get_vector_store(self) -> IVectorStore:
         """获取向量存储实例"""
         if "vector_store" not in self._services:
-            from rag_app.vector_store.raw_faiss.store import FaissVectorStore
-            self._services["vector_store"] = FaissVectorStore()
+            if self.vdb_config.type == "remote":
+                from rag_app.vector_store.remote import RemoteVectorStore
+                self._services["vector_store"] = RemoteVectorStore(self.get_vector_service_client())
+            else:
+                self._services["vector_store"] = self._create_vector_store(self.get_content_store())
         return self._services["vector_store"]
 
+    def get_vector_service_client(self):
+        """获取独立向量库服务客户端（vector_store.type 为 remote 时使用）"""
+        if "vector_service_client" not in self._services:
+            from rag_app.vector_store.remote import VectorServiceClient
+            url = f"http://{self.vdb_config.host}:{self.vdb_config.port}"
+            self._services["vector_service_client"] = VectorServiceClient(url, self.vdb_config.timeout)
+        return self._services["vector_service_client"]
+
+    def _create_vector_store(self, content, **paths) -> IVectorStore:
+        """
+        创建向量存储，paths 覆盖配置中的 index / map / wal / vectors 路径
+
+        content: 文件原文存储（崩溃恢复重新 embedding 时取 chunk 文本）
+        """
+
+        # 崩溃恢复只在需要时加载嵌入模型
+        def reembed(metas):
+            texts = [content.materialize(meta).text for meta in metas]
+            return embed_matrix(self.get_embedder(), texts)
+
+        # 变更日志由提交协议按组 fsync
+        if self.vdb_config.shards > 1:
+            from rag_app.vector_store.raw_faiss.sharded import ShardedVectorStore
+            return ShardedVectorStore(reembed=reembed, deferred_sync=True, **paths)
+
+        from rag_app.vector_store.raw_faiss.store import FaissVectorStore
+        return FaissVectorStore(reembed=reembed, deferred_sync=True, **paths)
+
     def get_metadata_repository(self) -> IMetadataRepository:
         """获取元数据存储实例"""
         if "metadata_repository" not in self._services:
-            from rag_app.vector_store.metadata import MetadataRepository
-            self._services["metadata_repository"] = MetadataRepository(
-                path=self.vdb_config.meta_path
-            )
+            if self.vdb_config.type == "remote":
+                from rag_app.vector_store.remote import RemoteMetadataRepository
+                self._services["metadata_repository"] = RemoteMetadataRepository(
+                    self.get_vector_service_client()
+                )
+            else:
+                from rag_app.vector_store.metadata import MetadataRepository
+                from rag_app.vector_store import commit
+                manifest = commit.load_manifest(self.vdb_config.commit_manifest_path)
+                self._services["metadata_repository"] = MetadataRepository(
+                    path=commit.resolve_path(manifest, "metadata", self.vdb_config.meta_path),
+                    deferred=True
+                )
         return self._services["metadata_repository"]
 
+    def get_article_store(self):
+        """获取文章向量存储实例"""
+        if "article_store" not in self._services:
+            if self.vdb_config.type == "remote":
+                from rag_app.vector_store.remote import RemoteArticleEmbeddingStore
+                self._services["article_store"] = RemoteArticleEmbeddingStore(
+                    self.get_vector_service_client()
+                )
+            else:
+                from rag_app.vector_store.embedding_store import ArticleEmbeddingStore
+                from rag_app.vector_store import commit
+                manifest = commit.load_manifest(self.vdb_config.commit_manifest_path)
+                self._services["article_store"] = ArticleEmbeddingStore(
+                    commit.resolve_path(manifest, "embeddings", self.vdb_config.embed_path),
+                    deferred=True
+                )
+        return self._services["article_store"]
+
+    def get_content_store(self):
+        """获取文件原文存储实例（远程向量库为 None，原文随元数据内联写入服务端）"""
+        if "content_store" not in self._services:
+            content_store = None
+            if self.vdb_config.type != "remote":
+                from rag_app.vector_store.content import ContentStore
+                content_store = ContentStore(self.vdb_config.content_dir)
+            self._services["content_store"] = content_store
+        return self._services["content_store"]
+
+    def get_committer(self):
+        """获取提交协议实例（远程向量库或只读节点为 None）"""
+        if "committer" not in self._services:
+            committer = None
+            if self.vdb_config.type != "remote":
+                committer = self._create_committer(
+                    self.get_vector_store(),
+                    self.get_metadata_repository(),
+                    self.get_article_store(),
+                    self.get_content_store(),
+                    manifest_path=self.vdb_config.commit_manifest_path,
+                    meta_path=self.vdb_config.meta_path,
+                    embed_path=self.vdb_config.embed_path,
+                )
+            self._services["committer"] = committer
+        return self._services["committer"]
+
+    def _create_committer(self, store, metadata, article_store, content_store, manifest_path: str, meta_path: str, embed_path: str):
+        """
+        创建提交协议：元数据与文章向量写出版本文件，新写入的原文、变更日志与清单按组 fsync
+        """
+        if store.read_only:
+            return None
+
+        def sync():
+            content_store.sync()
+            store.sync()
+
+        from rag_app.vector_store.commit import GroupCommitter
+        return GroupCommitter(
+            manifest_path,
+            participants={
+                "metadata": (metadata, meta_path),
+                "embeddings": (article_store, embed_path),
+            },
+            sync=sync,
+            window_ms=self.vdb_config.group_commit_ms,
+            max_batch=self.vdb_config.group_commit_max,
+            fsync=self.vdb_config.wal_fsync,
+        )
+
     def get_embedder(self) -> IEmbedder:
         """获取嵌入模型实例"""
         if "embedder" not in self._services:
@@ -72,7 +190,10 @@ class DIContainer:
                 embedder=embedder,
                 embed_path=self.vdb_config.embed_path,
                 chunk_size=self.vdb_config.chunk_size,
-                chunk_overlap=self.vdb_config.chunk_overlap
+                chunk_overlap=self.vdb_config.chunk_overlap,
+                article_store=self.get_article_store(),
+                committer=self.get_committer(),
+                content=self.get_content_store()
             )
         return self._services["vector_store_service"]
 
@@ -87,4 +208,128 @@ class DIContainer:
                 llm_client=llm_client,
                 vector_db=vector_store_service
             )
-        return self._services["rag_service"]
\ No newline at end of file
+        return self._services["rag_service"]
+
+    def get_collection_manager(self):
+        """获取命名集合管理器（各集合共享嵌入模型与 LLM 客户端）"""
+        if "collection_manager" not in self._services:
+            from rag_app.vector_store.collection import CollectionManager
+            self._services["collection_manager"] = CollectionManager(
+                self.vdb_config,
+                factory=self._create_collection,
+                close=self._close,
+            )
+        return self._services["collection_manager"]
+
+    def _create_collection(self, name: str) -> Dict[str, Any]:
+        """
+        创建命名集合的服务（独立的索引 / 映射 / 元数据 / 文章向量）
+        """
+        from rag_app.vector_store.collection import collection_paths
+        from rag_app.vector_store.metadata import MetadataRepository
+        from rag_app.vector_store.embedding_store import ArticleEmbeddingStore
+        from rag_app.vector_store.content import ContentStore
+        from rag_app.vector_store import commit
+        from rag_app.services.rag_service import RAGService
+
+        paths = collection_paths(self.vdb_config, name)
+        manifest = commit.load_manifest(paths["commit_manifest_path"])
+
+        content_store = ContentStore(paths["content_dir"])
+        vector_store = self._create_vector_store(
+            content_store,
+            index_path=paths["index_path"],
+            map_path=paths["map_path"],
+            wal_path=paths["wal_path"],
+            vectors_path=paths["vectors_path"],
+        )
+        metadata_repo = MetadataRepository(
+            path=commit.resolve_path(manifest, "metadata", paths["meta_path"]),
+            deferred=True
+        )
+        article_store = ArticleEmbeddingStore(
+            commit.resolve_path(manifest, "embeddings", paths["embed_path"]),
+            deferred=True
+        )
+        committer = self._create_committer(
+            vector_store,
+            metadata_repo,
+            article_store,
+            content_store,
+            manifest_path=paths["commit_manifest_path"],
+            meta_path=paths["meta_path"],
+            embed_path=paths["embed_path"],
+        )
+        vector_store_service = VectorStoreService(
+            store=vector_store,
+            metadata=metadata_repo,
+            embedder=self.get_embedder(),
+            embed_path=paths["embed_path"],
+            chunk_size=self.vdb_config.chunk_size,
+            chunk_overlap=self.vdb_config.chunk_overlap,
+            article_store=article_store,
+            committer=committer,
+            content=content_store
+        )
+
+        return {
+            "vector_store": vector_store,
+            "metadata_repository": metadata_repo,
+            "article_store": article_store,
+            "content_store": content_store,
+            "committer": committer,
+            "vector_store_service": vector_store_service,
+            "rag_service": RAGService(
+                llm_client=self.get_llm_client(),
+                vector_db=vector_store_service
+            ),
+        }
+
+    def reload_vector_store(self, on_ready: Optional[Callable[[], None]] = None):
+        """
+        从磁盘重新加载向量库相关服务（副本同步 / 快照导入替换文件后调用）
+
+        新实例加载完成后调用 on_ready（切换对外引用），之后才关闭旧实例，
+        进行中的请求在旧实例上完成；加载失败时保留旧实例
+        """
+        old = {name: self._services.pop(name) for name in _VECTOR_STORE_SERVICES if name in self._services}
+
+        try:
+            self.get_rag_service()
+        except Exception:
+            for name in _VECTOR_STORE_SERVICES:
+                self._services.pop(name, None)
+            self._services.update(old)
+            raise
+
+        if on_ready is not None:
+            on_ready()
+
+        self._close(old)
+
+    def close(self):
+        """关闭持有持久化状态的服务（如向量库 checkpoint）"""
+        manager = self._services.get("collection_manager")
+        if manager is not None:
+            manager.close()
+
+        self._close(self._services)
+
+    @staticmethod
+    def _close(services: Dict[str, Any]):
+        service = services.get("vector_store_service")
+        if service is not None and hasattr(service, "close"):
+            service.close()
+
+        # 提交剩余的暂存修改（需要向量库落盘变更日志），之后才关闭向量库
+        committer = services.get("committer")
+        if committer is not None:
+            committer.close()
+
+        store = services.get("vector_store")
+        if store is not None and hasattr(store, "close"):
+            store.close()
+
+        content_store = services.get("content_store")
+        if content_store is not None:
+            content_store.close()
@@ -1,14 +1,35 @@
 from typing import Protocol, List, Optional, runtime_checkable
 import numpy as np
 
-from rag_app.vector_store.types import ChunkMeta
+from rag_app.vector_store.types import ChunkMeta, SearchFilter
 
 
 @runtime_checkable
 class IVectorStore(Protocol):
     """向量存储接口"""
-    def search(self, query_vector: np.ndarray, top_k: int) -> List[dict]:
-        """向量搜索"""
+    def search(
+        self,
+        query_vector: np.ndarray,
+        top_k: int,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        search_filter: Optional[SearchFilter] = None,
+        min_score: Optional[float] = None,
+    ) -> List[dict]:
+        """向量搜索（nprobe / ef_search 为单次请求的 ANN 参数，search_filter 为元数据过滤，
+        min_score 不为空时为范围检索，只返回 score 不低于该值的结果，top_k 为上限）"""
+        ...
+
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        top_k: int,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        search_filter: Optional[SearchFilter] = None,
+        min_score: Optional[float] = None,
+    ) -> List[List[dict]]:
+        """批量向量搜索"""
         ...
 
     def add(self, metas: list, vectors: np.ndarray) -> bool:
@@ -19,8 +40,24 @@ class IVectorStore(Protocol):
         """按文件删除向量"""
         ...
 
-    def get(self, chunk_id: int) -> ChunkMeta:
-        """获取向量元数据"""
+    def get(self, chunk_id: int) -> Optional[ChunkMeta]:
+        """获取向量元数据（不存在返回 None）"""
+        ...
+
+    def stats(self, file_id: Optional[str] = None) -> dict:
+        """统计信息（增量维护，O(1)）"""
+        ...
+
+    def link_files(self, directory: str) -> dict:
+        """checkpoint 后将持久化文件链接到目录（快照导出）"""
+        ...
+
+    def file_ids(self) -> List[str]:
+        """存有 chunk 的 file_id（启动时与已提交的元数据对齐）"""
+        ...
+
+    def sync(self) -> None:
+        """落盘已追加的变更日志（组提交）"""
         ...
 
 @runtime_checkable
@@ -42,10 +79,22 @@ class IMetadataRepository(Protocol):
         """列出所有文件"""
         ...
 
+    def count_files(self) -> int:
+        """文件数"""
+        ...
+
+    def count_articles(self) -> int:
+        """文章数"""
+        ...
+
     def add_article(self, meta) -> None:
         """添加文章元数据"""
         ...
 
+    def add_articles(self, metas: List) -> None:
+        """批量添加文章元数据"""
+        ...
+
     def get_article(self, article_id: str):
         """获取文章元数据"""
         ...
@@ -54,6 +103,10 @@ class IMetadataRepository(Protocol):
         """删除文章元数据"""
         ...
 
+    def remove_articles(self, article_ids: List[str]) -> None:
+        """批量删除文章元数据"""
+        ...
+
 @runtime_checkable
 class IEmbedder(Protocol):
     """嵌入模型接口"""
@@ -62,7 +115,7 @@ class IEmbedder(Protocol):
         ...
 
     def embed_documents(self, texts: List[str]) -> List[np.ndarray]:
-        """嵌入多个文档"""
+        """嵌入多个文档（另提供 embed_documents_array 时写入路径直接使用其 (n, dim) 数组）"""
         ...
 
 @runtime_checkable
@@ -75,10 +128,30 @@ class ILLMClient(Protocol):
 @runtime_checkable
 class IVectorStoreService(Protocol):
     """向量存储服务接口"""
-    def search(self, query: str, top_k: int) -> List[dict]:
+    def search(
+        self,
+        query: str,
+        top_k: int,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        search_filter: Optional[SearchFilter] = None,
+        min_score: Optional[float] = None,
+    ) -> List[dict]:
         """搜索文档"""
         ...
 
+    def search_many(
+        self,
+        queries: List[str],
+        top_k: int,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        search_filter: Optional[SearchFilter] = None,
+        min_score: Optional[float] = None,
+    ) -> List[List[dict]]:
+        """批量搜索文档"""
+        ...
+
     def add_file(self, name: str, content: str) -> bool:
         """添加文件"""
         ...
@@ -91,8 +164,37 @@ class IVectorStoreService(Protocol):
         """列出文件"""
         ...
 
-    def get_chunk(self, chunk_id: int) -> ChunkMeta:
-        """获取向量元数据"""
+    def stats(self, file_id: Optional[str] = None) -> dict:
+        """向量库统计信息"""
+        ...
+
+    def usage(self) -> dict:
+        """各部分实际占用的内存 / 磁盘字节数"""
+        ...
+
+    def capacity(self, additional: int, sample: int = 20000, queries: int = 100) -> dict:
+        """容量规划：再写入 additional 个 chunk 后各索引类型的内存 / 磁盘 / 检索延迟预测"""
+        ...
+
+    def export_snapshot(self, out_path: str) -> dict:
+        """导出知识库快照，返回 manifest"""
+        ...
+
+    def frozen(self):
+        """快照导入期间停止写入（上下文管理器，退出前持有写锁）"""
+        ...
+
+    def detach(self):
+        """替换文件前停止落盘，之后关闭不再写出文件"""
+        ...
+
+    @property
+    def generation(self) -> str:
+        """知识库版本（每次增删文件后变化，副本据此判断是否需要同步）"""
+        ...
+
+    def get_chunk(self, chunk_id: int) -> Optional[ChunkMeta]:
+        """获取向量元数据（不含文本，已删除返回 None）"""
         ...
 
     def embed_query(self, query: str) -> np.ndarray:
@@ -103,6 +205,14 @@ class IVectorStoreService(Protocol):
         """获取文章切分信息"""
         ...
 
+    def get_article_chunks(self, article_ids: List[str]) -> dict:
+        """批量获取文章向量（article_id -> 向量，不存在的不返回）"""
+        ...
+
     def get_article_meta(self, article_id: str):
-        """获取文章元数据"""
+        """获取文章元数据（不含文本）"""
+        ...
+
+    def materialize(self, meta):
+        """切出 chunk / 文章元数据的文本（返回副本）"""
         ...
\ No newline at end of file
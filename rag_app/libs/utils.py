@@ -1,6 +1,27 @@
 import os
+
+import numpy as np
 from langchain_huggingface import HuggingFaceEmbeddings
 
+
+class ArrayEmbeddings(HuggingFaceEmbeddings):
+    """
+    HuggingFaceEmbeddings，额外提供 embed_documents_array：
+    直接返回 sentence-transformers 输出的 float32 (n, dim) 数组，
+    省去 embed_documents 的 tolist()（每个元素一个 Python float）
+    """
+
+    def embed_documents_array(self, texts: list[str]) -> np.ndarray:
+        # 与 embed_documents 的预处理一致
+        texts = [text.replace("\n", " ") for text in texts]
+        return self._client.encode(
+            texts,
+            show_progress_bar=self.show_progress,
+            convert_to_numpy=True,
+            **self.encode_kwargs,
+        )
+
+
 # 使用全局变量实现单例模式
 _embeddings_instance = None
 
@@ -10,7 +31,7 @@ def get_embeddings():
         curr_dir = os.path.dirname(os.path.abspath(__file__))
         bge_path = os.path.join(curr_dir, "..", "bge-small-zh-v1.5")
 
-        _embeddings_instance = HuggingFaceEmbeddings(
+        _embeddings_instance = ArrayEmbeddings(
             model_name=bge_path,
             model_kwargs={"device": 'cpu'},
             encode_kwargs={"normalize_embeddings": True},
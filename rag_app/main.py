@@ -1,15 +1,27 @@
 """
 RAG service interface for vector database management, document retrieval, and answer generation.
 """
+import os
 import json
+import tempfile
+from contextlib import contextmanager
 
 from fastapi import FastAPI, Request, Depends
+from fastapi.responses import FileResponse, JSONResponse
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 
 from libs.utils.logger import init_component_logger
 from libs.protocols.rag_contract import ChatRequest, ChatResponse
-from libs.protocols.vdb_contract import GetDocListResponse, AddDocRequest, CommonResponse
+from libs.protocols.vdb_contract import (
+    GetDocListResponse, AddDocRequest, CommonResponse, StatsResponse, SnapshotResponse,
+    ReplicationResponse, CollectionListResponse
+)
 from rag_app.core.container import DIContainer
 from rag_app.core.interface import IVectorStoreService
+from rag_app.vector_store import snapshot
+from rag_app.vector_store.replication import SnapshotFollower
+from rag_app.vector_store.collection import DEFAULT_COLLECTION
 from shared.config import get_app_config, get_llm_config, get_rag_config, get_vdb_config
 
 
@@ -39,10 +51,30 @@ async def lifespan(app: FastAPI):
 
     # 初始化向量库服务
     app.state.vdb_service = container.get_vector_store_service()
+
+    # 命名集合在首次使用时加载
+    app.state.collections = container.get_collection_manager()
+
+    # 只读副本：跟随写入节点，同步后原子切换服务
+    app.state.follower = None
+    if vdb_config.replication_source:
+        def swap():
+            app.state.rag_service = container.get_rag_service()
+            app.state.vdb_service = container.get_vector_store_service()
+
+        app.state.follower = SnapshotFollower(
+            vdb_config,
+            apply=lambda: container.reload_vector_store(on_ready=swap),
+        )
+        app.state.follower.start()
+
     logger.info("op=rag_app_initialized")
 
     yield
 
+    if app.state.follower is not None:
+        app.state.follower.close()
+    container.close()
     logger.info("op=rag_app_finish")
 
 app = FastAPI(
@@ -61,11 +93,63 @@ def get_rag_service(request: Request):
     """获取 RAG 服务依赖"""
     return request.app.state.rag_service
 
+def reject_on_follower(request: Request, op: str) -> bool:
+    """只读副本拒绝写入（写入只发往写入节点）"""
+    if request.app.state.follower is None:
+        return False
+    logger.warning(
+        f"op={op}_rejected "
+        "reason=read_replica"
+    )
+    return True
+
+@contextmanager
+def collection_services(request: Request, name: str, create: bool = False):
+    """按集合名获取 (RAG 服务, 向量库服务)，default 为全局知识库"""
+    if name == DEFAULT_COLLECTION:
+        yield request.app.state.rag_service, request.app.state.vdb_service
+        return
+
+    with request.app.state.collections.use(name, create=create) as services:
+        yield services["rag_service"], services["vector_store_service"]
+
 # 测试
 @app.get("/health")
-def check_health():
-    logger.debug("op=health_check model_loaded=true")
-    return {"status": "healthy", "model_loaded": True}
+def check_health(request: Request):
+    follower = request.app.state.follower
+    if follower is None:
+        logger.debug("op=health_check model_loaded=true")
+        return {"status": "healthy", "model_loaded": True}
+
+    # 副本复制延迟超过上限（或尚未完成首次同步）时返回 503，由负载均衡摘除
+    replication = follower.status()
+    logger.debug(
+        "op=health_check "
+        f"replica_lag={replication['lag_seconds']} "
+        f"stale={replication['stale']}"
+    )
+    if replication["stale"]:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "stale", "model_loaded": True, "replication": replication},
+        )
+    return {"status": "healthy", "model_loaded": True, "replication": replication}
+
+# 复制状态（副本轮询写入节点的版本）
+@app.get("/replication", response_model=ReplicationResponse)
+def get_replication(
+    request: Request,
+    vdb_service: IVectorStoreService = Depends(get_vector_store_service)
+):
+    follower = request.app.state.follower
+    if follower is None:
+        return ReplicationResponse(role="writer", generation=vdb_service.generation)
+
+    return ReplicationResponse(
+        role="follower",
+        generation=follower.generation or "",
+        replication=follower.status(),
+    )
 
 # 问答接口
 @app.post(rag_config.endpoint, response_model=ChatResponse)
@@ -79,7 +163,8 @@ async def chat(
     )
 
     try:
-        answer = rag_service.call_rag_flow(chat_in.text)
+        # 在线程池中执行，并发请求的检索才能被合批
+        answer = await run_in_threadpool(rag_service.call_rag_flow, chat_in.text)
         logger.info(
             "op=chat_end "
             f"answer_length={len(answer)}"
@@ -113,15 +198,71 @@ async def get_doc_list(
         )
         return GetDocListResponse()
 
+# 向量库统计
+@app.get("/stats", response_model=StatsResponse)
+async def get_stats(
+    vdb_service: IVectorStoreService = Depends(get_vector_store_service)
+):
+    logger.debug("op=get_stats")
+    try:
+        return StatsResponse(stats=vdb_service.stats())
+    except Exception as e:
+        logger.exception(
+            "op=get_stats_exception "
+            f"exception={type(e).__name__}"
+        )
+        return StatsResponse()
+
+# 单个文档统计
+@app.get("/stats/{doc_id}", response_model=StatsResponse)
+async def get_doc_stats(
+    doc_id: str,
+    vdb_service: IVectorStoreService = Depends(get_vector_store_service)
+):
+    logger.debug(f"op=get_doc_stats doc_id={doc_id}")
+    try:
+        return StatsResponse(stats=vdb_service.stats(doc_id))
+    except Exception as e:
+        logger.exception(
+            "op=get_doc_stats_exception "
+            f"exception={type(e).__name__}"
+        )
+        return StatsResponse()
+
+# 容量规划（在合成数据上构建各类型索引实测，耗时较长，在线程池中执行）
+@app.get("/capacity", response_model=StatsResponse)
+async def get_capacity(
+    additional: int = 0,
+    sample: int = 20000,
+    vdb_service: IVectorStoreService = Depends(get_vector_store_service)
+):
+    logger.info(
+        "op=get_capacity "
+        f"additional={additional} "
+        f"sample={sample}"
+    )
+    try:
+        return StatsResponse(stats=await run_in_threadpool(vdb_service.capacity, additional, sample))
+    except Exception as e:
+        logger.exception(
+            "op=get_capacity_exception "
+            f"exception={type(e).__name__}"
+        )
+        return StatsResponse()
+
 # 删除文档
 @app.delete("/doc/{doc_id}", response_model=CommonResponse)
 async def delete_doc(
     doc_id: str,
+    request: Request,
     vdb_service: IVectorStoreService = Depends(get_vector_store_service)
 ):
     logger.info("op=delete_doc_start")
+    if reject_on_follower(request, "delete_doc"):
+        return CommonResponse(status="error")
     try:
-        if vdb_service.delete_file(doc_id):
+        # 写锁与组提交等待在线程池中执行，不阻塞事件循环
+        if await run_in_threadpool(vdb_service.delete_file, doc_id):
             logger.info("op=delete_doc_end")
             return CommonResponse(status="ok")
         logger.error("op=delete_doc_error")
@@ -137,14 +278,225 @@ async def delete_doc(
 @app.post("/doc", response_model=CommonResponse)
 async def add_doc(
     param_in: AddDocRequest,
+    request: Request,
     vdb_service: IVectorStoreService = Depends(get_vector_store_service)
 ):
     logger.info(
         "op=add_doc_start "
         f"doc_name={param_in.name}"
     )
+    if reject_on_follower(request, "add_doc"):
+        return CommonResponse(status="error")
+    try:
+        # embedding、写锁与组提交等待在线程池中执行，不阻塞事件循环
+        if await run_in_threadpool(vdb_service.add_file, param_in.name, param_in.content):
+            logger.info("op=add_doc_end")
+            return CommonResponse(status="ok")
+        logger.error("op=add_doc_error")
+        return CommonResponse(status="error")
+    except Exception as e:
+        logger.exception(
+            "op=add_doc_exception "
+            f"exception={type(e).__name__}"
+        )
+        return CommonResponse(status="error")
+
+# 导出知识库快照
+@app.get("/snapshot")
+async def export_snapshot(
+    vdb_service: IVectorStoreService = Depends(get_vector_store_service)
+):
+    logger.info("op=export_snapshot_start")
+
+    # 写到数据目录下的临时文件（与索引同盘），发送完成后删除
+    fd, path = tempfile.mkstemp(
+        prefix=".export-", suffix=".tar",
+        dir=os.path.dirname(os.path.abspath(vdb_config.index_path))
+    )
+    os.close(fd)
+
+    try:
+        manifest = await run_in_threadpool(vdb_service.export_snapshot, path)
+    except Exception as e:
+        os.remove(path)
+        logger.exception(
+            "op=export_snapshot_exception "
+            f"exception={type(e).__name__}"
+        )
+        raise
+
+    logger.info(
+        "op=export_snapshot_end "
+        f"files={len(manifest['files'])}"
+    )
+    return FileResponse(
+        path,
+        media_type="application/x-tar",
+        filename=f"kb-snapshot-{manifest['created_at'][:19].replace(':', '')}.tar",
+        background=BackgroundTask(os.remove, path),
+    )
+
+# 导入知识库快照（请求体为快照文件）
+@app.post("/snapshot", response_model=SnapshotResponse)
+async def import_snapshot(request: Request):
+    logger.info("op=import_snapshot_start")
+    if reject_on_follower(request, "import_snapshot"):
+        return SnapshotResponse(status="error")
+    if vdb_config.type == "remote":
+        # 文件在独立向量库服务上，本节点没有可替换的数据
+        logger.warning("op=import_snapshot_rejected reason=remote_store")
+        return SnapshotResponse(status="error")
+
+    # 请求体流式写入临时文件，不整体读入内存
+    fd, path = tempfile.mkstemp(
+        prefix=".import-", suffix=".tar",
+        dir=os.path.dirname(os.path.abspath(vdb_config.index_path))
+    )
+
+    vdb_service = request.app.state.vdb_service
+
+    def switch():
+        request.app.state.rag_service = container.get_rag_service()
+        request.app.state.vdb_service = container.get_vector_store_service()
+
+    def load():
+        detached = False
+
+        def before_commit(manifest):
+            nonlocal detached
+            vdb_service.detach()
+            detached = True
+
+        # 停止写入、等待已暂存的修改提交后，在写锁内校验并替换文件；
+        # 新实例加载完成、切换引用后才关闭旧实例，进行中的检索在旧实例上完成
+        with vdb_service.frozen():
+            try:
+                return snapshot.import_snapshot(path, vdb_config, before_commit=before_commit)
+            finally:
+                if detached:
+                    container.reload_vector_store(on_ready=switch)
+
+    try:
+        with os.fdopen(fd, "wb") as f:
+            async for chunk in request.stream():
+                f.write(chunk)
+
+        manifest = await run_in_threadpool(load)
+        logger.info(
+            "op=import_snapshot_end "
+            f"total_vectors={manifest['index'].get('total_vectors')}"
+        )
+        return SnapshotResponse(status="ok", manifest=manifest)
+    except Exception as e:
+        logger.exception(
+            "op=import_snapshot_exception "
+            f"exception={type(e).__name__}"
+        )
+        return SnapshotResponse(status="error")
+    finally:
+        os.remove(path)
+
+# ======================
+# 命名集合（路径中的集合名 default 对应上面的全局接口）
+# ======================
+
+# 集合列表
+@app.get("/collections", response_model=CollectionListResponse)
+def list_collections(request: Request):
+    logger.debug("op=list_collections")
+    manager = request.app.state.collections
+    return CollectionListResponse(collections=manager.list(), status=manager.status())
+
+# 删除集合
+@app.delete("/collections/{name}", response_model=CommonResponse)
+def drop_collection(name: str, request: Request):
+    logger.info(f"op=drop_collection_start name={name}")
+    if reject_on_follower(request, "drop_collection"):
+        return CommonResponse(status="error")
+    try:
+        if name != DEFAULT_COLLECTION and request.app.state.collections.drop(name):
+            logger.info("op=drop_collection_end")
+            return CommonResponse(status="ok")
+        logger.error("op=drop_collection_error")
+        return CommonResponse(status="error")
+    except Exception as e:
+        logger.exception(
+            "op=drop_collection_exception "
+            f"exception={type(e).__name__}"
+        )
+        return CommonResponse(status="error")
+
+# 集合问答
+@app.post(f"/collections/{{name}}{rag_config.endpoint}", response_model=ChatResponse)
+def collection_chat(name: str, chat_in: ChatRequest, request: Request):
+    logger.info(
+        "op=chat_start "
+        f"collection={name} "
+        f"text={chat_in.text}"
+    )
+
+    try:
+        with collection_services(request, name) as (rag_service, _):
+            answer = rag_service.call_rag_flow(chat_in.text)
+        logger.info(
+            "op=chat_end "
+            f"answer_length={len(answer)}"
+        )
+        return ChatResponse(response=answer)
+    except Exception as e:
+        logger.exception(
+            "op=chat_error "
+            f"error={type(e).__name__}"
+        )
+        return ChatResponse(response="系统繁忙，请稍后再试。")
+
+# 集合文档列表
+@app.get("/collections/{name}/doc", response_model=GetDocListResponse)
+def get_collection_doc_list(name: str, request: Request):
+    logger.info(f"op=get_doc_list_start collection={name}")
+    try:
+        with collection_services(request, name) as (_, vdb_service):
+            docs = [meta.model_dump() for meta in vdb_service.list_files()]
+        logger.info(
+            "op=get_doc_list_end "
+            f"doc_count={len(docs)}"
+        )
+        return GetDocListResponse(docs=docs)
+    except Exception as e:
+        logger.exception(
+            "op=get_doc_list_exception "
+            f"exception={type(e).__name__}"
+        )
+        return GetDocListResponse()
+
+# 集合统计
+@app.get("/collections/{name}/stats", response_model=StatsResponse)
+def get_collection_stats(name: str, request: Request):
+    logger.debug(f"op=get_stats collection={name}")
+    try:
+        with collection_services(request, name) as (_, vdb_service):
+            return StatsResponse(stats=vdb_service.stats())
+    except Exception as e:
+        logger.exception(
+            "op=get_stats_exception "
+            f"exception={type(e).__name__}"
+        )
+        return StatsResponse()
+
+# 集合添加文档（集合不存在时创建）
+@app.post("/collections/{name}/doc", response_model=CommonResponse)
+def add_collection_doc(name: str, param_in: AddDocRequest, request: Request):
+    logger.info(
+        "op=add_doc_start "
+        f"collection={name} "
+        f"doc_name={param_in.name}"
+    )
+    if reject_on_follower(request, "add_doc"):
+        return CommonResponse(status="error")
     try:
-        if vdb_service.add_file(param_in.name, param_in.content):
+        with collection_services(request, name, create=True) as (_, vdb_service):
+            added = vdb_service.add_file(param_in.name, param_in.content)
+        if added:
             logger.info("op=add_doc_end")
             return CommonResponse(status="ok")
         logger.error("op=add_doc_error")
@@ -156,6 +508,27 @@ async def add_doc(
         )
         return CommonResponse(status="error")
 
+# 集合删除文档
+@app.delete("/collections/{name}/doc/{doc_id}", response_model=CommonResponse)
+def delete_collection_doc(name: str, doc_id: str, request: Request):
+    logger.info(f"op=delete_doc_start collection={name}")
+    if reject_on_follower(request, "delete_doc"):
+        return CommonResponse(status="error")
+    try:
+        with collection_services(request, name) as (_, vdb_service):
+            deleted = vdb_service.delete_file(doc_id)
+        if deleted:
+            logger.info("op=delete_doc_end")
+            return CommonResponse(status="ok")
+        logger.error("op=delete_doc_error")
+        return CommonResponse(status="error")
+    except Exception as e:
+        logger.exception(
+            "op=delete_doc_exception "
+            f"exception={type(e).__name__}"
+        )
+        return CommonResponse(status="error")
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -63,6 +63,7 @@ class RAGService:
         logger.info(
             "RAGService initialized with config: "
             f"similarity_threshold={self.rag_config.similarity_threshold}, "
+            f"retrieval_mode={self.rag_config.retrieval_mode}, "
             f"top_k={self.rag_config.top_k_retrieval}, "
             f"max_articles={self.rag_config.max_retrieved_articles}"
         )
@@ -109,36 +110,49 @@ class RAGService:
             return []
 
         # 使用配置中的检索参数
-        results = self.vdb.search(query, self.rag_config.top_k_retrieval)
+        if self.rag_config.retrieval_mode == "range":
+            # 范围检索：只取相似度不低于阈值的 chunk，无相关内容时直接返回
+            results = self.vdb.search(
+                query,
+                self.rag_config.range_max_results,
+                min_score=self.rag_config.similarity_threshold,
+            )
+            if not results:
+                logger.info("op=retrieve_done count=0 reason=below_threshold")
+                return []
+        else:
+            results = self.vdb.search(query, self.rag_config.top_k_retrieval)
 
         article_ids = set()
 
         for r in results:
+            # 检索与读取之间文件可能被删除：已删除的 chunk 跳过
             chunk = self.vdb.get_chunk(int(r["chunk_id"]))
-            article_ids.update(chunk.article_ids)
+            if chunk is not None:
+                article_ids.update(chunk.article_ids)
 
         # 获取嵌入器
         q_vec = self.vdb.embed_query(query)
 
-        articles = []
-
-        for aid in article_ids:
-            # 获取文章向量
-            vec = self.vdb.get_article_chunk(aid)
-            if vec is not None:
-                score = cosine_sim(q_vec, vec)
-
-                # 获取文章元数据
-                article_meta = self.vdb.get_article_meta(aid)
-                if article_meta:
-                    articles.append((score, article_meta))
+        # 批量获取文章向量（一次读取 / 一次远程请求）
+        vectors = self.vdb.get_article_chunks(list(article_ids))
 
         # 按相似度排序
-        articles.sort(key=lambda x: x[0], reverse=True)
+        scored = sorted(
+            ((cosine_sim(q_vec, vec), aid) for aid, vec in vectors.items()),
+            key=lambda x: x[0],
+            reverse=True,
+        )
 
-        # 使用配置中的最大文章数
+        # 使用配置中的最大文章数，只获取入选文章的元数据
         max_articles = self.rag_config.max_retrieved_articles
-        result = articles[:max_articles]
+        result = []
+        for score, aid in scored:
+            if len(result) >= max_articles:
+                break
+            article_meta = self.vdb.get_article_meta(aid)
+            if article_meta:
+                result.append((score, article_meta))
 
         logger.info("op=retrieve_done count=%d", len(result))
 
@@ -175,7 +189,8 @@ class RAGService:
         if best_score < self.rag_config.similarity_threshold:
             return "抱歉，检索到的知识文档相关性较低，建议咨询人工。"
 
-        # 基于上下文生成答案
+        # 基于上下文生成答案（检索只取元数据，此处才切出条文文本）
+        articles = [(score, self.vdb.materialize(meta)) for score, meta in articles]
         content = "\n".join([art[1].text for art in articles])
         prompt = prompts.RAG_GENERATE_TEMPLATE.format(content=content, user_input=user_input)
 
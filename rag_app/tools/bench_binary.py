@@ -0,0 +1,113 @@
+"""
+二值预筛选基准：对比 Flat 精确检索与「符号位 Hamming 候选 + 原始向量重排」的召回率与延迟
+
+用法：
+    python -m rag_app.tools.bench_binary --vectors data/vector_store/vectors.f32 --dim 512
+    python -m rag_app.tools.bench_binary --n 200000 --dim 512 --k-factors 16,32,64,128
+"""
+
+import time
+import argparse
+from types import SimpleNamespace
+
+import faiss
+import numpy as np
+
+from rag_app.vector_store.raw_faiss import binary as binary_index
+
+
+def _load_vectors(args) -> np.ndarray:
+    """
+    读取原始向量文件（vectors.f32 / .npy），未指定时生成聚簇的合成数据
+    """
+
+    if args.vectors:
+        if args.vectors.endswith(".npy"):
+            vectors = np.load(args.vectors).astype("float32")
+        else:
+            vectors = np.fromfile(args.vectors, dtype="float32").reshape(-1, args.dim)
+        # 原始向量文件中删除 / 未写入的行为全零
+        vectors = vectors[np.linalg.norm(vectors, axis=1) > 0]
+    else:
+        rng = np.random.default_rng(0)
+        centers = rng.standard_normal((max(args.n // 1000, 1), args.dim))
+        vectors = centers[rng.integers(0, len(centers), args.n)]
+        vectors = (vectors + 0.5 * rng.standard_normal(vectors.shape)).astype("float32")
+
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def _recall(ids: np.ndarray, truth: np.ndarray) -> float:
+    k = truth.shape[1]
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(ids.tolist(), truth.tolist())]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="二值预筛选召回率 / 延迟基准")
+    parser.add_argument("--vectors", default=None, help="原始向量文件（.f32 / .npy），缺省时使用合成数据")
+    parser.add_argument("--dim", type=int, default=512, help="向量维度")
+    parser.add_argument("--n", type=int, default=100000, help="合成数据向量数")
+    parser.add_argument("--queries", type=int, default=1000, help="查询数（从数据中抽样）")
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--k-factors", default="16,32,64,128", help="候选倍数列表（逗号分隔）")
+    parser.add_argument("--type", default="flat", choices=("flat", "hnsw"), help="二值索引类型")
+    parser.add_argument("--hnsw-m", type=int, default=32)
+    args = parser.parse_args()
+
+    vectors = _load_vectors(args)
+    n, dim = vectors.shape
+    ids = np.arange(n, dtype="int64")
+
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(n, min(args.queries, n), replace=False)]
+    queries = queries + 0.05 * rng.standard_normal(queries.shape).astype("float32")
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+
+    # Flat 基线
+    flat = faiss.IndexFlatIP(dim)
+    flat.add(vectors)
+
+    start = time.time()
+    _, truth = flat.search(queries, args.top_k)
+    flat_ms = (time.time() - start) * 1000 / len(queries)
+
+    # 二值索引
+    config = SimpleNamespace(
+        dimension=dim,
+        binary_index_type=args.type,
+        hnsw_m=args.hnsw_m,
+        hnsw_ef_construction=200,
+        hnsw_ef_search=64,
+    )
+    start = time.time()
+    binary = binary_index.build_binary_index(config)
+    binary.add_with_ids(binary_index.binary_codes(vectors), ids)
+    build_s = time.time() - start
+
+    print(f"vectors={n} dim={dim} queries={len(queries)} top_k={args.top_k} type={args.type}")
+    print(
+        f"float_bytes={n * dim * 4} binary_bytes={binary_index.memory_bytes(binary)} "
+        f"binary_build={build_s:.2f}s"
+    )
+    print(f"{'mode':<16}{'recall@k':>10}{'ms/query':>10}")
+    print(f"{'flat':<16}{1.0:>10.3f}{flat_ms:>10.3f}")
+
+    codes = binary_index.binary_codes(queries)
+
+    for factor in (int(f) for f in args.k_factors.split(",")):
+        k = min(args.top_k * factor, n)
+
+        start = time.time()
+        _, cand = binary.search(codes, k)
+        # 与 FaissVectorStore._refine 相同的精确重排
+        sims = np.einsum("nd,nkd->nk", queries, vectors[np.maximum(cand, 0)])
+        sims[cand < 0] = -np.inf
+        order = np.argsort(-sims, axis=1)[:, :args.top_k]
+        result = np.take_along_axis(cand, order, axis=1)
+        ms = (time.time() - start) * 1000 / len(queries)
+
+        print(f"{'binary x' + str(factor):<16}{_recall(result, truth):>10.3f}{ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
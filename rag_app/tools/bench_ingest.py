@@ -0,0 +1,115 @@
+"""
+写入路径内存基准：对比「嵌套列表 + 逐步复制」与「单一 float32 缓冲区」两种写入路径的
+峰值内存（tracemalloc：numpy 数组与 Python 对象，不含 FAISS 内部分配，两种路径相同）
+
+    legacy:  embed_documents 的嵌套列表 -> np.array -> 归一化新数组 -> 日志 payload 拼接，
+             文章逐条 embed_query + np.asarray
+    buffer:  embed_documents_array -> 原地归一化（已归一化时跳过）-> 日志分段写出，
+             文章一次批量 embedding，按行视图保存
+
+用法：
+    python -m rag_app.tools.bench_ingest --chunks 20000 --articles 2000 --dim 512
+"""
+
+import os
+import time
+import argparse
+import tempfile
+import tracemalloc
+
+import faiss
+import numpy as np
+
+from rag_app.vector_store.embedding_store import ArticleEmbeddingStore
+from rag_app.vector_store.raw_faiss.vectors import embed_matrix, normalize_rows
+from rag_app.vector_store.raw_faiss.wal import MutationLog, OP_ADD
+
+
+class _SyntheticEmbedder:
+    """
+    模拟 HuggingFaceEmbeddings：模型输出已归一化的 float32 数组，
+    embed_documents / embed_query 再转为 Python 列表
+    """
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self._rng = np.random.default_rng(0)
+
+    def embed_documents_array(self, texts: list[str]) -> np.ndarray:
+        vectors = self._rng.standard_normal((len(texts), self.dim), dtype="float32")
+        return normalize_rows(vectors, copy=False)
+
+    def embed_documents(self, texts: list[str]) -> list:
+        return self.embed_documents_array(texts).tolist()
+
+    def embed_query(self, text: str) -> list:
+        return self.embed_documents_array([text])[0].tolist()
+
+
+def _legacy(embedder, chunks, articles, index, wal, article_store):
+    # 与改动前 VectorStoreService._embed / FaissVectorStore._normalize / MutationLog.append_add 相同
+    vectors = np.array(embedder.embed_documents(chunks), dtype="float32")
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1e-12
+    vectors = vectors / norms
+
+    ids = np.arange(len(vectors), dtype="int64")
+    index.add_with_ids(vectors, ids)
+    payload = b"".join([ids.tobytes(), vectors.tobytes()])
+    wal._append(OP_ADD, [payload])
+
+    article_vectors = {f"a{i}": embedder.embed_query(text) for i, text in enumerate(articles)}
+    article_store.save_batch({aid: np.asarray(vec, dtype=np.float32) for aid, vec in article_vectors.items()})
+
+
+def _buffer(embedder, chunks, articles, index, wal, article_store):
+    vectors = normalize_rows(embed_matrix(embedder, chunks), copy=False)
+
+    ids = np.arange(len(vectors), dtype="int64")
+    index.add_with_ids(vectors, ids)
+    wal._append(OP_ADD, [ids, vectors])
+
+    article_vectors = embed_matrix(embedder, articles)
+    article_store.save_matrix([f"a{i}" for i in range(len(articles))], article_vectors)
+
+
+def _measure(name, func, args, directory):
+    embedder = _SyntheticEmbedder(args.dim)
+    chunks = [f"chunk {i}" for i in range(args.chunks)]
+    articles = [f"article {i}" for i in range(args.articles)]
+
+    index = faiss.IndexIDMap(faiss.IndexFlatIP(args.dim))
+    wal = MutationLog(os.path.join(directory, f"{name}.wal"), fsync=False)
+    article_store = ArticleEmbeddingStore(os.path.join(directory, f"{name}.npz"), deferred=True)
+
+    tracemalloc.start()
+    start = time.time()
+    func(embedder, chunks, articles, index, wal, article_store)
+    elapsed = time.time() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    wal.close()
+    return peak, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="写入路径峰值内存基准")
+    parser.add_argument("--chunks", type=int, default=20000, help="单个文件的 chunk 数")
+    parser.add_argument("--articles", type=int, default=2000, help="单个文件的文章数")
+    parser.add_argument("--dim", type=int, default=512, help="向量维度")
+    args = parser.parse_args()
+
+    buffer_bytes = (args.chunks + args.articles) * args.dim * 4
+
+    print(f"chunks={args.chunks} articles={args.articles} dim={args.dim} float32_bytes={buffer_bytes}")
+    print(f"{'path':<10}{'peak_MB':>10}{'x_buffer':>10}{'time_s':>10}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name, func in (("legacy", _legacy), ("buffer", _buffer)):
+            peak, elapsed = _measure(name, func, args, directory)
+            print(f"{name:<10}{peak / 2**20:>10.1f}{peak / buffer_bytes:>10.2f}{elapsed:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
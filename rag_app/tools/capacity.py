@@ -0,0 +1,100 @@
+"""
+容量规划：统计当前向量库各部分实际占用，并预测再写入 N 个 chunk 后各索引类型的
+内存、磁盘与检索延迟（在合成数据上构建真实索引实测后外推，不是公式估算）
+
+用法：
+    python -m rag_app.tools.capacity --additional 1000000
+    python -m rag_app.tools.capacity --additional 5000000 --sample 50000 --json
+
+在线节点使用 GET /capacity?additional=N
+"""
+
+import json
+import argparse
+
+from rag_app.core.container import DIContainer
+from rag_app.vector_store.service import VectorStoreService
+from shared.config import get_app_config, get_llm_config, get_rag_config, get_vdb_config
+
+
+def _mb(value) -> str:
+    if value is None:
+        return "-"
+    return f"{value / 2**20:.1f}"
+
+
+def _print(report: dict):
+    usage = report["usage"]
+
+    print(
+        f"chunks={usage['chunks']} files={usage['files']} articles={usage['articles']} "
+        f"dimension={report['dimension']} shards={report['shards']}"
+    )
+    print()
+    print(f"{'component':<20}{'memory_MB':>12}{'disk_MB':>12}")
+    for name, item in usage["components"].items():
+        print(f"{name:<20}{_mb(item['memory']):>12}{_mb(item['disk']):>12}")
+    print(f"{'total':<20}{_mb(usage['memory_bytes']):>12}{_mb(usage['disk_bytes']):>12}")
+
+    print()
+    print(f"projection: +{report['additional']} chunks -> {report['target_chunks']} chunks")
+    print(f"{'component':<20}{'memory_MB':>12}{'disk_MB':>12}")
+    for name, item in report["components"].items():
+        print(f"{name:<20}{_mb(item['memory']):>12}{_mb(item['disk']):>12}")
+
+    print()
+    print(f"{'index_type':<12}{'descriptor':<28}{'index_MB':>10}{'memory_MB':>11}{'disk_MB':>10}{'search_ms':>11}")
+    for item in report["index_types"]:
+        name = item["index_type"] + ("*" if item.get("configured") else "")
+        if "error" in item:
+            print(f"{name:<12}error: {item['error']}")
+            continue
+        descriptor = item["descriptor"] + (" (untrained)" if item["transitional"] else "")
+        print(
+            f"{name:<12}{descriptor:<28}{_mb(item['index_bytes']):>10}"
+            f"{_mb(item['memory_bytes']):>11}{_mb(item['disk_bytes']):>10}{item['search_ms']:>11.3f}"
+        )
+
+    print()
+    print("* 当前配置的索引类型；(untrained) 为数据量未达到 train_threshold 时的 Flat 过渡索引")
+    print("元数据对象内存无法统计（-）；延迟只含索引检索，不含精排、二值预筛选与嵌入模型")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="向量库容量规划")
+    parser.add_argument("--additional", type=int, default=0, help="再写入的 chunk 数")
+    parser.add_argument("--sample", type=int, default=20000, help="每种索引最大实测向量数")
+    parser.add_argument("--queries", type=int, default=100, help="测量延迟的查询数")
+    parser.add_argument("--json", action="store_true", help="输出 JSON")
+    args = parser.parse_args()
+
+    vdb_config = get_vdb_config()
+    container = DIContainer(
+        app_config=get_app_config(),
+        llm_config=get_llm_config(),
+        rag_config=get_rag_config(),
+        vdb_config=vdb_config,
+    )
+
+    # 只打开向量库、元数据与文章向量（不加载嵌入模型，不启动提交协议、不对齐）
+    try:
+        service = VectorStoreService(
+            store=container.get_vector_store(),
+            metadata=container.get_metadata_repository(),
+            embedder=None,
+            embed_path=vdb_config.embed_path,
+            article_store=container.get_article_store(),
+            content=container.get_content_store(),
+        )
+        report = service.capacity(args.additional, sample=args.sample, queries=args.queries)
+    finally:
+        container.close()
+
+    if args.json:
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    else:
+        _print(report)
+
+
+if __name__ == "__main__":
+    main()
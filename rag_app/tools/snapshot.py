@@ -0,0 +1,74 @@
+"""
+知识库快照命令行工具（离线使用，节点服务未运行时执行）
+
+用法：
+    python -m rag_app.tools.snapshot export kb.tar
+    python -m rag_app.tools.snapshot import kb.tar
+    curl -s http://node-a:8000/snapshot | python -m rag_app.tools.snapshot import -
+
+在线节点使用 GET /snapshot 导出、POST /snapshot 导入
+"""
+
+import sys
+import json
+import argparse
+
+from rag_app.core.container import DIContainer
+from rag_app.vector_store import snapshot, commit
+from shared.config import get_app_config, get_llm_config, get_rag_config, get_vdb_config
+
+
+def _export(args):
+    vdb_config = get_vdb_config()
+    container = DIContainer(
+        app_config=get_app_config(),
+        llm_config=get_llm_config(),
+        rag_config=get_rag_config(),
+        vdb_config=vdb_config,
+    )
+
+    # 只打开向量库（checkpoint 后导出），不加载嵌入模型；
+    # 元数据 / 文章向量取提交清单中的当前版本文件
+    store = container.get_vector_store()
+    manifest = commit.load_manifest(vdb_config.commit_manifest_path)
+    files = {
+        "metadata": commit.resolve_path(manifest, "metadata", vdb_config.meta_path),
+        "embeddings": commit.resolve_path(manifest, "embeddings", vdb_config.embed_path),
+    }
+    try:
+        return snapshot.export_snapshot(
+            store,
+            vdb_config,
+            args.path,
+            files=lambda: files,
+            content=container.get_content_store(),
+        )
+    finally:
+        container.close()
+
+
+def _import(args):
+    src = sys.stdin.buffer if args.path == "-" else args.path
+    return snapshot.import_snapshot(src, get_vdb_config())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="知识库快照导出 / 导入")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("export", help="导出快照到文件")
+    p.add_argument("path", help="输出文件路径")
+    p.set_defaults(func=_export)
+
+    p = sub.add_parser("import", help="从文件（- 为标准输入）导入快照")
+    p.add_argument("path", help="快照文件路径，- 表示从标准输入流式读取")
+    p.set_defaults(func=_import)
+
+    args = parser.parse_args()
+    manifest = args.func(args)
+
+    print(json.dumps(manifest, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import time
+import queue
+import logging
+import threading
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from rag_app.core.interface import IVectorStore
+from rag_app.vector_store.types import SearchFilter
+
+
+logger = logging.getLogger("VDB")
+
+
+@dataclass
+class _Request:
+    """
+    单个待合批的查询
+    """
+
+    vector: np.ndarray
+    # 检索参数相同的查询才能合并为一次 search_batch
+    params: tuple
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    done: threading.Event = field(default_factory=threading.Event)
+    result: list = None
+    error: Exception = None
+
+
+class SearchBatcher:
+    """
+    检索合批调度器
+
+    并发请求各自调用 search 时只提交 1 x d 的查询；调度线程在 window_ms 窗口内
+    （或凑满 max_batch 个）收集查询，按检索参数分组后每组调用一次
+    store.search_batch，再把结果分发给各调用方。
+    批量查询让 FAISS 走矩阵乘法路径，并避免多个请求同时抢占 OpenMP 线程
+
+    指标：批次数、平均 / 最大批大小、排队等待时间
+    """
+
+    def __init__(self, store: IVectorStore, window_ms: float, max_batch: int):
+        self.store = store
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+
+        self._queue: "queue.Queue[_Request]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._metrics = {
+            "batches": 0,
+            "queries": 0,
+            "max_batch_size": 0,
+            "wait_ms_total": 0.0,
+            "wait_ms_max": 0.0,
+        }
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="search-batcher",
+            daemon=True,
+        )
+        self._thread.start()
+
+        logger.info(
+            "op=search_batcher_init "
+            f"window_ms={window_ms} "
+            f"max_batch={max_batch}"
+        )
+
+    # ======================
+    # Internal
+    # ======================
+
+    def _collect(self) -> list[_Request]:
+        """
+        阻塞等待第一个查询，之后在窗口内继续收集，最多 max_batch 个
+        """
+
+        try:
+            first = self._queue.get(timeout=0.5)
+        except queue.Empty:
+            return []
+
+        batch = [first]
+        deadline = time.perf_counter() + self.window
+
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _dispatch(self, batch: list[_Request]):
+        start = time.perf_counter()
+
+        groups: dict[tuple, list[_Request]] = {}
+        for req in batch:
+            groups.setdefault(req.params, []).append(req)
+
+        for params, reqs in groups.items():
+            top_k, nprobe, ef_search, min_score = params
+            try:
+                results = self.store.search_batch(
+                    np.stack([r.vector for r in reqs]),
+                    top_k,
+                    nprobe=nprobe,
+                    ef_search=ef_search,
+                    min_score=min_score,
+                )
+                for req, result in zip(reqs, results):
+                    req.result = result
+            except Exception as e:
+                for req in reqs:
+                    req.error = e
+
+            for req in reqs:
+                req.done.set()
+
+        waits = [(start - r.enqueued_at) * 1000 for r in batch]
+        with self._lock:
+            m = self._metrics
+            m["batches"] += 1
+            m["queries"] += len(batch)
+            m["max_batch_size"] = max(m["max_batch_size"], len(batch))
+            m["wait_ms_total"] += sum(waits)
+            m["wait_ms_max"] = max(m["wait_ms_max"], max(waits))
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._collect()
+            if batch:
+                self._dispatch(batch)
+
+        # 关闭前处理完已提交的查询
+        pending = []
+        while True:
+            try:
+                pending.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        if pending:
+            self._dispatch(pending)
+
+    # ======================
+    # Public API
+    # ======================
+
+    def search(
+        self,
+        query_vector: np.ndarray,
+        top_k: int = 10,
+        nprobe: int = None,
+        ef_search: int = None,
+        search_filter: SearchFilter = None,
+        min_score: float = None,
+    ) -> list[dict]:
+        """
+        提交单个查询并等待合批结果，参数与 IVectorStore.search 相同
+
+        带过滤条件的查询各自编译 IDSelector，不参与合批；关闭后直接检索
+        """
+
+        if search_filter is not None or self._stop.is_set():
+            return self.store.search(
+                query_vector,
+                top_k,
+                nprobe=nprobe,
+                ef_search=ef_search,
+                search_filter=search_filter,
+                min_score=min_score,
+            )
+
+        req = _Request(
+            vector=np.asarray(query_vector, dtype="float32").reshape(-1),
+            params=(top_k, nprobe, ef_search, min_score),
+        )
+        self._queue.put(req)
+        req.done.wait()
+
+        if req.error is not None:
+            raise req.error
+
+        return req.result
+
+    def metrics(self) -> dict:
+        with self._lock:
+            m = dict(self._metrics)
+
+        queries = m.pop("queries")
+        wait_total = m.pop("wait_ms_total")
+
+        return {
+            **m,
+            "queries": queries,
+            "avg_batch_size": round(queries / m["batches"], 2) if m["batches"] else 0.0,
+            "avg_wait_ms": round(wait_total / queries, 3) if queries else 0.0,
+            "wait_ms_max": round(m["wait_ms_max"], 3),
+        }
+
+    def close(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
@@ -0,0 +1,319 @@
+import os
+import re
+import time
+import shutil
+import logging
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Any, Iterator
+
+from shared.config import VectorStoreConfig
+
+
+logger = logging.getLogger("VDB")
+
+# 保留名称：对应原有的全局知识库（vector_store 下的路径），不参与加载与卸载
+DEFAULT_COLLECTION = "default"
+
+# 集合名即目录名，只允许安全字符
+_NAME_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+# 集合目录下的文件名沿用全局配置中的文件名
+_PATH_KEYS = (
+    "index_path", "map_path", "wal_path", "vectors_path",
+    "meta_path", "embed_path", "commit_manifest_path", "content_dir",
+)
+
+
+def check_collection_name(name: str):
+    if not _NAME_PATTERN.match(name):
+        raise ValueError(f"invalid collection name: {name}")
+
+
+def collection_paths(config: VectorStoreConfig, name: str) -> dict:
+    """
+    集合的持久化路径：<collections_dir>/<名称>/<全局配置中的文件名>
+    """
+
+    directory = os.path.join(config.collections_dir, name)
+    return {
+        key: os.path.join(directory, os.path.basename(getattr(config, key)))
+        for key in _PATH_KEYS
+    }
+
+
+@dataclass
+class _Collection:
+    """
+    已加载的集合
+    """
+
+    name: str
+    services: Dict[str, Any]
+    # 正在使用该集合的请求数，大于 0 时不卸载
+    refs: int = 0
+    memory_bytes: int = 0
+    loaded_at: float = field(default_factory=time.time)
+
+
+class CollectionManager:
+    """
+    命名集合管理
+
+    - 每个集合独立的索引 / 映射 / 元数据 / 文章向量，首次使用时从磁盘加载
+    - 已加载集合按最近使用排序；估算内存之和超过预算时卸载最近最少使用且
+      未被使用的集合（卸载前 checkpoint，下次使用时重新加载）
+    - 同一集合的加载与卸载互斥，避免新实例读到卸载过程中的文件
+
+    内存估算：索引（含二值索引）+ 映射表文本 + 元数据文件大小；
+    原始向量文件按需映射，由页缓存回收，不计入
+    """
+
+    def __init__(
+        self,
+        config: VectorStoreConfig,
+        factory: Callable[[str], Dict[str, Any]],
+        close: Callable[[Dict[str, Any]], None],
+    ):
+        """
+        Args:
+            config: 向量存储配置（集合根目录与内存预算）
+            factory: 集合名 -> 服务字典（vector_store / metadata_repository /
+                     vector_store_service / rag_service）
+            close: 关闭服务字典
+        """
+
+        self.config = config
+        self.root = config.collections_dir
+        self.budget_bytes = config.collection_memory_budget_mb * 1024 * 1024
+        self.factory = factory
+        self.close_services = close
+
+        self._loaded: "OrderedDict[str, _Collection]" = OrderedDict()
+        self._lock = threading.Lock()
+        # 每个集合一把加载锁（加载 / 卸载 / 删除互斥）
+        self._name_locks: Dict[str, threading.Lock] = {}
+        self._metrics = {"loads": 0, "evictions": 0}
+
+        logger.info(
+            "op=collection_manager_init "
+            f"root={self.root} "
+            f"budget_mb={config.collection_memory_budget_mb}"
+        )
+
+    # ======================
+    # Internal
+    # ======================
+
+    def _name_lock(self, name: str) -> threading.Lock:
+        with self._lock:
+            return self._name_locks.setdefault(name, threading.Lock())
+
+    def _hit(self, name: str):
+        """
+        已加载时增加引用并移到最近使用端（调用方持有 self._lock）
+        """
+
+        coll = self._loaded.get(name)
+        if coll is not None:
+            coll.refs += 1
+            self._loaded.move_to_end(name)
+        return coll
+
+    @staticmethod
+    def _measure(services: Dict[str, Any]) -> int:
+        stats = services["vector_store"].stats()
+        meta_path = services["metadata_repository"].path
+
+        return (
+            stats["index_memory_bytes"]
+            + stats["binary_index_bytes"]
+            + stats["text_bytes"]
+            + (os.path.getsize(meta_path) if os.path.exists(meta_path) else 0)
+        )
+
+    def _acquire(self, name: str, create: bool) -> _Collection:
+        check_collection_name(name)
+
+        with self._lock:
+            coll = self._hit(name)
+        if coll is not None:
+            return coll
+
+        with self._name_lock(name):
+            # 等待加载锁期间可能已被其他请求加载
+            with self._lock:
+                coll = self._hit(name)
+            if coll is not None:
+                return coll
+
+            directory = os.path.join(self.root, name)
+            if not os.path.isdir(directory):
+                if not create:
+                    raise KeyError(f"collection not found: {name}")
+                os.makedirs(directory, exist_ok=True)
+
+            start = time.time()
+            services = self.factory(name)
+            coll = _Collection(name=name, services=services, refs=1)
+            coll.memory_bytes = self._measure(services)
+
+            with self._lock:
+                self._loaded[name] = coll
+                self._metrics["loads"] += 1
+
+            logger.info(
+                "op=collection_loaded "
+                f"name={name} "
+                f"memory_bytes={coll.memory_bytes} "
+                f"time={time.time() - start:.2f}s"
+            )
+
+        self._evict()
+
+        return coll
+
+    def _release(self, coll: _Collection):
+        # 写入后内存增长，释放时重新估算
+        memory_bytes = self._measure(coll.services)
+
+        with self._lock:
+            coll.memory_bytes = memory_bytes
+            coll.refs -= 1
+
+        self._evict()
+
+    def _evict(self):
+        """
+        超出预算时按最近最少使用卸载；正在使用的与最近使用的集合保留
+        """
+
+        if self.budget_bytes <= 0:
+            return
+
+        victims = []
+        with self._lock:
+            total = sum(c.memory_bytes for c in self._loaded.values())
+            if total <= self.budget_bytes:
+                return
+
+            newest = next(reversed(self._loaded))
+            for name, coll in list(self._loaded.items()):
+                if total <= self.budget_bytes or name == newest:
+                    break
+                if coll.refs:
+                    continue
+                del self._loaded[name]
+                total -= coll.memory_bytes
+                victims.append(coll)
+
+            self._metrics["evictions"] += len(victims)
+
+        for coll in victims:
+            with self._name_lock(coll.name):
+                self.close_services(coll.services)
+
+            logger.info(
+                "op=collection_evicted "
+                f"name={coll.name} "
+                f"memory_bytes={coll.memory_bytes} "
+                f"loaded_bytes={total} "
+                f"budget_bytes={self.budget_bytes}"
+            )
+
+    # ======================
+    # Public API
+    # ======================
+
+    @contextmanager
+    def use(self, name: str, create: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        使用集合（未加载时加载），退出前不会被卸载
+
+        Args:
+            name: 集合名
+            create: 集合不存在时是否创建（写入时为 True）
+
+        Yields:
+            dict: 服务字典
+        """
+
+        coll = self._acquire(name, create)
+        try:
+            yield coll.services
+        finally:
+            self._release(coll)
+
+    def list(self) -> list[dict]:
+        """
+        磁盘上的全部集合及加载状态
+        """
+
+        names = []
+        if os.path.isdir(self.root):
+            names = sorted(
+                n for n in os.listdir(self.root)
+                if _NAME_PATTERN.match(n) and os.path.isdir(os.path.join(self.root, n))
+            )
+
+        with self._lock:
+            loaded = {
+                name: {"memory_bytes": c.memory_bytes, "in_use": c.refs}
+                for name, c in self._loaded.items()
+            }
+
+        return [
+            {"name": name, "loaded": name in loaded, **loaded.get(name, {})}
+            for name in names
+        ]
+
+    def drop(self, name: str) -> bool:
+        """
+        删除集合（卸载并删除目录）
+
+        Returns:
+            bool: 集合是否存在
+        """
+
+        check_collection_name(name)
+
+        with self._name_lock(name):
+            with self._lock:
+                coll = self._loaded.get(name)
+                if coll is not None:
+                    if coll.refs:
+                        raise RuntimeError(f"collection in use: {name}")
+                    del self._loaded[name]
+
+            if coll is not None:
+                self.close_services(coll.services)
+
+            directory = os.path.join(self.root, name)
+            if not os.path.isdir(directory):
+                return False
+
+            shutil.rmtree(directory)
+
+        logger.info(f"op=collection_dropped name={name}")
+
+        return True
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "loaded": len(self._loaded),
+                "memory_bytes": sum(c.memory_bytes for c in self._loaded.values()),
+                "budget_bytes": self.budget_bytes,
+                **self._metrics,
+            }
+
+    def close(self):
+        with self._lock:
+            loaded = list(self._loaded.values())
+            self._loaded.clear()
+
+        for coll in loaded:
+            with self._name_lock(coll.name):
+                self.close_services(coll.services)
@@ -0,0 +1,386 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, Tuple
+
+
+logger = logging.getLogger("VDB")
+
+
+def fsync_path(path: str):
+    """
+    fsync 已写完的文件
+    """
+
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def fsync_dir(path: str):
+    """
+    fsync 目录（使其中的新建 / 重命名持久化）
+    """
+
+    fd = os.open(path or ".", os.O_RDONLY | getattr(os, "O_DIRECTORY", 0))
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def generation_path(base_path: str, generation: int) -> str:
+    """
+    版本文件路径：<目录>/<文件名>.g<版本号>.<扩展名>
+    """
+
+    stem, ext = os.path.splitext(base_path)
+    return f"{stem}.g{generation:08d}{ext}"
+
+
+def _generation_pattern(base_path: str):
+    stem, ext = os.path.splitext(os.path.basename(base_path))
+    return re.compile(rf"^{re.escape(stem)}\.g\d{{8}}{re.escape(ext)}$")
+
+
+def load_manifest(path: str) -> dict:
+    """
+    读取提交清单，不存在时为版本 0（各参与方使用配置中的原路径）
+    """
+
+    if not os.path.exists(path):
+        return {"generation": 0, "files": {}}
+
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def resolve_path(manifest: dict, name: str, base_path: str) -> str:
+    """
+    参与方当前的已提交文件（与配置路径同目录）
+    """
+
+    filename = manifest["files"].get(name)
+    if not filename:
+        return base_path
+    return os.path.join(os.path.dirname(base_path), filename)
+
+
+def clear_manifest(path: str):
+    """
+    删除提交清单，各参与方回到配置中的原路径（快照导入替换文件后调用）
+
+    残留的版本文件在下次启动时清理
+    """
+
+    if os.path.exists(path):
+        os.remove(path)
+        fsync_dir(os.path.dirname(os.path.abspath(path)))
+
+
+class GroupCommitter:
+    """
+    多文件提交协议：版本文件 + 单一提交清单 + 组提交
+
+    一次文件增删同时修改向量库、元数据与文章向量。参与方（元数据 / 文章向量）
+    只在内存中修改，调用方在写锁（self.lock）内应用修改后 stage 得到版本号。
+    后台线程把窗口内暂存的多个版本合并为一组：在写锁内为有修改的参与方写出
+    一个新的版本文件（不覆盖已提交的文件），释放写锁后 fsync 这些文件与向量库
+    变更日志，再原子替换清单（临时文件 + rename）。清单替换即提交点，
+    被取代的文件随后删除。每组的写文件与 fsync 次数与组内修改数无关
+
+    崩溃后清单仍指向上一次提交的文件，未提交的版本文件在启动时清理；向量库
+    只可能领先于清单（变更日志已写入、清单未替换），由业务层按文件对齐
+    """
+
+    def __init__(
+        self,
+        manifest_path: str,
+        participants: Dict[str, Tuple[object, str]],
+        sync: Callable[[], None],
+        window_ms: float = 0,
+        max_batch: int = 64,
+        fsync: bool = True,
+        lock=None,
+    ):
+        """
+        Args:
+            manifest_path: 提交清单路径
+            participants: 名称 -> (参与方, 配置中的原路径)；参与方提供 dirty 与 save_as(path)
+            sync: 落盘向量库变更日志（每组一次）
+            window_ms: 组提交等待窗口（毫秒），0 表示只合并上一次提交期间到达的修改
+            max_batch: 单组最多合并的版本数，达到后不再等待窗口
+            fsync: 是否 fsync（关闭时仍保证进程崩溃下的原子性）
+            lock: 业务写锁（可重入），默认新建；写入方持有它修改参与方与向量库
+        """
+
+        self.manifest_path = manifest_path
+        self.participants = participants
+        self.sync = sync
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.fsync = fsync
+        self.lock = lock if lock is not None else threading.RLock()
+
+        manifest = load_manifest(manifest_path)
+
+        # 已提交 / 已暂存的版本号
+        self.generation = manifest["generation"]
+        self._staged = self.generation
+
+        # 参与方名称 -> 已提交文件 / 最新暂存文件
+        self._committed = {
+            name: resolve_path(manifest, name, base_path)
+            for name, (_, base_path) in participants.items()
+        }
+        self._files = dict(self._committed)
+        # 已写出、尚未提交的版本文件
+        self._written: list[str] = []
+
+        self._failed = 0
+        self._error = None
+        self._metrics = {
+            "commits": 0,
+            "fsyncs": 0,
+            "last_batch": 0,
+            "last_commit_ms": 0.0,
+        }
+
+        self._cond = threading.Condition()
+        self._stop = False
+        # 后台线程已退出（停止时仍有失败的提交即放弃重试）
+        self._closed = False
+
+        self._cleanup()
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name="group-commit",
+            daemon=True,
+        )
+        self._thread.start()
+
+    # ======================
+    # Internal
+    # ======================
+
+    def _cleanup(self):
+        """
+        删除未被清单引用的版本文件（上次崩溃前暂存未提交的修改）
+        """
+
+        removed = 0
+        for name, (_, base_path) in self.participants.items():
+            directory = os.path.dirname(os.path.abspath(base_path))
+            if not os.path.isdir(directory):
+                continue
+
+            pattern = _generation_pattern(base_path)
+            committed = os.path.basename(self._committed[name])
+            for filename in os.listdir(directory):
+                if pattern.match(filename) and filename != committed:
+                    os.remove(os.path.join(directory, filename))
+                    removed += 1
+
+        if removed:
+            logger.warning(f"op=commit_stale_files_removed count={removed}")
+
+    def _capture(self):
+        """
+        为有修改的参与方写出当前暂存版本的文件（调用方持有写锁，不 fsync）
+        """
+
+        generation = self._staged
+
+        written = {}
+        for name, (participant, base_path) in self.participants.items():
+            if participant.dirty:
+                path = generation_path(base_path, generation)
+                participant.save_as(path)
+                written[name] = path
+
+        with self._cond:
+            self._files.update(written)
+            self._written.extend(written.values())
+
+    def _write_manifest(self, generation: int, files: dict):
+        manifest = {
+            "generation": generation,
+            "committed_at": datetime.now().isoformat(),
+            "files": {name: os.path.basename(path) for name, path in files.items()},
+        }
+
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(json.dumps(manifest, ensure_ascii=False, indent=2))
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+
+        os.replace(tmp_path, self.manifest_path)
+        if self.fsync:
+            fsync_dir(os.path.dirname(os.path.abspath(self.manifest_path)))
+
+    def _commit(self, target: int, files: dict, written: list[str]):
+        start = time.time()
+        latest = set(files.values())
+        fresh = [path for path in written if path in latest]
+
+        fsyncs = 0
+        if self.fsync:
+            directories = {os.path.dirname(os.path.abspath(path)) for path in fresh}
+            for path in fresh:
+                fsync_path(path)
+            for directory in directories:
+                fsync_dir(directory)
+            self.sync()
+            # 版本文件 + 所在目录 + 变更日志 + 清单文件与目录
+            fsyncs = len(fresh) + len(directories) + 3
+
+        self._write_manifest(target, files)
+
+        with self._cond:
+            batch = target - self.generation
+            previous = self._committed
+            self._committed = files
+            self.generation = target
+            # 重试成功：失败的版本已包含在本组中
+            self._failed = 0
+            self._metrics["commits"] += 1
+            self._metrics["fsyncs"] += fsyncs
+            self._metrics["last_batch"] = batch
+            self._metrics["last_commit_ms"] = round((time.time() - start) * 1000, 3)
+            self._cond.notify_all()
+
+        # 被同组后续版本取代的暂存文件、上一次提交的文件
+        for path in [p for p in written if p not in latest] + [p for p in previous.values() if p not in latest]:
+            if os.path.exists(path):
+                os.remove(path)
+
+        logger.info(
+            "op=commit_done "
+            f"generation={target} "
+            f"batch={batch} "
+            f"fsyncs={fsyncs} "
+            f"time={time.time() - start:.3f}s"
+        )
+
+    def _run(self):
+        try:
+            self._loop()
+        finally:
+            with self._cond:
+                self._closed = True
+                self._cond.notify_all()
+
+    def _loop(self):
+        while True:
+            with self._cond:
+                while self._staged == self.generation and not self._stop:
+                    self._cond.wait()
+                if self._staged == self.generation:
+                    break
+
+                # 等待窗口内的后续修改合并为一组
+                deadline = time.monotonic() + self.window
+                while not self._stop and self._staged - self.generation < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+
+            # 先取写锁再取条件变量（与 stage 的顺序一致）
+            with self.lock:
+                self._capture()
+                with self._cond:
+                    target, files, written = self._staged, dict(self._files), self._written
+                    self._written = []
+
+            try:
+                self._commit(target, files, written)
+            except Exception as e:
+                logger.exception(f"op=commit_failed generation={target}")
+                with self._cond:
+                    # 版本文件保留，下一次提交重试
+                    self._written = written + self._written
+                    self._failed = target
+                    self._error = f"{type(e).__name__}: {e}"
+                    self._cond.notify_all()
+                    if self._stop:
+                        break
+                    self._cond.wait(1.0)
+
+    # ======================
+    # Public API
+    # ======================
+
+    def stage(self) -> int:
+        """
+        暂存一次修改，返回其版本号（调用方持有写锁，修改已应用到各参与方与向量库）
+        """
+
+        with self._cond:
+            self._staged += 1
+            self._cond.notify_all()
+            return self._staged
+
+    def wait(self, generation: int):
+        """
+        等待版本提交（持久化）
+
+        提交失败时后台线程重试，重试成功即返回；停止时仍未提交（放弃重试）
+        抛出 RuntimeError。在业务写锁外调用，等待期间其他写入继续暂存并进入同一组
+        """
+
+        with self._cond:
+            while self.generation < generation:
+                if self._closed:
+                    if self._failed >= generation:
+                        raise RuntimeError(f"commit failed: {self._error}")
+                    raise RuntimeError("committer closed")
+                self._cond.wait()
+
+    def current_files(self) -> dict:
+        """
+        参与方名称 -> 与内存状态一致的文件（调用方持有写锁；有未写出的修改时先写出）
+        """
+
+        with self.lock:
+            self._capture()
+            with self._cond:
+                return dict(self._files)
+
+    def committed_files(self) -> dict:
+        """
+        参与方名称 -> 已提交文件
+        """
+
+        with self._cond:
+            return dict(self._committed)
+
+    def status(self) -> dict:
+        with self._cond:
+            return {
+                "generation": self.generation,
+                "staged": self._staged,
+                # 提交失败、正在重试的版本号（0 表示没有）
+                "failed": self._failed,
+                "last_error": self._error,
+                **self._metrics,
+            }
+
+    def close(self):
+        """
+        提交剩余的暂存版本后停止
+        """
+
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        self._thread.join()
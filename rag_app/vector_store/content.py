@@ -0,0 +1,249 @@
+import os
+import mmap
+import logging
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+from rag_app.vector_store.commit import fsync_path, fsync_dir
+
+
+logger = logging.getLogger("VDB")
+
+# 每隔多少个字符记录一次字节位置（切片最多多解码约 2 * 该数量的字符）
+_CHECKPOINT_CHARS = 64
+
+# 建立 checkpoints 时每次扫描的字节数（临时数组的大小与该值成正比，而非与文件大小）
+_SCAN_BYTES = 1 << 20
+
+# 同时保持映射的文件数（每个映射占用一个文件描述符）
+_MAX_OPEN = 256
+
+_SUFFIX = ".txt"
+
+
+class _MappedText:
+    """
+    一个文件原文的只读映射
+
+    checkpoints[i] 为第 i * _CHECKPOINT_CHARS 个字符的字节位置；纯 ASCII 时为 None（字符位置即字节位置）
+    """
+
+    def __init__(self, path: str):
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self.buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+        self.checkpoints = _char_checkpoints(self.buf)
+
+    def text(self, offset: int, length: int) -> str:
+        if self.checkpoints is None:
+            return str(memoryview(self.buf)[offset:offset + length], "utf-8")
+
+        first = offset // _CHECKPOINT_CHARS
+        last = -(-(offset + length) // _CHECKPOINT_CHARS)
+
+        b0 = int(self.checkpoints[first]) if first < len(self.checkpoints) else len(self.buf)
+        b1 = int(self.checkpoints[last]) if last < len(self.checkpoints) else len(self.buf)
+
+        skip = offset - first * _CHECKPOINT_CHARS
+        return str(memoryview(self.buf)[b0:b1], "utf-8")[skip:skip + length]
+
+
+def _char_checkpoints(buf) -> Optional[np.ndarray]:
+    """
+    分块扫描，返回每 _CHECKPOINT_CHARS 个字符的字节位置；纯 ASCII 时返回 None
+    """
+
+    data = np.frombuffer(buf, dtype="uint8")
+    parts = []
+    chars = 0
+    ascii_only = True
+
+    for pos in range(0, len(data), _SCAN_BYTES):
+        block = data[pos:pos + _SCAN_BYTES]
+        if ascii_only and (block >= 0x80).any():
+            ascii_only = False
+
+        # UTF-8 字符起始字节：非 10xxxxxx
+        starts = np.flatnonzero((block & 0xC0) != 0x80)
+        parts.append(starts[(-chars) % _CHECKPOINT_CHARS::_CHECKPOINT_CHARS] + pos)
+        chars += len(starts)
+
+    del data
+    if ascii_only:
+        return None
+
+    return np.concatenate(parts)
+
+
+class ContentStore:
+    """
+    文件原文存储
+
+    每个文件的原文以 UTF-8 保存一次（<目录>/<file_id>.txt），ChunkMeta / ArticleMeta
+    只记录 (file_id, offset, length)（字符位置），text 留空，读取时从只读 mmap 按需切出：
+    不再在映射表、元数据中重复保存 chunk（含重叠部分）与条文文本
+
+    与提交协议配合：
+    - put 在暂存版本之前写出（临时文件 + rename，不 fsync），sync 由组提交在替换清单前调用
+    - 删除在版本提交之后进行
+    - 崩溃残留的原文（未提交的新增 / 已提交但未删除）由启动对齐按元数据清理
+    """
+
+    def __init__(self, directory: str, max_open: int = _MAX_OPEN):
+        self.directory = directory
+        self.max_open = max_open
+
+        self._lock = threading.Lock()
+        self._open: "OrderedDict[str, _MappedText]" = OrderedDict()
+        # 已写出、尚未 fsync 的文件
+        self._pending: list[str] = []
+        # 原文总字节数（首次统计时扫描目录，之后随增删维护）
+        self._bytes: Optional[int] = None
+
+    # ======================
+    # Internal
+    # ======================
+
+    def _path(self, file_id: str) -> str:
+        if not file_id or os.sep in file_id or file_id.startswith("."):
+            raise ValueError(f"invalid file_id: {file_id}")
+        return os.path.join(self.directory, file_id + _SUFFIX)
+
+    def _mapped(self, file_id: str) -> _MappedText:
+        with self._lock:
+            mapped = self._open.get(file_id)
+            if mapped is not None:
+                self._open.move_to_end(file_id)
+                return mapped
+
+        try:
+            mapped = _MappedText(self._path(file_id))
+        except FileNotFoundError:
+            raise KeyError(file_id) from None
+
+        with self._lock:
+            self._open[file_id] = mapped
+            # 淘汰只丢弃引用，正在读取的线程仍持有映射，释放时自动解除
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)
+
+        return mapped
+
+    # ======================
+    # Public API
+    # ======================
+
+    def put(self, file_id: str, content: str):
+        """
+        写出文件原文（file_id 不复用，写出后不再修改）
+        """
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        path = self._path(file_id)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            self._pending.append(path)
+            if self._bytes is not None:
+                self._bytes += os.path.getsize(path)
+
+        logger.debug(f"op=content_put file_id={file_id} chars={len(content)}")
+
+    def text(self, file_id: str, offset: int, length: int) -> str:
+        """
+        读取原文片段（字符位置）；文件不存在时抛出 KeyError
+        """
+
+        return self._mapped(file_id).text(offset, length)
+
+    def materialize(self, meta):
+        """
+        ChunkMeta / ArticleMeta 的文本：内联文本（旧数据 / 远程写入）原样返回，
+        否则返回从原文切出 text 的副本（不修改 meta）
+        """
+
+        if meta is None or meta.text:
+            return meta
+
+        return meta.model_copy(update={"text": self.text(meta.file_id, meta.offset, meta.length)})
+
+    def exists(self, file_id: str) -> bool:
+        return os.path.exists(self._path(file_id))
+
+    def size(self, file_id: str) -> int:
+        path = self._path(file_id)
+        return os.path.getsize(path) if os.path.exists(path) else 0
+
+    def nbytes(self) -> int:
+        """
+        原文总字节数
+        """
+
+        with self._lock:
+            if self._bytes is not None:
+                return self._bytes
+
+        total = sum(self.size(file_id) for file_id in self.file_ids())
+        with self._lock:
+            if self._bytes is None:
+                self._bytes = total
+            return self._bytes
+
+    def file_ids(self) -> list[str]:
+        if not os.path.isdir(self.directory):
+            return []
+
+        return [
+            name[:-len(_SUFFIX)]
+            for name in os.listdir(self.directory)
+            if name.endswith(_SUFFIX)
+        ]
+
+    def path(self, file_id: str) -> Optional[str]:
+        path = self._path(file_id)
+        return path if os.path.exists(path) else None
+
+    def sync(self) -> int:
+        """
+        fsync 已写出的原文与目录（组提交调用），返回 fsync 的文件数
+        """
+
+        with self._lock:
+            pending, self._pending = self._pending, []
+
+        synced = 0
+        for path in pending:
+            if os.path.exists(path):
+                fsync_path(path)
+                synced += 1
+
+        if pending:
+            fsync_dir(self.directory)
+
+        return synced
+
+    def delete(self, file_id: str):
+        with self._lock:
+            self._open.pop(file_id, None)
+
+        path = self._path(file_id)
+        if os.path.exists(path):
+            size = os.path.getsize(path)
+            os.remove(path)
+            with self._lock:
+                if self._bytes is not None:
+                    self._bytes -= size
+
+        logger.debug(f"op=content_delete file_id={file_id}")
+
+    def close(self):
+        with self._lock:
+            self._open.clear()
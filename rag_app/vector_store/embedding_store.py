@@ -17,12 +17,19 @@ class ArticleEmbeddingStore:
     - 删除
 
     ⚠️ 当前为单机轻量方案，后期可替换为 DB / KV / Milvus
+
+    deferred 模式（提交协议）：启动时整体载入内存，修改只在内存中生效并标记 dirty，
+    由 commit.GroupCommitter 调用 save_as 写出版本文件，读取不再访问磁盘
     """
 
-    def __init__(self, path: str):
+    def __init__(self, path: str, deferred: bool = False):
         self.path = path
+        self.deferred = deferred
+        self.dirty = False
         self._lock = threading.Lock()
 
+        self._data = self._load_all() if deferred else None
+
     # ======================
     # Internal
     # ======================
@@ -54,6 +61,23 @@ class ArticleEmbeddingStore:
         # 原子替换，防止写一半崩溃
         os.replace(tmp_path, self.path)
 
+    def _read(self) -> dict:
+        """
+        当前全部 embedding（deferred 模式为内存中的字典，不复制）
+        """
+
+        if self.deferred:
+            return self._data
+
+        return self._load_all()
+
+    def _write(self, data: dict):
+        if self.deferred:
+            self.dirty = True
+            return
+
+        self._save_all(data)
+
     # ======================
     # Public API
     # ======================
@@ -63,7 +87,7 @@ class ArticleEmbeddingStore:
         获取单个 embedding
         """
 
-        data = self._load_all()
+        data = self._read()
 
         return data.get(article_id)
 
@@ -72,7 +96,7 @@ class ArticleEmbeddingStore:
         批量获取
         """
 
-        data = self._load_all()
+        data = self._read()
 
         result = {}
 
@@ -89,14 +113,14 @@ class ArticleEmbeddingStore:
 
         with self._lock:
 
-            data = self._load_all()
+            data = self._read()
 
             data[article_id] = np.asarray(
                 embedding,
                 dtype=np.float32
             )
 
-            self._save_all(data)
+            self._write(data)
 
         logger.debug(f"article_embedding_saved id={article_id}")
 
@@ -112,15 +136,41 @@ class ArticleEmbeddingStore:
 
         with self._lock:
 
-            data = self._load_all()
+            data = self._read()
 
             for aid, vec in items.items():
                 data[aid] = np.asarray(vec, dtype=np.float32)
 
-            self._save_all(data)
+            self._write(data)
 
         logger.debug(f"article_embedding_saved_batch size={len(items)}")
 
+    def save_matrix(self, article_ids: list[str], vectors: np.ndarray):
+        """
+        批量保存一块 (n, dim) 向量，第 i 行对应 article_ids[i]
+
+        deferred 模式下各条 embedding 为该缓冲区的行视图，不逐条复制
+        """
+
+        if len(article_ids) != len(vectors):
+            raise ValueError(f"ids {len(article_ids)} mismatch vectors {len(vectors)}")
+
+        if not len(article_ids):
+            return
+
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+
+        with self._lock:
+
+            data = self._read()
+
+            for aid, vec in zip(article_ids, vectors):
+                data[aid] = vec
+
+            self._write(data)
+
+        logger.debug(f"article_embedding_saved_batch size={len(article_ids)}")
+
     def delete(self, article_id: str):
         """
         删除单条
@@ -128,12 +178,12 @@ class ArticleEmbeddingStore:
 
         with self._lock:
 
-            data = self._load_all()
+            data = self._read()
 
             if article_id in data:
                 del data[article_id]
 
-                self._save_all(data)
+                self._write(data)
 
         logger.debug(f"article_embedding_deleted id={article_id}")
 
@@ -144,23 +194,33 @@ class ArticleEmbeddingStore:
 
         with self._lock:
 
-            data = self._load_all()
+            data = self._read()
 
             for aid in article_ids:
                 data.pop(aid, None)
 
-            self._save_all(data)
+            self._write(data)
 
         logger.debug(
             f"article_embedding_deleted_batch size={len(article_ids)}"
         )
 
+    def save_as(self, path: str):
+        """
+        写出当前内存状态到新的版本文件（提交协议调用，不 fsync）
+        """
+
+        with self._lock:
+            np.savez_compressed(path, **self._data)
+            self.path = path
+            self.dirty = False
+
     def exists(self, article_id: str) -> bool:
         """
         是否存在
         """
 
-        data = self._load_all()
+        data = self._read()
 
         return article_id in data
 
@@ -169,6 +229,6 @@ class ArticleEmbeddingStore:
         总数量
         """
 
-        data = self._load_all()
+        data = self._read()
 
         return len(data)
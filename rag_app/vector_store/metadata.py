@@ -11,8 +11,16 @@ from rag_app.core.interface import IMetadataRepository
 logger = logging.getLogger("VDB")
 
 class MetadataRepository(IMetadataRepository):
-    def __init__(self, path: str):
+    def __init__(self, path: str, deferred: bool = False):
+        """
+        Args:
+            path: 元数据文件路径
+            deferred: 修改只在内存中生效并标记 dirty，由提交协议（commit.GroupCommitter）
+                写出版本文件；否则每次修改原子覆盖 path
+        """
         self.path = path
+        self.deferred = deferred
+        self.dirty = False
         self._store = self._load_or_init()
 
     # =====================
@@ -25,16 +33,35 @@ class MetadataRepository(IMetadataRepository):
                 return MetadataSchema.model_validate_json(f.read())
 
         data = MetadataSchema()
-        self._save(data)
+        if not self.deferred:
+            self._save(data)
 
         return data
 
     def _save(self, data: Optional[MetadataSchema] = None):
+        if self.deferred:
+            self.dirty = True
+            return
+
         if not data:
             data = self._store
 
-        with open(self.path, "w", encoding="utf-8") as f:
+        # 先写临时文件再原子替换，避免崩溃导致文件截断
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
             f.write(data.model_dump_json(indent=2))
+        os.replace(tmp_path, self.path)
+
+    def save_as(self, path: str):
+        """
+        写出当前内存状态到新的版本文件（提交协议调用，不 fsync）
+        """
+
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self._store.model_dump_json(indent=2))
+
+        self.path = path
+        self.dirty = False
 
     # =====================
     # CRUD
@@ -56,6 +83,19 @@ class MetadataRepository(IMetadataRepository):
 
         logger.info("op=meta_add_article_done")
 
+    def add_articles(self, metas: list[ArticleMeta]):
+        """
+        批量添加文章元数据（只写盘一次）
+        """
+
+        logger.info(f"op=meta_add_articles_start count={len(metas)}")
+
+        for meta in metas:
+            self._store.articles[meta.article_id] = meta
+        self._save()
+
+        logger.info("op=meta_add_articles_done")
+
     def get_file(self, file_id: str) -> Optional[FileMeta]:
         logger.info(f"op=meta_get_file file_id={file_id}")
         return self._store.files.get(file_id)
@@ -82,31 +122,42 @@ class MetadataRepository(IMetadataRepository):
 
         logger.info("op=meta_remove_article_done")
 
+    def remove_articles(self, article_ids: list[str]):
+        """
+        批量删除文章元数据（只写盘一次）
+        """
+
+        logger.info(f"op=meta_remove_articles_start count={len(article_ids)}")
+
+        removed = 0
+        for article_id in article_ids:
+            if self._store.articles.pop(article_id, None) is not None:
+                removed += 1
+        if removed:
+            self._save()
+
+        logger.info(f"op=meta_remove_articles_done removed={removed}")
+
     def file_exists(self, file_id: str) -> bool:
         return file_id in self._store.files
 
     def article_exists(self, article_id: str) -> bool:
         return article_id in self._store.articles
 
-    def list_all_files(self) -> Dict[str, FileMeta]:
-        logger.info("op=meta_list_files_start")
-        result = {}
+    def count_files(self) -> int:
+        return len(self._store.files)
 
-        for name, data in self._store.files.items():
-            result[name] = FileMeta.model_validate(data)
+    def count_articles(self) -> int:
+        return len(self._store.articles)
 
-        logger.info("op=meta_list_files_done")
-        return result
+    def list_all_files(self) -> Dict[str, FileMeta]:
+        # 加载时已校验为 FileMeta，直接返回浅拷贝
+        logger.info("op=meta_list_files")
+        return dict(self._store.files)
 
     def list_all_articles(self) -> Dict[str, ArticleMeta]:
-        logger.info("op=meta_list_articles_start")
-        result = {}
-
-        for name, data in self._store.articles.items():
-            result[name] = ArticleMeta.model_validate(data)
-
-        logger.info("op=meta_list_articles_done")
-        return result
+        logger.info("op=meta_list_articles")
+        return dict(self._store.articles)
 
     def list_articles_by_file(self, file_id: str) -> list[ArticleMeta]:
         logger.info("op=meta_list_articles_start")
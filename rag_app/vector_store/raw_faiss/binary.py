@@ -0,0 +1,82 @@
+import faiss
+import numpy as np
+
+
+# 二值索引类型
+BINARY_FLAT = "flat"
+BINARY_HNSW = "hnsw"
+
+
+def binary_codes(vectors: np.ndarray) -> np.ndarray:
+    """
+    向量符号位编码：每维 1 bit（> 0 为 1），(n, dim) -> (n, dim / 8) uint8
+    """
+
+    return np.packbits(vectors > 0, axis=1)
+
+
+def build_binary_index(config):
+    """
+    构建空的二值索引（按 chunk_id 存储）
+
+    flat: 精确 Hamming 扫描；hnsw: 近似，适合更大规模
+    """
+
+    if config.binary_index_type == BINARY_HNSW:
+        sub = faiss.IndexBinaryHNSW(config.dimension, config.hnsw_m)
+        sub.hnsw.efConstruction = config.hnsw_ef_construction
+        sub.hnsw.efSearch = config.hnsw_ef_search
+    else:
+        sub = faiss.IndexBinaryFlat(config.dimension)
+
+    index = faiss.IndexBinaryIDMap(sub)
+    # IDMap 不持有子索引的所有权，保持引用
+    index.referenced_objects = [sub]
+
+    return index
+
+
+def clone_binary_index(index):
+    """
+    深拷贝（faiss 不支持直接 clone IDMap 二值索引，经序列化复制）
+    """
+
+    return faiss.deserialize_index_binary(faiss.serialize_index_binary(index))
+
+
+def remove_binary_ids(config, index, ids: np.ndarray):
+    """
+    移除指定 id，返回修改后的索引（HNSW 不支持删除，重建）
+    """
+
+    if not len(ids):
+        return index
+
+    try:
+        index.remove_ids(faiss.IDSelectorBatch(np.asarray(ids, dtype="int64")))
+        return index
+    except RuntimeError:
+        pass
+
+    all_ids = faiss.vector_to_array(index.id_map)
+    codes = index.index.reconstruct_n(0, index.ntotal)
+    keep = ~np.isin(all_ids, ids)
+
+    rebuilt = build_binary_index(config)
+    rebuilt.add_with_ids(codes[keep], all_ids[keep])
+
+    return rebuilt
+
+
+def memory_bytes(index) -> int:
+    """
+    二值索引内存估算：编码 + id 映射（HNSW 另加邻居表）
+    """
+
+    total = index.ntotal * (index.code_size + 8)
+
+    sub = faiss.downcast_IndexBinary(index.index)
+    if isinstance(sub, faiss.IndexBinaryHNSW):
+        total += index.ntotal * sub.hnsw.nb_neighbors(0) * 4
+
+    return total
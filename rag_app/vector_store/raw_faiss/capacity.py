@@ -0,0 +1,343 @@
+import os
+import math
+import time
+import logging
+import tempfile
+from datetime import datetime
+
+import faiss
+import numpy as np
+
+from shared.config import VectorStoreConfig
+from rag_app.vector_store.types import ChunkMeta
+from rag_app.vector_store.raw_faiss import index_factory, binary as binary_index
+from rag_app.vector_store.raw_faiss.docmap import ColumnarDocMap
+
+
+logger = logging.getLogger("VDB")
+
+# 合成数据：每个聚簇的向量数、聚簇内噪声（与 bench_binary 相同）
+_CLUSTER_SIZE = 1000
+_NOISE = 0.5
+
+# 语料为空时合成映射表的每文件 chunk 数与每个 chunk 的条文数
+_CHUNKS_PER_FILE = 80
+_ARTICLES_PER_CHUNK = 2
+
+
+# ======================
+# 合成数据
+# ======================
+
+def synthetic_vectors(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    """
+    聚簇的归一化合成向量（IVF / HNSW 在均匀随机数据上的表现不代表真实语料）
+    """
+
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((max(n // _CLUSTER_SIZE, 1), dim)).astype("float32")
+    vectors = centers[rng.integers(0, len(centers), n)]
+    vectors += _NOISE * rng.standard_normal(vectors.shape, dtype="float32")
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    return vectors
+
+
+def _synthetic_doc_map(n: int) -> ColumnarDocMap:
+    doc_map = ColumnarDocMap()
+    metas = [
+        ChunkMeta(
+            chunk_id=i,
+            file_id=f"file-{i // _CHUNKS_PER_FILE:06d}",
+            article_ids=[f"article-{i * _ARTICLES_PER_CHUNK + j:08d}" for j in range(_ARTICLES_PER_CHUNK)],
+            offset=(i % _CHUNKS_PER_FILE) * 450,
+            length=500,
+            created_at=datetime.now(),
+        )
+        for i in range(n)
+    ]
+    doc_map.add(np.arange(n, dtype="int64"), metas)
+
+    return doc_map
+
+
+# ======================
+# 测量
+# ======================
+
+def _index_bytes(index) -> int:
+    """
+    索引实际占用字节数（序列化大小：向量编码 + id 映射 + 图结构 + 聚类中心 / 码本）
+
+    内存加载时常驻内存与之相当，也是索引文件的大小
+    """
+
+    return int(faiss.serialize_index(index).nbytes)
+
+
+def _search_ms(index, queries: np.ndarray, top_k: int) -> float:
+    """
+    逐条检索的平均延迟（毫秒），与服务中单个请求的检索方式相同
+    """
+
+    k = min(top_k, max(index.ntotal, 1))
+    index.search(queries[:1], k)
+
+    start = time.perf_counter()
+    for i in range(len(queries)):
+        index.search(queries[i:i + 1], k)
+
+    return (time.perf_counter() - start) * 1000 / len(queries)
+
+
+def _transitional(config: VectorStoreConfig, ntotal: int) -> bool:
+    """
+    与 FaissVectorStore 相同：需要训练的类型在数据量达到 train_threshold 前为 Flat 过渡索引
+    """
+
+    return index_factory.requires_training(config) and ntotal < config.train_threshold
+
+
+def _build(config: VectorStoreConfig, ntotal: int, train_vectors: np.ndarray):
+    if _transitional(config, ntotal):
+        return index_factory.build_initial_index(config)
+
+    index = index_factory.build_index(config, ntotal)
+    index_factory.train_index(index, train_vectors, config.max_train_points)
+
+    return index
+
+
+def measure_index(
+    config: VectorStoreConfig,
+    ntotal: int,
+    sample: int,
+    queries: int = 100,
+    top_k: int = 10,
+) -> dict:
+    """
+    用真实索引在合成数据上测量，并外推到 ntotal 个向量
+
+    在 sample / 4 与 sample 两个数据量上测量索引字节数与检索延迟：
+    字节数按每向量增量线性外推；延迟 Flat / IVF 按线性（扫描量与数据量成正比）、
+    HNSW 按对数（图搜索跳数）外推。ntotal 不超过 sample 时直接测量 ntotal。
+    样本编码小于 CPU 末级缓存时 Flat 的延迟外推偏低，可增大 sample
+
+    Args:
+        config: 向量存储配置（index_type 等决定构建的索引）
+        ntotal: 外推的目标向量数（单个索引 / 分片）
+        sample: 最大实测向量数
+        queries: 测量延迟的查询数
+        top_k: 检索数量
+    """
+
+    n2 = max(1, min(sample, ntotal))
+    n1 = max(1, n2 // 4)
+
+    # IVF 训练需要每个聚类足够的样本（与真实迁移时的采样上限一致）
+    transitional = _transitional(config, ntotal)
+    n_train = n2
+    if index_factory.requires_training(config) and not transitional:
+        nlist = index_factory.effective_nlist(config, ntotal)
+        n_train = min(config.max_train_points, max(n2, nlist * 39))
+
+    vectors = synthetic_vectors(max(n2, n_train), config.dimension)
+    rng = np.random.default_rng(1)
+    probes = vectors[rng.choice(n2, min(queries, n2), replace=False)]
+    probes = probes + 0.05 * rng.standard_normal(probes.shape, dtype="float32")
+    probes /= np.linalg.norm(probes, axis=1, keepdims=True)
+
+    start = time.time()
+    index = _build(config, ntotal, vectors[:n_train])
+    train_s = time.time() - start
+
+    points = []
+    added = 0
+    for n in sorted({n1, n2}):
+        index.add_with_ids(vectors[added:n], np.arange(added, n, dtype="int64"))
+        added = n
+        points.append((n, _index_bytes(index), _search_ms(index, probes, top_k)))
+
+    kind = index_factory.index_kind(index)
+    (na, ba, la), (nb, bb, lb) = points[0], points[-1]
+
+    if nb == ntotal or nb == na:
+        index_bytes, search_ms = bb, lb
+    else:
+        per_vector = (bb - ba) / (nb - na)
+        index_bytes = bb + per_vector * (ntotal - nb)
+        if kind == index_factory.INDEX_HNSW:
+            slope = (lb - la) / (np.log(nb) - np.log(na))
+            search_ms = lb + slope * (np.log(ntotal) - np.log(nb))
+        else:
+            search_ms = lb + (lb - la) / (nb - na) * (ntotal - nb)
+        # 测量噪声可能使斜率为负，外推值不低于实测值
+        search_ms = max(search_ms, lb)
+
+    return {
+        "index_type": kind,
+        "codec": index_factory.index_codec(index),
+        "transform": index_factory.index_transform(index),
+        "descriptor": "IDMap2,Flat" if transitional else index_factory.index_descriptor(config, ntotal),
+        "transitional": transitional,
+        "index_bytes": int(index_bytes),
+        "search_ms": round(float(search_ms), 3),
+        "measured": [{"vectors": n, "index_bytes": b, "search_ms": round(l, 3)} for n, b, l in points],
+        "train_s": round(train_s, 2),
+    }
+
+
+def measure_binary(config: VectorStoreConfig, ntotal: int, sample: int) -> int:
+    """
+    二值预筛选索引字节数：实测 sample 个向量后按每向量字节数外推
+    """
+
+    n = max(1, min(sample, ntotal))
+    index = binary_index.build_binary_index(config)
+    index.add_with_ids(binary_index.binary_codes(synthetic_vectors(n, config.dimension)), np.arange(n, dtype="int64"))
+
+    return int(binary_index.memory_bytes(index) / n * ntotal)
+
+
+def doc_map_bytes_per_chunk(sample: int = 10000) -> dict:
+    """
+    合成映射表的每 chunk 字节数（语料为空时使用）
+    """
+
+    doc_map = _synthetic_doc_map(sample)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "doc_map.bin")
+        doc_map.save(path)
+        disk = os.path.getsize(path)
+
+    return {"memory": doc_map.nbytes() / sample, "disk": disk / sample}
+
+
+# ======================
+# 容量规划
+# ======================
+
+def _project_components(config: VectorStoreConfig, usage: dict, target: int, sample: int) -> dict:
+    """
+    与索引类型无关的部分：按当前语料每 chunk 的实际字节数外推到 target 个 chunk，
+    语料为空时映射表用合成数据实测，元数据 / 文章向量 / 原文无法外推（None）
+    """
+
+    chunks = usage["chunks"]
+    current = usage["components"]
+
+    def scale(name):
+        if not chunks:
+            return {"memory": None, "disk": None}
+        return {
+            key: None if value is None else int(value * target / chunks)
+            for key, value in current[name].items()
+        }
+
+    if chunks:
+        doc_map = scale("doc_map")
+    else:
+        per_chunk = doc_map_bytes_per_chunk(min(sample, 10000))
+        doc_map = {key: int(value * target) for key, value in per_chunk.items()}
+
+    components = {
+        "doc_map": doc_map,
+        "metadata": scale("metadata"),
+        "article_embeddings": scale("article_embeddings"),
+        "content": scale("content"),
+        # 日志在 checkpoint 后截断，上限约为 checkpoint 阈值
+        "wal": {"memory": 0, "disk": config.wal_checkpoint_bytes},
+    }
+
+    # 原始向量文件每个 chunk_id 一行（精排 / 二值预筛选使用）
+    raw = config.refine or config.binary_prefilter
+    components["raw_vectors"] = {"memory": 0, "disk": target * config.dimension * 4 if raw else 0}
+
+    binary = measure_binary(config, target, sample) if config.binary_prefilter else 0
+    components["binary_index"] = {"memory": binary, "disk": 0}
+
+    return components
+
+
+def project(
+    config: VectorStoreConfig,
+    usage: dict,
+    additional: int,
+    sample: int = 20000,
+    queries: int = 100,
+    top_k: int = 10,
+    index_types=index_factory.INDEX_TYPES,
+) -> dict:
+    """
+    预测再写入 additional 个 chunk 后各索引类型的内存、磁盘与检索延迟
+
+    索引部分用真实索引类在合成数据上实测后外推（measure_index）；分片时每个分片
+    索引 target / shards 个向量，内存为各分片之和，延迟为单分片延迟乘以
+    ceil(分片数 / 并行检索线程数)。延迟只含索引检索（不含精排读取原始向量、
+    二值预筛选与嵌入模型），mmap 加载时索引内存为页缓存而非常驻内存
+
+    Args:
+        config: 向量存储配置（除 index_type 外的参数按配置构建）
+        usage: 当前实际占用（VectorStoreService.usage()）
+        additional: 再写入的 chunk 数
+        sample: 每种索引最大实测向量数
+        queries: 测量延迟的查询数
+        top_k: 检索数量
+        index_types: 参与比较的索引类型
+    """
+
+    target = usage["chunks"] + additional
+    shards = max(1, config.shards)
+    per_shard = max(1, math.ceil(target / shards))
+    workers = config.shard_search_workers or shards
+    rounds = math.ceil(shards / workers)
+
+    components = _project_components(config, usage, target, sample)
+    memory = sum(c["memory"] or 0 for c in components.values())
+    disk = sum(c["disk"] or 0 for c in components.values())
+
+    results = []
+    for index_type in index_types:
+        candidate = config.model_copy(update={"index_type": index_type})
+        start = time.time()
+        try:
+            measured = measure_index(candidate, per_shard, sample, queries, top_k)
+        except RuntimeError as e:
+            # 参数与维度不兼容（如 pq_m 不能整除维度）
+            logger.warning(f"op=capacity_measure_failed index_type={index_type} error={e}")
+            results.append({"index_type": index_type, "error": str(e).splitlines()[0].split("Error: ")[-1]})
+            continue
+
+        index_bytes = measured["index_bytes"] * shards
+        results.append({
+            "index_type": index_type,
+            "configured": index_type == config.index_type,
+            "transitional": measured["transitional"],
+            "descriptor": measured["descriptor"],
+            "index_bytes": index_bytes,
+            "memory_bytes": index_bytes + memory,
+            "disk_bytes": index_bytes + disk,
+            "search_ms": round(measured["search_ms"] * rounds, 3),
+            "measured": measured["measured"],
+        })
+
+        logger.info(
+            "op=capacity_measure "
+            f"index_type={index_type} "
+            f"descriptor={measured['descriptor']} "
+            f"vectors={per_shard} "
+            f"index_bytes={index_bytes} "
+            f"search_ms={measured['search_ms']} "
+            f"time={time.time() - start:.2f}s"
+        )
+
+    return {
+        "chunks": usage["chunks"],
+        "additional": additional,
+        "target_chunks": target,
+        "shards": shards,
+        "dimension": config.dimension,
+        "components": components,
+        "index_types": results,
+    }
@@ -0,0 +1,136 @@
+import time
+import logging
+import threading
+
+
+logger = logging.getLogger("VDB")
+
+# 无删除通知时的检查间隔（秒）
+_POLL_SECONDS = 5.0
+
+
+class Compactor:
+    """
+    后台压缩线程
+
+    职责：
+    - 墓碑比例达到 dirty_ratio，或存在墓碑且空闲 idle_seconds 后，
+      调用 store.compact 物理移除墓碑向量
+    - 记录进度与回收量，供 info / 统计接口查询
+    """
+
+    def __init__(self, store, dirty_ratio: float, idle_seconds: int):
+        self.store = store
+        self.dirty_ratio = dirty_ratio
+        self.idle_seconds = idle_seconds
+
+        self.status = {
+            "state": "idle",
+            "phase": None,
+            "done": 0,
+            "total": 0,
+            "runs": 0,
+            "reclaimed_vectors": 0,
+            "reclaimed_bytes": 0,
+            "last_run": None,
+        }
+
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="faiss-compactor",
+            daemon=True,
+        )
+
+    # ======================
+    # Internal
+    # ======================
+
+    def _due(self):
+        """
+        返回触发原因，无需压缩时返回 None
+        """
+
+        snap = self.store._snapshot
+        tombstones = len(snap.doc_map.tombstones)
+        if not tombstones:
+            return None
+
+        if tombstones >= self.dirty_ratio * max(self.store.ntotal, 1):
+            return "dirty_ratio"
+
+        idle = time.time() - self.store.last_write
+        if self.idle_seconds and idle >= self.idle_seconds:
+            return "idle"
+
+        return None
+
+    def _progress(self, phase: str, done: int, total: int):
+        self.status.update(phase=phase, done=done, total=total)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.wait(_POLL_SECONDS)
+            self._wake.clear()
+
+            if self._stop.is_set():
+                break
+
+            reason = self._due()
+            if reason is None:
+                continue
+
+            self.run_once(reason)
+
+    # ======================
+    # Public API
+    # ======================
+
+    def run_once(self, reason: str = "manual") -> dict:
+        """
+        执行一次压缩（后台线程或手动调用）
+        """
+
+        logger.info(f"op=vdb_compact_start reason={reason}")
+        self.status.update(state="running", phase=None, done=0, total=0)
+
+        try:
+            result = self.store.compact(progress=self._progress)
+        except Exception:
+            logger.exception("op=vdb_compact_failed")
+            self.status.update(state="failed")
+            return {}
+
+        result["reason"] = reason
+        result["finished_at"] = time.time()
+
+        self.status["runs"] += 1
+        self.status["reclaimed_vectors"] += result["reclaimed_vectors"]
+        self.status["reclaimed_bytes"] += result["reclaimed_bytes"]
+        self.status.update(state="idle", phase=None, done=0, total=0, last_run=result)
+
+        logger.info(
+            "op=vdb_compact_done "
+            f"reclaimed_vectors={result['reclaimed_vectors']} "
+            f"reclaimed_bytes={result['reclaimed_bytes']} "
+            f"time={result['duration']:.2f}s"
+        )
+
+        return result
+
+    def start(self):
+        self._thread.start()
+
+    def notify(self):
+        """
+        删除后唤醒，立即检查是否需要压缩
+        """
+
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        if self._thread.is_alive():
+            self._thread.join()
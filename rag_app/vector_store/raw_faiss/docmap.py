@@ -0,0 +1,709 @@
+import os
+import json
+import mmap
+import logging
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterator, Optional
+
+import numpy as np
+
+from rag_app.vector_store.types import ChunkMeta, DocMap, SearchFilter
+
+
+logger = logging.getLogger("VDB")
+
+# 文件格式：magic + header 长度 + JSON header + 64 字节对齐的数组区
+_MAGIC = b"RDOCMAP1"
+_ALIGN = 64
+
+_EPOCH = datetime(1970, 1, 1)
+_NO_TIME = -1
+
+
+def _to_micros(dt: Optional[datetime]) -> int:
+    if dt is None:
+        return _NO_TIME
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return (dt - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(value: int) -> Optional[datetime]:
+    if value == _NO_TIME:
+        return None
+    return _EPOCH + timedelta(microseconds=int(value))
+
+
+def _csr_take(indptr: np.ndarray, data: np.ndarray, rows: np.ndarray):
+    """
+    取 CSR 中的若干行，返回新的 (indptr, data)
+    """
+
+    lengths = np.diff(indptr)[rows]
+    new_indptr = np.zeros(len(rows) + 1, dtype="int64")
+    np.cumsum(lengths, out=new_indptr[1:])
+
+    if not len(rows) or not new_indptr[-1]:
+        return new_indptr, data[:0]
+
+    # 每个元素在原 data 中的位置 = 所在行起点 + 行内偏移
+    starts = np.repeat(indptr[:-1][rows], lengths)
+    inner = np.arange(new_indptr[-1]) - np.repeat(new_indptr[:-1], lengths)
+
+    return new_indptr, data[starts + inner]
+
+
+class _Segment:
+    """
+    一段连续 chunk_id 范围的列式数据
+
+    数组创建后不再原地修改（删除只替换 alive），便于共享与 mmap
+    """
+
+    COLUMNS = (
+        "ids", "file_idx", "offsets", "lengths", "created_at",
+        "art_indptr", "art_idx", "art_table",
+        "text_indptr", "text_blob",
+    )
+
+    def __init__(self, **columns):
+        for name in self.COLUMNS:
+            setattr(self, name, columns[name])
+
+        alive = columns.get("alive")
+        self.alive = alive if alive is not None else np.ones(len(self.ids), dtype=bool)
+        self.live = int(self.alive.sum())
+
+    @classmethod
+    def build(
+        cls,
+        ids: np.ndarray,
+        metas: list[ChunkMeta],
+        file_index: Callable[[str], int],
+    ) -> "_Segment":
+        n = len(metas)
+
+        file_idx = np.empty(n, dtype="int32")
+        offsets = np.empty(n, dtype="int64")
+        lengths = np.empty(n, dtype="int64")
+        created_at = np.empty(n, dtype="int64")
+
+        art_indptr = np.zeros(n + 1, dtype="int64")
+        art_local = {}
+        art_idx = []
+
+        text_parts = []
+        text_indptr = np.zeros(n + 1, dtype="int64")
+
+        for i, meta in enumerate(metas):
+            file_idx[i] = file_index(meta.file_id)
+            offsets[i] = meta.offset
+            lengths[i] = meta.length
+            created_at[i] = _to_micros(meta.created_at)
+
+            for aid in meta.article_ids:
+                art_idx.append(art_local.setdefault(aid, len(art_local)))
+            art_indptr[i + 1] = len(art_idx)
+
+            raw = (meta.text or "").encode("utf-8")
+            text_parts.append(raw)
+            text_indptr[i + 1] = text_indptr[i] + len(raw)
+
+        width = max((len(a) for a in art_local), default=1)
+
+        return cls(
+            ids=np.asarray(ids, dtype="int64"),
+            file_idx=file_idx,
+            offsets=offsets,
+            lengths=lengths,
+            created_at=created_at,
+            art_indptr=art_indptr,
+            art_idx=np.asarray(art_idx, dtype="int32"),
+            art_table=np.array([a.encode("utf-8") for a in art_local], dtype=f"S{width}"),
+            text_indptr=text_indptr,
+            text_blob=np.frombuffer(b"".join(text_parts), dtype="uint8"),
+        )
+
+    def find(self, chunk_ids: np.ndarray):
+        """
+        返回 (位置, 是否命中且存活)
+        """
+
+        pos = np.searchsorted(self.ids, chunk_ids)
+        pos = np.minimum(pos, max(len(self.ids) - 1, 0))
+
+        if not len(self.ids):
+            return pos, np.zeros(len(chunk_ids), dtype=bool)
+
+        hit = (self.ids[pos] == chunk_ids) & self.alive[pos]
+        return pos, hit
+
+    def meta(self, pos: int, file_table: list[str]) -> ChunkMeta:
+        a0, a1 = self.art_indptr[pos], self.art_indptr[pos + 1]
+        t0, t1 = self.text_indptr[pos], self.text_indptr[pos + 1]
+
+        # 只读视图：跳过 pydantic 校验
+        return ChunkMeta.model_construct(
+            chunk_id=int(self.ids[pos]),
+            file_id=file_table[self.file_idx[pos]],
+            article_ids=[
+                a.decode("utf-8") for a in self.art_table[self.art_idx[a0:a1]]
+            ],
+            offset=int(self.offsets[pos]),
+            length=int(self.lengths[pos]),
+            created_at=_from_micros(self.created_at[pos]),
+            text=self.text_blob[t0:t1].tobytes().decode("utf-8"),
+        )
+
+    def without(self, pos: np.ndarray) -> "_Segment":
+        """
+        复制 alive 并标记删除（其余列共享）
+        """
+
+        seg = _Segment.__new__(_Segment)
+        for name in self.COLUMNS:
+            setattr(seg, name, getattr(self, name))
+
+        seg.alive = self.alive.copy()
+        seg.alive[pos] = False
+        seg.live = int(seg.alive.sum())
+
+        return seg
+
+    def compact(self) -> "_Segment":
+        """
+        丢弃已删除行
+        """
+
+        rows = np.flatnonzero(self.alive)
+        if len(rows) == len(self.ids):
+            return self
+
+        art_indptr, art_idx = _csr_take(self.art_indptr, self.art_idx, rows)
+        text_indptr, text_blob = _csr_take(self.text_indptr, self.text_blob, rows)
+
+        return _Segment(
+            ids=self.ids[rows],
+            file_idx=self.file_idx[rows],
+            offsets=self.offsets[rows],
+            lengths=self.lengths[rows],
+            created_at=self.created_at[rows],
+            art_indptr=art_indptr,
+            art_idx=art_idx,
+            art_table=self.art_table,
+            text_indptr=text_indptr,
+            text_blob=text_blob,
+        )
+
+
+def _merge(segments: list[_Segment]) -> _Segment:
+    """
+    合并多个已压缩的段
+    """
+
+    if len(segments) == 1:
+        return segments[0]
+
+    width = max(s.art_table.dtype.itemsize for s in segments)
+
+    art_tables, art_idx, art_ptrs, text_ptrs = [], [], [], []
+    art_base, art_off, text_off = 0, 0, 0
+
+    for seg in segments:
+        art_tables.append(seg.art_table.astype(f"S{width}"))
+        art_idx.append(seg.art_idx + art_base)
+        art_ptrs.append(seg.art_indptr[:-1] + art_off)
+        text_ptrs.append(seg.text_indptr[:-1] + text_off)
+
+        art_base += len(seg.art_table)
+        art_off += int(seg.art_indptr[-1])
+        text_off += int(seg.text_indptr[-1])
+
+    return _Segment(
+        ids=np.concatenate([s.ids for s in segments]),
+        file_idx=np.concatenate([s.file_idx for s in segments]),
+        offsets=np.concatenate([s.offsets for s in segments]),
+        lengths=np.concatenate([s.lengths for s in segments]),
+        created_at=np.concatenate([s.created_at for s in segments]),
+        art_indptr=np.concatenate(art_ptrs + [np.array([art_off], dtype="int64")]),
+        art_idx=np.concatenate(art_idx).astype("int32"),
+        art_table=np.concatenate(art_tables),
+        text_indptr=np.concatenate(text_ptrs + [np.array([text_off], dtype="int64")]),
+        text_blob=np.concatenate([s.text_blob for s in segments]),
+    )
+
+
+class ColumnarDocMap:
+    """
+    列式 Chunk 映射表
+
+    - 定长字段存为 numpy 数组（file 序号 / offset / length / created_at）
+    - article_ids 为 CSR（indptr + 段内 article 表序号）
+    - text 为 UTF-8 拼接 blob + indptr
+    - 二进制落盘，加载时 mmap，不逐条反序列化
+
+    chunk_id 单调递增，按段保存连续 id 范围；新增追加新段，删除只标记 alive，
+    save 时压缩合并为一段。对外通过 get 返回 ChunkMeta 视图
+
+    tombstones 记录已从映射表删除、但向量仍在索引中的 chunk_id（等待后台压缩物理移除）
+    """
+
+    def __init__(self):
+        self.next_id = 0
+        self.checkpoint_lsn = 0
+
+        self.file_table: list[str] = []
+        self._file_pos: dict[str, int] = {}
+
+        self._segments: list[_Segment] = []
+        self._starts: list[int] = []
+
+        # 有序 int64 数组，只整体替换不原地修改
+        self.tombstones = np.empty(0, dtype="int64")
+
+        # 增量统计（加载时由列数据计算，之后随 add / remove 更新，不落盘）
+        # 按 file 序号的存活 chunk 数与文本字节数，只整体替换不原地修改
+        self.file_chunks = np.zeros(0, dtype="int64")
+        self.file_bytes = np.zeros(0, dtype="int64")
+        self.live_chunks = 0
+        self.live_files = 0
+        self.text_bytes = 0
+
+    # ======================
+    # Internal
+    # ======================
+
+    def _file_index(self, file_id: str) -> int:
+        idx = self._file_pos.get(file_id)
+        if idx is None:
+            idx = len(self.file_table)
+            self.file_table.append(file_id)
+            self._file_pos[file_id] = idx
+        return idx
+
+    def _append_segment(self, seg: _Segment):
+        if not len(seg.ids):
+            return
+        self._segments.append(seg)
+        self._starts.append(int(seg.ids[0]))
+
+    def _count(self, seg: _Segment, rows: np.ndarray, sign: int):
+        """
+        按段内行号更新统计（sign 为 1 / -1）
+        """
+
+        if not len(rows):
+            return
+
+        size = len(self.file_table)
+        file_idx = seg.file_idx[rows]
+        nbytes = (seg.text_indptr[rows + 1] - seg.text_indptr[rows])
+
+        chunks = np.bincount(file_idx, minlength=size)
+        text = np.bincount(file_idx, weights=nbytes, minlength=size).astype("int64")
+
+        file_chunks = np.zeros(size, dtype="int64")
+        file_chunks[:len(self.file_chunks)] = self.file_chunks
+        file_bytes = np.zeros(size, dtype="int64")
+        file_bytes[:len(self.file_bytes)] = self.file_bytes
+
+        self.file_chunks = file_chunks + sign * chunks
+        self.file_bytes = file_bytes + sign * text
+
+        self.live_chunks += sign * len(rows)
+        self.text_bytes += sign * int(nbytes.sum())
+        self.live_files = int(np.count_nonzero(self.file_chunks))
+
+    def _segment_of(self, chunk_id: int) -> Optional[_Segment]:
+        i = bisect_right(self._starts, chunk_id) - 1
+        if i < 0:
+            return None
+        return self._segments[i]
+
+    # ======================
+    # Public API
+    # ======================
+
+    def __len__(self) -> int:
+        return self.live_chunks
+
+    def copy(self) -> "ColumnarDocMap":
+        """
+        写时复制的浅拷贝
+
+        段在创建后不再原地修改（删除 / 压缩都生成新段），只需复制段列表与文件表
+        """
+
+        doc_map = ColumnarDocMap()
+        doc_map.next_id = self.next_id
+        doc_map.checkpoint_lsn = self.checkpoint_lsn
+
+        doc_map.file_table = list(self.file_table)
+        doc_map._file_pos = dict(self._file_pos)
+
+        doc_map._segments = list(self._segments)
+        doc_map._starts = list(self._starts)
+
+        doc_map.tombstones = self.tombstones
+
+        doc_map.file_chunks = self.file_chunks
+        doc_map.file_bytes = self.file_bytes
+        doc_map.live_chunks = self.live_chunks
+        doc_map.live_files = self.live_files
+        doc_map.text_bytes = self.text_bytes
+
+        return doc_map
+
+    def __contains__(self, chunk_id: int) -> bool:
+        return self.get(chunk_id) is not None
+
+    def add(self, ids: np.ndarray, metas: list[ChunkMeta]):
+        """
+        追加一批 chunk（ids 必须大于已有 id）
+        """
+
+        if not len(metas):
+            return
+
+        seg = _Segment.build(ids, metas, self._file_index)
+        self._append_segment(seg)
+        self._count(seg, np.arange(len(seg.ids)), 1)
+
+        self.next_id = max(self.next_id, int(seg.ids[-1]) + 1)
+
+    def remove(self, ids: np.ndarray):
+        """
+        删除指定 chunk_id（逻辑标记，save 时物理压缩）
+        """
+
+        ids = np.asarray(ids, dtype="int64")
+
+        for i, seg in enumerate(self._segments):
+            pos, hit = seg.find(ids)
+            if hit.any():
+                self._count(seg, pos[hit], -1)
+                self._segments[i] = seg.without(pos[hit])
+
+    def add_tombstones(self, ids: np.ndarray):
+        """
+        记录仍在索引中的已删除 chunk_id
+        """
+
+        self.tombstones = np.union1d(self.tombstones, np.asarray(ids, dtype="int64"))
+
+    def drop_tombstones(self, ids: np.ndarray):
+        """
+        索引物理移除后清除墓碑
+        """
+
+        self.tombstones = np.setdiff1d(
+            self.tombstones, np.asarray(ids, dtype="int64"), assume_unique=True
+        )
+
+    def get(self, chunk_id: int) -> Optional[ChunkMeta]:
+        seg = self._segment_of(int(chunk_id))
+        if seg is None:
+            return None
+
+        pos, hit = seg.find(np.asarray([chunk_id], dtype="int64"))
+        if not hit[0]:
+            return None
+
+        return seg.meta(int(pos[0]), self.file_table)
+
+    def lookup_file_ids(self, chunk_ids: np.ndarray) -> list[Optional[str]]:
+        """
+        批量查询 chunk 所属 file_id（不存在或已删除为 None）
+        """
+
+        chunk_ids = np.asarray(chunk_ids, dtype="int64")
+        result: list[Optional[str]] = [None] * len(chunk_ids)
+
+        for seg in self._segments:
+            pos, hit = seg.find(chunk_ids)
+            for i in np.flatnonzero(hit).tolist():
+                result[i] = self.file_table[seg.file_idx[pos[i]]]
+
+        return result
+
+    def ids_of_file(self, file_id: str) -> np.ndarray:
+        """
+        某文件的存活 chunk_ids（列比较，无逐条遍历）
+        """
+
+        idx = self._file_pos.get(file_id)
+        if idx is None:
+            return np.empty(0, dtype="int64")
+
+        parts = [
+            seg.ids[(seg.file_idx == idx) & seg.alive]
+            for seg in self._segments
+        ]
+
+        return np.concatenate(parts) if parts else np.empty(0, dtype="int64")
+
+    def select_ids(self, search_filter: SearchFilter) -> np.ndarray:
+        """
+        按过滤条件选出存活 chunk_ids（列运算）
+        """
+
+        file_idx = None
+        if search_filter.file_ids is not None:
+            file_idx = np.asarray(
+                [self._file_pos[f] for f in search_filter.file_ids if f in self._file_pos],
+                dtype="int32",
+            )
+
+        after = before = None
+        if search_filter.created_after is not None:
+            after = _to_micros(search_filter.created_after)
+        if search_filter.created_before is not None:
+            before = _to_micros(search_filter.created_before)
+
+        parts = []
+        for seg in self._segments:
+            mask = seg.alive.copy()
+
+            if file_idx is not None:
+                mask &= np.isin(seg.file_idx, file_idx)
+            if after is not None:
+                mask &= seg.created_at >= after
+            if before is not None:
+                mask &= (seg.created_at <= before) & (seg.created_at != _NO_TIME)
+
+            parts.append(seg.ids[mask])
+
+        return np.concatenate(parts) if parts else np.empty(0, dtype="int64")
+
+    def file_index(self) -> dict[str, np.ndarray]:
+        """
+        file_id -> 存活 chunk_ids
+        """
+
+        groups: dict[str, list[np.ndarray]] = {}
+
+        for seg in self._segments:
+            rows = np.flatnonzero(seg.alive)
+            if not len(rows):
+                continue
+
+            file_idx = seg.file_idx[rows]
+            order = np.argsort(file_idx, kind="stable")
+            uniq, starts = np.unique(file_idx[order], return_index=True)
+
+            for fidx, part in zip(uniq.tolist(), np.split(seg.ids[rows][order], starts[1:])):
+                groups.setdefault(self.file_table[fidx], []).append(part)
+
+        return {
+            fid: np.concatenate(parts) if len(parts) > 1 else parts[0]
+            for fid, parts in groups.items()
+        }
+
+    def live_file_ids(self) -> list[str]:
+        """
+        存活 chunk 数大于 0 的 file_id（O(文件数)）
+        """
+
+        return [
+            fid for fid, chunks in zip(self.file_table, self.file_chunks.tolist())
+            if chunks > 0
+        ]
+
+    def live_ids(self) -> np.ndarray:
+        """
+        全部存活 chunk_id（有序）
+        """
+
+        parts = [seg.ids[seg.alive] for seg in self._segments]
+        if not parts:
+            return np.empty(0, dtype="int64")
+
+        return np.concatenate(parts)
+
+    def file_stats(self, file_id: str) -> dict:
+        """
+        单个文件的存活 chunk 数与文本字节数（O(1)）
+        """
+
+        idx = self._file_pos.get(file_id)
+        if idx is None or idx >= len(self.file_chunks):
+            return {"chunks": 0, "bytes": 0}
+
+        return {
+            "chunks": int(self.file_chunks[idx]),
+            "bytes": int(self.file_bytes[idx]),
+        }
+
+    def iter_chunks(self) -> Iterator[ChunkMeta]:
+        for seg in self._segments:
+            for pos in np.flatnonzero(seg.alive).tolist():
+                yield seg.meta(pos, self.file_table)
+
+    def compact(self):
+        """
+        丢弃已删除行并合并为一段
+        """
+
+        segments = [seg.compact() for seg in self._segments]
+        segments = [seg for seg in segments if len(seg.ids)]
+
+        self._segments, self._starts = [], []
+        if segments:
+            self._append_segment(_merge(segments))
+
+    def nbytes(self) -> int:
+        """
+        列数据占用字节数
+        """
+
+        return sum(
+            getattr(seg, name).nbytes + seg.alive.nbytes
+            for seg in self._segments
+            for name in _Segment.COLUMNS
+        )
+
+    # ======================
+    # Persistence
+    # ======================
+
+    def save(self, path: str, fsync: bool = False):
+        """
+        压缩后写出二进制文件（先写临时文件再原子替换）
+
+        fsync: 替换前落盘临时文件（checkpoint 随后清空变更日志，映射必须先持久化）
+        """
+
+        self.compact()
+
+        arrays = {}
+        if self._segments:
+            seg = self._segments[0]
+            arrays = {name: getattr(seg, name) for name in _Segment.COLUMNS}
+        if len(self.tombstones):
+            arrays["tombstones"] = self.tombstones
+
+        header = {
+            "version": 1,
+            "next_id": self.next_id,
+            "checkpoint_lsn": self.checkpoint_lsn,
+            "file_table": self.file_table,
+            "arrays": {},
+        }
+
+        # 先按占位长度计算数组偏移，再回填
+        offset = 0
+        for name, arr in arrays.items():
+            header["arrays"][name] = {
+                "dtype": arr.dtype.str,
+                "shape": list(arr.shape),
+                "offset": offset,
+            }
+            offset += -(-arr.nbytes // _ALIGN) * _ALIGN
+
+        header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        data_start = -(-(len(_MAGIC) + 8 + len(header_bytes)) // _ALIGN) * _ALIGN
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_MAGIC)
+            f.write(len(header_bytes).to_bytes(8, "little"))
+            f.write(header_bytes)
+            f.write(b"\0" * (data_start - f.tell()))
+
+            for name, arr in arrays.items():
+                f.seek(data_start + header["arrays"][name]["offset"])
+                f.write(np.ascontiguousarray(arr).tobytes())
+
+            # 末尾的空数组（如原文在内容存储中时的 text_blob）不写入字节，补齐到其偏移
+            f.truncate(data_start + offset)
+
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "ColumnarDocMap":
+        """
+        mmap 加载二进制文件，数组直接引用文件页
+        """
+
+        doc_map = cls()
+
+        with open(path, "rb") as f:
+            if f.read(len(_MAGIC)) != _MAGIC:
+                raise ValueError(f"invalid doc map file: {path}")
+
+            header_len = int.from_bytes(f.read(8), "little")
+            header = json.loads(f.read(header_len).decode("utf-8"))
+
+            size = os.fstat(f.fileno()).st_size
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+        data_start = -(-(len(_MAGIC) + 8 + header_len) // _ALIGN) * _ALIGN
+
+        doc_map.next_id = header["next_id"]
+        doc_map.checkpoint_lsn = header["checkpoint_lsn"]
+        doc_map.file_table = list(header["file_table"])
+        doc_map._file_pos = {fid: i for i, fid in enumerate(doc_map.file_table)}
+
+        if header["arrays"]:
+            columns = {}
+            for name, spec in header["arrays"].items():
+                dtype = np.dtype(spec["dtype"])
+                count = int(np.prod(spec["shape"]))
+                columns[name] = np.frombuffer(
+                    buf, dtype=dtype, count=count, offset=data_start + spec["offset"]
+                ).reshape(spec["shape"])
+
+            tombstones = columns.pop("tombstones", None)
+            if tombstones is not None:
+                doc_map.tombstones = tombstones
+            if columns:
+                seg = _Segment(**columns)
+                doc_map._append_segment(seg)
+                doc_map._count(seg, np.flatnonzero(seg.alive), 1)
+
+        return doc_map
+
+    @classmethod
+    def from_docmap(cls, legacy: DocMap) -> "ColumnarDocMap":
+        """
+        从旧版 JSON DocMap 转换
+        """
+
+        doc_map = cls()
+        doc_map.checkpoint_lsn = legacy.checkpoint_lsn
+
+        ids = sorted(legacy.chunks)
+        if ids:
+            metas = [legacy.chunks[cid] for cid in ids]
+            doc_map.add(np.asarray(ids, dtype="int64"), metas)
+
+        doc_map.next_id = max(legacy.next_id, doc_map.next_id)
+
+        return doc_map
+
+
+def migrate_json_map(json_path: str, bin_path: str) -> ColumnarDocMap:
+    """
+    将 doc_map.json 迁移为列式二进制格式，原文件保留为 .migrated 备份
+    """
+
+    with open(json_path, "r", encoding="utf-8") as f:
+        legacy = DocMap.model_validate_json(f.read())
+
+    doc_map = ColumnarDocMap.from_docmap(legacy)
+    doc_map.save(bin_path)
+
+    os.replace(json_path, json_path + ".migrated")
+
+    logger.info(
+        "op=doc_map_migrated "
+        f"chunks={len(doc_map)} "
+        f"path={bin_path}"
+    )
+
+    return doc_map
@@ -0,0 +1,603 @@
+import logging
+from typing import Optional
+
+import faiss
+import numpy as np
+
+from shared.config import VectorStoreConfig
+
+
+logger = logging.getLogger("VDB")
+
+# 支持的索引类型
+INDEX_FLAT = "flat"
+INDEX_IVF_FLAT = "ivf_flat"
+INDEX_IVF_PQ = "ivf_pq"
+INDEX_HNSW = "hnsw"
+
+INDEX_TYPES = (INDEX_FLAT, INDEX_IVF_FLAT, INDEX_IVF_PQ, INDEX_HNSW)
+
+# 向量压缩编码
+CODEC_NONE = "none"
+CODEC_SQ8 = "sq8"
+CODEC_FP16 = "fp16"
+CODEC_PQ = "pq"
+
+# 降维变换
+TRANSFORM_NONE = "none"
+TRANSFORM_PCA = "pca"
+TRANSFORM_OPQ = "opq"
+
+# IVF 每个聚类中心至少需要的训练样本数（低于该值 faiss 会告警且聚类质量差）
+_MIN_POINTS_PER_CENTROID = 39
+
+# contains_ids 每批按 id 取回的向量数
+_CONTAINS_BATCH = 1024
+
+
+def effective_nlist(config: VectorStoreConfig, ntotal: int) -> int:
+    """
+    根据数据量收敛 nlist，保证每个聚类有足够训练样本
+
+    至少为 2：单聚类 IVF 保留给 flat + PQ（见 index_descriptor / index_kind）
+    """
+
+    return max(2, min(config.ivf_nlist, ntotal // _MIN_POINTS_PER_CENTROID))
+
+
+def index_descriptor(config: VectorStoreConfig, ntotal: int = 0) -> str:
+    """
+    生成 faiss.index_factory 描述串
+
+    IVF 原生支持 add_with_ids / remove_ids，其余类型外包 IDMap2
+    以支持稳定的 64 位 chunk_id；降维变换作为前缀（IndexPreTransform）
+
+    Args:
+        config: 向量存储配置
+        ntotal: 训练时的数据量（用于收敛 nlist）
+    """
+
+    index_type = config.index_type
+    codec = target_codec(config)
+
+    if codec == CODEC_SQ8:
+        encoding = "SQ8"
+    elif codec == CODEC_FP16:
+        encoding = "SQfp16"
+    elif codec == CODEC_PQ:
+        encoding = f"PQ{config.pq_m}x{config.pq_nbits}"
+    else:
+        encoding = "Flat"
+
+    if config.vector_transform == TRANSFORM_PCA:
+        transform = f"PCA{config.transform_dim},"
+    elif config.vector_transform == TRANSFORM_OPQ:
+        transform = f"OPQ{config.pq_m}_{config.transform_dim},"
+    else:
+        transform = ""
+
+    if index_type == INDEX_FLAT:
+        if codec == CODEC_PQ:
+            # IndexPQ 不支持 SearchParameters（IDSelector），单聚类 IVF 与 PQ 全量扫描等价
+            return f"{transform}IVF1,{encoding}"
+        return f"IDMap2,{transform}{encoding}"
+
+    if index_type in (INDEX_IVF_FLAT, INDEX_IVF_PQ):
+        return f"{transform}IVF{effective_nlist(config, ntotal)},{encoding}"
+
+    if index_type == INDEX_HNSW:
+        if codec == CODEC_NONE:
+            return f"IDMap2,{transform}HNSW{config.hnsw_m}"
+        if codec == CODEC_PQ:
+            # HNSW 的 PQ 存储固定 8 bit 编码
+            return f"IDMap2,{transform}HNSW{config.hnsw_m}_PQ{config.pq_m}"
+        return f"IDMap2,{transform}HNSW{config.hnsw_m},{encoding}"
+
+    raise ValueError(f"unsupported index_type: {index_type}")
+
+
+def target_codec(config: VectorStoreConfig) -> str:
+    """
+    目标索引的向量编码（ivf_pq 固定为 PQ）
+    """
+
+    if config.index_type == INDEX_IVF_PQ:
+        return CODEC_PQ
+    return config.vector_codec
+
+
+def requires_training(config: VectorStoreConfig) -> bool:
+    """
+    目标索引是否需要训练
+    """
+
+    if config.index_type in (INDEX_IVF_FLAT, INDEX_IVF_PQ):
+        return True
+
+    # 降维矩阵需要训练
+    if config.vector_transform != TRANSFORM_NONE:
+        return True
+
+    # SQ8 需统计各维取值范围，PQ 需训练码本；fp16 无需训练
+    return target_codec(config) in (CODEC_SQ8, CODEC_PQ)
+
+
+def build_index(config: VectorStoreConfig, ntotal: int = 0):
+    """
+    按配置构建目标索引（未训练）
+
+    Args:
+        config: 向量存储配置
+        ntotal: 预计数据量
+    """
+
+    desc = index_descriptor(config, ntotal)
+
+    # 归一化向量 + 内积 = 余弦相似度
+    index = faiss.index_factory(config.dimension, desc, faiss.METRIC_INNER_PRODUCT)
+
+    hnsw = _as_hnsw(index)
+    if hnsw is not None:
+        hnsw.hnsw.efConstruction = config.hnsw_ef_construction
+        hnsw.hnsw.efSearch = config.hnsw_ef_search
+
+    ivf = _as_ivf(index)
+    if ivf is not None:
+        ivf.nprobe = config.ivf_nprobe
+        # 哈希表形式的 id -> 倒排位置映射，同时支持 reconstruct 与 remove_ids
+        ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+
+    logger.info(f"op=faiss_index_build desc={desc}")
+
+    return index
+
+
+def build_initial_index(config: VectorStoreConfig):
+    """
+    构建空库使用的初始索引
+
+    需要训练的索引类型在数据量达到 train_threshold 前先使用 Flat
+    """
+
+    if requires_training(config):
+        return faiss.index_factory(
+            config.dimension, "IDMap2,Flat", faiss.METRIC_INNER_PRODUCT
+        )
+
+    return build_index(config)
+
+
+def train_index(index, vectors: np.ndarray, max_train_points: int):
+    """
+    训练索引（采样训练集）
+    """
+
+    if index.is_trained:
+        return
+
+    n = vectors.shape[0]
+    if n > max_train_points:
+        rng = np.random.default_rng(1234)
+        sample = vectors[rng.choice(n, max_train_points, replace=False)]
+    else:
+        sample = vectors
+
+    sample = np.ascontiguousarray(sample, dtype="float32")
+
+    logger.info(f"op=faiss_index_train_start points={sample.shape[0]}")
+
+    pca = _as_pca(index)
+    if pca is not None and not pca.is_trained:
+        # 内积检索需要不去中心化的投影：用 {x, -x} 训练，均值为 0，
+        # 主成分即二阶矩矩阵的特征向量，偏置为 0，投影后的内积近似原内积
+        pca.train(np.concatenate([sample, -sample]))
+
+    index.train(sample)
+    logger.info("op=faiss_index_train_done")
+
+
+def index_kind(index) -> str:
+    """
+    识别已加载索引的类型
+    """
+
+    if _as_hnsw(index) is not None:
+        return INDEX_HNSW
+
+    ivf = _as_ivf(index)
+    if ivf is not None:
+        if isinstance(ivf, faiss.IndexIVFPQ):
+            # flat + PQ 以单聚类 IVF 存储（见 index_descriptor）
+            if _is_flat_pq(ivf):
+                return INDEX_FLAT
+            return INDEX_IVF_PQ
+        return INDEX_IVF_FLAT
+
+    return INDEX_FLAT
+
+
+def _is_flat_pq(ivf) -> bool:
+    # 目标索引的 nlist 至少为 2（见 effective_nlist），单聚类只来自 flat + PQ
+    return ivf.nlist == 1
+
+
+def index_codec(index) -> str:
+    """
+    识别已加载索引的向量编码
+    """
+
+    ivf = _as_ivf(index)
+    if ivf is not None:
+        storage = ivf
+    else:
+        storage = _unwrap_id_map(index)
+        if isinstance(storage, faiss.IndexHNSW):
+            storage = faiss.downcast_index(storage.storage)
+
+    if isinstance(storage, (faiss.IndexScalarQuantizer, faiss.IndexIVFScalarQuantizer)):
+        if storage.sq.qtype == faiss.ScalarQuantizer.QT_fp16:
+            return CODEC_FP16
+        return CODEC_SQ8
+
+    if isinstance(storage, (faiss.IndexPQ, faiss.IndexIVFPQ)):
+        return CODEC_PQ
+
+    return CODEC_NONE
+
+
+def index_transform(index) -> Optional[str]:
+    """
+    识别已加载索引的降维变换（如 pca256 / opq256），无变换时为 None
+    """
+
+    pre = _as_pretransform(index)
+    if pre is None:
+        return None
+
+    # 训练后的 OPQ 旋转矩阵写盘后读回为 LinearTransform
+    vt = faiss.downcast_VectorTransform(pre.chain.at(0))
+    if isinstance(vt, faiss.PCAMatrix):
+        return f"{TRANSFORM_PCA}{vt.d_out}"
+    return f"{TRANSFORM_OPQ}{vt.d_out}"
+
+
+def memory_bytes(index) -> int:
+    """
+    估算索引常驻内存（向量编码 + id 映射 + 图结构 + 降维矩阵），O(1)
+    """
+
+    ntotal = index.ntotal
+    per_vector = 0
+
+    fixed = 0
+    pre = _as_pretransform(index)
+    if pre is not None:
+        for i in range(pre.chain.size()):
+            vt = pre.chain.at(i)
+            fixed += vt.d_in * vt.d_out * 4
+
+    if isinstance(faiss.downcast_index(index), faiss.IndexIDMap):
+        # id_map（IDMap2 另有反向哈希表）
+        per_vector += 8 + 32
+
+    ivf = _as_ivf(index)
+    hnsw = _as_hnsw(index)
+
+    if ivf is not None:
+        # 倒排表编码 + id，哈希表形式的 direct map
+        per_vector += ivf.code_size + 8 + 32
+    elif hnsw is not None:
+        storage = faiss.downcast_index(hnsw.storage)
+        # 第 0 层邻居表（2M 个 int32），上层占比很小忽略
+        per_vector += _code_size(storage) + hnsw.hnsw.nb_neighbors(0) * 4
+    else:
+        per_vector += _code_size(_unwrap_id_map(index))
+
+    return ntotal * per_vector + fixed
+
+
+def should_migrate(config: VectorStoreConfig, index, ntotal: int = None) -> bool:
+    """
+    当前为 Flat 过渡索引，且数据量达到阈值时需要迁移到目标索引
+
+    ntotal: 向量总数（含尚未并入索引的追加向量），默认 index.ntotal
+    """
+
+    if not requires_training(config):
+        return False
+
+    # 过渡索引固定为 IDMap2,Flat；flat + 降维的目标索引种类 / 编码与之相同，按降维区分
+    if index_kind(index) != INDEX_FLAT or index_codec(index) != CODEC_NONE:
+        return False
+    if index_transform(index) is not None:
+        return False
+
+    return (index.ntotal if ntotal is None else ntotal) >= config.train_threshold
+
+
+def should_retrain(config: VectorStoreConfig, index, ntotal: int = None) -> bool:
+    """
+    IVF 目标索引的 nlist 在迁移时按当时数据量收敛，之后固定不变；
+    数据增长到 effective_nlist 达到已训练 nlist 的 ivf_retrain_growth 倍时需要重新训练
+
+    ntotal: 向量总数（含尚未并入索引的追加向量），默认 index.ntotal
+    """
+
+    if config.ivf_retrain_growth <= 0 or config.index_type not in (INDEX_IVF_FLAT, INDEX_IVF_PQ):
+        return False
+
+    ivf = _as_ivf(index)
+    if ivf is None or index_kind(index) == INDEX_FLAT:
+        return False
+
+    target = effective_nlist(config, index.ntotal if ntotal is None else ntotal)
+    return target >= ivf.nlist * config.ivf_retrain_growth
+
+
+def stores_exact_vectors(index) -> bool:
+    """
+    索引能否还原出原始向量（无压缩编码、无降维）
+    """
+
+    return index_codec(index) == CODEC_NONE and index_transform(index) is None
+
+
+def has_stable_ids(index) -> bool:
+    """
+    索引是否按 chunk_id 存储（IDMap2 或原生 IVF）
+    """
+
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexIDMap):
+        return True
+
+    ivf = _as_ivf(index)
+    return ivf is not None and ivf.direct_map.type == faiss.DirectMap.Hashtable
+
+
+def upgrade_legacy_index(config: VectorStoreConfig, index):
+    """
+    将按位置编号的旧索引升级为按 chunk_id 存储的索引
+
+    旧索引中 chunk_id 即向量位置，升级后 id 不变
+    """
+
+    ivf = _as_ivf(index)
+    if ivf is not None:
+        # IVF 按顺序添加时内部 id 即位置，只需切换 direct map 类型
+        ivf.set_direct_map_type(faiss.DirectMap.Hashtable)
+        return index
+
+    ntotal = index.ntotal
+    vectors = index.reconstruct_n(0, ntotal) if ntotal else None
+
+    if index_kind(index) == INDEX_HNSW:
+        upgraded = build_index(config)
+    else:
+        upgraded = faiss.index_factory(
+            config.dimension, "IDMap2,Flat", faiss.METRIC_INNER_PRODUCT
+        )
+
+    if ntotal:
+        upgraded.add_with_ids(vectors, np.arange(ntotal, dtype="int64"))
+
+    logger.info(f"op=faiss_index_upgrade_legacy ntotal={ntotal}")
+
+    return upgraded
+
+
+def export_vectors(index):
+    """
+    导出 IDMap2 索引或按 chunk_id 存储的 IVF 索引中的全部 (ids, vectors)
+
+    压缩编码 / 降维索引导出的是解码后的近似向量
+    """
+
+    if _as_ivf(index) is not None:
+        if not has_stable_ids(index):
+            raise ValueError("export_vectors requires an IVF index with a hashtable direct map")
+        ids = index_ids(index)
+        vectors = index.reconstruct_batch(ids) if len(ids) else np.empty((0, index.d), dtype="float32")
+        return ids, vectors
+
+    index = faiss.downcast_index(index)
+    if not isinstance(index, faiss.IndexIDMap):
+        raise ValueError("export_vectors requires an IDMap index")
+
+    ids = faiss.vector_to_array(index.id_map).astype("int64")
+    vectors = index.index.reconstruct_n(0, index.ntotal)
+
+    return ids, vectors
+
+
+def index_ids(index) -> np.ndarray:
+    """
+    索引中全部 chunk_id（有序）
+    """
+
+    ivf = _as_ivf(index)
+    if ivf is not None:
+        invlists = ivf.invlists
+        parts = [
+            faiss.rev_swig_ptr(invlists.get_ids(lst), invlists.list_size(lst)).copy()
+            for lst in range(ivf.nlist)
+            if invlists.list_size(lst)
+        ]
+        ids = np.concatenate(parts) if parts else np.empty(0, dtype="int64")
+    else:
+        wrapped = faiss.downcast_index(index)
+        if not isinstance(wrapped, faiss.IndexIDMap):
+            raise ValueError("index_ids requires an IDMap or IVF index")
+        ids = faiss.vector_to_array(wrapped.id_map)
+
+    return np.sort(ids.astype("int64"))
+
+
+def contains_ids(index, ids: np.ndarray) -> np.ndarray:
+    """
+    ids 中哪些在索引中（bool 数组）
+
+    按 id 定位（IDMap2 反向哈希表 / IVF 哈希表 direct map），开销与 len(ids) 成正比，
+    不遍历索引；整批命中时一次完成，否则逐个判断该批
+    """
+
+    ids = np.asarray(ids, dtype="int64")
+    present = np.zeros(len(ids), dtype=bool)
+    if not index.ntotal:
+        return present
+
+    for pos in range(0, len(ids), _CONTAINS_BATCH):
+        batch = ids[pos:pos + _CONTAINS_BATCH]
+        try:
+            index.reconstruct_batch(batch)
+            present[pos:pos + len(batch)] = True
+            continue
+        except RuntimeError:
+            pass
+
+        for i, cid in enumerate(batch.tolist()):
+            try:
+                index.reconstruct(cid)
+                present[pos + i] = True
+            except RuntimeError:
+                pass
+
+    return present
+
+
+def remove_selector(index, ids: np.ndarray):
+    """
+    构造删除用的 id 选择器
+
+    IVF 哈希表 direct map 只接受 IDSelectorArray（按 id 直接定位，O(k)）；
+    IDMap2 需对每个向量做成员判断，使用哈希集合的 IDSelectorBatch
+    """
+
+    if _as_ivf(index) is not None:
+        return faiss.IDSelectorArray(ids)
+
+    return faiss.IDSelectorBatch(ids)
+
+
+def id_selector(ids: np.ndarray, id_bound: int):
+    """
+    构造检索过滤用的 id 选择器
+
+    选中比例高时用位图（按 id 直接寻址），否则用哈希集合
+    """
+
+    ids = np.asarray(ids, dtype="int64")
+
+    if len(ids) * 64 >= id_bound:
+        mask = np.zeros(id_bound, dtype=bool)
+        mask[ids] = True
+        return faiss.IDSelectorBitmap(np.packbits(mask, bitorder="little"))
+
+    return faiss.IDSelectorBatch(ids)
+
+
+def exclude_selector(ids: np.ndarray):
+    """
+    构造排除指定 id 的选择器（检索时跳过墓碑）
+    """
+
+    inner = faiss.IDSelectorBatch(np.asarray(ids, dtype="int64"))
+    sel = faiss.IDSelectorNot(inner)
+    # IDSelectorNot 只持有裸指针，需保持内层选择器存活
+    sel.referenced_objects = [inner]
+
+    return sel
+
+
+def search_params(
+    index,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    sel=None,
+):
+    """
+    构造单次请求的搜索参数（线程安全，不修改索引全局状态）
+
+    sel: faiss IDSelector，检索时只考虑被选中的 id
+    """
+
+    ivf = _as_ivf(index)
+    if ivf is not None and (nprobe is not None or sel is not None):
+        kwargs = {"nprobe": int(nprobe if nprobe is not None else ivf.nprobe)}
+        if sel is not None:
+            kwargs["sel"] = sel
+        return faiss.SearchParametersIVF(**kwargs)
+
+    hnsw = _as_hnsw(index)
+    if hnsw is not None and (ef_search is not None or sel is not None):
+        kwargs = {"efSearch": int(ef_search if ef_search is not None else hnsw.hnsw.efSearch)}
+        if sel is not None:
+            kwargs["sel"] = sel
+        return faiss.SearchParametersHNSW(**kwargs)
+
+    if sel is not None:
+        return faiss.SearchParameters(sel=sel)
+
+    return None
+
+
+# ======================
+# Internal
+# ======================
+
+def _as_ivf(index):
+    try:
+        return faiss.downcast_index(faiss.extract_index_ivf(index))
+    except RuntimeError:
+        return None
+
+
+def _code_size(index) -> int:
+    try:
+        return index.sa_code_size()
+    except RuntimeError:
+        return index.d * 4
+
+
+def _as_hnsw(index):
+    index = _unwrap_id_map(index)
+    if isinstance(index, faiss.IndexHNSW):
+        return index
+    return None
+
+
+def _as_pretransform(index):
+    """
+    IndexPreTransform（IDMap2 外包时在其内层），无降维时为 None
+    """
+
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexIDMap):
+        index = faiss.downcast_index(index.index)
+    if isinstance(index, faiss.IndexPreTransform):
+        return index
+    return None
+
+
+def _as_pca(index):
+    pre = _as_pretransform(index)
+    if pre is None:
+        return None
+
+    vt = faiss.downcast_VectorTransform(pre.chain.at(0))
+    if isinstance(vt, faiss.PCAMatrix):
+        return vt
+    return None
+
+
+def _unwrap_id_map(index):
+    """
+    去掉 IDMap2 与降维变换外壳，返回实际存储向量的索引
+    """
+
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexIDMap):
+        index = faiss.downcast_index(index.index)
+    if isinstance(index, faiss.IndexPreTransform):
+        index = faiss.downcast_index(index.index)
+    return index
@@ -0,0 +1,157 @@
+import time
+import logging
+from typing import Callable, Optional
+
+import numpy as np
+
+from rag_app.vector_store.raw_faiss import index_factory
+from rag_app.vector_store.types import ChunkMeta
+
+
+logger = logging.getLogger("VDB")
+
+# 重新 embedding 的批大小
+_REEMBED_BATCH = 256
+
+
+def recover(
+    store,
+    reembed: Optional[Callable[[list[ChunkMeta]], np.ndarray]] = None,
+    candidates: Optional[np.ndarray] = None,
+) -> dict:
+    """
+    启动时修复 index 与 doc_map 的不一致（替代整体重置）
+
+    两侧的差异只出现在崩溃前后写入的那一段：给出 candidates（checkpoint 中途崩溃时
+    变更日志中该区间记录的 id）时只核对这些 id，否则比较全部 id 集合。处理差异部分：
+    - 索引中有、映射表中没有的孤儿向量：从索引移除
+    - 已不在索引中的墓碑：清除
+    - 映射表中有、索引中缺失的向量：优先从原始向量文件恢复，
+      否则用 chunk 文本重新 embedding；两者都不可用时从映射表移除该 chunk
+
+    只在启动阶段（无并发读取）调用，修复后发布快照并 checkpoint
+
+    Args:
+        store: FaissVectorStore
+        reembed: ChunkMeta 列表 -> 向量（n, dim），可选（文本可能在内容存储中，由调用方取出）
+        candidates: 需要核对的 chunk_id，None 表示全部
+
+    Returns:
+        dict: 修复报告
+    """
+
+    start = time.time()
+
+    index, doc_map = store.index, store.doc_map
+
+    if candidates is None:
+        scope = "full"
+        index_ids = index_factory.index_ids(index)
+        live_ids = doc_map.live_ids()
+        tombstones = doc_map.tombstones
+    else:
+        scope = "wal"
+        candidates = np.unique(np.asarray(candidates, dtype="int64"))
+        index_ids = candidates[index_factory.contains_ids(index, candidates)]
+        live_ids = candidates[np.array([fid is not None for fid in doc_map.lookup_file_ids(candidates)], dtype=bool)]
+        tombstones = np.intersect1d(candidates, doc_map.tombstones, assume_unique=True)
+
+    known = np.union1d(live_ids, tombstones)
+
+    report = {
+        "scope": scope,
+        "checked": int(len(index_ids) if candidates is None else len(candidates)),
+        "orphans_removed": 0,
+        "tombstones_dropped": 0,
+        "restored_from_raw": 0,
+        "reembedded": 0,
+        "chunks_dropped": 0,
+        "files_affected": [],
+    }
+
+    # 1. 孤儿向量
+    orphans = np.setdiff1d(index_ids, known, assume_unique=True)
+    if len(orphans):
+        index = store._remove_ids(index, orphans)
+        report["orphans_removed"] = int(len(orphans))
+
+    # 2. 失效墓碑
+    stale = np.setdiff1d(tombstones, index_ids, assume_unique=True)
+    if len(stale):
+        doc_map.drop_tombstones(stale)
+        report["tombstones_dropped"] = int(len(stale))
+
+    # 3. 缺失向量
+    missing = np.setdiff1d(live_ids, index_ids, assume_unique=True)
+    if len(missing):
+        report["files_affected"] = sorted({fid for fid in doc_map.lookup_file_ids(missing) if fid})
+
+        restored, vectors = _from_raw(store, missing)
+        if len(restored):
+            index.add_with_ids(vectors, restored)
+            report["restored_from_raw"] = int(len(restored))
+
+        rest = np.setdiff1d(missing, restored, assume_unique=True)
+        if len(rest) and reembed is not None:
+            for pos in range(0, len(rest), _REEMBED_BATCH):
+                ids = rest[pos:pos + _REEMBED_BATCH]
+                metas = [doc_map.get(int(cid)) for cid in ids]
+
+                vectors = store._normalize(reembed(metas), copy=False)
+                index.add_with_ids(vectors, ids)
+
+                if store.raw_vectors is not None:
+                    store.raw_vectors.write(ids, vectors)
+
+                logger.info(
+                    "op=vdb_recovery_reembed_progress "
+                    f"done={min(pos + _REEMBED_BATCH, len(rest))} "
+                    f"total={len(rest)}"
+                )
+
+            report["reembedded"] = int(len(rest))
+        elif len(rest):
+            # 无法恢复向量：移除对应 chunk，保证其余数据可用
+            doc_map.remove(rest)
+            report["chunks_dropped"] = int(len(rest))
+
+    store._publish(index, doc_map)
+    store.checkpoint()
+
+    report["time"] = round(time.time() - start, 3)
+
+    logger.warning(
+        "op=vdb_recovery_done "
+        f"scope={scope} "
+        f"checked={report['checked']} "
+        f"orphans_removed={report['orphans_removed']} "
+        f"tombstones_dropped={report['tombstones_dropped']} "
+        f"restored_from_raw={report['restored_from_raw']} "
+        f"reembedded={report['reembedded']} "
+        f"chunks_dropped={report['chunks_dropped']} "
+        f"files_affected={len(report['files_affected'])} "
+        f"time={report['time']}s"
+    )
+
+    return report
+
+
+def _from_raw(store, ids: np.ndarray):
+    """
+    从原始向量文件取回向量（文件未覆盖或全零的行视为不可用）
+    """
+
+    empty = (np.empty(0, dtype="int64"), None)
+
+    if store.raw_vectors is None:
+        return empty
+
+    rows = store.raw_vectors.nbytes() // (store.dim * 4)
+    covered = ids[ids - store.id_base < rows]
+    if not len(covered):
+        return empty
+
+    vectors = store.raw_vectors.take(covered)
+    valid = np.linalg.norm(vectors, axis=1) > 0
+
+    return covered[valid], vectors[valid]
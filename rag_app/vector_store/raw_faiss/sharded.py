@@ -0,0 +1,262 @@
+import os
+import heapq
+import zlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+from rag_app.vector_store.types import ChunkMeta, SearchFilter
+from rag_app.vector_store.raw_faiss.store import FaissVectorStore
+from rag_app.core.interface import IVectorStore
+from shared.config import get_vdb_config
+
+
+logger = logging.getLogger("VDB")
+
+# chunk_id 高位为分片号：id = shard << _SHARD_ID_BITS | 分片内序号
+_SHARD_ID_BITS = 40
+
+
+def shard_paths(path: str, shard: int) -> str:
+    """
+    分片文件路径：<目录>/shards/<分片号>/<文件名>
+    """
+
+    directory, name = os.path.split(path)
+    return os.path.join(directory, "shards", f"{shard:03d}", name)
+
+
+class ShardedVectorStore(IVectorStore):
+    """
+    分片 FAISS 向量库
+
+    - 按 file_id 哈希或按分片大小将 chunk 分布到 N 个 FaissVectorStore
+    - 每个分片独立持久化（索引 / 映射 / 变更日志），写入只影响所在分片
+    - 检索在线程池中并行查询各分片（faiss 检索释放 GIL），堆合并 top_k
+    - chunk_id 高位编码分片号，get 可直接路由
+    """
+
+    def __init__(
+        self,
+        reembed=None,
+        index_path: str = None,
+        map_path: str = None,
+        wal_path: str = None,
+        vectors_path: str = None,
+        deferred_sync: bool = False,
+    ):
+        """
+        reembed: 崩溃恢复时重新 embedding 的函数，传给各分片
+        index_path / map_path / wal_path / vectors_path: 覆盖配置中的路径（命名集合使用）
+        deferred_sync: 变更日志不逐条 fsync，由提交协议调用 sync() 按组落盘
+        """
+
+        self.vdb_config = get_vdb_config()
+        self.strategy = self.vdb_config.shard_strategy
+
+        index_path = index_path or self.vdb_config.index_path
+        map_path = map_path or self.vdb_config.map_path
+        wal_path = wal_path or self.vdb_config.wal_path
+        vectors_path = vectors_path or self.vdb_config.vectors_path
+
+        self.shards: list[FaissVectorStore] = []
+        for i in range(self.vdb_config.shards):
+            shard_index_path = shard_paths(index_path, i)
+            os.makedirs(os.path.dirname(shard_index_path), exist_ok=True)
+
+            self.shards.append(FaissVectorStore(
+                index_path=shard_index_path,
+                map_path=shard_paths(map_path, i),
+                wal_path=shard_paths(wal_path, i),
+                vectors_path=shard_paths(vectors_path, i),
+                id_base=i << _SHARD_ID_BITS,
+                reembed=reembed,
+                deferred_sync=deferred_sync,
+            ))
+
+        workers = self.vdb_config.shard_search_workers or len(self.shards)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="faiss-shard")
+
+        logger.info(
+            "op=vdb_sharded_init "
+            f"shards={len(self.shards)} "
+            f"strategy={self.strategy} "
+            f"workers={workers}"
+        )
+
+    # ======================
+    # Internal
+    # ======================
+
+    def _shard_of_chunk(self, chunk_id: int) -> FaissVectorStore:
+        return self.shards[chunk_id >> _SHARD_ID_BITS]
+
+    def _route(self, file_id: str) -> FaissVectorStore:
+        """
+        选择文件写入的分片
+        """
+
+        if self.strategy == "size":
+            # 同一文件始终在同一分片，便于删除
+            for shard in self.shards:
+                if len(shard.doc_map.ids_of_file(file_id)):
+                    return shard
+            return min(self.shards, key=lambda s: s.ntotal)
+
+        return self.shards[zlib.crc32(file_id.encode("utf-8")) % len(self.shards)]
+
+    # ======================
+    # Public API
+    # ======================
+
+    @property
+    def read_only(self) -> bool:
+        return self.shards[0].read_only
+
+    def get(self, chunk_id: int) -> Optional[ChunkMeta]:
+        shard = chunk_id >> _SHARD_ID_BITS
+        if not 0 <= shard < len(self.shards):
+            return None
+        return self.shards[shard].get(chunk_id)
+
+    def file_ids(self) -> list[str]:
+        return [fid for shard in self.shards for fid in shard.file_ids()]
+
+    def add(self, metas: list[ChunkMeta], vectors: np.ndarray) -> bool:
+        """
+        按文件分组写入各自分片
+        """
+
+        if vectors.ndim != 2:
+            raise ValueError("vectors must be 2D array")
+
+        groups: dict[int, list[int]] = {}
+        for pos, meta in enumerate(metas):
+            shard = self._route(meta.file_id)
+            groups.setdefault(self.shards.index(shard), []).append(pos)
+
+        # 单个文件的写入只落在一个分片，直接交出整块缓冲区，不按位置复制
+        if len(groups) == 1:
+            (i,) = groups
+            self.shards[i].add(metas, vectors)
+            return True
+
+        for i, positions in groups.items():
+            self.shards[i].add([metas[p] for p in positions], vectors[positions])
+
+        return True
+
+    def delete_by_file(self, file_id: str) -> bool:
+        """
+        只在包含该文件的分片上删除
+        """
+
+        for shard in self.shards:
+            if len(shard.doc_map.ids_of_file(file_id)):
+                shard.delete_by_file(file_id)
+
+        return True
+
+    def search(
+        self,
+        query_vector: np.ndarray,
+        top_k: int = 10,
+        nprobe: int = None,
+        ef_search: int = None,
+        search_filter: SearchFilter = None,
+        min_score: float = None,
+    ) -> list[dict]:
+        if query_vector.ndim == 1:
+            query_vector = query_vector.reshape(1, -1)
+
+        return self.search_batch(
+            query_vector, top_k, nprobe, ef_search, search_filter, min_score
+        )[0]
+
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        top_k: int = 10,
+        nprobe: int = None,
+        ef_search: int = None,
+        search_filter: SearchFilter = None,
+        min_score: float = None,
+    ) -> list[list[dict]]:
+        """
+        并行检索各分片，按 score 堆合并 top_k
+        """
+
+        if queries.ndim != 2:
+            raise ValueError("queries must be 2D array")
+
+        futures = [
+            self._pool.submit(
+                shard.search_batch, queries, top_k, nprobe, ef_search, search_filter, min_score
+            )
+            for shard in self.shards
+            if shard.ntotal
+        ]
+        per_shard = [f.result() for f in futures]
+
+        return [
+            heapq.nlargest(top_k, (r for shard in per_shard for r in shard[row]), key=lambda r: r["score"])
+            for row in range(queries.shape[0])
+        ]
+
+    def checkpoint(self):
+        for shard in self.shards:
+            shard.checkpoint()
+
+    def sync(self):
+        for shard in self.shards:
+            shard.sync()
+
+    def link_files(self, directory: str) -> dict:
+        """
+        各分片的持久化文件链接到 directory/shards/<分片号>/，名称带分片前缀
+        """
+
+        linked = {}
+        for i, shard in enumerate(self.shards):
+            prefix = f"shards/{i:03d}/"
+            for name, item in shard.link_files(os.path.join(directory, "shards", f"{i:03d}")).items():
+                linked[prefix + name] = item
+
+        return linked
+
+    def detach(self):
+        for shard in self.shards:
+            shard.detach()
+
+    def close(self):
+        for shard in self.shards:
+            shard.close()
+        self._pool.shutdown(wait=True)
+
+    def info(self):
+        shards = [shard.info() for shard in self.shards]
+
+        return {
+            "total_vectors": sum(s["total_vectors"] for s in shards),
+            "tombstones": sum(s["tombstones"] for s in shards),
+            "index_type": shards[0]["index_type"],
+            "codec": shards[0]["codec"],
+            "transform": shards[0]["transform"],
+            "refine": shards[0]["refine"],
+            "binary_prefilter": shards[0]["binary_prefilter"],
+            "read_only": shards[0]["read_only"],
+            "mmapped": all(s["mmapped"] for s in shards),
+            "total_files": sum(s["total_files"] for s in shards),
+            "shards": shards,
+        }
+
+    def stats(self, file_id: str = None) -> dict:
+        """
+        各分片统计求和
+        """
+
+        shards = [shard.stats(file_id) for shard in self.shards]
+
+        return {key: sum(s[key] for s in shards) for key in shards[0]}
@@ -1,53 +1,333 @@
 import os
 import json
+import shutil
 import faiss
 import logging
+import threading
 import numpy as np
 from datetime import datetime
 import time as _time
+from dataclasses import dataclass
+from typing import Optional
 
-from rag_app.vector_store.types import ChunkMeta, DocMap
+from rag_app.vector_store.types import ChunkMeta, SearchFilter
+from rag_app.vector_store.raw_faiss.docmap import ColumnarDocMap, migrate_json_map
+from rag_app.vector_store.raw_faiss import index_factory
+from rag_app.vector_store.raw_faiss import binary as binary_index
+from rag_app.vector_store.raw_faiss.wal import MutationLog, OP_ADD, OP_DELETE
+from rag_app.vector_store.raw_faiss.vectors import RawVectorFile, normalize_rows
+from rag_app.vector_store.raw_faiss.compactor import Compactor
+from rag_app.vector_store.raw_faiss import recovery
+from rag_app.vector_store.commit import fsync_path, fsync_dir
 from rag_app.core.interface import IVectorStore
 from shared.config import get_vdb_config
 
 
 logger = logging.getLogger("VDB")
 
+# mmap 只读加载：优先使用零拷贝映射（Flat codes / IVF 倒排表直接引用文件页）
+_MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP) | faiss.IO_FLAG_READ_ONLY
+
+# 预取读块大小
+_PREFETCH_BLOCK = 16 * 1024 * 1024
+
+# 构建二值索引时每批读取的原始向量数
+_BINARY_BUILD_BATCH = 65536
+
+
+def _prefetch_file(path: str):
+    """
+    顺序读取文件，将页面提前载入 page cache（多进程共享）
+    """
+
+    start = _time.time()
+    total = 0
+
+    try:
+        with open(path, "rb", buffering=0) as f:
+            if hasattr(os, "posix_fadvise"):
+                os.posix_fadvise(f.fileno(), 0, 0, os.POSIX_FADV_WILLNEED)
+
+            buf = bytearray(_PREFETCH_BLOCK)
+            while True:
+                n = f.readinto(buf)
+                if not n:
+                    break
+                total += n
+    except OSError:
+        logger.exception(f"op=faiss_index_prefetch_failed path={path}")
+        return
+
+    logger.info(
+        "op=faiss_index_prefetch_done "
+        f"bytes={total} "
+        f"time={_time.time() - start:.2f}s"
+    )
+
+
+@dataclass(frozen=True)
+class _Delta:
+    """
+    上次 checkpoint 之后追加、尚未并入索引的向量（归一化 float32），发布后不再修改
+
+    追加时复制出新的 _Delta（大小受 checkpoint 间隔限制），已发布的索引因此不被原地修改；
+    首次追加直接引用 add 交出的向量缓冲区，不复制
+    """
+
+    ids: np.ndarray
+    vectors: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def append(self, ids: np.ndarray, vectors: np.ndarray) -> "_Delta":
+        if not len(self.ids):
+            return _Delta(ids, vectors)
+        return _Delta(np.concatenate([self.ids, ids]), np.concatenate([self.vectors, vectors]))
+
+    def without(self, ids: np.ndarray) -> "_Delta":
+        if not len(self.ids) or not len(ids):
+            return self
+        keep = ~np.isin(self.ids, ids)
+        return _Delta(self.ids[keep], self.vectors[keep])
+
+
+_EMPTY_DELTA = _Delta(np.empty(0, dtype="int64"), np.empty((0, 0), dtype="float32"))
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    """
+    (index, doc_map, delta) 快照
+
+    发布后均不再修改：追加进入新的 delta，checkpoint 时在索引副本上并入；
+    删除 / 压缩 / 迁移同样在副本上构造新索引后整体替换
+    """
+
+    index: object
+    doc_map: ColumnarDocMap
+    # 排除墓碑的 IDSelector（无墓碑时为 None）
+    exclude: object = None
+    # 符号位二值索引（未开启二值预筛选时为 None）
+    binary: object = None
+    # 未并入 index / binary 的追加向量，检索时精确计算后合并
+    delta: _Delta = _EMPTY_DELTA
+
+
 class FaissVectorStore(IVectorStore):
     """
     FAISS 向量库存储层
     负责：
     - 向量存取
     - ID 映射
-    - 持久化
+    - 持久化（变更日志 + 定期 checkpoint）
+
+    并发：检索读取当前快照，不等待写入；add / delete / checkpoint 串行持有写锁。
+    add 不修改已发布的索引：新向量进入快照的 delta（检索时精确计算后合并），
+    映射表写时复制后原子替换快照；checkpoint 在索引副本上并入 delta 后发布。
+    迁移 / 压缩同样在副本上构造新索引后替换，检索不会看到不一致的 index 与 doc_map
+
+    删除：只从映射表移除并记录墓碑，检索时排除；后台 Compactor 按墓碑比例 /
+    空闲时间物理移除
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        index_path: str = None,
+        map_path: str = None,
+        wal_path: str = None,
+        vectors_path: str = None,
+        id_base: int = 0,
+        reembed=None,
+        deferred_sync: bool = False,
+    ):
+        """
+        index_path / map_path / wal_path / vectors_path: 覆盖配置中的路径（分片存储 / 命名集合使用）
+        id_base: chunk_id 起始值（分片之间 id 不重叠）
+        reembed: ChunkMeta 列表 -> 向量（n, dim），崩溃恢复时为缺失向量的 chunk 重新 embedding
+        deferred_sync: 变更日志不逐条 fsync，由提交协议调用 sync() 按组落盘
+        """
+
         self.vdb_config = get_vdb_config()
 
         self.dim = self.vdb_config.dimension
-        self.index_path = self.vdb_config.index_path
-        self.map_path = self.vdb_config.map_path
+        self.index_path = index_path or self.vdb_config.index_path
+        self.wal_path = wal_path or self.vdb_config.wal_path
+        self.id_base = id_base
+        # 映射表使用列式二进制格式，旧配置中的 .json 路径自动迁移
+        stem, ext = os.path.splitext(map_path or self.vdb_config.map_path)
+        self.map_path = stem + ".bin" if ext == ".json" else stem + ext
+        self.legacy_map_path = stem + ".json"
+
+        # mmap 加载的索引数据直接引用文件页，不允许修改；副本只由复制更新
+        self.read_only = (
+            self.vdb_config.read_only
+            or self.vdb_config.index_load_mode == "mmap"
+            or bool(self.vdb_config.replication_source)
+        )
+        self.mmapped = False
+
+        # 写锁（可重入：add 内部会触发 checkpoint）
+        self._write_lock = threading.RLock()
+        self.last_write = _time.time()
+
+        # 压缩进行中：checkpoint 不替换当前索引（压缩结果基于它构造）
+        self._compacting = False
+        # 索引被整体替换（迁移 / 重置）时递增，进行中的压缩作废
+        self._epoch = 0
+        self.compactor = None
+        self.recovery_report = None
+
+        doc_map = self._load_or_create_map()
+        doc_map.next_id = max(doc_map.next_id, self.id_base)
+        self._publish(self._load_or_create_index(), doc_map)
+
+        self.wal = MutationLog(
+            self.wal_path,
+            start_lsn=self.doc_map.checkpoint_lsn,
+            fsync=self.vdb_config.wal_fsync and not deferred_sync,
+            read_only=self.read_only,
+        )
 
-        self.index = self._load_or_create_index()
-        self.doc_map = self._load_or_create_map()
+        # 压缩索引的精排 / 二值预筛选的重排使用磁盘上的原始向量
+        self.raw_vectors = None
+        if self.vdb_config.refine or self.vdb_config.binary_prefilter:
+            self.raw_vectors = RawVectorFile(
+                vectors_path or self.vdb_config.vectors_path,
+                self.dim,
+                id_base=self.id_base,
+                read_only=self.read_only,
+            )
+
+        # 旧版索引按位置编号，升级为按 chunk_id 存储（id 不变）
+        if not index_factory.has_stable_ids(self.index):
+            self._publish(
+                index_factory.upgrade_legacy_index(self.vdb_config, self.index),
+                self.doc_map,
+            )
+            if not self.read_only:
+                self._save(self.index, self.doc_map)
+
+        # 在最近一次 checkpoint 之上回放日志尾部；索引比映射表新时得到需要核对的 id
+        suspects = self._replay_log()
+
+        if self.raw_vectors is not None and not self.read_only:
+            self._backfill_raw_vectors()
+
+        # index / map 不一致时只修复差异部分；修复失败才重置
+        # （最小一致性：不因单文件损坏导致服务起不来）。只读进程不修改写入方的数据
+        if suspects is not None and not self.read_only:
+            # checkpoint 中途崩溃：只核对日志中该区间记录的 id
+            self._recover(reembed, suspects)
 
-        # 如果 index / map 任一损坏或不一致，重置以保证可用性
-        # （最小一致性：不因单文件损坏导致服务起不来）
-        if getattr(self.index, "ntotal", None) is not None and self.index.ntotal != self.doc_map.next_id:
+        expected = len(self.doc_map) + len(self.doc_map.tombstones)
+        if getattr(self.index, "ntotal", None) is not None and self.index.ntotal != expected:
             logger.warning(
-                "op=vdb_store_inconsistent_reset "
+                "op=vdb_store_inconsistent "
                 f"index_ntotal={self.index.ntotal} "
-                f"map_next_id={self.doc_map.next_id}"
+                f"map_chunks={len(self.doc_map)} "
+                f"tombstones={len(self.doc_map.tombstones)} "
+                f"read_only={self.read_only}"
             )
-            self._reset()
+            # 文件在 checkpoint 协议之外损坏（无法由日志限定范围）：比较全部 id
+            if not self.read_only:
+                self._recover(reembed, None)
+
+        # 二值索引由原始向量派生，不单独持久化，启动时重建
+        if self.vdb_config.binary_prefilter:
+            self._build_binary()
+
+        if not self.read_only:
+            self.compactor = Compactor(
+                self,
+                dirty_ratio=self.vdb_config.compaction_dirty_ratio,
+                idle_seconds=self.vdb_config.compaction_idle_seconds,
+            )
+            self.compactor.start()
+
+    # ============ 快照 ============
+    @property
+    def index(self):
+        return self._snapshot.index
+
+    @property
+    def doc_map(self) -> ColumnarDocMap:
+        return self._snapshot.doc_map
+
+    @property
+    def ntotal(self) -> int:
+        """
+        向量总数（含墓碑与未并入索引的追加向量）
+        """
+
+        snap = self._snapshot
+        return snap.index.ntotal + len(snap.delta)
+
+    def _publish(self, index, doc_map: ColumnarDocMap, binary=None, delta: _Delta = None):
+        """
+        原子替换当前快照（单次属性赋值）
+
+        binary: 新的二值索引，None 时沿用当前快照的二值索引
+        delta: 新的追加向量，None 时沿用当前快照的（index 已并入时传 _EMPTY_DELTA）
+        """
+
+        prev = getattr(self, "_snapshot", None)
+        if binary is None and prev is not None:
+            binary = prev.binary
+        if delta is None:
+            delta = prev.delta if prev is not None else _EMPTY_DELTA
+
+        exclude = None
+        if len(doc_map.tombstones):
+            if prev is not None and prev.doc_map.tombstones is doc_map.tombstones:
+                exclude = prev.exclude
+            else:
+                exclude = index_factory.exclude_selector(doc_map.tombstones)
+
+        self._snapshot = _Snapshot(index, doc_map, exclude, binary, delta)
 
     # ============ 加载向量库 ============
+    def _read_index(self):
+        """
+        按 index_load_mode 读取索引
+
+        mmap 模式下多个进程共享同一索引文件的物理页，启动无需整体读入内存；
+        日志尾部不为空时需要回放，只能读入私有内存
+        """
+
+        has_tail = os.path.exists(self.wal_path) and os.path.getsize(self.wal_path) > 0
+
+        if self.vdb_config.index_load_mode != "mmap" or has_tail:
+            if self.vdb_config.index_load_mode == "mmap":
+                logger.warning("op=faiss_index_mmap_skipped reason=wal_tail")
+            return faiss.read_index(self.index_path)
+
+        index = faiss.read_index(self.index_path, _MMAP_FLAGS)
+        self.mmapped = True
+
+        if self.vdb_config.mmap_prefetch:
+            threading.Thread(
+                target=_prefetch_file,
+                args=(self.index_path,),
+                name="faiss-prefetch",
+                daemon=True,
+            ).start()
+
+        logger.info(f"op=faiss_index_mmap_loaded ntotal={index.ntotal}")
+
+        return index
+
+    def _check_writable(self):
+        if self.read_only:
+            raise RuntimeError("vector store is read-only")
+
     def _load_or_create_index(self):
         if os.path.exists(self.index_path):
             try:
-                return faiss.read_index(self.index_path)
+                return self._read_index()
             except Exception:
+                if self.read_only:
+                    raise
                 # index 文件损坏：备份并重建
                 try:
                     bak = self.index_path + f".corrupt.{int(_time.time())}"
@@ -55,65 +335,319 @@ class FaissVectorStore(IVectorStore):
                     logger.exception(f"op=faiss_index_corrupt_backup path={bak}")
                 except Exception:
                     logger.exception("op=faiss_index_corrupt_backup_failed")
-                return faiss.IndexFlatIP(self.dim)
+                return index_factory.build_initial_index(self.vdb_config)
 
         print("🆕 Create new FAISS index")
 
-        # 使用最基础版本，后期可换 IVF/HNSW
-        index = faiss.IndexFlatIP(self.dim)     # 内积
-        # index = faiss.IndexFlatL2(self.dim)     # L2距离
-
-        return index
+        # 需要训练的索引（IVF）在数据量达到阈值前先用 Flat 过渡
+        return index_factory.build_initial_index(self.vdb_config)
 
     # ============ 加载映射文件 ============
     def _load_or_create_map(self):
         if os.path.exists(self.map_path):
             try:
-                with open(self.map_path, "r", encoding="utf-8") as f:
-                    return DocMap.model_validate_json(f.read())
+                return ColumnarDocMap.load(self.map_path)
             except Exception:
-                # JSON 截断/损坏：备份并重建（否则应用启动直接失败）
+                if self.read_only:
+                    raise
+                # 文件截断/损坏：备份并重建（否则应用启动直接失败）
                 try:
                     bak = self.map_path + f".corrupt.{int(_time.time())}"
                     os.replace(self.map_path, bak)
                     logger.exception(f"op=doc_map_corrupt_backup path={bak}")
                 except Exception:
                     logger.exception("op=doc_map_corrupt_backup_failed")
-                return DocMap()
+                return ColumnarDocMap()
+
+        # 旧版 doc_map.json：迁移为列式格式
+        if os.path.exists(self.legacy_map_path) and not self.read_only:
+            try:
+                return migrate_json_map(self.legacy_map_path, self.map_path)
+            except Exception:
+                logger.exception(f"op=doc_map_migrate_failed path={self.legacy_map_path}")
+                return ColumnarDocMap()
 
         # 首次创建立即写盘
-        doc_map = DocMap()
-        with open(self.map_path, "w", encoding="utf-8") as f:
-            json.dump(doc_map.model_dump(), f, indent=2, ensure_ascii=False)
+        doc_map = ColumnarDocMap()
+        if self.read_only:
+            return doc_map
+
+        doc_map.save(self.map_path)
 
         return doc_map
 
+    # ============ 回放变更日志 ============
+    def _replay_log(self) -> Optional[np.ndarray]:
+        """
+        在映射表的 checkpoint_lsn 之上回放日志
+
+        checkpoint 写出索引后、写出映射表前崩溃时，日志中有一条覆盖到 index_lsn
+        （大于映射表的 checkpoint_lsn）的 checkpoint 记录：lsn <= index_lsn 的新增已在索引中，
+        只回放到映射表。此时返回需要核对的 id（这些记录中的 id，以及映射表已有的墓碑——
+        该次 checkpoint 前的压缩可能已将其移除），否则返回 None
+        """
+
+        start = _time.time()
+        replayed = 0
+
+        # 启动阶段尚无并发读取，直接在当前快照上修改
+        index, doc_map = self.index, self.doc_map
+
+        map_lsn = doc_map.checkpoint_lsn
+        index_lsn = self.wal.index_lsn(map_lsn)
+        if index_lsn is not None and index_lsn <= map_lsn:
+            index_lsn = None
+        suspects = [doc_map.tombstones] if index_lsn is not None else None
+
+        for record in self.wal.replay(map_lsn):
+            covered = index_lsn is not None and record.lsn <= index_lsn
+
+            if record.op == OP_ADD:
+                metas = [ChunkMeta.model_validate(m) for m in record.metas]
+                self._apply_add(None if covered else index, doc_map, record.ids, record.vectors, metas)
+            elif record.op == OP_DELETE:
+                self._apply_delete(doc_map, record.ids)
+            else:
+                continue
+
+            if covered:
+                suspects.append(record.ids)
+            replayed += 1
+
+        self._publish(index, doc_map)
+
+        if replayed:
+            logger.info(
+                "op=wal_replay_done "
+                f"records={replayed} "
+                f"last_lsn={self.wal.last_lsn} "
+                f"index_lsn={index_lsn} "
+                f"time={_time.time() - start:.2f}s"
+            )
+
+        if suspects is None:
+            return None
+        return np.unique(np.concatenate(suspects))
+
+    def _recover(self, reembed, candidates: Optional[np.ndarray]):
+        try:
+            self.recovery_report = recovery.recover(self, reembed, candidates)
+        except Exception:
+            logger.exception("op=vdb_recovery_failed fallback=reset")
+            self._reset()
+
+    # ============ 补齐原始向量 ============
+    def _backfill_raw_vectors(self):
+        """
+        已有数据的库开启 refine 时，从当前索引导出向量补齐原始向量文件
+
+        索引已压缩时导出的是解码后的近似向量，之后新增的 chunk 为原始精度
+        """
+
+        expected = (self.doc_map.next_id - self.id_base) * self.dim * 4
+        if not len(self.doc_map) or self.raw_vectors.nbytes() >= expected:
+            return
+
+        ids = np.sort(np.concatenate(list(self.doc_map.file_index().values())))
+        self.raw_vectors.write(ids, self.index.reconstruct_batch(ids))
+        self.raw_vectors.sync()
+
+        logger.info(
+            "op=raw_vectors_backfill_done "
+            f"chunks={len(ids)} "
+            f"codec={index_factory.index_codec(self.index)}"
+        )
+
+    # ============ 构建二值索引 ============
+    def _build_binary(self):
+        """
+        从原始向量文件为全部有效 chunk 构建符号位二值索引
+        """
+
+        start = _time.time()
+        binary = binary_index.build_binary_index(self.vdb_config)
+
+        ids = self.doc_map.live_ids()
+        for pos in range(0, len(ids), _BINARY_BUILD_BATCH):
+            batch = ids[pos:pos + _BINARY_BUILD_BATCH]
+            binary.add_with_ids(binary_index.binary_codes(self.raw_vectors.take(batch)), batch)
+
+        self._publish(self.index, self.doc_map, binary)
+
+        logger.info(
+            "op=binary_index_build_done "
+            f"type={self.vdb_config.binary_index_type} "
+            f"ntotal={binary.ntotal} "
+            f"time={_time.time() - start:.2f}s"
+        )
+
+    # ============ checkpoint ============
+    def checkpoint(self):
+        """
+        全量写出索引与映射，并清空变更日志
+        """
+
+        self._check_writable()
+
+        with self._write_lock:
+            logger.info(f"op=vdb_checkpoint_start lsn={self.wal.last_lsn}")
+
+            # 写出过程中检索继续使用旧快照；映射表在副本上压缩，追加向量并入索引副本
+            snap = self._snapshot
+            doc_map = snap.doc_map.copy()
+            doc_map.checkpoint_lsn = self.wal.last_lsn
+
+            index, binary = self._fold(snap, binary=not self._compacting)
+
+            if self.raw_vectors is not None:
+                self.raw_vectors.sync()
+            self._save(index, doc_map, log_checkpoint=True)
+
+            if self._compacting:
+                # 压缩结束时发布基于当前索引的结果，之后再次 checkpoint 并入
+                self._publish(snap.index, doc_map)
+            else:
+                self._publish(index, doc_map, binary, delta=_EMPTY_DELTA)
+            self.wal.reset()
+
+            logger.info("op=vdb_checkpoint_done")
+
+    def _fold(self, snap: _Snapshot, binary: bool = True):
+        """
+        在副本上并入 snap 的追加向量，返回 (index, binary)；无追加向量时返回原索引
+
+        binary: 是否同时构造二值索引副本（False 时返回 snap.binary）
+        """
+
+        if not len(snap.delta):
+            return snap.index, snap.binary
+
+        index = faiss.clone_index(snap.index)
+        index.add_with_ids(snap.delta.vectors, snap.delta.ids)
+
+        folded = snap.binary
+        if binary and folded is not None:
+            folded = binary_index.clone_binary_index(folded)
+            folded.add_with_ids(binary_index.binary_codes(snap.delta.vectors), snap.delta.ids)
+
+        return index, folded
+
+    def _maybe_checkpoint(self):
+        if (
+            self.wal.records >= self.vdb_config.wal_checkpoint_records
+            or self.wal.size_bytes() >= self.vdb_config.wal_checkpoint_bytes
+        ):
+            self.checkpoint()
+
+    def detach(self):
+        """
+        停止后台压缩并转为只读（文件即将被快照导入替换）：之后的写入抛出异常，
+        关闭时不再 checkpoint；已提交的修改已在变更日志中落盘
+        """
+
+        if self.compactor is not None:
+            self.compactor.stop()
+
+        with self._write_lock:
+            self.read_only = True
+
+    def close(self):
+        """
+        关闭前 checkpoint，下次启动无需回放
+        """
+
+        if self.compactor is not None:
+            self.compactor.stop()
+
+        with self._write_lock:
+            if self.wal.records and not self.read_only:
+                self.checkpoint()
+            self.wal.close()
+            if self.raw_vectors is not None:
+                self.raw_vectors.close()
+
+    # ============ 导出持久化文件 ============
+    def link_files(self, directory: str) -> dict:
+        """
+        checkpoint 后把持久化文件硬链接到 directory，得到一致的时间点副本
+
+        索引与映射表写出时原子替换，链接后的文件不再变化；原始向量文件只追加，
+        按链接时的大小截取。写锁只覆盖 checkpoint 与链接，不随导出时长阻塞写入
+
+        Returns:
+            dict: 名称（index / doc_map / vectors）-> (路径, 字节数)
+        """
+
+        os.makedirs(directory, exist_ok=True)
+        files = {"index": self.index_path, "doc_map": self.map_path}
+        if self.raw_vectors is not None and self.raw_vectors.nbytes():
+            files["vectors"] = self.raw_vectors.path
+
+        linked = {}
+        with self._write_lock:
+            if not self.read_only:
+                self.checkpoint()
+
+            for name, path in files.items():
+                dst = os.path.join(directory, name)
+                try:
+                    os.link(path, dst)
+                except OSError:
+                    # 跨设备 / 文件系统不支持硬链接
+                    shutil.copyfile(path, dst)
+                linked[name] = (dst, os.path.getsize(path))
+
+        return linked
+
     # ============ 持久化向量库 ============
-    def _save(self):
-        # 先写临时文件再原子替换，避免崩溃导致文件截断
+    def _save(self, index, doc_map: ColumnarDocMap, log_checkpoint: bool = False):
+        # 先写临时文件再原子替换，避免崩溃导致文件截断；
+        # checkpoint 随后清空变更日志，开启 fsync 时两者须先落盘
+        fsync = self.vdb_config.wal_fsync
+
         tmp_index_path = self.index_path + ".tmp"
-        faiss.write_index(self.index, tmp_index_path)
+        faiss.write_index(index, tmp_index_path)
+        if fsync:
+            fsync_path(tmp_index_path)
         os.replace(tmp_index_path, self.index_path)
 
-        tmp_map_path = self.map_path + ".tmp"
-        with open(tmp_map_path, "w", encoding="utf-8") as f:
-            # 关键：使用 pydantic 的 JSON mode，确保 datetime 被序列化为字符串
-            f.write(self.doc_map.model_dump_json(indent=2))
-        os.replace(tmp_map_path, self.map_path)
+        # 索引已替换、映射表尚未写出：日志中记录索引覆盖到的 lsn（见 _replay_log）
+        if log_checkpoint:
+            self.wal.append_checkpoint(doc_map.checkpoint_lsn)
+            if fsync:
+                self.wal.sync()
+
+        doc_map.save(self.map_path, fsync=fsync)
+        if fsync:
+            fsync_dir(os.path.dirname(os.path.abspath(self.map_path)))
+
+    # ============ 落盘变更日志 ============
+    def sync(self):
+        """
+        fsync 已追加的变更日志（提交协议每组调用一次）
+        """
+
+        with self._write_lock:
+            self.wal.sync()
 
     # ============ 归一化处理 ============
-    def _normalize(self, vectors: np.ndarray):
-        # 归一化，适合 inner product 搜索
-        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
-        norms[norms == 0] = 1e-12
-        return vectors / norms
+    def _normalize(self, vectors: np.ndarray, copy: bool = True):
+        # 归一化，适合 inner product 搜索；已归一化（bge 输出）时不分配新数组
+        return normalize_rows(vectors, copy=copy)
+
+    def get(self, chunk_id: int) -> Optional[ChunkMeta]:
+        """
+        获取向量元数据（不存在返回 None）
+        """
+
+        return self.doc_map.get(chunk_id)
 
-    def get(self, chunk_id: int) -> ChunkMeta:
+    def file_ids(self) -> list[str]:
         """
-        获取向量
+        存有 chunk 的 file_id（启动时与已提交的元数据对齐）
         """
 
-        return self.doc_map.chunks.get(chunk_id)
+        return self.doc_map.live_file_ids()
 
     # ============ 添加向量 ============
     def add(
@@ -124,48 +658,158 @@ class FaissVectorStore(IVectorStore):
         """
         添加向量
 
-        vectors: (n, dim)
+        vectors: (n, dim)，float32 连续时不复制，归一化在其上原地进行
         """
 
         logger.info("op=chunk_add_start")
+        self._check_writable()
+
         if vectors.ndim != 2:
             raise ValueError("vectors must be 2D array")
 
         if vectors.shape[1] != self.dim:
             raise ValueError(f"dimension {vectors.shape[1]} mismatch {self.dim}")
 
-        # 归一化处理
-        vectors = self._normalize(vectors)
+        # 归一化处理（原地进行：vectors 由调用方交出，写入索引 / 日志 / 原始向量文件的是同一块缓冲区）
+        vectors = self._normalize(vectors, copy=False)
 
         count = vectors.shape[0]
 
-        start_id = self.doc_map.next_id
-        assert self.index.ntotal == start_id, "index size mismatch"
+        with self._write_lock:
+            # 已发布的索引不修改：新向量进入 delta（写时复制），映射表写时复制
+            snap = self._snapshot
+            doc_map = snap.doc_map.copy()
 
-        ids = np.arange(start_id, start_id + count)
-        self.index.add(vectors)
+            # chunk_id 单调递增且不复用，删除后其余 id 保持不变
+            start_id = doc_map.next_id
+            ids = np.arange(start_id, start_id + count, dtype="int64")
 
-        # 建立映射
-        for i in ids:
-            chunk = metas[i - start_id]
-            chunk.chunk_id = int(i)
-            self.doc_map.chunks[int(i)] = chunk
+            self._apply_add(None, doc_map, ids, vectors, metas)
+            delta = snap.delta.append(ids, vectors)
+            self.last_write = _time.time()
+
+            # 只追加增量，全量落盘交给 checkpoint
+            self.wal.append_add(
+                ids,
+                vectors,
+                [meta.model_dump(mode="json") for meta in metas],
+            )
 
-        self.doc_map.next_id += count
+            if self._should_rebuild(snap.index, snap.index.ntotal + len(delta)):
+                # 迁移 / 重新训练会丢弃墓碑向量，二值索引在副本上同步移除
+                index, binary = self._fold(_Snapshot(snap.index, doc_map, binary=snap.binary, delta=delta))
+                if binary is not None and len(doc_map.tombstones):
+                    if binary is snap.binary:
+                        binary = binary_index.clone_binary_index(binary)
+                    binary = binary_index.remove_binary_ids(self.vdb_config, binary, doc_map.tombstones)
+                self._publish(self._migrate_index(index, doc_map), doc_map, binary, delta=_EMPTY_DELTA)
+                self._epoch += 1
+                self.checkpoint()
+            else:
+                self._publish(snap.index, doc_map, delta=delta)
+                self._maybe_checkpoint()
 
-        self._save()
         logger.info("op=chunk_add_done")
         return True
 
+    def _apply_add(
+        self,
+        index,
+        doc_map: ColumnarDocMap,
+        ids: np.ndarray,
+        vectors: np.ndarray,
+        metas: list[ChunkMeta],
+    ):
+        """
+        写入原始向量与映射；index 不为 None 时原地追加（只在启动阶段回放时，尚无并发读取）
+        """
+
+        # 先写原始向量：检索一旦看到新 id，精排即可读到其向量
+        if self.raw_vectors is not None:
+            self.raw_vectors.write(ids, vectors)
+
+        if index is not None:
+            index.add_with_ids(vectors, ids)
+
+        # 建立映射
+        for cid, chunk in zip(ids.tolist(), metas):
+            chunk.chunk_id = cid
+
+        doc_map.add(ids, metas)
+
+    # ============ 迁移到目标索引 ============
+    def _should_rebuild(self, index, ntotal: int) -> bool:
+        """
+        是否需要（重新）训练目标索引：过渡索引达到 train_threshold，或 IVF 的 nlist 已落后于数据量
+
+        重新训练需要原始向量：压缩 / 降维索引只有开启原始向量文件时才重新训练
+        """
+
+        if index_factory.should_migrate(self.vdb_config, index, ntotal):
+            return True
+
+        if not index_factory.should_retrain(self.vdb_config, index, ntotal):
+            return False
+
+        return self.raw_vectors is not None or index_factory.stores_exact_vectors(index)
+
+    def _migrate_index(self, index, doc_map: ColumnarDocMap):
+        """
+        Flat 过渡索引达到 train_threshold 后，训练目标索引并迁移全部向量；
+        IVF 索引的 nlist 落后于数据量时同样重新训练
+
+        迁移保留原 chunk_id（顺带丢弃墓碑向量），返回新索引
+        """
+
+        ntotal = index.ntotal
+
+        logger.info(
+            "op=faiss_index_migrate_start "
+            f"index_type={self.vdb_config.index_type} "
+            f"from={index_factory.index_kind(index)} "
+            f"ntotal={ntotal}"
+        )
+        start = _time.time()
+
+        ids, vectors = index_factory.export_vectors(index)
+        if self.raw_vectors is not None and not index_factory.stores_exact_vectors(index):
+            # 压缩 / 降维索引解码出的是近似向量，用原始向量训练与写入
+            vectors = self.raw_vectors.take(ids)
+
+        if len(doc_map.tombstones):
+            keep = ~np.isin(ids, doc_map.tombstones)
+            ids, vectors = ids[keep], vectors[keep]
+            doc_map.drop_tombstones(doc_map.tombstones)
+
+        migrated = index_factory.build_index(self.vdb_config, ntotal)
+        index_factory.train_index(migrated, vectors, self.vdb_config.max_train_points)
+        migrated.add_with_ids(vectors, ids)
+
+        logger.info(
+            "op=faiss_index_migrate_done "
+            f"time={_time.time() - start:.2f}s"
+        )
+
+        return migrated
+
     # ============ 向量检索 ============
     def search(
         self,
         query_vector: np.ndarray,
-        top_k: int = 10
+        top_k: int = 10,
+        nprobe: int = None,
+        ef_search: int = None,
+        search_filter: SearchFilter = None,
+        min_score: float = None,
     ) -> list[dict]:
         """
         查询
 
+        nprobe: IVF 探测聚类数（仅本次请求生效）
+        ef_search: HNSW 搜索宽度（仅本次请求生效）
+        search_filter: 按 file_id / created_at 过滤，过滤在 FAISS 内完成
+        min_score: 范围检索，只返回 score >= min_score 的结果（top_k 为上限）
+
         return:
         [
             {
@@ -176,99 +820,488 @@ class FaissVectorStore(IVectorStore):
         ]
         """
 
-        logger.info("op=chunk_search_start")
         if query_vector.ndim == 1:
             query_vector = query_vector.reshape(1, -1)
 
-        query_vector = self._normalize(query_vector)
+        return self.search_batch(
+            query_vector, top_k, nprobe, ef_search, search_filter, min_score
+        )[0]
 
-        scores, ids = self.index.search(query_vector, top_k)
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        top_k: int = 10,
+        nprobe: int = None,
+        ef_search: int = None,
+        search_filter: SearchFilter = None,
+        min_score: float = None,
+    ) -> list[list[dict]]:
+        """
+        批量查询（一次 index.search）
 
-        results = []
+        queries: (n, dim)
+        search_filter: 对所有查询生效的过滤条件
+        min_score: 范围检索阈值，每个查询返回的结果数不固定
 
-        for score, idx in zip(scores[0], ids[0]):
-            if idx == -1:
-                continue
+        return: 每个查询一个结果列表，格式同 search
+        """
 
-            meta = self.doc_map.chunks.get(idx)
-            if not meta:
-                continue
+        logger.info(f"op=chunk_search_start queries={queries.shape[0]}")
+        if queries.ndim != 2:
+            raise ValueError("queries must be 2D array")
+
+        queries = self._normalize(queries)
+
+        # 整个请求只读取同一个快照
+        snap = self._snapshot
+
+        # 二值预筛选（无过滤条件时）：Hamming 候选 + 原始向量重排
+        prefilter = snap.binary is not None and search_filter is None
+
+        # 压缩索引先多取候选，再用原始向量精排
+        refine = (
+            not prefilter
+            and self.raw_vectors is not None
+            and index_factory.index_codec(snap.index) != index_factory.CODEC_NONE
+        )
+        k = top_k * self.vdb_config.refine_k_factor if refine else top_k
+
+        # 过滤条件对索引与 delta 共用同一候选集
+        selected = snap.doc_map.select_ids(search_filter) if search_filter is not None else None
+
+        # 快照中的索引不会被修改，检索无需与写入互斥
+        if prefilter:
+            scores, ids = self._binary_search(snap, queries, top_k)
+        elif min_score is not None and search_filter is None and not refine:
+            scores, ids = self._range_search(snap, queries, top_k, min_score, nprobe, ef_search)
+        elif search_filter is None:
+            params = index_factory.search_params(snap.index, nprobe, ef_search, sel=snap.exclude)
+            scores, ids = snap.index.search(queries, k, params=params)
+        else:
+            scores, ids = self._filtered_search(snap, queries, k, nprobe, ef_search, selected)
+
+        if refine:
+            scores, ids = self._refine(queries, ids, top_k)
+
+        if len(snap.delta):
+            scores, ids = self._merge_delta(snap, queries, scores, ids, top_k, selected)
+
+        # 向量化查询 file_id，不逐条构造 ChunkMeta
+        file_ids = snap.doc_map.lookup_file_ids(ids.ravel())
+        k = ids.shape[1]
+        batch = []
+
+        for row, (row_scores, row_ids) in enumerate(zip(scores.tolist(), ids.tolist())):
+            results = []
+
+            for col, (score, idx) in enumerate(zip(row_scores, row_ids)):
+                if idx == -1:
+                    continue
+
+                # knn 退化路径（过滤 / 精排 / 二值预筛选 / 索引不支持范围检索）在此按阈值截断
+                if min_score is not None and score < min_score:
+                    break
+
+                file_id = file_ids[row * k + col]
+                if file_id is None:
+                    continue
+
+                results.append({
+                    "file_id": file_id,
+                    "score": score,
+                    "chunk_id": idx,
+                })
+
+            batch.append(results)
 
-            results.append({
-                "file_id": meta.file_id,
-                "score": float(score),
-                "chunk_id": int(idx),
-            })
         logger.info(
             "op=chunk_search_done "
-            f"results_count={len(results)}"
+            f"results_count={sum(len(r) for r in batch)}"
+        )
+
+        return batch
+
+    def _range_search(
+        self,
+        snap: _Snapshot,
+        queries: np.ndarray,
+        max_results: int,
+        min_score: float,
+        nprobe: int,
+        ef_search: int,
+    ):
+        """
+        范围检索：faiss range_search 取 score > min_score 的全部结果，
+        每个查询按 score 降序保留 max_results 个，输出格式同 index.search
+
+        索引不支持 range_search 时退化为 knn（由调用方按阈值截断）
+        """
+
+        params = index_factory.search_params(snap.index, nprobe, ef_search, sel=snap.exclude)
+
+        try:
+            lims, dists, labels = snap.index.range_search(queries, min_score, params=params)
+        except RuntimeError:
+            logger.warning(
+                "op=faiss_range_search_unsupported "
+                f"index_type={index_factory.index_kind(snap.index)} "
+                "fallback=knn"
+            )
+            return snap.index.search(queries, max_results, params=params)
+
+        n = queries.shape[0]
+        scores = np.full((n, max_results), -np.inf, dtype="float32")
+        ids = np.full((n, max_results), -1, dtype="int64")
+
+        for row in range(n):
+            row_scores = dists[lims[row]:lims[row + 1]]
+            order = np.argsort(-row_scores)[:max_results]
+
+            scores[row, :len(order)] = row_scores[order]
+            ids[row, :len(order)] = labels[lims[row]:lims[row + 1]][order]
+
+        return scores, ids
+
+    def _binary_search(self, snap: _Snapshot, queries: np.ndarray, top_k: int):
+        """
+        二值预筛选：符号位编码按 Hamming 距离取 top_k * binary_k_factor 个候选，
+        再用原始向量精确内积重排，输出格式同 index.search
+        """
+
+        n = queries.shape[0]
+        if not snap.binary.ntotal:
+            return (
+                np.full((n, top_k), -np.inf, dtype="float32"),
+                np.full((n, top_k), -1, dtype="int64"),
+            )
+
+        k = min(top_k * self.vdb_config.binary_k_factor, snap.binary.ntotal)
+        _, ids = snap.binary.search(binary_index.binary_codes(queries), k)
+
+        # 墓碑（已删除）候选不参与重排
+        file_ids = snap.doc_map.lookup_file_ids(ids.ravel())
+        live = np.fromiter((f is not None for f in file_ids), dtype=bool, count=ids.size)
+        ids = np.where(live.reshape(ids.shape), ids, -1)
+
+        return self._refine(queries, ids, top_k)
+
+    def _filtered_search(
+        self,
+        snap: _Snapshot,
+        queries: np.ndarray,
+        top_k: int,
+        nprobe: int,
+        ef_search: int,
+        selected: np.ndarray,
+    ):
+        """
+        过滤检索（selected: 过滤条件选中的 chunk_id）
+
+        - 候选很少：直接取回候选向量精确计算，保证返回完整 top_k
+        - 否则：编译为 IDSelector 交给 FAISS，在扫描时跳过未选中的 id
+
+        delta 中的候选由 _merge_delta 计算，这里只检索索引
+        """
+
+        if len(snap.delta):
+            selected = selected[~np.isin(selected, snap.delta.ids)]
+        n = queries.shape[0]
+
+        if not len(selected):
+            return (
+                np.full((n, top_k), -np.inf, dtype="float32"),
+                np.full((n, top_k), -1, dtype="int64"),
+            )
+
+        if len(selected) <= self.vdb_config.filter_brute_force_max:
+            if self.raw_vectors is not None:
+                vectors = self.raw_vectors.take(selected)
+            else:
+                vectors = snap.index.reconstruct_batch(selected)
+            return self._exact_topk(queries, vectors, selected, top_k)
+
+        sel = index_factory.id_selector(selected, snap.doc_map.next_id)
+        params = index_factory.search_params(snap.index, nprobe, ef_search, sel=sel)
+
+        return snap.index.search(queries, top_k, params=params)
+
+    def _merge_delta(
+        self,
+        snap: _Snapshot,
+        queries: np.ndarray,
+        scores: np.ndarray,
+        ids: np.ndarray,
+        top_k: int,
+        selected: np.ndarray = None,
+    ):
+        """
+        对未并入索引的追加向量精确计算 top_k（排除墓碑与未被过滤条件选中的），
+        与索引结果按得分合并，输出格式同 index.search
+        """
+
+        delta = snap.delta
+        keep = ~np.isin(delta.ids, snap.doc_map.tombstones)
+        if selected is not None:
+            keep &= np.isin(delta.ids, selected)
+        if not keep.any():
+            return scores, ids
+
+        delta_scores, delta_ids = self._exact_topk(queries, delta.vectors[keep], delta.ids[keep], top_k)
+
+        scores = np.concatenate([np.where(ids >= 0, scores, -np.inf), delta_scores], axis=1)
+        ids = np.concatenate([ids, delta_ids], axis=1)
+        order = np.argsort(-scores, axis=1, kind="stable")[:, :top_k]
+
+        return (
+            np.take_along_axis(scores, order, axis=1),
+            np.take_along_axis(ids, order, axis=1),
+        )
+
+    def _refine(self, queries: np.ndarray, ids: np.ndarray, top_k: int):
+        """
+        用原始向量重新计算候选得分，取 top_k
+        """
+
+        valid = ids >= 0
+        vectors = self.raw_vectors.take(np.where(valid, ids, self.id_base))
+
+        sims = np.einsum("nd,nkd->nk", queries, vectors)
+        sims[~valid] = -np.inf
+
+        order = np.argsort(-sims, axis=1)[:, :top_k]
+
+        return (
+            np.take_along_axis(sims, order, axis=1),
+            np.take_along_axis(ids, order, axis=1),
         )
 
-        return results
+    @staticmethod
+    def _exact_topk(queries: np.ndarray, vectors: np.ndarray, ids: np.ndarray, top_k: int):
+        """
+        对少量候选做精确内积 top_k，输出格式同 index.search
+        """
+
+        n, m = queries.shape[0], vectors.shape[0]
+        sims = queries @ vectors.T
+
+        k = min(top_k, m)
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(sims, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        top = np.take_along_axis(top, order, axis=1)
 
-    # ============ 逻辑删除向量（重建索引） ============
+        scores = np.full((n, top_k), -np.inf, dtype="float32")
+        result_ids = np.full((n, top_k), -1, dtype="int64")
+        scores[:, :k] = np.take_along_axis(top_scores, order, axis=1)
+        result_ids[:, :k] = ids[top]
+
+        return scores, result_ids
+
+    # ============ 按 file_id 删除（墓碑） ============
     def delete_by_file(
         self,
         file_id: str
     ) -> bool:
         """
         根据 file_id 删除
-        FAISS 不支持物理删除 → 重建索引
+
+        只移除映射表并记录墓碑，不修改索引，立即返回；
+        向量由后台压缩物理移除，其余 chunk_id 不变
         """
 
         logger.info(
             "op=chunk_delete_start "
             f"file_id={file_id}"
         )
+        self._check_writable()
 
-        keep_ids = []
-        for cid, meta in self.doc_map.chunks.items():
-            if meta.file_id != file_id:
-                keep_ids.append(cid)
+        with self._write_lock:
+            ids = self.doc_map.ids_of_file(file_id)
+            if not len(ids):
+                logger.info("op=chunk_del_empty")
+                return True
 
-        if not keep_ids:
-            logger.warning("⚠️ No vectors to keep, reset index")
-            self._reset()
-            logger.info("op=chunk_del_empty")
-            return True
+            doc_map = self.doc_map.copy()
+            self._apply_delete(doc_map, ids)
+            self.last_write = _time.time()
 
-        keep_ids = np.array(keep_ids)
+            self.wal.append_delete(file_id, ids)
+            self._publish(self.index, doc_map)
+            self._maybe_checkpoint()
 
-        # 全量拷贝，可能存在性能隐患，需要优化
-        vectors = self.index.reconstruct_n(0, self.index.ntotal)
-        keep_vectors = vectors[keep_ids]
+        if self.compactor is not None:
+            self.compactor.notify()
 
-        # 重建索引
-        self.index = faiss.IndexFlatIP(self.dim)
-        self.index.add(keep_vectors)
+        logger.info(
+            "op=chunk_delete_done "
+            f"tombstoned={len(ids)}"
+        )
+        return True
 
-        # 重建 map
-        new_chunks = {}
-        for new_id, old_id in enumerate(keep_ids):
-            meta = self.doc_map.chunks[old_id]
-            meta.chunk_id = new_id
-            new_chunks[new_id] = meta
+    def _apply_delete(self, doc_map: ColumnarDocMap, ids: np.ndarray):
+        doc_map.remove(ids)
+        doc_map.add_tombstones(ids)
 
-        self.doc_map = DocMap(
-            next_id=len(keep_ids),
-            chunks=new_chunks
-        )
+    # ============ 压缩：物理移除墓碑向量 ============
+    def compact(self, progress=None) -> dict:
+        """
+        物理移除墓碑向量（由 Compactor 后台调用）
 
-        self._save()
-        logger.info("op=chunk_delete_done")
-        return True
+        已发布的索引不再修改，复制与移除都在写锁外进行，期间检索与写入照常；
+        期间新增的向量留在 delta，发布后由 checkpoint 并入新索引并回收磁盘空间
+
+        progress: 回调 (phase, done, total)
+        """
+
+        self._check_writable()
+        report = progress or (lambda phase, done, total: None)
+        start = _time.time()
+
+        with self._write_lock:
+            base = self._snapshot
+            purge = base.doc_map.tombstones
+            if not len(purge):
+                return {"reclaimed_vectors": 0, "reclaimed_bytes": 0, "duration": 0.0}
+
+            epoch = self._epoch
+            self._compacting = True
+
+        try:
+            report("clone", 0, len(purge))
+            index = faiss.clone_index(base.index)
+            binary = None
+            if base.binary is not None:
+                binary = binary_index.clone_binary_index(base.binary)
+
+            report("remove", 0, len(purge))
+            index = self._remove_ids(index, purge)
+            report("remove", len(purge), len(purge))
+
+            if binary is not None:
+                binary = binary_index.remove_binary_ids(self.vdb_config, binary, purge)
+
+            with self._write_lock:
+                self._compacting = False
+
+                if epoch != self._epoch:
+                    logger.warning("op=vdb_compact_aborted reason=index_replaced")
+                    return {"reclaimed_vectors": 0, "reclaimed_bytes": 0, "duration": 0.0}
+
+                # 期间的追加仍在 delta 中；其中已删除的随墓碑一并丢弃
+                snap = self._snapshot
+                doc_map = snap.doc_map.copy()
+                doc_map.drop_tombstones(purge)
+
+                # 按索引占用计算回收量（索引文件大小在 checkpoint 前可能已过期，差值不可靠）
+                before = self._index_memory_bytes(snap)
+                self._publish(index, doc_map, binary, delta=snap.delta.without(purge))
+                after = self._index_memory_bytes(self._snapshot)
+
+                report("checkpoint", 0, 1)
+                self.checkpoint()
+        finally:
+            with self._write_lock:
+                self._compacting = False
+
+        return {
+            "reclaimed_vectors": int(len(purge)),
+            "reclaimed_bytes": max(before - after, 0),
+            "duration": _time.time() - start,
+        }
+
+    @staticmethod
+    def _index_memory_bytes(snap: _Snapshot) -> int:
+        """
+        快照中索引与二值索引的内存占用
+        """
+
+        total = index_factory.memory_bytes(snap.index) + snap.delta.vectors.nbytes
+        if snap.binary is not None:
+            total += binary_index.memory_bytes(snap.binary)
+
+        return total
+
+    def _remove_ids(self, index, ids: np.ndarray):
+        """
+        从索引中移除指定 id，返回修改后的索引（可能是重建的新索引）
+        """
+
+        try:
+            index.remove_ids(index_factory.remove_selector(index, ids))
+            return index
+        except RuntimeError:
+            # HNSW 不支持物理删除，退化为重建
+            logger.warning("op=faiss_remove_ids_unsupported fallback=rebuild")
+
+        all_ids, vectors = index_factory.export_vectors(index)
+        keep = ~np.isin(all_ids, ids)
+
+        rebuilt = index_factory.build_index(self.vdb_config, int(keep.sum()))
+        index_factory.train_index(rebuilt, vectors[keep], self.vdb_config.max_train_points)
+        rebuilt.add_with_ids(vectors[keep], all_ids[keep])
+
+        return rebuilt
 
     # ============ 获取向量库信息 ============
     def info(self):
+        snap = self._snapshot
+
+        return {
+            "total_vectors": snap.index.ntotal + len(snap.delta) - len(snap.doc_map.tombstones),
+            "tombstones": len(snap.doc_map.tombstones),
+            "index_type": index_factory.index_kind(snap.index),
+            "codec": index_factory.index_codec(snap.index),
+            "transform": index_factory.index_transform(snap.index),
+            "refine": self.raw_vectors is not None,
+            "binary_prefilter": self.vdb_config.binary_index_type if snap.binary is not None else None,
+            "read_only": self.read_only,
+            "mmapped": self.mmapped,
+            "total_files": snap.doc_map.live_files,
+            "compaction": self.compactor.status if self.compactor is not None else None,
+            "recovery": self.recovery_report,
+        }
+
+    def stats(self, file_id: str = None) -> dict:
+        """
+        增量维护的统计信息，开销与数据量无关
+
+        file_id: 指定时只返回该文件的 chunk 数与文本字节数
+        """
+
+        snap = self._snapshot
+
+        if file_id is not None:
+            return snap.doc_map.file_stats(file_id)
+
         return {
-            "total_vectors": self.index.ntotal,
-            "total_files": len(set(self.doc_map.chunks.values())),
+            "files": snap.doc_map.live_files,
+            "chunks": len(snap.doc_map),
+            "text_bytes": snap.doc_map.text_bytes,
+            "vectors": snap.index.ntotal + len(snap.delta),
+            "tombstones": len(snap.doc_map.tombstones),
+            "index_memory_bytes": index_factory.memory_bytes(snap.index) + snap.delta.vectors.nbytes,
+            "binary_index_bytes": binary_index.memory_bytes(snap.binary) if snap.binary is not None else 0,
+            "raw_vector_bytes": self.raw_vectors.nbytes() if self.raw_vectors is not None else 0,
+            "wal_bytes": self.wal.size_bytes(),
+            "doc_map_bytes": snap.doc_map.nbytes(),
+            "index_file_bytes": os.path.getsize(self.index_path) if os.path.exists(self.index_path) else 0,
+            "doc_map_file_bytes": os.path.getsize(self.map_path) if os.path.exists(self.map_path) else 0,
         }
 
     # ============ 重置向量库 ============
     def _reset(self):
-        self.index = faiss.IndexFlatIP(self.dim)
+        doc_map = ColumnarDocMap()
+        doc_map.next_id = self.id_base
+
+        with self._write_lock:
+            binary = None
+            if self.vdb_config.binary_prefilter:
+                binary = binary_index.build_binary_index(self.vdb_config)
+
+            self._publish(index_factory.build_initial_index(self.vdb_config), doc_map, binary, delta=_EMPTY_DELTA)
+            self._epoch += 1
 
-        self.doc_map = DocMap()
+            if self.raw_vectors is not None:
+                self.raw_vectors.reset()
 
-        self._save()
+            self.checkpoint()
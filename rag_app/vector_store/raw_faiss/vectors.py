@@ -0,0 +1,173 @@
+import os
+import logging
+
+import numpy as np
+
+
+logger = logging.getLogger("VDB")
+
+# 范数与 1 的偏差在此范围内视为已归一化（bge 输出已归一化，float32 舍入误差约 1e-7）
+_UNIT_NORM_TOLERANCE = 1e-5
+
+
+# ======================
+# 写入路径的向量缓冲区
+# ======================
+
+def as_matrix(vectors) -> np.ndarray:
+    """
+    转为连续的 float32 (n, dim) 数组，已满足时原样返回（不复制）
+    """
+
+    vectors = np.ascontiguousarray(vectors, dtype="float32")
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+
+    return vectors
+
+
+def normalize_rows(vectors: np.ndarray, copy: bool = True) -> np.ndarray:
+    """
+    按行 L2 归一化（适合 inner product 搜索），零向量保持为零
+
+    已归一化时原样返回，不分配新数组；copy=False 时原地修改 vectors
+    （调用方交出缓冲区，只读数组仍会复制）
+    """
+
+    vectors = as_matrix(vectors)
+
+    norms = np.sqrt(np.einsum("ij,ij->i", vectors, vectors))
+    if np.all(np.abs(norms - 1) <= _UNIT_NORM_TOLERANCE):
+        return vectors
+
+    norms[norms == 0] = 1e-12
+    if copy or not vectors.flags.writeable:
+        return vectors / norms[:, None]
+
+    vectors /= norms[:, None]
+    return vectors
+
+
+def embed_matrix(embedder, texts: list[str]) -> np.ndarray:
+    """
+    批量 embedding，返回一个连续的 float32 (n, dim) 缓冲区
+
+    嵌入模型提供 embed_documents_array 时直接使用其数组输出，
+    不经过每个元素一个 Python float 的嵌套列表（约为 float32 数组的 8 倍内存）
+    """
+
+    if not texts:
+        return np.empty((0, 0), dtype="float32")
+
+    if hasattr(embedder, "embed_documents_array"):
+        return as_matrix(embedder.embed_documents_array(texts))
+
+    return as_matrix(embedder.embed_documents(texts))
+
+
+class RawVectorFile:
+    """
+    原始（float32）向量文件
+
+    第 i 行保存 chunk_id = id_base + i 的归一化向量，删除的行保留不回收。
+    压缩索引只在内存中保存编码，精排时按 id 从本文件（page cache）读取少量候选行，
+    内存占用与原始向量数量无关
+
+    写入不单独 fsync：崩溃后由变更日志回放重写（按 id 定位，幂等），
+    checkpoint 时 sync
+    """
+
+    def __init__(self, path: str, dim: int, id_base: int = 0, read_only: bool = False):
+        self.path = path
+        self.dim = dim
+        self.id_base = id_base
+        self.read_only = read_only
+
+        self._row_bytes = dim * 4
+        self._fd = None
+        self._view = None
+
+    # ======================
+    # Internal
+    # ======================
+
+    def _open(self) -> int:
+        if self._fd is None:
+            flags = os.O_RDONLY if self.read_only else os.O_RDWR | os.O_CREAT
+            self._fd = os.open(self.path, flags, 0o644)
+        return self._fd
+
+    def _rows(self) -> np.ndarray:
+        """
+        整个文件的只读映射（文件增长后重新映射）
+        """
+
+        if not os.path.exists(self.path):
+            return np.empty((0, self.dim), dtype="float32")
+
+        rows = os.path.getsize(self.path) // self._row_bytes
+        if self._view is None or self._view.shape[0] != rows:
+            if rows == 0:
+                return np.empty((0, self.dim), dtype="float32")
+            self._view = np.memmap(self.path, dtype="float32", mode="r", shape=(rows, self.dim))
+
+        return self._view
+
+    # ======================
+    # Public API
+    # ======================
+
+    def write(self, ids: np.ndarray, vectors: np.ndarray):
+        """
+        按 id 写入向量（连续 id 一次写入）
+        """
+
+        if self.read_only:
+            raise RuntimeError("vector file is read-only")
+
+        if not len(ids):
+            return
+
+        fd = self._open()
+        rows = np.asarray(ids, dtype="int64") - self.id_base
+        vectors = as_matrix(vectors)
+
+        # 直接写出数组的缓冲区，不经过 tobytes 复制
+        if rows[-1] - rows[0] + 1 == len(rows):
+            os.pwrite(fd, memoryview(vectors).cast("B"), int(rows[0]) * self._row_bytes)
+            return
+
+        for row, vec in zip(rows.tolist(), vectors):
+            os.pwrite(fd, memoryview(vec).cast("B"), row * self._row_bytes)
+
+    def take(self, ids: np.ndarray) -> np.ndarray:
+        """
+        读取指定 id 的向量（返回副本，形状为 ids.shape + (dim,)）
+        """
+
+        ids = np.asarray(ids, dtype="int64")
+        return np.asarray(self._rows()[ids - self.id_base])
+
+    def sync(self):
+        if self._fd is not None and not self.read_only:
+            os.fsync(self._fd)
+
+    def reset(self):
+        """
+        清空（向量库重置时调用）
+        """
+
+        self.close()
+        with open(self.path, "wb"):
+            pass
+
+    def nbytes(self) -> int:
+        if os.path.exists(self.path):
+            return os.path.getsize(self.path)
+        return 0
+
+    def close(self):
+        self._view = None
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,293 @@
+import os
+import json
+import struct
+import zlib
+import logging
+from dataclasses import dataclass, field
+from typing import Iterator, Optional
+
+import numpy as np
+
+
+logger = logging.getLogger("VDB")
+
+# 记录类型
+OP_ADD = 1
+OP_DELETE = 2
+# checkpoint 已写出索引（映射表尚未写出），payload 为索引覆盖到的 lsn
+OP_CHECKPOINT = 3
+
+# 记录头：lsn, op, payload 长度, payload crc32
+_HEADER = struct.Struct("<QBII")
+
+# ADD payload 头：向量数, 维度, metas json 长度
+_ADD_HEADER = struct.Struct("<III")
+
+
+@dataclass
+class LogRecord:
+    """
+    变更日志记录
+    """
+
+    lsn: int
+    op: int
+    ids: np.ndarray = field(default_factory=lambda: np.empty(0, dtype="int64"))
+    vectors: Optional[np.ndarray] = None
+    metas: list[dict] = field(default_factory=list)
+    file_id: Optional[str] = None
+    # OP_CHECKPOINT：索引覆盖到的 lsn
+    index_lsn: Optional[int] = None
+
+
+class MutationLog:
+    """
+    向量库变更日志（追加写）
+
+    职责：
+    - 记录 add / delete 的增量（向量 + ChunkMeta / 删除的 id）
+    - 启动时回放 checkpoint 之后的记录
+    - checkpoint 完成后清空
+
+    写入代价为 O(增量)，全量索引与映射只在 checkpoint 时落盘
+    """
+
+    def __init__(
+        self,
+        path: str,
+        start_lsn: int = 0,
+        fsync: bool = True,
+        read_only: bool = False,
+    ):
+        self.path = path
+        self.fsync = fsync
+        self.read_only = read_only
+
+        self.last_lsn = start_lsn
+        self.records = 0
+
+        self._fp = None
+
+    # ======================
+    # Internal
+    # ======================
+
+    def _open(self):
+        if self._fp is None:
+            self._fp = open(self.path, "ab")
+        return self._fp
+
+    def _append(self, op: int, parts: list) -> int:
+        """
+        追加一条记录，payload 由 parts（bytes / 连续数组）依次拼成
+
+        逐段计算校验和并写出，不把大块向量复制成一个 payload
+        """
+
+        if self.read_only:
+            raise RuntimeError("mutation log is read-only")
+
+        lsn = self.last_lsn + 1
+
+        parts = [memoryview(part).cast("B") for part in parts]
+        crc = 0
+        for part in parts:
+            crc = zlib.crc32(part, crc)
+
+        fp = self._open()
+        fp.write(_HEADER.pack(lsn, op, sum(len(part) for part in parts), crc))
+        for part in parts:
+            fp.write(part)
+        fp.flush()
+
+        if self.fsync:
+            os.fsync(fp.fileno())
+
+        self.last_lsn = lsn
+        self.records += 1
+
+        return lsn
+
+    @staticmethod
+    def _decode(lsn: int, op: int, payload: bytes) -> LogRecord:
+        if op == OP_ADD:
+            n, dim, meta_len = _ADD_HEADER.unpack_from(payload, 0)
+            pos = _ADD_HEADER.size
+
+            ids = np.frombuffer(payload, dtype="int64", count=n, offset=pos)
+            pos += ids.nbytes
+
+            vectors = np.frombuffer(
+                payload, dtype="float32", count=n * dim, offset=pos
+            ).reshape(n, dim)
+            pos += vectors.nbytes
+
+            metas = json.loads(payload[pos:pos + meta_len].decode("utf-8"))
+
+            return LogRecord(lsn=lsn, op=op, ids=ids, vectors=vectors, metas=metas)
+
+        if op == OP_DELETE:
+            (n,) = struct.unpack_from("<I", payload, 0)
+            ids = np.frombuffer(payload, dtype="int64", count=n, offset=4)
+            file_id = payload[4 + ids.nbytes:].decode("utf-8")
+
+            return LogRecord(lsn=lsn, op=op, ids=ids, file_id=file_id)
+
+        if op == OP_CHECKPOINT:
+            (index_lsn,) = struct.unpack_from("<Q", payload, 0)
+            return LogRecord(lsn=lsn, op=op, index_lsn=index_lsn)
+
+        raise ValueError(f"unknown wal op: {op}")
+
+    # ======================
+    # Public API
+    # ======================
+
+    def append_add(self, ids: np.ndarray, vectors: np.ndarray, metas: list[dict]) -> int:
+        """
+        记录新增向量
+        """
+
+        ids = np.ascontiguousarray(ids, dtype="int64")
+        vectors = np.ascontiguousarray(vectors, dtype="float32")
+        meta_bytes = json.dumps(metas, ensure_ascii=False).encode("utf-8")
+
+        return self._append(OP_ADD, [
+            _ADD_HEADER.pack(vectors.shape[0], vectors.shape[1], len(meta_bytes)),
+            ids,
+            vectors,
+            meta_bytes,
+        ])
+
+    def append_delete(self, file_id: str, ids: np.ndarray) -> int:
+        """
+        记录删除
+        """
+
+        ids = np.ascontiguousarray(ids, dtype="int64")
+
+        return self._append(OP_DELETE, [
+            struct.pack("<I", ids.shape[0]),
+            ids,
+            file_id.encode("utf-8"),
+        ])
+
+    def append_checkpoint(self, index_lsn: int) -> int:
+        """
+        记录索引文件已替换、覆盖到 index_lsn（映射表随后写出，之后清空日志）
+
+        两者之间崩溃时映射表仍停在上一次 checkpoint，回放据此只核对该区间内记录的 id
+        """
+
+        return self._append(OP_CHECKPOINT, [struct.pack("<Q", index_lsn)])
+
+    def index_lsn(self, after_lsn: int) -> Optional[int]:
+        """
+        lsn > after_lsn 的最后一条 checkpoint 记录中索引覆盖到的 lsn，没有时为 None
+
+        只读取记录头并跳过其余记录的 payload
+        """
+
+        if not os.path.exists(self.path):
+            return None
+
+        found = None
+
+        with open(self.path, "rb") as f:
+            while True:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    break
+
+                lsn, op, length, crc = _HEADER.unpack(header)
+                if op != OP_CHECKPOINT:
+                    f.seek(length, os.SEEK_CUR)
+                    continue
+
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+
+                if lsn > after_lsn:
+                    found = self._decode(lsn, op, payload).index_lsn
+
+        return found
+
+    def replay(self, after_lsn: int) -> Iterator[LogRecord]:
+        """
+        读取 lsn > after_lsn 的记录
+
+        遇到截断或校验失败的尾部记录时停止，并截掉损坏部分
+        """
+
+        if not os.path.exists(self.path):
+            return
+
+        valid_end = 0
+
+        with open(self.path, "rb") as f:
+            while True:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    break
+
+                lsn, op, length, crc = _HEADER.unpack(header)
+                payload = f.read(length)
+
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    logger.warning(f"op=wal_torn_tail lsn={lsn} offset={valid_end}")
+                    break
+
+                valid_end = f.tell()
+                self.last_lsn = max(self.last_lsn, lsn)
+
+                if lsn <= after_lsn:
+                    continue
+
+                self.records += 1
+                yield self._decode(lsn, op, payload)
+
+        # 截掉损坏的尾部，后续追加从完整记录之后开始（只读时由写入方处理）
+        if not self.read_only and os.path.getsize(self.path) != valid_end:
+            with open(self.path, "r+b") as f:
+                f.truncate(valid_end)
+
+    def size_bytes(self) -> int:
+        """
+        日志文件大小
+        """
+
+        if self._fp is not None:
+            return self._fp.tell()
+
+        if os.path.exists(self.path):
+            return os.path.getsize(self.path)
+
+        return 0
+
+    def sync(self):
+        """
+        落盘已追加的记录（逐条不 fsync 时由提交协议按组调用）
+        """
+
+        if self._fp is not None:
+            self._fp.flush()
+            os.fsync(self._fp.fileno())
+
+    def reset(self):
+        """
+        checkpoint 后清空日志（lsn 继续递增）
+        """
+
+        self.close()
+
+        with open(self.path, "wb") as f:
+            if self.fsync:
+                os.fsync(f.fileno())
+
+        self.records = 0
+
+    def close(self):
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
@@ -0,0 +1,394 @@
+import os
+import base64
+import shutil
+import logging
+import tarfile
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+import requests
+
+from rag_app.core.interface import IVectorStore, IMetadataRepository
+from rag_app.vector_store.types import ChunkMeta, SearchFilter, FileMeta, ArticleMeta
+from rag_app.vector_store.snapshot import read_manifest
+
+
+logger = logging.getLogger("VDB")
+
+# 检索结果附带的 chunk 元数据缓存条数
+_META_CACHE_SIZE = 10000
+
+# 下载快照的读块大小
+_DOWNLOAD_CHUNK = 1024 * 1024
+
+# 快照中向量库文件的成员前缀
+_STORE_PREFIX = "vector_store/"
+
+
+def encode_vectors(vectors: np.ndarray) -> dict:
+    """
+    (n, dim) 向量 -> {"vectors": base64(float32 小端字节), "shape": [n, dim]}
+    """
+
+    vectors = np.ascontiguousarray(vectors, dtype="<f4")
+    if vectors.ndim == 1:
+        vectors = vectors.reshape(1, -1)
+
+    return {
+        "vectors": base64.b64encode(vectors.data).decode("ascii"),
+        "shape": list(vectors.shape),
+    }
+
+
+def decode_vectors(data: str, shape: List[int]) -> np.ndarray:
+    """
+    encode_vectors 的逆变换（返回可写的 float32 数组）
+    """
+
+    buf = bytearray(base64.b64decode(data))
+    return np.frombuffer(buf, dtype="<f4").reshape(shape).astype("float32", copy=False)
+
+
+class VectorServiceClient:
+    """
+    独立向量库服务（vdb_service）的 HTTP 客户端，连接复用
+
+    服务端返回非 2xx 时抛出 RuntimeError（带服务端错误信息）
+    """
+
+    def __init__(self, url: str, timeout: float):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    def _check(self, response) -> dict:
+        if response.status_code >= 400:
+            try:
+                detail = response.json().get("error", response.text)
+            except ValueError:
+                detail = response.text
+            raise RuntimeError(f"vector service error {response.status_code}: {detail}")
+
+        return response.json()
+
+    def get(self, path: str, **params) -> dict:
+        response = self._session.get(self.url + path, params=params, timeout=self.timeout)
+        return self._check(response)
+
+    def post(self, path: str, payload: dict) -> dict:
+        response = self._session.post(self.url + path, json=payload, timeout=self.timeout)
+        return self._check(response)
+
+    def delete(self, path: str) -> dict:
+        response = self._session.delete(self.url + path, timeout=self.timeout)
+        return self._check(response)
+
+    def download(self, path: str, out_path: str) -> int:
+        """
+        GET 响应体流式写入 out_path（临时文件 + 原子替换），返回字节数
+        """
+
+        with self._session.get(self.url + path, stream=True, timeout=self.timeout) as response:
+            if response.status_code >= 400:
+                self._check(response)
+
+            tmp_path = out_path + ".tmp"
+            size = 0
+            with open(tmp_path, "wb") as f:
+                for block in response.iter_content(chunk_size=_DOWNLOAD_CHUNK):
+                    f.write(block)
+                    size += len(block)
+
+        os.replace(tmp_path, out_path)
+        return size
+
+    def close(self):
+        self._session.close()
+
+
+class RemoteVectorStore(IVectorStore):
+    """
+    远程向量存储（IVectorStore 的 HTTP 实现）
+
+    - 检索一次请求完成整批查询，并附带命中 chunk 的元数据，
+      随后的 get(chunk_id) 命中本地缓存，不再逐条请求
+    - chunk_id 在服务实例内不复用；服务重启（epoch 变化）时清空缓存
+    """
+
+    def __init__(self, client: VectorServiceClient):
+        self.client = client
+
+        self._metas: "OrderedDict[int, ChunkMeta]" = OrderedDict()
+        self._epoch = None
+        self._lock = threading.Lock()
+
+    # ======================
+    # Internal
+    # ======================
+
+    def _cache(self, epoch: str, metas: Dict) -> Dict[int, Optional[ChunkMeta]]:
+        parsed = {
+            int(chunk_id): ChunkMeta.model_validate(meta) if meta is not None else None
+            for chunk_id, meta in metas.items()
+        }
+
+        with self._lock:
+            if epoch != self._epoch:
+                self._metas.clear()
+                self._epoch = epoch
+
+            for chunk_id, meta in parsed.items():
+                if meta is not None:
+                    self._metas[chunk_id] = meta
+                    self._metas.move_to_end(chunk_id)
+
+            while len(self._metas) > _META_CACHE_SIZE:
+                self._metas.popitem(last=False)
+
+        return parsed
+
+    # ======================
+    # IVectorStore
+    # ======================
+
+    def search(
+        self,
+        query_vector: np.ndarray,
+        top_k: int = 10,
+        nprobe: int = None,
+        ef_search: int = None,
+        search_filter: SearchFilter = None,
+        min_score: float = None,
+    ) -> list[dict]:
+        return self.search_batch(
+            np.asarray(query_vector, dtype="float32").reshape(1, -1),
+            top_k,
+            nprobe=nprobe,
+            ef_search=ef_search,
+            search_filter=search_filter,
+            min_score=min_score,
+        )[0]
+
+    def search_batch(
+        self,
+        queries: np.ndarray,
+        top_k: int = 10,
+        nprobe: int = None,
+        ef_search: int = None,
+        search_filter: SearchFilter = None,
+        min_score: float = None,
+    ) -> list[list[dict]]:
+        data = self.client.post("/search", {
+            **encode_vectors(queries),
+            "top_k": top_k,
+            "nprobe": nprobe,
+            "ef_search": ef_search,
+            "min_score": min_score,
+            "search_filter": search_filter.model_dump(mode="json") if search_filter is not None else None,
+            "with_meta": True,
+        })
+
+        self._cache(data["epoch"], data["metas"])
+
+        return data["results"]
+
+    def add(self, metas: list[ChunkMeta], vectors: np.ndarray) -> bool:
+        self.client.post("/chunks", {
+            **encode_vectors(vectors),
+            "metas": [meta.model_dump(mode="json") for meta in metas],
+        })
+        return True
+
+    def delete_by_file(self, file_id: str) -> bool:
+        self.client.delete(f"/files/{file_id}/chunks")
+
+        # 已删除的 chunk 不再由缓存返回
+        with self._lock:
+            for chunk_id in [cid for cid, meta in self._metas.items() if meta.file_id == file_id]:
+                del self._metas[chunk_id]
+
+        return True
+
+    def get(self, chunk_id: int) -> Optional[ChunkMeta]:
+        """
+        与本地存储一致：不存在（或已删除）的 chunk 返回 None
+        """
+
+        with self._lock:
+            meta = self._metas.get(chunk_id)
+        if meta is not None:
+            return meta
+
+        data = self.client.post("/chunks/get", {"chunk_ids": [int(chunk_id)]})
+        return self._cache(data["epoch"], data["metas"]).get(int(chunk_id))
+
+    def file_ids(self) -> list[str]:
+        return self.client.get("/files")["data"]["file_ids"]
+
+    def sync(self):
+        """
+        服务端每个写请求在返回前已按组提交落盘；此处再请求一次日志 fsync
+        """
+
+        self.client.post("/sync", {})
+
+    def stats(self, file_id: str = None) -> dict:
+        params = {"file_id": file_id} if file_id is not None else {}
+        return self.client.get("/stats", **params)["data"]
+
+    def info(self) -> dict:
+        return self.client.get("/info")["data"]
+
+    def export_snapshot(self, out_path: str) -> dict:
+        """
+        下载服务端的知识库快照（GET /snapshot，格式相同），返回其 manifest
+        """
+
+        size = self.client.download("/snapshot", out_path)
+        manifest = read_manifest(out_path)
+
+        logger.info(
+            "op=remote_snapshot_downloaded "
+            f"bytes={size} "
+            f"files={len(manifest['files'])}"
+        )
+
+        return manifest
+
+    def link_files(self, directory: str) -> dict:
+        """
+        服务端导出快照后取出其中的向量库文件写入 directory（名称同本地存储的 link_files）
+        """
+
+        os.makedirs(directory, exist_ok=True)
+        fd, path = tempfile.mkstemp(prefix=".remote-", suffix=".tar", dir=directory)
+        os.close(fd)
+
+        linked = {}
+        try:
+            self.client.download("/snapshot", path)
+            with tarfile.open(path, "r|") as tar:
+                for member in tar:
+                    if not member.isfile() or not member.name.startswith(_STORE_PREFIX):
+                        continue
+                    name = member.name[len(_STORE_PREFIX):]
+                    if name.startswith("/") or ".." in name.split("/"):
+                        raise ValueError(f"unexpected snapshot member: {member.name}")
+
+                    dst = os.path.join(directory, name)
+                    os.makedirs(os.path.dirname(dst), exist_ok=True)
+                    with tar.extractfile(member) as src, open(dst, "wb") as f:
+                        shutil.copyfileobj(src, f, _DOWNLOAD_CHUNK)
+                    linked[name] = (dst, member.size)
+        finally:
+            os.remove(path)
+
+        return linked
+
+    def close(self):
+        self.client.close()
+
+
+class RemoteMetadataRepository(IMetadataRepository):
+    """
+    远程元数据存储（IMetadataRepository 的 HTTP 实现）
+    """
+
+    def __init__(self, client: VectorServiceClient):
+        self.client = client
+
+    def add_file(self, meta: FileMeta):
+        self.client.post("/meta/files", meta.model_dump(mode="json"))
+
+    def add_article(self, meta: ArticleMeta):
+        self.add_articles([meta])
+
+    def add_articles(self, metas: list[ArticleMeta]):
+        self.client.post("/meta/articles", {"articles": [m.model_dump(mode="json") for m in metas]})
+
+    def get_file(self, file_id: str) -> Optional[FileMeta]:
+        meta = self.client.get(f"/meta/files/{file_id}")["data"].get("file")
+        return FileMeta.model_validate(meta) if meta is not None else None
+
+    def get_article(self, article_id: str) -> Optional[ArticleMeta]:
+        articles = self.client.post("/meta/articles/get", {"ids": [article_id]})["data"]["articles"]
+        meta = articles.get(article_id)
+        return ArticleMeta.model_validate(meta) if meta is not None else None
+
+    def remove_file(self, file_id: str):
+        self.client.delete(f"/meta/files/{file_id}")
+
+    def remove_article(self, article_id: str):
+        self.remove_articles([article_id])
+
+    def remove_articles(self, article_ids: list[str]):
+        self.client.post("/meta/articles/delete", {"ids": list(article_ids)})
+
+    def file_exists(self, file_id: str) -> bool:
+        return self.get_file(file_id) is not None
+
+    def article_exists(self, article_id: str) -> bool:
+        return self.get_article(article_id) is not None
+
+    def count_files(self) -> int:
+        return self.client.get("/meta/counts")["data"]["files"]
+
+    def count_articles(self) -> int:
+        return self.client.get("/meta/counts")["data"]["articles"]
+
+    def list_all_files(self) -> Dict[str, FileMeta]:
+        files = self.client.get("/meta/files")["data"]["files"]
+        return {file_id: FileMeta.model_validate(meta) for file_id, meta in files.items()}
+
+
+class RemoteArticleEmbeddingStore:
+    """
+    远程文章向量存储（与 ArticleEmbeddingStore 接口一致）
+    """
+
+    def __init__(self, client: VectorServiceClient):
+        self.client = client
+
+    def get(self, article_id: str):
+        return self.get_batch([article_id]).get(article_id)
+
+    def get_batch(self, article_ids: list[str]) -> dict:
+        data = self.client.post("/embeddings/get", {"ids": list(article_ids)})["data"]
+        if not data["ids"]:
+            return {}
+
+        vectors = decode_vectors(data["vectors"], data["shape"])
+        return dict(zip(data["ids"], vectors))
+
+    def save(self, article_id: str, embedding: np.ndarray):
+        self.save_batch({article_id: embedding})
+
+    def save_batch(self, items: dict):
+        if not items:
+            return
+
+        self.client.post("/embeddings", {
+            "ids": list(items),
+            **encode_vectors(np.stack([np.asarray(v, dtype="float32") for v in items.values()])),
+        })
+
+    def save_matrix(self, article_ids: list[str], vectors: np.ndarray):
+        if not len(article_ids):
+            return
+
+        self.client.post("/embeddings", {"ids": list(article_ids), **encode_vectors(vectors)})
+
+    def delete(self, article_id: str):
+        self.delete_batch([article_id])
+
+    def delete_batch(self, article_ids: list[str]):
+        self.client.post("/embeddings/delete", {"ids": list(article_ids)})
+
+    def exists(self, article_id: str) -> bool:
+        return self.get(article_id) is not None
+
+    def count(self) -> int:
+        return self.client.get("/embeddings/count")["data"]["count"]
@@ -0,0 +1,202 @@
+import time
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Optional
+
+import requests
+
+from rag_app.vector_store import snapshot
+from shared.config import VectorStoreConfig
+
+
+logger = logging.getLogger("VDB")
+
+
+class SnapshotFollower:
+    """
+    只读副本的复制线程
+
+    每隔 replication_poll_seconds 查询写入节点的知识库版本（GET /replication），
+    版本变化时流式拉取快照（GET /snapshot），校验通过后替换本地文件并调用
+    apply 重新加载服务。写入节点只在写锁内导出，快照总是一致的时间点副本
+
+    复制延迟：本节点数据至少与写入节点在 synced_at 时刻的状态一样新
+    （版本相同的那次轮询，或成功应用的那次同步的开始时间），
+    lag = now - synced_at，不依赖两台机器的时钟一致
+    """
+
+    def __init__(self, config: VectorStoreConfig, apply: Callable[[], None]):
+        """
+        Args:
+            config: 向量存储配置（replication_* 与快照目标路径）
+            apply: 本地文件替换后重新加载服务
+        """
+
+        self.config = config
+        self.apply = apply
+        self.source = config.replication_source.rstrip("/")
+        self.poll_seconds = config.replication_poll_seconds
+        self.max_lag_seconds = config.replication_max_lag_seconds
+        self.timeout = config.replication_timeout
+
+        # 已应用的写入节点版本 / 最近一次看到的写入节点版本
+        self.generation: Optional[str] = None
+        self.source_generation: Optional[str] = None
+        self.synced_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+        self._lock = threading.Lock()
+        self._metrics = {
+            "polls": 0,
+            "syncs": 0,
+            "failures": 0,
+            "bytes": 0,
+            "last_sync_seconds": 0.0,
+        }
+        self._stale = True
+
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="replica-follower",
+            daemon=True,
+        )
+
+    # ======================
+    # Internal
+    # ======================
+
+    def _fetch_generation(self) -> str:
+        response = requests.get(self.source + "/replication", timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()["generation"]
+
+    def _pull(self) -> dict:
+        """
+        流式导入写入节点的快照（边下载边校验，不落完整归档）
+        """
+
+        with requests.get(self.source + "/snapshot", stream=True, timeout=self.timeout) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            return snapshot.import_snapshot(response.raw, self.config)
+
+    def _sync_once(self):
+        started = time.time()
+
+        generation = self._fetch_generation()
+        with self._lock:
+            self._metrics["polls"] += 1
+            self.source_generation = generation
+
+        if generation != self.generation:
+            manifest = self._pull()
+            self.apply()
+
+            size = sum(f["size"] for f in manifest["files"].values())
+            with self._lock:
+                self.generation = manifest.get("generation")
+                self._metrics["syncs"] += 1
+                self._metrics["bytes"] += size
+                self._metrics["last_sync_seconds"] = round(time.time() - started, 3)
+
+            logger.info(
+                "op=replica_sync_done "
+                f"generation={self.generation} "
+                f"total_vectors={manifest['index'].get('total_vectors')} "
+                f"bytes={size} "
+                f"time={time.time() - started:.2f}s"
+            )
+
+        with self._lock:
+            self.synced_at = started
+            self.last_error = None
+
+    def _check_lag(self):
+        """
+        延迟越界 / 恢复时各记录一次日志
+        """
+
+        stale = self.is_stale()
+        if stale != self._stale:
+            self._stale = stale
+            if stale:
+                logger.warning(
+                    "op=replica_lag_exceeded "
+                    f"lag={self.lag_seconds()} "
+                    f"max_lag={self.max_lag_seconds}"
+                )
+            else:
+                logger.info(f"op=replica_in_sync generation={self.generation}")
+
+    def _run(self):
+        while True:
+            try:
+                self._sync_once()
+            except Exception as e:
+                with self._lock:
+                    self._metrics["failures"] += 1
+                    self.last_error = f"{type(e).__name__}: {e}"
+                logger.warning(
+                    "op=replica_sync_failed "
+                    f"source={self.source} "
+                    f"error={type(e).__name__}"
+                )
+
+            self._check_lag()
+
+            if self._stop.wait(self.poll_seconds):
+                break
+
+    # ======================
+    # Public API
+    # ======================
+
+    def start(self):
+        logger.info(
+            "op=replica_follower_start "
+            f"source={self.source} "
+            f"poll={self.poll_seconds}s "
+            f"max_lag={self.max_lag_seconds}s"
+        )
+        self._thread.start()
+
+    def lag_seconds(self) -> Optional[float]:
+        """
+        复制延迟（秒），尚未完成首次同步时为 None
+        """
+
+        synced_at = self.synced_at
+        if synced_at is None:
+            return None
+        return round(time.time() - synced_at, 3)
+
+    def is_stale(self) -> bool:
+        lag = self.lag_seconds()
+        return lag is None or lag > self.max_lag_seconds
+
+    def status(self) -> dict:
+        with self._lock:
+            metrics = dict(self._metrics)
+            synced_at = self.synced_at
+            status = {
+                "source": self.source,
+                "generation": self.generation,
+                "source_generation": self.source_generation,
+                "last_error": self.last_error,
+            }
+
+        return {
+            **status,
+            "synced_at": datetime.fromtimestamp(synced_at).isoformat() if synced_at else None,
+            "lag_seconds": self.lag_seconds(),
+            "max_lag_seconds": self.max_lag_seconds,
+            "stale": self.is_stale(),
+            **metrics,
+        }
+
+    def close(self):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join(timeout=self.timeout)
@@ -2,21 +2,75 @@ import os
 import re
 import uuid
 import time
-from typing import List
+import threading
+from contextlib import contextmanager
+from typing import List, Optional
 from datetime import datetime
 
 import numpy as np
 
 from rag_app.vector_store.raw_faiss.store import FaissVectorStore
+from rag_app.vector_store.raw_faiss.vectors import embed_matrix
+from rag_app.vector_store.raw_faiss import capacity
 from rag_app.vector_store.metadata import MetadataRepository
-from rag_app.vector_store.types import FileMeta, ArticleMeta, ChunkMeta
+from rag_app.vector_store.types import FileMeta, ArticleMeta, ChunkMeta, SearchFilter
 from rag_app.vector_store.embedding_store import ArticleEmbeddingStore
+from rag_app.vector_store.batcher import SearchBatcher
+from rag_app.vector_store import snapshot
 from rag_app.core.interface import IVectorStoreService, IVectorStore, IMetadataRepository, IEmbedder
 from shared.config import get_app_config, get_vdb_config
 from libs.utils.logger import init_component_logger
 
 logger = init_component_logger("VDB")
 
+def reconcile_committed(store, metadata, article_store, committer, lock, content=None) -> dict:
+    """
+    启动时对齐向量库与已提交的元数据（只处理差异文件，不重置 / 重建）
+
+    提交顺序为 向量库变更日志 -> 版本文件 -> 清单，崩溃后向量库可能领先于清单：
+    - 向量库中有、元数据中没有的文件：未提交的新增，回滚（删除向量）
+    - 元数据中有、向量库中没有 chunk 的文件：向量删除已落盘的删除，补完
+    - 元数据中没有的原文（未提交的新增 / 提交后尚未删除）：删除
+
+    Returns:
+        dict: 回滚 / 补完的文件数
+    """
+    files = metadata.list_all_files()
+    stored = set(store.file_ids())
+
+    orphans = sorted(stored - set(files))
+    lost = [meta for file_id, meta in files.items() if meta.chunks and file_id not in stored]
+    report = {"rolled_back": len(orphans), "rolled_forward": len(lost)}
+
+    # 原文只在提交之后删除，补完的删除与未提交的新增对应的原文在此清理
+    if content is not None:
+        live = set(files) - {meta.file_id for meta in lost}
+        for file_id in set(content.file_ids()) - live:
+            content.delete(file_id)
+
+    if not orphans and not lost:
+        return report
+
+    with lock:
+        for file_id in orphans:
+            store.delete_by_file(file_id)
+
+        for meta in lost:
+            metadata.remove_file(meta.file_id)
+            metadata.remove_articles(meta.article_ids)
+            article_store.delete_batch(meta.article_ids)
+
+        generation = committer.stage()
+
+    committer.wait(generation)
+
+    logger.warning(
+        "op=vdb_commit_reconciled "
+        f"rolled_back={len(orphans)} "
+        f"rolled_forward={len(lost)}"
+    )
+    return report
+
 class VectorStoreService(IVectorStoreService):
     """
     向量库业务调度层
@@ -30,6 +84,9 @@ class VectorStoreService(IVectorStoreService):
         embed_path: str,
         chunk_size: int = None,
         chunk_overlap: int = None,
+        article_store=None,
+        committer=None,
+        content=None,
     ):
         """
         初始化向量存储服务
@@ -41,6 +98,11 @@ class VectorStoreService(IVectorStoreService):
             embed_path: 文章向量存储路径
             chunk_size: 文本切分大小（可选，默认从配置读取）
             chunk_overlap: 文本切分重叠（可选，默认从配置读取）
+            article_store: 文章向量存储（可选，默认为 embed_path 上的本地 NPZ）
+            committer: 提交协议（可选，commit.GroupCommitter）；提供时每次增删作为一个版本
+                原子提交，返回前等待所在的组落盘
+            content: 文件原文存储（可选，content.ContentStore）；提供时原文只保存一份，
+                chunk / 条文元数据只记录位置，读取时切出文本；否则文本内联在元数据中
         """
         self.store = store
         self.metadata = metadata
@@ -59,8 +121,35 @@ class VectorStoreService(IVectorStoreService):
         if self.chunk_overlap >= self.chunk_size:
             raise ValueError("chunk_overlap must < chunk_size")
 
-        # 初始化文章向量存储
-        self.article_store = ArticleEmbeddingStore(embed_path)
+        # 初始化文章向量存储（远程向量库服务时由容器注入）
+        self.article_store = article_store if article_store is not None else ArticleEmbeddingStore(embed_path)
+
+        self.content = content
+
+        # 文件增删的写锁（向量库 + 元数据 + 文章向量作为整体修改），
+        # 启用提交协议时与其共用，组提交在写锁内写出版本文件
+        self.committer = committer
+        self._write_lock = committer.lock if committer is not None else threading.RLock()
+
+        # 知识库版本：实例标识 + 修改计数（重启或重新加载后实例标识变化，副本全量同步一次）
+        self._instance_id = uuid.uuid4().hex[:12]
+        self._mutations = 0
+
+        # 快照导入进行中（或已替换文件）时拒绝写入
+        self._frozen = False
+
+        # 并发单条检索合批
+        self.batcher = None
+        if self.vdb_config.search_batch_window_ms > 0:
+            self.batcher = SearchBatcher(
+                store,
+                window_ms=self.vdb_config.search_batch_window_ms,
+                max_batch=self.vdb_config.search_batch_max,
+            )
+
+        # 崩溃前未提交的修改：向量库与已提交的元数据按文件对齐
+        if self.committer is not None:
+            self._reconcile()
 
         logger.info(
             "VectorStoreService initialized with config: "
@@ -78,6 +167,124 @@ class VectorStoreService(IVectorStoreService):
         files_dict = self.metadata.list_all_files()
         return list(files_dict.values())
 
+    def stats(self, file_id: str = None) -> dict:
+        """
+        向量库统计信息（各计数均为增量维护，开销与数据量无关）
+
+        Args:
+            file_id: 指定时只返回该文件的统计
+
+        Returns:
+            dict: 统计信息
+        """
+        if file_id is not None:
+            stats = {"file_id": file_id, **self.store.stats(file_id)}
+            if self.content is not None:
+                stats["content_bytes"] = self.content.size(file_id)
+            return stats
+
+        store_stats = self.store.stats()
+        stats = {
+            **store_stats,
+            "metadata_files": self.metadata.count_files(),
+            "articles": self.metadata.count_articles(),
+        }
+        if self.batcher is not None:
+            stats["search_batcher"] = self.batcher.metrics()
+        if self.committer is not None:
+            stats["commit"] = self.committer.status()
+        stats["usage"] = self._usage(store_stats)
+
+        return stats
+
+    def usage(self) -> dict:
+        """
+        各部分实际占用的内存 / 磁盘字节数
+
+        索引内存为按结构估算的常驻字节数，其余为实际数组 / 文件大小；
+        元数据对象的内存无法直接统计（None），只给出文件大小
+
+        Returns:
+            dict: chunks / files / articles、components（名称 -> memory / disk）与合计
+        """
+        return self._usage(self.store.stats())
+
+    def capacity(self, additional: int, sample: int = 20000, queries: int = 100) -> dict:
+        """
+        容量规划：当前实际占用 + 再写入 additional 个 chunk 后各索引类型的内存 / 磁盘 / 检索延迟预测
+        （在合成数据上构建真实索引测量，耗时数秒到数十秒）
+
+        Args:
+            additional: 再写入的 chunk 数
+            sample: 每种索引最大实测向量数
+            queries: 测量延迟的查询数
+        """
+        usage = self.usage()
+        projection = capacity.project(self.vdb_config, usage, additional, sample=sample, queries=queries)
+
+        return {"usage": usage, **projection}
+
+    def export_snapshot(self, out_path: str) -> dict:
+        """
+        导出知识库快照（向量库 + 元数据 + 文章向量，单个归档文件）
+
+        Args:
+            out_path: 输出路径
+
+        Returns:
+            dict: manifest
+        """
+        # 远程模式：元数据与向量都在向量库服务上，由服务导出同一版本的快照
+        if self.vdb_config.type == "remote":
+            return self.store.export_snapshot(out_path)
+
+        return snapshot.export_snapshot(
+            self.store,
+            self.vdb_config,
+            out_path,
+            lock=self._write_lock,
+            generation=lambda: self.generation,
+            files=self.committer.current_files if self.committer is not None else None,
+            content=self.content,
+        )
+
+    @contextmanager
+    def frozen(self):
+        """
+        快照导入期间停止写入：之后的增删抛出 RuntimeError，等待已暂存的版本提交，
+        再在写锁内执行（检索照常）。导入失败时退出后恢复写入
+        """
+        with self._write_lock:
+            self._frozen = True
+            generation = self.committer.status()["staged"] if self.committer is not None else None
+
+        try:
+            # 写锁外等待：组提交写出版本文件需要写锁
+            self._wait(generation)
+            with self._write_lock:
+                yield
+        except BaseException:
+            self._frozen = False
+            raise
+
+    def detach(self):
+        """
+        快照导入替换文件前调用（frozen 内）：停止提交协议与后台压缩，向量库转为只读，
+        之后关闭本实例不再写出任何文件；切换到新实例前检索照常
+        """
+        if self.committer is not None:
+            self.committer.close()
+        self.store.detach()
+
+    @property
+    def generation(self) -> str:
+        """
+        知识库版本，增删文件开始修改数据前递增
+
+        快照在写锁内读取版本，manifest 中的版本与快照内容一致
+        """
+        return f"{self._instance_id}-{self._mutations}"
+
     def add_file(self, filename: str, content: str) -> bool:
         """
         添加文件到向量库
@@ -91,11 +298,11 @@ class VectorStoreService(IVectorStoreService):
         """
         start = time.time()
 
-        # 1. 检查文件是否已存在
-        for f in self.metadata.list_all_files().values():
-            if f.filename == filename:
-                raise ValueError(f"{filename} already indexed")
+        # 1. 检查文件是否已存在（写锁内再检查一次）
+        self._check_not_frozen()
+        self._check_not_indexed(filename)
 
+        # 切分与 embedding 不修改任何状态，在写锁外进行，并发写入只在应用修改时串行
         # 2. 切分chunk和article
         chunks = self._split_text(content)
 
@@ -105,7 +312,10 @@ class VectorStoreService(IVectorStoreService):
         # 4. 生成 file_id
         file_id = str(uuid.uuid4().hex)
 
-        # 5. 构造chunkmetas
+        # 原文保存一次时，元数据只记录在原文中的位置
+        inline = self.content is None
+
+        # 5. 构造chunkmetas（相邻 chunk 起点相差 chunk_size - chunk_overlap）
         chunkmetas = []
         offset = 0
         for chunk in chunks:
@@ -114,19 +324,20 @@ class VectorStoreService(IVectorStoreService):
                 file_id=file_id,
                 offset=offset,
                 length=chunk_len,
-                text=chunk,
+                text=chunk if inline else "",
                 created_at=datetime.now()
             ))
-            offset += chunk_len
+            offset += self.chunk_size - self.chunk_overlap
 
-        # 6. 构造articlemetas
+        # 6. 构造articlemetas（offset 计入被 splitlines 去掉的换行符）
         articlemetas = []
         offset = 0
-        articles = content.splitlines()
         article_ids = []
-        for article in articles:
+        article_texts = []
+        for article, line in zip(content.splitlines(), content.splitlines(keepends=True)):
             article_id = str(uuid.uuid4().hex)
             article_ids.append(article_id)
+            article_texts.append(article)
             match = re.search(r'第[一二三四五六七八九十百千万零]+条', article)
             title = match.group() if match else "未知条款"
             article_len = len(article)
@@ -136,33 +347,56 @@ class VectorStoreService(IVectorStoreService):
                 title=title,
                 offset=offset,
                 length=article_len,
-                text=article,
+                text=article if inline else "",
                 created_at=datetime.now()
             ))
-            offset += article_len
+            offset += len(line)
 
         # 7. chunk-article对齐
         self._align_chunks(chunkmetas, articlemetas)
 
-        # 8. 写入向量库
-        self.store.add(chunkmetas, vectors)
-
-        # 9. 写 filemeta
-        filemeta = FileMeta(
-            file_id=file_id,
-            filename=filename,
-            chunks=len(chunks),
-            size=len(content),
-            article_ids=article_ids,
-            created_at=datetime.now()
-        )
-        self.metadata.add_file(filemeta)
-
-        # 10. 写 articlemeta 和文章向量
-        for articlemate in articlemetas:
-            self.metadata.add_article(articlemate)
-            a_vec = self.embedder.embed_query(articlemate.text)
-            self.article_store.save(articlemate.article_id, a_vec)
+        # 文章 embedding（一次批量调用，得到一块 (文章数, dim) 缓冲区）
+        article_vectors = self._embed(article_texts)
+
+        # 原文在暂存版本之前写出，随所在的组 fsync
+        if self.content is not None:
+            self.content.put(file_id, content)
+
+        try:
+            # 写入串行化，导出快照时得到一致的向量库与元数据
+            with self._write_lock:
+                self._check_not_frozen()
+                self._check_not_indexed(filename)
+
+                # 8. 写入向量库
+                self._mutations += 1
+                self.store.add(chunkmetas, vectors)
+
+                # 9. 写 filemeta
+                filemeta = FileMeta(
+                    file_id=file_id,
+                    filename=filename,
+                    chunks=len(chunks),
+                    size=len(content),
+                    article_ids=article_ids,
+                    created_at=datetime.now()
+                )
+                self.metadata.add_file(filemeta)
+
+                # 10. 写 articlemeta 和文章向量（批量写入，远程存储时各一次请求）
+                self.metadata.add_articles(articlemetas)
+                self.article_store.save_matrix(article_ids, article_vectors)
+
+                # 11. 暂存为一个版本
+                generation = self._stage()
+        except Exception:
+            # 未暂存为版本：原文随之删除
+            if self.content is not None:
+                self.content.delete(file_id)
+            raise
+
+        # 12. 写锁外等待组提交落盘
+        self._wait(generation)
 
         logger.info(
             f"vdb_add_success file={filename} "
@@ -181,28 +415,40 @@ class VectorStoreService(IVectorStoreService):
         Returns:
             bool: 是否删除成功
         """
-        start = time.time()
+        # 写入串行化，导出快照时得到一致的向量库与元数据
+        with self._write_lock:
+            start = time.time()
+            self._check_not_frozen()
+
+            logger.info(f"vdb_delete_start file_id={file_id}")
+
+            filemeta = self.metadata.get_file(file_id)
 
-        logger.info(f"vdb_delete_start file_id={file_id}")
+            if not filemeta:
+                raise ValueError("file not found")
 
-        filemeta = self.metadata.get_file(file_id)
+            # 1. 删除向量
+            self._mutations += 1
+            self.store.delete_by_file(file_id)
 
-        if not filemeta:
-            raise ValueError("file not found")
+            # 2. 删除filemeta
+            self.metadata.remove_file(file_id)
 
-        # 1. 删除向量
-        self.store.delete_by_file(file_id)
+            # 3. 删除articlemeta
+            artcle_ids = filemeta.article_ids
+            self.metadata.remove_articles(artcle_ids)
 
-        # 2. 删除filemeta
-        self.metadata.remove_file(file_id)
+            # 4. 删除embedding
+            self.article_store.delete_batch(artcle_ids)
 
-        # 3. 删除articlemeta
-        artcle_ids = filemeta.article_ids
-        for aid in artcle_ids:
-            self.metadata.remove_article(aid)
+            # 5. 暂存为一个版本
+            generation = self._stage()
 
-        # 4. 删除embedding
-        self.article_store.delete_batch(artcle_ids)
+        self._wait(generation)
+
+        # 6. 提交后删除原文（崩溃残留由启动对齐清理）
+        if self.content is not None:
+            self.content.delete(file_id)
 
         logger.info(
             f"vdb_delete_success file={file_id} "
@@ -213,14 +459,22 @@ class VectorStoreService(IVectorStoreService):
     def search(
         self,
         query: str,
-        top_k: int = 10
+        top_k: int = 10,
+        nprobe: int = None,
+        ef_search: int = None,
+        search_filter: SearchFilter = None,
+        min_score: float = None,
     ) -> List[dict]:
         """
         搜索相关文档
 
         Args:
             query: 查询文本
-            top_k: 返回结果数量
+            top_k: 返回结果数量（范围检索时为上限）
+            nprobe: IVF 探测聚类数（可选，仅本次请求生效）
+            ef_search: HNSW 搜索宽度（可选，仅本次请求生效）
+            search_filter: 按 file_id / created_at 过滤（可选）
+            min_score: 范围检索阈值（可选），只返回 score 不低于该值的结果，数量不固定
 
         Returns:
             List[dict]: 搜索结果列表
@@ -232,8 +486,16 @@ class VectorStoreService(IVectorStoreService):
         # 1. embedding
         q_vec = self._embed([query])[0]
 
-        # 2. 搜索
-        results = self.store.search(q_vec, top_k)
+        # 2. 搜索（开启合批时与并发请求合并为一次检索）
+        searcher = self.batcher if self.batcher is not None else self.store
+        results = searcher.search(
+            q_vec,
+            top_k,
+            nprobe=nprobe,
+            ef_search=ef_search,
+            search_filter=search_filter,
+            min_score=min_score,
+        )
 
         logger.info(
             f"vdb_search_success hits={len(results)} "
@@ -242,22 +504,155 @@ class VectorStoreService(IVectorStoreService):
 
         return results
 
-    def get_chunk(self, chunk_id) -> ChunkMeta:
+    def search_many(
+        self,
+        queries: List[str],
+        top_k: int = 10,
+        nprobe: int = None,
+        ef_search: int = None,
+        search_filter: SearchFilter = None,
+        min_score: float = None,
+    ) -> List[List[dict]]:
+        """
+        批量搜索（一次 embedding + 一次向量检索）
+
+        Args:
+            queries: 查询文本列表
+            top_k: 每个查询返回结果数量（范围检索时为上限）
+            nprobe: IVF 探测聚类数（可选）
+            ef_search: HNSW 搜索宽度（可选）
+            search_filter: 过滤条件（可选，对所有查询生效）
+            min_score: 范围检索阈值（可选）
+
+        Returns:
+            List[List[dict]]: 与 queries 一一对应的搜索结果列表
+        """
+        logger.info(f"vdb_search_many_start n={len(queries)} k={top_k}")
+
+        if not queries:
+            return []
+
+        start = time.time()
+
+        # 1. 批量 embedding
+        q_vecs = self._embed(queries)
+
+        # 2. 批量搜索
+        results = self.store.search_batch(
+            q_vecs,
+            top_k,
+            nprobe=nprobe,
+            ef_search=ef_search,
+            search_filter=search_filter,
+            min_score=min_score,
+        )
+
+        logger.info(
+            f"vdb_search_many_success hits={sum(len(r) for r in results)} "
+            f"time={time.time()-start:.2f}s"
+        )
+
+        return results
+
+    def get_chunk(self, chunk_id) -> Optional[ChunkMeta]:
+        # 只返回元数据（article_ids / file_id / 偏移），文本由 materialize 按需切出
         return self.store.get(chunk_id)
 
+    def close(self):
+        """停止检索合批线程（提交协议由容器在关闭向量库前关闭）"""
+        if self.batcher is not None:
+            self.batcher.close()
+
     def embed_query(self, query: str) -> np.ndarray:
         return self.embedder.embed_query(query)
 
     def get_article_chunk(self, article_id: str):
         return self.article_store.get(article_id)
 
+    def get_article_chunks(self, article_ids: List[str]) -> dict:
+        return self.article_store.get_batch(article_ids)
+
     def get_article_meta(self, article_id: str):
         return self.metadata.get_article(article_id)
 
+    def materialize(self, meta):
+        """
+        从原文切出 chunk / 条文文本（内联文本 / 远程服务已切出的原样返回）
+        """
+        if self.content is None:
+            return meta
+        return self.content.materialize(meta)
+
     # ===========================
     # Internal Methods
     # ===========================
 
+    def _check_not_frozen(self):
+        if self._frozen:
+            raise RuntimeError("knowledge base snapshot import in progress")
+
+    def _check_not_indexed(self, filename: str):
+        for f in self.metadata.list_all_files().values():
+            if f.filename == filename:
+                raise ValueError(f"{filename} already indexed")
+
+    def _usage(self, stats: dict) -> dict:
+        """
+        由向量库统计与提交清单中的文件计算各部分占用（远程模式下文件不在本地，记为 0）
+        """
+        metadata_path = getattr(self.metadata, "path", None)
+        embed_path = getattr(self.article_store, "path", None)
+        if self.committer is not None:
+            files = self.committer.committed_files()
+            metadata_path = files.get("metadata", metadata_path)
+            embed_path = files.get("embeddings", embed_path)
+
+        def file_bytes(path):
+            return os.path.getsize(path) if path and os.path.exists(path) else 0
+
+        articles = self.article_store.count()
+        components = {
+            "index": {"memory": stats["index_memory_bytes"], "disk": stats.get("index_file_bytes", 0)},
+            "doc_map": {"memory": stats.get("doc_map_bytes", 0), "disk": stats.get("doc_map_file_bytes", 0)},
+            "binary_index": {"memory": stats["binary_index_bytes"], "disk": 0},
+            "raw_vectors": {"memory": 0, "disk": stats["raw_vector_bytes"]},
+            "wal": {"memory": 0, "disk": stats["wal_bytes"]},
+            "metadata": {"memory": None, "disk": file_bytes(metadata_path)},
+            # deferred 模式下文章向量整体载入内存
+            "article_embeddings": {
+                "memory": articles * self.vdb_config.dimension * 4 if getattr(self.article_store, "deferred", False) else 0,
+                "disk": file_bytes(embed_path),
+            },
+            "content": {"memory": 0, "disk": self.content.nbytes() if self.content is not None else 0},
+        }
+
+        return {
+            "chunks": stats["chunks"],
+            "files": stats["files"],
+            "articles": articles,
+            "components": components,
+            "memory_bytes": sum(c["memory"] or 0 for c in components.values()),
+            "disk_bytes": sum(c["disk"] or 0 for c in components.values()),
+        }
+
+    def _stage(self):
+        """
+        暂存当前修改为一个版本（持有写锁），未启用提交协议时返回 None
+        """
+        if self.committer is None:
+            return None
+        return self.committer.stage()
+
+    def _wait(self, generation):
+        if generation is not None:
+            self.committer.wait(generation)
+
+    def _reconcile(self):
+        reconcile_committed(
+            self.store, self.metadata, self.article_store, self.committer, self._write_lock,
+            content=self.content,
+        )
+
     def _split_text(self, text: str) -> List[str]:
         """
         切分文本
@@ -289,10 +684,9 @@ class VectorStoreService(IVectorStoreService):
             texts: 文本列表
 
         Returns:
-            np.ndarray: 向量数组
+            np.ndarray: 连续的 float32 (n, dim) 向量数组（写入时原样交给向量库，不再复制）
         """
-        vectors = self.embedder.embed_documents(texts)
-        return np.array(vectors, dtype="float32")
+        return embed_matrix(self.embedder, texts)
 
     def _align_chunks(self, chunkmetas: List[ChunkMeta], articlemetas: List[ArticleMeta]) -> None:
         """
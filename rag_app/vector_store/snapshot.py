@@ -0,0 +1,405 @@
+import os
+import io
+import json
+import time
+import shutil
+import hashlib
+import logging
+import tarfile
+import tempfile
+from datetime import datetime
+from typing import Callable, Optional, Union, BinaryIO
+
+from rag_app.vector_store.raw_faiss.sharded import shard_paths
+from rag_app.vector_store import commit
+from shared.config import VectorStoreConfig
+
+
+logger = logging.getLogger("VDB")
+
+# 快照格式
+SNAPSHOT_FORMAT = "rag-kb-snapshot"
+SNAPSHOT_VERSION = 1
+
+MANIFEST_NAME = "manifest.json"
+
+# 提交协议参与方 -> 快照成员名
+_COMMIT_MEMBERS = {
+    "metadata": "metadata.json",
+    "embeddings": "article_embeddings.npz",
+}
+
+# 文件原文成员：content/<file_id>.txt
+_CONTENT_PREFIX = "content/"
+
+# 流式读写块大小
+_CHUNK = 1024 * 1024
+
+
+def _map_path(path: str) -> str:
+    """
+    与 FaissVectorStore 一致：旧配置中的 .json 映射路径对应 .bin 文件
+    """
+
+    stem, ext = os.path.splitext(path)
+    return stem + ".bin" if ext == ".json" else stem + ext
+
+
+def snapshot_targets(config: VectorStoreConfig) -> dict:
+    """
+    快照成员名 -> 本节点按配置的目标路径
+    """
+
+    targets = {
+        "metadata.json": config.meta_path,
+        "article_embeddings.npz": config.embed_path,
+    }
+
+    store_files = {
+        "index": config.index_path,
+        "doc_map": _map_path(config.map_path),
+        "vectors": config.vectors_path,
+    }
+
+    if config.shards > 1:
+        for i in range(config.shards):
+            for name, path in store_files.items():
+                targets[f"vector_store/shards/{i:03d}/{name}"] = shard_paths(path, i)
+    else:
+        for name, path in store_files.items():
+            targets[f"vector_store/{name}"] = path
+
+    return targets
+
+
+def _content_target(config: VectorStoreConfig, name: str) -> Optional[str]:
+    """
+    原文成员的目标路径（成员名不合法时为 None）
+    """
+
+    filename = name[len(_CONTENT_PREFIX):]
+    if not name.startswith(_CONTENT_PREFIX) or not filename.endswith(".txt"):
+        return None
+    if "/" in filename or filename.startswith("."):
+        return None
+
+    return os.path.join(config.content_dir, filename)
+
+
+def _link(src: str, dst: str):
+    try:
+        os.link(src, dst)
+    except OSError:
+        # 跨设备 / 文件系统不支持硬链接
+        shutil.copyfile(src, dst)
+
+
+def _wal_paths(config: VectorStoreConfig) -> list[str]:
+    if config.shards > 1:
+        return [shard_paths(config.wal_path, i) for i in range(config.shards)]
+    return [config.wal_path]
+
+
+def _sha256(path: str, size: int) -> str:
+    digest = hashlib.sha256()
+    remaining = size
+
+    with open(path, "rb") as f:
+        while remaining:
+            block = f.read(min(_CHUNK, remaining))
+            if not block:
+                raise IOError(f"file shrank while hashing: {path}")
+            digest.update(block)
+            remaining -= len(block)
+
+    return digest.hexdigest()
+
+
+def export_snapshot(
+    store,
+    config: VectorStoreConfig,
+    out_path: str,
+    lock=None,
+    generation: Optional[Callable[[], str]] = None,
+    files: Optional[Callable[[], dict]] = None,
+    content=None,
+) -> dict:
+    """
+    导出知识库快照（单个 tar 文件，不压缩以便流式导入）
+
+    成员：manifest.json（版本、索引描述、各文件大小与 sha256）在最前，
+    之后依次为向量库文件、元数据与文章向量、文件原文
+
+    Args:
+        store: 向量存储（FaissVectorStore / ShardedVectorStore）
+        config: 向量存储配置
+        out_path: 输出路径
+        lock: 业务层写锁，持有期间只做 checkpoint 与硬链接
+        generation: 返回知识库版本，在写锁内调用并写入 manifest
+        files: 返回元数据 / 文章向量当前的文件（提交协议的版本文件），在写锁内调用；
+            默认为配置中的路径
+        content: 文件原文存储（content.ContentStore），导出向量库中存在的文件的原文
+
+    Returns:
+        dict: manifest
+    """
+
+    start = time.time()
+
+    staging = tempfile.mkdtemp(
+        prefix=".snapshot-", dir=os.path.dirname(os.path.abspath(config.index_path))
+    )
+
+    try:
+        members = {}
+        version = None
+
+        # 1. 一致的时间点副本（向量库与元数据在同一把写锁内取得）
+        if lock is not None:
+            lock.acquire()
+        try:
+            for name, (path, size) in store.link_files(os.path.join(staging, "vector_store")).items():
+                members[f"vector_store/{name}"] = (path, size)
+
+            sources = files() if files is not None else {
+                "metadata": config.meta_path,
+                "embeddings": config.embed_path,
+            }
+            for key, name in _COMMIT_MEMBERS.items():
+                src = sources[key]
+                if os.path.exists(src):
+                    # 未经提交协议写入时元数据为原地覆盖写入，需复制
+                    dst = os.path.join(staging, name)
+                    shutil.copyfile(src, dst)
+                    members[name] = (dst, os.path.getsize(dst))
+
+            # 原文写出后不再修改，硬链接即可（删除只发生在提交之后，写锁内不会删除）
+            if content is not None:
+                os.makedirs(os.path.join(staging, "content"), exist_ok=True)
+                for file_id in store.file_ids():
+                    src = content.path(file_id)
+                    if src is None:
+                        continue
+                    name = _CONTENT_PREFIX + os.path.basename(src)
+                    dst = os.path.join(staging, name)
+                    _link(src, dst)
+                    members[name] = (dst, os.path.getsize(dst))
+
+            if generation is not None:
+                version = generation()
+        finally:
+            if lock is not None:
+                lock.release()
+
+        # 2. manifest
+        info = store.info()
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "version": SNAPSHOT_VERSION,
+            "created_at": datetime.now().isoformat(),
+            "generation": version,
+            "index": {
+                "dimension": config.dimension,
+                "shards": config.shards,
+                "index_type": info.get("index_type"),
+                "codec": info.get("codec"),
+                "transform": info.get("transform"),
+                "total_vectors": info.get("total_vectors"),
+                "total_files": info.get("total_files"),
+            },
+            "files": {
+                name: {"size": size, "sha256": _sha256(path, size)}
+                for name, (path, size) in members.items()
+            },
+        }
+
+        # 3. 写 tar（临时文件 + 原子替换）
+        tmp_path = out_path + ".tmp"
+        with tarfile.open(tmp_path, "w", format=tarfile.PAX_FORMAT) as tar:
+            data = json.dumps(manifest, ensure_ascii=False, indent=2).encode("utf-8")
+            tarinfo = tarfile.TarInfo(MANIFEST_NAME)
+            tarinfo.size = len(data)
+            tarinfo.mtime = int(time.time())
+            tar.addfile(tarinfo, io.BytesIO(data))
+
+            for name, (path, size) in members.items():
+                tarinfo = tarfile.TarInfo(name)
+                tarinfo.size = size
+                tarinfo.mtime = int(time.time())
+                with open(path, "rb") as f:
+                    tar.addfile(tarinfo, f)
+
+        os.replace(tmp_path, out_path)
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+    logger.info(
+        "op=snapshot_export_done "
+        f"path={out_path} "
+        f"files={len(manifest['files'])} "
+        f"bytes={os.path.getsize(out_path)} "
+        f"time={time.time() - start:.2f}s"
+    )
+
+    return manifest
+
+
+def import_snapshot(
+    src: Union[str, BinaryIO],
+    config: VectorStoreConfig,
+    before_commit: Optional[Callable[[dict], None]] = None,
+) -> dict:
+    """
+    导入知识库快照（流式读取，不整体载入内存）
+
+    每个成员边读边写到目标路径旁的临时文件并计算 sha256，全部校验通过后
+    才替换目标文件；快照中没有的向量库文件（如原始向量）与变更日志被删除，
+    避免旧数据混入。导入后无需重新 embedding，按 index_load_mode 加载
+    （mmap 时启动只映射文件）
+
+    Args:
+        src: 快照文件路径或可读的二进制流
+        config: 本节点的向量存储配置（决定目标路径）
+        before_commit: 校验通过、替换文件之前的回调（在线导入时用于关闭当前服务）
+
+    Returns:
+        dict: manifest
+    """
+
+    start = time.time()
+    targets = snapshot_targets(config)
+    staged = {}
+
+    if isinstance(src, str):
+        tar = tarfile.open(src, "r|")
+    else:
+        tar = tarfile.open(fileobj=src, mode="r|")
+
+    try:
+        with tar:
+            manifest = None
+
+            for member in tar:
+                if manifest is None:
+                    if member.name != MANIFEST_NAME:
+                        raise ValueError("snapshot manifest must be the first member")
+                    manifest = json.loads(tar.extractfile(member).read().decode("utf-8"))
+                    _check_manifest(manifest, config)
+                    continue
+
+                expected = manifest["files"].get(member.name)
+                target = targets.get(member.name) or _content_target(config, member.name)
+                if expected is None or target is None or not member.isfile():
+                    raise ValueError(f"unexpected snapshot member: {member.name}")
+
+                os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+
+                tmp_path = target + ".import"
+                staged[member.name] = tmp_path
+
+                digest = hashlib.sha256()
+                size = 0
+                reader = tar.extractfile(member)
+                with open(tmp_path, "wb") as f:
+                    while True:
+                        block = reader.read(_CHUNK)
+                        if not block:
+                            break
+                        digest.update(block)
+                        f.write(block)
+                        size += len(block)
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                if size != expected["size"] or digest.hexdigest() != expected["sha256"]:
+                    raise ValueError(f"snapshot checksum mismatch: {member.name}")
+
+            if manifest is None:
+                raise ValueError("empty snapshot")
+
+            missing = set(manifest["files"]) - set(staged)
+            if missing:
+                raise ValueError(f"snapshot truncated, missing: {sorted(missing)}")
+
+        if before_commit is not None:
+            before_commit(manifest)
+
+        # 校验全部通过后替换；快照外的旧文件删除
+        for name, target in targets.items():
+            if name in staged:
+                os.replace(staged.pop(name), target)
+            elif name.startswith("vector_store/") and os.path.exists(target):
+                os.remove(target)
+
+        for wal_path in _wal_paths(config):
+            if os.path.exists(wal_path):
+                os.remove(wal_path)
+
+        # 原文：快照中的替换，其余删除
+        content_names = set()
+        for name in [n for n in staged if n.startswith(_CONTENT_PREFIX)]:
+            target = _content_target(config, name)
+            os.replace(staged.pop(name), target)
+            content_names.add(os.path.basename(target))
+
+        if os.path.isdir(config.content_dir):
+            for filename in os.listdir(config.content_dir):
+                if filename.endswith(".txt") and filename not in content_names:
+                    os.remove(os.path.join(config.content_dir, filename))
+
+        # 元数据 / 文章向量已写到配置路径，清单中的版本文件作废
+        commit.clear_manifest(config.commit_manifest_path)
+    finally:
+        for tmp_path in staged.values():
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    logger.info(
+        "op=snapshot_import_done "
+        f"files={len(manifest['files'])} "
+        f"total_vectors={manifest['index'].get('total_vectors')} "
+        f"time={time.time() - start:.2f}s"
+    )
+
+    return manifest
+
+
+def read_manifest(path: str) -> dict:
+    """
+    读取快照文件的 manifest（第一个成员），不读取其余成员
+    """
+
+    with tarfile.open(path, "r|") as tar:
+        member = tar.next()
+        if member is None or member.name != MANIFEST_NAME:
+            raise ValueError("snapshot manifest must be the first member")
+        return json.loads(tar.extractfile(member).read().decode("utf-8"))
+
+
+def _check_manifest(manifest: dict, config: VectorStoreConfig):
+    """
+    校验快照格式与本节点配置是否兼容
+    """
+
+    if manifest.get("format") != SNAPSHOT_FORMAT:
+        raise ValueError(f"not a knowledge-base snapshot: {manifest.get('format')}")
+
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"unsupported snapshot version: {manifest.get('version')}")
+
+    index = manifest["index"]
+    if index["dimension"] != config.dimension:
+        raise ValueError(
+            f"snapshot dimension {index['dimension']} mismatch config {config.dimension}"
+        )
+
+    if index["shards"] != config.shards:
+        raise ValueError(f"snapshot shards {index['shards']} mismatch config {config.shards}")
+
+    if index.get("index_type") != config.index_type:
+        # 索引文件自描述，按快照中的类型加载；达到阈值时再按本节点配置迁移
+        logger.warning(
+            "op=snapshot_index_type_differs "
+            f"snapshot={index.get('index_type')} "
+            f"config={config.index_type}"
+        )
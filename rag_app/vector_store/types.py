@@ -14,12 +14,14 @@ class ChunkMeta(BaseModel):
 
     article_ids: list[str] = Field(default_factory=list)
 
+    # 在文件原文中的字符位置
     offset: int = Field(ge=0)
     length: int = Field(gt=0)
 
     created_at: Optional[datetime] = None
 
-    text: str
+    # 原文在内容存储中时为空，读取时按 offset / length 切出（content.ContentStore）
+    text: str = ""
 
 
 class DocMap(BaseModel):
@@ -29,9 +31,24 @@ class DocMap(BaseModel):
 
     next_id: int = 0
 
+    # 已落盘的最后一条变更日志 lsn
+    checkpoint_lsn: int = 0
+
     chunks: dict[int, ChunkMeta] = Field(default_factory=dict)
 
 
+class SearchFilter(BaseModel):
+    """
+    检索过滤条件（条件之间为 AND）
+    """
+
+    file_ids: Optional[list[str]] = None
+
+    # created_at 范围（闭区间），设置后无创建时间的 chunk 不会命中
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+
 class ArticleMeta(BaseModel):
     """
     章节信息
@@ -42,12 +59,14 @@ class ArticleMeta(BaseModel):
 
     title: Optional[str] = None
 
+    # 在文件原文中的字符位置
     offset: int = Field(ge=0)
     length: int = Field(gt=0)
 
     created_at: Optional[datetime] = None
 
-    text: str
+    # 原文在内容存储中时为空，读取时按 offset / length 切出（content.ContentStore）
+    text: str = ""
 
 
 class FileMeta(BaseModel):
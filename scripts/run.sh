@@ -44,18 +44,23 @@ case "$1" in
         activate_env "rag_runtime"
         python -m rag_app.main
         ;;
+    --vdb)
+        activate_env "rag_runtime"
+        python -m vdb_service.main
+        ;;
     --llm)
         activate_env "llm_runtime"
         python -m llm_service.main
         ;;
     *)
         echo "RAG系统启动脚本"
-        echo "用法: $0 [--ragui|--vdbui|--rag|--llm]"
+        echo "用法: $0 [--ragui|--vdbui|--rag|--vdb|--llm]"
         echo ""
         echo "选项:"
         echo "  --ragui    启动RAG UI (端口8501)"
         echo "  --vdbui    启动向量数据库UI (端口8502)"
         echo "  --rag      启动RAG后端服务"
+        echo "  --vdb      启动独立向量库服务 (vector_store.type: remote 时使用)"
         echo "  --llm      启动LLM服务"
         exit 1
         ;;
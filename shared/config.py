@@ -65,6 +65,8 @@ class RAGConfig(ComponentConfig):
     # 检索配置
     similarity_threshold: float = Field(0.65, description="相似度阈值")
     top_k_retrieval: int = Field(10, description="检索返回数量")
+    retrieval_mode: str = Field("knn", description="检索方式: knn（固定 top_k）/ range（按相似度阈值）")
+    range_max_results: int = Field(50, description="range 检索每次最多返回的 chunk 数")
     max_retrieved_articles: int = Field(2, description="最大返回文章数")
 
     # 生成参数
@@ -72,6 +74,13 @@ class RAGConfig(ComponentConfig):
     chat_top_p: float = Field(0.1, description="聊天top_p参数")
     chat_max_tokens: int = Field(8192, description="聊天最大token数")
 
+    @validator("retrieval_mode")
+    def validate_retrieval_mode(cls, v):
+        """验证检索方式"""
+        if v not in ("knn", "range"):
+            raise ValueError("retrieval_mode 必须是 knn / range 之一")
+        return v
+
     @validator("similarity_threshold")
     def validate_similarity_threshold(cls, v):
         """验证相似度阈值在合理范围内"""
@@ -86,19 +95,93 @@ class RAGConfig(ComponentConfig):
 class VectorStoreConfig(ComponentConfig):
     """向量存储专用配置"""
 
-    type: str = Field("faiss", description="向量存储类型")
+    type: str = Field("faiss", description="向量存储类型: faiss（进程内）/ remote（独立向量库服务 vdb_service）")
+
+    # 独立向量库服务配置（服务监听地址；type 为 remote 时 rag_app 连接该地址）
+    host: str = Field("0.0.0.0", description="向量库服务主机")
+    port: int = Field(8002, description="向量库服务端口")
+    timeout: int = Field(60, description="向量库服务请求超时时间（秒）")
     dimension: int = Field(512, description="向量维度")
 
     # 路径配置
     index_path: str = Field("data/vector_store/faiss.index", description="索引路径")
     meta_path: str = Field("data/vector_store/metadata.json", description="元数据路径")
-    map_path: str = Field("data/vector_store/doc_map.json", description="映射路径")
+    map_path: str = Field("data/vector_store/doc_map.bin", description="映射路径")
     embed_path: str = Field("data/vector_store/article_embeddings.npz", description="向量路径")
+    wal_path: str = Field("data/vector_store/faiss.wal", description="变更日志路径")
+    vectors_path: str = Field("data/vector_store/vectors.f32", description="原始向量路径（精排使用）")
+    commit_manifest_path: str = Field("data/vector_store/commit_manifest.json", description="提交清单路径（记录元数据 / 文章向量当前的版本文件）")
+    content_dir: str = Field("data/vector_store/content", description="文件原文目录（每个文件一份 UTF-8 原文，chunk / 条文按位置引用）")
 
     # 文本处理配置
     chunk_size: int = Field(500, description="文本切分大小")
     chunk_overlap: int = Field(50, description="文本切分重叠")
 
+    # 索引配置
+    index_type: str = Field("flat", description="索引类型: flat / ivf_flat / ivf_pq / hnsw")
+    vector_codec: str = Field("none", description="向量压缩编码: none / sq8 / fp16 / pq")
+    vector_transform: str = Field("none", description="索引前的降维变换: none / pca / opq（opq 需配合 PQ 编码）")
+    transform_dim: int = Field(256, description="降维后的维度")
+    refine: bool = Field(False, description="是否用原始向量对压缩索引的候选精排")
+    refine_k_factor: int = Field(4, description="精排候选数为 top_k 的倍数")
+    train_threshold: int = Field(50000, description="向量数达到该值后训练并迁移到目标索引")
+    max_train_points: int = Field(200000, description="索引训练最大采样数")
+    ivf_nlist: int = Field(1024, description="IVF 聚类中心数")
+    ivf_retrain_growth: float = Field(2.0, description="按当前数据量收敛的 nlist 达到已训练 nlist 的该倍数时重新训练（0 表示不重新训练）")
+    ivf_nprobe: int = Field(16, description="IVF 默认探测聚类数")
+    pq_m: int = Field(64, description="PQ 子空间数")
+    pq_nbits: int = Field(8, description="PQ 每个子空间编码位数")
+    hnsw_m: int = Field(32, description="HNSW 每个节点的邻居数")
+    hnsw_ef_construction: int = Field(200, description="HNSW 构建时搜索宽度")
+    hnsw_ef_search: int = Field(64, description="HNSW 默认搜索宽度")
+
+    # 二值预筛选配置
+    binary_prefilter: bool = Field(False, description="是否先用符号位二值索引按 Hamming 距离取候选，再用原始向量精排")
+    binary_index_type: str = Field("flat", description="二值索引类型: flat / hnsw")
+    # 召回率 / 延迟权衡（10 万条 512 维聚簇数据，top_k=10，Flat 精确检索 8.8ms）：
+    # x16 召回 0.63 / 1.0ms，x32 0.81 / 1.4ms，x64 0.96 / 2.2ms，x128 1.00 / 3.5ms
+    binary_k_factor: int = Field(64, description="二值预筛选候选数为 top_k 的倍数（越大召回越高，重排读取的原始向量越多）")
+
+    # 检索合批配置
+    search_batch_window_ms: float = Field(0, description="并发检索合批等待窗口（毫秒，0 表示不合批）")
+    search_batch_max: int = Field(32, description="单批最多合并的查询数")
+
+    # 过滤检索配置
+    filter_brute_force_max: int = Field(2048, description="过滤后候选数不超过该值时直接精确计算")
+
+    # 分片配置
+    shards: int = Field(1, description="分片数（大于 1 时启用分片存储）")
+    shard_strategy: str = Field("hash", description="分片策略: hash（按 file_id 哈希）/ size（写入最小分片）")
+    shard_search_workers: int = Field(0, description="分片并行检索线程数（0 表示与分片数相同）")
+
+    # 压缩配置
+    compaction_dirty_ratio: float = Field(0.2, description="墓碑占索引向量比例达到该值后后台压缩")
+    compaction_idle_seconds: int = Field(300, description="存在墓碑且空闲该秒数后后台压缩（0 表示不按空闲触发）")
+
+    # 变更日志配置
+    wal_checkpoint_records: int = Field(100, description="日志记录数达到该值后 checkpoint")
+    wal_checkpoint_bytes: int = Field(256 * 1024 * 1024, description="日志大小达到该值后 checkpoint")
+    wal_fsync: bool = Field(True, description="变更是否 fsync 落盘（经提交协议写入时按组 fsync）")
+
+    # 组提交配置
+    group_commit_ms: float = Field(5.0, description="组提交等待窗口（毫秒），窗口内的文件增删合并为一次 fsync，0 表示不等待")
+    group_commit_max: int = Field(64, description="单组最多合并的修改数")
+
+    # 加载配置
+    index_load_mode: str = Field("memory", description="索引加载方式: memory / mmap（mmap 为只读）")
+    read_only: bool = Field(False, description="只读模式（服务进程不写入向量库）")
+    mmap_prefetch: bool = Field(False, description="mmap 加载后是否在后台预取索引页")
+
+    # 命名集合配置（每个集合独立的索引 / 映射 / 元数据 / 文章向量）
+    collections_dir: str = Field("data/collections", description="命名集合根目录（每个集合一个子目录）")
+    collection_memory_budget_mb: int = Field(1024, description="已加载集合的内存预算（MB），超过后卸载最近最少使用的集合，0 表示不限制")
+
+    # 复制配置（只读副本跟随写入节点）
+    replication_source: str = Field("", description="写入节点地址（如 http://writer:8000），非空时本节点为只读副本")
+    replication_poll_seconds: float = Field(5.0, description="副本轮询写入节点版本的间隔（秒）")
+    replication_max_lag_seconds: float = Field(60.0, description="副本允许的最大复制延迟（秒），超过后健康检查返回 503")
+    replication_timeout: float = Field(600.0, description="副本下载快照的超时时间（秒）")
+
     @validator("chunk_overlap")
     def validate_chunk_overlap(cls, v, values):
         """验证 chunk_overlap 小于 chunk_size"""
@@ -106,6 +189,155 @@ class VectorStoreConfig(ComponentConfig):
             raise ValueError("chunk_overlap 必须小于 chunk_size")
         return v
 
+    @validator("type")
+    def validate_type(cls, v):
+        """验证向量存储类型"""
+        if v not in ("faiss", "remote"):
+            raise ValueError("type 必须是 faiss / remote 之一")
+        return v
+
+    @validator("index_type")
+    def validate_index_type(cls, v):
+        """验证索引类型"""
+        if v not in ("flat", "ivf_flat", "ivf_pq", "hnsw"):
+            raise ValueError("index_type 必须是 flat / ivf_flat / ivf_pq / hnsw 之一")
+        return v
+
+    @validator("vector_codec")
+    def validate_vector_codec(cls, v):
+        """验证向量压缩编码"""
+        if v not in ("none", "sq8", "fp16", "pq"):
+            raise ValueError("vector_codec 必须是 none / sq8 / fp16 / pq 之一")
+        return v
+
+    @validator("vector_transform")
+    def validate_vector_transform(cls, v, values):
+        """验证降维变换（OPQ 只用于 PQ 编码）"""
+        if v not in ("none", "pca", "opq"):
+            raise ValueError("vector_transform 必须是 none / pca / opq 之一")
+        if v == "opq" and values.get("index_type") != "ivf_pq" and values.get("vector_codec") != "pq":
+            raise ValueError("vector_transform=opq 需要 index_type=ivf_pq 或 vector_codec=pq")
+        return v
+
+    @validator("transform_dim")
+    def validate_transform_dim(cls, v, values):
+        """验证降维后的维度不超过向量维度"""
+        if values.get("vector_transform", "none") != "none":
+            if not 0 < v <= values.get("dimension", v):
+                raise ValueError("transform_dim 必须在 1 到 dimension 之间")
+        return v
+
+    @validator("refine_k_factor")
+    def validate_refine_k_factor(cls, v):
+        """验证精排倍数"""
+        if v < 1:
+            raise ValueError("refine_k_factor 必须大于等于 1")
+        return v
+
+    @validator("binary_prefilter")
+    def validate_binary_prefilter(cls, v, values):
+        """验证二值编码要求向量维度为 8 的倍数"""
+        if v and "dimension" in values and values["dimension"] % 8 != 0:
+            raise ValueError("binary_prefilter 要求 dimension 为 8 的倍数")
+        return v
+
+    @validator("binary_index_type")
+    def validate_binary_index_type(cls, v):
+        """验证二值索引类型"""
+        if v not in ("flat", "hnsw"):
+            raise ValueError("binary_index_type 必须是 flat / hnsw 之一")
+        return v
+
+    @validator("binary_k_factor")
+    def validate_binary_k_factor(cls, v):
+        """验证二值预筛选倍数"""
+        if v < 1:
+            raise ValueError("binary_k_factor 必须大于等于 1")
+        return v
+
+    @validator("search_batch_window_ms")
+    def validate_search_batch_window_ms(cls, v):
+        """验证合批窗口"""
+        if v < 0:
+            raise ValueError("search_batch_window_ms 必须大于等于 0")
+        return v
+
+    @validator("search_batch_max")
+    def validate_search_batch_max(cls, v):
+        """验证单批查询数"""
+        if v < 1:
+            raise ValueError("search_batch_max 必须大于等于 1")
+        return v
+
+    @validator("group_commit_ms")
+    def validate_group_commit_ms(cls, v):
+        """验证组提交窗口"""
+        if v < 0:
+            raise ValueError("group_commit_ms 必须大于等于 0")
+        return v
+
+    @validator("group_commit_max")
+    def validate_group_commit_max(cls, v):
+        """验证单组修改数"""
+        if v < 1:
+            raise ValueError("group_commit_max 必须大于等于 1")
+        return v
+
+    @validator("collection_memory_budget_mb")
+    def validate_collection_memory_budget_mb(cls, v):
+        """验证集合内存预算"""
+        if v < 0:
+            raise ValueError("collection_memory_budget_mb 必须大于等于 0")
+        return v
+
+    @validator("replication_poll_seconds")
+    def validate_replication_poll_seconds(cls, v):
+        """验证复制轮询间隔"""
+        if v <= 0:
+            raise ValueError("replication_poll_seconds 必须大于 0")
+        return v
+
+    @validator("replication_max_lag_seconds")
+    def validate_replication_max_lag_seconds(cls, v, values):
+        """验证最大复制延迟（至少一个轮询间隔）"""
+        if "replication_poll_seconds" in values and v < values["replication_poll_seconds"]:
+            raise ValueError("replication_max_lag_seconds 必须大于等于 replication_poll_seconds")
+        return v
+
+    @validator("index_load_mode")
+    def validate_index_load_mode(cls, v):
+        """验证索引加载方式"""
+        if v not in ("memory", "mmap"):
+            raise ValueError("index_load_mode 必须是 memory / mmap 之一")
+        return v
+
+    @validator("shard_strategy")
+    def validate_shard_strategy(cls, v):
+        """验证分片策略"""
+        if v not in ("hash", "size"):
+            raise ValueError("shard_strategy 必须是 hash / size 之一")
+        return v
+
+    @validator("compaction_dirty_ratio")
+    def validate_compaction_dirty_ratio(cls, v):
+        """验证压缩触发比例"""
+        if not 0 < v <= 1:
+            raise ValueError("compaction_dirty_ratio 必须在 0 到 1 之间")
+        return v
+
+    @validator("pq_m")
+    def validate_pq_m(cls, v, values):
+        """验证 pq_m 能整除 PQ 编码的维度（开启降维时为 transform_dim）"""
+        if values.get("index_type") != "ivf_pq" and values.get("vector_codec") != "pq":
+            return v
+        if values.get("vector_transform", "none") != "none":
+            dim = values.get("transform_dim")
+        else:
+            dim = values.get("dimension")
+        if dim is not None and dim % v != 0:
+            raise ValueError("pq_m 必须能整除 dimension（开启降维时为 transform_dim）")
+        return v
+
     class Config:
         env_prefix = "VECTOR_STORE_"
 
@@ -274,6 +506,14 @@ class ConfigLoader:
             if "port" in rag:
                 result["port"] = rag["port"]
 
+            # 检索配置
+            for key in (
+                "similarity_threshold", "top_k_retrieval", "max_retrieved_articles",
+                "retrieval_mode", "range_max_results",
+            ):
+                if key in rag:
+                    result[key] = rag[key]
+
         return result
 
     def _extract_vdb_config(self, config_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -292,6 +532,16 @@ class ConfigLoader:
                 result["map_path"] = vs["map_path"]
             if "embed_path" in vs:
                 result["embed_path"] = vs["embed_path"]
+            if "wal_path" in vs:
+                result["wal_path"] = vs["wal_path"]
+            if "vectors_path" in vs:
+                result["vectors_path"] = vs["vectors_path"]
+            if "commit_manifest_path" in vs:
+                result["commit_manifest_path"] = vs["commit_manifest_path"]
+            if "content_dir" in vs:
+                result["content_dir"] = vs["content_dir"]
+            if "collections_dir" in vs:
+                result["collections_dir"] = vs["collections_dir"]
 
             # 维度配置
             if "dimension" in vs:
@@ -303,6 +553,33 @@ class ConfigLoader:
             if "chunk_overlap" in vs:
                 result["chunk_overlap"] = vs["chunk_overlap"]
 
+            # 向量库服务配置
+            for key in ("type", "host", "port", "timeout"):
+                if key in vs:
+                    result[key] = vs[key]
+
+            # 索引配置
+            for key in (
+                "index_type", "vector_codec", "vector_transform", "transform_dim",
+                "refine", "refine_k_factor",
+                "train_threshold", "max_train_points",
+                "ivf_nlist", "ivf_retrain_growth", "ivf_nprobe", "pq_m", "pq_nbits",
+                "hnsw_m", "hnsw_ef_construction", "hnsw_ef_search",
+                "wal_checkpoint_records", "wal_checkpoint_bytes", "wal_fsync",
+                "group_commit_ms", "group_commit_max",
+                "index_load_mode", "read_only", "mmap_prefetch",
+                "filter_brute_force_max",
+                "binary_prefilter", "binary_index_type", "binary_k_factor",
+                "search_batch_window_ms", "search_batch_max",
+                "shards", "shard_strategy", "shard_search_workers",
+                "compaction_dirty_ratio", "compaction_idle_seconds",
+                "collection_memory_budget_mb",
+                "replication_source", "replication_poll_seconds",
+                "replication_max_lag_seconds", "replication_timeout",
+            ):
+                if key in vs:
+                    result[key] = vs[key]
+
         return result
 
     def _extract_ui_config(self, config_data: Dict[str, Any]) -> Dict[str, Any]:
@@ -6,6 +6,8 @@ VDB接口测试用例
 
 import os
 import sys
+import json
+import urllib.request
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -15,10 +17,11 @@ from common.assertions import assert_true, assert_status, assert_response_type,
 RAG_BASE = os.environ.get("RAG_BASE", "http://127.0.0.1:8000")
 TEST_DATA_PATH = os.environ.get("TEST_DATA_PATH", "test/config/test_data/test_data.txt")
 DOC_NAME = os.environ.get("TEST_DATA_NAME", "test_data.txt")
+COLLECTION = os.environ.get("TEST_COLLECTION", "api-test")
 
 client = HttpClient(RAG_BASE)
 
-state = {"file_id": None}
+state = {"file_id": None, "generation": None}
 
 
 def test_get_doc_empty():
@@ -68,6 +71,100 @@ def test_get_doc_after_add():
     state["file_id"] = file_id
 
 
+def test_stats_after_add():
+    """测试添加后获取统计信息"""
+    code, j, body = client.get("/stats")
+
+    assert_status(code, 200, f"body={body}")
+    assert_field_exists(j, "stats", f"response={j}")
+
+    stats = j["stats"]
+    assert_true(stats.get("files", 0) >= 1, f"expected files>=1, got {stats}")
+    assert_true(stats.get("chunks", 0) > 0, f"expected chunks>0, got {stats}")
+
+    code, j, body = client.get(f"/stats/{state['file_id']}")
+
+    assert_status(code, 200, f"body={body}")
+    assert_true(j["stats"].get("chunks", 0) > 0, f"expected file chunks>0, got {j}")
+
+
+def test_snapshot_roundtrip():
+    """测试快照导出后导入，文档与统计不变"""
+    with urllib.request.urlopen(f"{RAG_BASE}/snapshot", timeout=120) as resp:
+        assert_status(resp.status, 200, "export snapshot")
+        data = resp.read()
+    assert_true(len(data) > 0, "empty snapshot")
+
+    _, before, _ = client.get("/stats")
+
+    req = urllib.request.Request(
+        f"{RAG_BASE}/snapshot",
+        data=data,
+        headers={"Content-Type": "application/x-tar"},
+        method="POST",
+    )
+    with urllib.request.urlopen(req, timeout=120) as resp:
+        assert_status(resp.status, 200, "import snapshot")
+        j = json.loads(resp.read().decode("utf-8"))
+    assert_true(j.get("status") == "ok", f"expected status=ok, got {j}")
+    assert_true(j["manifest"]["index"]["total_files"] >= 1, f"unexpected manifest: {j}")
+
+    code, j, body = client.get("/doc")
+    assert_status(code, 200, f"body={body}")
+    assert_true(
+        any(d.get("file_id") == state["file_id"] for d in j["docs"]),
+        f"doc missing after snapshot import: {j}"
+    )
+
+    _, after, _ = client.get("/stats")
+    assert_true(
+        after["stats"].get("chunks") == before["stats"].get("chunks"),
+        f"chunks changed after import: {before} -> {after}"
+    )
+
+
+def test_replication_writer():
+    """测试写入节点返回知识库版本"""
+    code, j, body = client.get("/replication")
+
+    assert_status(code, 200, f"body={body}")
+    assert_true(j.get("role") == "writer", f"expected role=writer, got {j}")
+    assert_true(j.get("generation"), f"missing generation: {j}")
+
+    state["generation"] = j["generation"]
+
+
+def test_collection_isolation():
+    """测试命名集合与全局知识库隔离"""
+    code, j, body = client.get("/doc")
+    assert_status(code, 200, f"body={body}")
+    default_count = len(j["docs"])
+
+    code, j, body = client.post(
+        f"/collections/{COLLECTION}/doc",
+        {"name": DOC_NAME, "content": "第一条 集合隔离测试"},
+        timeout=120
+    )
+    assert_status(code, 200, f"body={body}")
+    assert_true(j.get("status") == "ok", f"expected status=ok, got {j}")
+
+    code, j, body = client.get(f"/collections/{COLLECTION}/doc")
+    assert_status(code, 200, f"body={body}")
+    assert_true(len(j["docs"]) == 1, f"expected 1 doc in collection, got {j}")
+
+    code, j, body = client.get("/doc")
+    assert_true(len(j["docs"]) == default_count, f"default docs changed: {j}")
+
+    code, j, body = client.get("/collections")
+    assert_status(code, 200, f"body={body}")
+    names = [c.get("name") for c in j.get("collections", [])]
+    assert_true(COLLECTION in names, f"collection not listed: {j}")
+
+    code, j, body = client.delete(f"/collections/{COLLECTION}")
+    assert_status(code, 200, f"body={body}")
+    assert_true(j.get("status") == "ok", f"expected status=ok, got {j}")
+
+
 def test_delete_doc():
     """测试删除文档"""
     file_id = state["file_id"]
@@ -91,6 +188,26 @@ def test_get_doc_after_delete():
             raise AssertionError(f"doc still exists after delete: {d}")
 
 
+def test_replication_after_delete():
+    """测试删除后知识库版本变化（副本据此同步）"""
+    code, j, body = client.get("/replication")
+
+    assert_status(code, 200, f"body={body}")
+    assert_true(
+        j.get("generation") != state["generation"],
+        f"generation unchanged after delete: {j}"
+    )
+
+
+def test_stats_after_delete():
+    """测试删除后文档统计清零"""
+    code, j, body = client.get(f"/stats/{state['file_id']}")
+
+    assert_status(code, 200, f"body={body}")
+    assert_field_exists(j, "stats", f"response={j}")
+    assert_true(j["stats"].get("chunks") == 0, f"expected file chunks=0, got {j}")
+
+
 if __name__ == "__main__":
     print("[TEST] VDB API Tests")
     
@@ -107,6 +224,22 @@ if __name__ == "__main__":
         test_get_doc_after_add()
         print("[TEST] test_get_doc_after_add OK")
         
+        print("[TEST] test_stats_after_add ...", flush=True)
+        test_stats_after_add()
+        print("[TEST] test_stats_after_add OK")
+        
+        print("[TEST] test_snapshot_roundtrip ...", flush=True)
+        test_snapshot_roundtrip()
+        print("[TEST] test_snapshot_roundtrip OK")
+        
+        print("[TEST] test_replication_writer ...", flush=True)
+        test_replication_writer()
+        print("[TEST] test_replication_writer OK")
+        
+        print("[TEST] test_collection_isolation ...", flush=True)
+        test_collection_isolation()
+        print("[TEST] test_collection_isolation OK")
+        
         print("[TEST] test_delete_doc ...", flush=True)
         test_delete_doc()
         print("[TEST] test_delete_doc OK")
@@ -115,6 +248,14 @@ if __name__ == "__main__":
         test_get_doc_after_delete()
         print("[TEST] test_get_doc_after_delete OK")
         
+        print("[TEST] test_replication_after_delete ...", flush=True)
+        test_replication_after_delete()
+        print("[TEST] test_replication_after_delete OK")
+        
+        print("[TEST] test_stats_after_delete ...", flush=True)
+        test_stats_after_delete()
+        print("[TEST] test_stats_after_delete OK")
+        
         print("[TEST] ALL VDB API TESTS PASSED")
     except Exception as e:
         print(f"[TEST] FAIL: {type(e).__name__}: {e}", file=sys.stderr)
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+向量库单元测试工具：在临时目录中直接构造存储（不启动服务）
+"""
+
+import os
+import logging
+
+import numpy as np
+
+from shared.config import get_vdb_config, reset_config
+from rag_app.vector_store.types import ChunkMeta
+
+
+def configure(directory, **overrides):
+    """
+    重置全局配置，全部路径指向 directory，并应用 overrides
+
+    Returns:
+        VectorStoreConfig: 全局配置（存储类读取的同一实例）
+    """
+    reset_config()
+    config = get_vdb_config()
+
+    config.index_path = os.path.join(directory, "faiss.index")
+    config.map_path = os.path.join(directory, "doc_map.bin")
+    config.wal_path = os.path.join(directory, "faiss.wal")
+    config.meta_path = os.path.join(directory, "metadata.json")
+    config.embed_path = os.path.join(directory, "article_embeddings.npz")
+    config.vectors_path = os.path.join(directory, "vectors.f32")
+    config.commit_manifest_path = os.path.join(directory, "commit_manifest.json")
+    config.content_dir = os.path.join(directory, "content")
+    config.collections_dir = os.path.join(directory, "collections")
+
+    # 单元测试使用小维度，不在后台压缩
+    config.dimension = 16
+    config.compaction_idle_seconds = 0
+    config.compaction_dirty_ratio = 1.0
+    config.wal_fsync = False
+
+    for key, value in overrides.items():
+        setattr(config, key, value)
+
+    logging.getLogger("VDB").setLevel(logging.WARNING)
+    return config
+
+
+def random_vectors(n, dim, seed=0):
+    """归一化的随机向量"""
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((n, dim)).astype("float32")
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def chunk_metas(file_id, n, text=True):
+    """file_id 的 n 个 chunk 元数据"""
+    return [
+        ChunkMeta(
+            file_id=file_id,
+            article_ids=[f"{file_id}-a{i}"],
+            offset=i * 10,
+            length=10,
+            text=f"{file_id} chunk {i}" if text else "",
+        )
+        for i in range(n)
+    ]
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+容量规划单元测试
+实测小样本后外推的索引字节数与真实构建的索引一致；与索引无关的部分按当前语料每 chunk 字节数线性外推；
+分片、过渡索引与参数不兼容的索引类型
+"""
+
+import os
+import sys
+import tempfile
+
+import faiss
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from common.assertions import assert_true
+from common.vdb_store import configure, random_vectors, chunk_metas
+
+from rag_app.vector_store.raw_faiss import capacity, index_factory
+from rag_app.vector_store.raw_faiss.store import FaissVectorStore
+from rag_app.vector_store.metadata import MetadataRepository
+from rag_app.vector_store.service import VectorStoreService
+
+
+def close_to(actual, expected, tolerance=0.05):
+    return abs(actual - expected) <= tolerance * expected
+
+
+def test_extrapolation_matches_real_index():
+    """2000 个向量实测外推到 8000 个，与直接构建 8000 个向量的索引字节数接近"""
+    for index_type in ("flat", "ivf_flat", "hnsw"):
+        with tempfile.TemporaryDirectory() as directory:
+            config = configure(directory, index_type=index_type, train_threshold=1000, ivf_nlist=16)
+
+            projected = capacity.measure_index(config, 8000, sample=2000, queries=5)
+            real = capacity.measure_index(config, 8000, sample=8000, queries=5)
+
+            assert_true(projected["index_type"] == index_type and not projected["transitional"], f"projected={projected}")
+            assert_true(
+                close_to(projected["index_bytes"], real["index_bytes"]),
+                f"{index_type}: projected={projected['index_bytes']} real={real['index_bytes']}",
+            )
+
+
+def test_transitional_below_threshold():
+    """数据量低于 train_threshold 时按 Flat 过渡索引测量"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="ivf_pq", pq_m=4, train_threshold=10000)
+        measured = capacity.measure_index(config, 500, sample=500, queries=5)
+        assert_true(measured["transitional"] and measured["descriptor"] == "IDMap2,Flat", f"measured={measured}")
+        assert_true(measured["index_type"] == index_factory.INDEX_FLAT, f"measured={measured}")
+
+
+def make_service(config, n):
+    store = FaissVectorStore()
+    store.add(chunk_metas("f0", n), random_vectors(n, config.dimension))
+    store.checkpoint()
+    service = VectorStoreService(
+        store=store, metadata=MetadataRepository(config.meta_path), embedder=None, embed_path=config.embed_path,
+    )
+    return service, store
+
+
+def test_project_scales_components():
+    """映射表按每 chunk 字节数线性外推；additional=0 时 Flat 预测与当前索引文件大小一致"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat", pq_m=5, train_threshold=500)
+        service, store = make_service(config, 1000)
+
+        usage = service.usage()
+        same = capacity.project(config, usage, 0, sample=1000, queries=5, index_types=("flat",))
+        flat = same["index_types"][0]
+        assert_true(flat["configured"], f"flat={flat}")
+        actual = int(faiss.serialize_index(store.index).nbytes)
+        assert_true(close_to(flat["index_bytes"], actual), f"projected={flat['index_bytes']} actual={actual}")
+
+        doubled = capacity.project(config, usage, 1000, sample=1000, queries=5, index_types=("flat", "ivf_pq"))
+        assert_true(doubled["target_chunks"] == 2000, f"target={doubled['target_chunks']}")
+        current = usage["components"]["doc_map"]["memory"]
+        assert_true(doubled["components"]["doc_map"]["memory"] == 2 * current, f"doc_map={doubled['components']['doc_map']}")
+
+        # pq_m=5 不能整除 dimension=16：该类型给出错误而不是整体失败
+        errors = {r["index_type"]: r.get("error") for r in doubled["index_types"]}
+        assert_true(errors["flat"] is None and errors["ivf_pq"], f"errors={errors}")
+
+        service.close()
+        store.close()
+
+
+def test_project_shards():
+    """分片：每个分片实测 target / shards 个向量，索引字节数为各分片之和"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat", shards=4, shard_search_workers=2)
+        usage = {"chunks": 0, "components": {}}
+
+        projection = capacity.project(config, usage, 4000, sample=1000, queries=5, index_types=("flat",))
+        flat = projection["index_types"][0]
+        single = capacity.measure_index(config, 1000, sample=1000, queries=5)
+
+        assert_true(projection["shards"] == 4 and flat["measured"][-1]["vectors"] == 1000, f"flat={flat}")
+        assert_true(close_to(flat["index_bytes"], 4 * single["index_bytes"]), f"sharded={flat['index_bytes']} single={single['index_bytes']}")
+        assert_true(projection["components"]["doc_map"]["memory"] > 0, "synthetic doc map not measured")
+
+
+if __name__ == "__main__":
+    try:
+        print("[TEST] test_extrapolation_matches_real_index ...", flush=True)
+        test_extrapolation_matches_real_index()
+        print("[TEST] test_extrapolation_matches_real_index OK")
+
+        print("[TEST] test_transitional_below_threshold ...", flush=True)
+        test_transitional_below_threshold()
+        print("[TEST] test_transitional_below_threshold OK")
+
+        print("[TEST] test_project_scales_components ...", flush=True)
+        test_project_scales_components()
+        print("[TEST] test_project_scales_components OK")
+
+        print("[TEST] test_project_shards ...", flush=True)
+        test_project_shards()
+        print("[TEST] test_project_shards OK")
+
+        print("[TEST] ALL CAPACITY TESTS PASSED")
+    except Exception as e:
+        print(f"[TEST] FAIL: {type(e).__name__}: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+原文存储单元测试
+在临时目录中直接构造 ContentStore / VectorStoreService（不启动服务）
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from common.assertions import assert_true
+from common.vdb_store import configure, random_vectors
+
+from rag_app.vector_store import content
+from rag_app.vector_store.content import ContentStore, _CHECKPOINT_CHARS
+from rag_app.vector_store.types import ArticleMeta, ChunkMeta
+
+
+# 1 / 2 / 3 / 4 字节的 UTF-8 字符混排，字符边界与 checkpoint 错开
+MIXED = "第一条 Article 1：合同自成立时生效。é ñ 📄 附件\r\n" * 20
+
+
+def assert_slices(store, file_id, content):
+    """每个起点、跨越 checkpoint 的各种长度与 str 切片一致"""
+    for offset in range(len(content)):
+        for length in (1, 7, _CHECKPOINT_CHARS - 1, _CHECKPOINT_CHARS, _CHECKPOINT_CHARS + 1, 3 * _CHECKPOINT_CHARS):
+            expected = content[offset:offset + length]
+            actual = store.text(file_id, offset, length)
+            assert_true(actual == expected, f"offset={offset} length={length}: {actual!r} != {expected!r}")
+
+
+def test_utf8_slices_across_checkpoints():
+    """多字节字符：切片跨越 64 字符 checkpoint 时按字符位置切出"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = ContentStore(directory)
+        store.put("mixed", MIXED)
+        assert_true(len(MIXED.encode("utf-8")) > len(MIXED) > 4 * _CHECKPOINT_CHARS, "content too short")
+
+        mapped = store._mapped("mixed")
+        assert_true(mapped.checkpoints is not None, "multi-byte content mapped as ASCII")
+        assert_slices(store, "mixed", MIXED)
+
+        # 文件末尾的长度越界按 str 切片截断
+        tail = len(MIXED) - 3
+        assert_true(store.text("mixed", tail, 100) == MIXED[tail:], "tail slice mismatch")
+
+
+def test_checkpoints_scanned_in_blocks():
+    """分块扫描：块边界切开多字节字符、非 ASCII 只出现在后面的块时切片不变"""
+    scan_bytes = content._SCAN_BYTES
+    content._SCAN_BYTES = 37
+    try:
+        with tempfile.TemporaryDirectory() as directory:
+            store = ContentStore(directory)
+            late = "ascii head\n" * 30 + MIXED
+            store.put("mixed", MIXED)
+            store.put("late", late)
+
+            assert_true(store._mapped("late").checkpoints is not None, "late multi-byte content mapped as ASCII")
+            assert_slices(store, "mixed", MIXED)
+            assert_slices(store, "late", late)
+    finally:
+        content._SCAN_BYTES = scan_bytes
+
+
+def test_ascii_and_empty_files():
+    """纯 ASCII 不建 checkpoint，空文件返回空串"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = ContentStore(directory)
+        ascii_text = "".join(f"line {i}\n" for i in range(100))
+        store.put("ascii", ascii_text)
+        store.put("empty", "")
+
+        assert_true(store._mapped("ascii").checkpoints is None, "ASCII content has checkpoints")
+        assert_slices(store, "ascii", ascii_text)
+        assert_true(store.text("empty", 0, 10) == "", "empty file slice")
+
+
+def test_materialize_and_delete():
+    """materialize 返回副本，内联文本原样返回；删除后读取抛出 KeyError"""
+    with tempfile.TemporaryDirectory() as directory:
+        store = ContentStore(directory)
+        store.put("f0", MIXED)
+
+        meta = ArticleMeta(article_id="a0", file_id="f0", offset=70, length=30)
+        text = store.materialize(meta)
+        assert_true(text.text == MIXED[70:100], f"materialized {text.text!r}")
+        assert_true(meta.text == "", "materialize modified the meta")
+
+        inline = ArticleMeta(article_id="a1", file_id="missing", offset=0, length=3, text="inline")
+        assert_true(store.materialize(inline) is inline, "inline text re-read")
+
+        assert_true(store.nbytes() == len(MIXED.encode("utf-8")), f"nbytes={store.nbytes()}")
+        store.delete("f0")
+        assert_true(store.nbytes() == 0, f"nbytes after delete={store.nbytes()}")
+        try:
+            store.text("f0", 0, 1)
+            raise AssertionError("deleted content still readable")
+        except KeyError:
+            pass
+
+
+def test_service_returns_raw_metas():
+    """get_chunk / get_article_meta 只返回偏移，materialize 时才切出文本"""
+    from rag_app.vector_store.raw_faiss.store import FaissVectorStore
+    from rag_app.vector_store.metadata import MetadataRepository
+    from rag_app.vector_store.service import VectorStoreService
+
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat")
+        content = ContentStore(config.content_dir)
+        content.put("f0", MIXED)
+
+        store = FaissVectorStore()
+        metadata = MetadataRepository(config.meta_path)
+        service = VectorStoreService(
+            store=store,
+            metadata=metadata,
+            embedder=None,
+            embed_path=config.embed_path,
+            content=content,
+        )
+
+        store.add(
+            [ChunkMeta(file_id="f0", article_ids=["a0"], offset=60, length=40)],
+            random_vectors(1, config.dimension),
+        )
+        metadata.add_article(ArticleMeta(article_id="a0", file_id="f0", offset=60, length=40))
+
+        chunk = service.get_chunk(0)
+        assert_true(chunk.text == "" and chunk.article_ids == ["a0"], f"chunk={chunk}")
+        assert_true(service.materialize(chunk).text == MIXED[60:100], "chunk text mismatch")
+
+        article = service.get_article_meta("a0")
+        assert_true(article.text == "", "article text materialized on lookup")
+        assert_true(service.materialize(article).text == MIXED[60:100], "article text mismatch")
+
+        service.close()
+        store.close()
+
+
+if __name__ == "__main__":
+    try:
+        print("[TEST] test_utf8_slices_across_checkpoints ...", flush=True)
+        test_utf8_slices_across_checkpoints()
+        print("[TEST] test_utf8_slices_across_checkpoints OK")
+
+        print("[TEST] test_checkpoints_scanned_in_blocks ...", flush=True)
+        test_checkpoints_scanned_in_blocks()
+        print("[TEST] test_checkpoints_scanned_in_blocks OK")
+
+        print("[TEST] test_ascii_and_empty_files ...", flush=True)
+        test_ascii_and_empty_files()
+        print("[TEST] test_ascii_and_empty_files OK")
+
+        print("[TEST] test_materialize_and_delete ...", flush=True)
+        test_materialize_and_delete()
+        print("[TEST] test_materialize_and_delete OK")
+
+        print("[TEST] test_service_returns_raw_metas ...", flush=True)
+        test_service_returns_raw_metas()
+        print("[TEST] test_service_returns_raw_metas OK")
+
+        print("[TEST] ALL CONTENT STORE TESTS PASSED")
+    except Exception as e:
+        print(f"[TEST] FAIL: {type(e).__name__}: {e}", file=sys.stderr)
+        sys.exit(1)
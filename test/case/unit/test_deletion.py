@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+按 chunk_id 物理删除单元测试
+各索引类型按稳定 chunk_id 移除向量（HNSW 退化为重建），其余 chunk_id 不变；旧的按位置编号索引升级后 id 不变
+"""
+
+import os
+import sys
+import tempfile
+
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from common.assertions import assert_true
+from common.vdb_store import configure, random_vectors, chunk_metas
+
+from rag_app.vector_store.raw_faiss.store import FaissVectorStore
+from rag_app.vector_store.raw_faiss import index_factory
+
+
+def test_delete_keeps_other_ids():
+    """删除一个文件后压缩：只移除该文件的 id，其余 chunk 的 id 与检索结果不变"""
+    for index_type in index_factory.INDEX_TYPES:
+        with tempfile.TemporaryDirectory() as directory:
+            overrides = {"pq_m": 4, "pq_nbits": 4} if index_type == index_factory.INDEX_IVF_PQ else {}
+            config = configure(directory, index_type=index_type, train_threshold=100, **overrides)
+            store = FaissVectorStore()
+
+            files = {f"f{i}": random_vectors(60, config.dimension, seed=i) for i in range(3)}
+            for file_id, vectors in files.items():
+                store.add(chunk_metas(file_id, 60), vectors.copy())
+            store.checkpoint()
+
+            before = {file_id: store.doc_map.ids_of_file(file_id).copy() for file_id in files}
+            assert_true(index_factory.index_kind(store.index) == index_type, f"kind={index_factory.index_kind(store.index)}")
+
+            store.delete_by_file("f1")
+            store.compact()
+
+            index = store.index
+            assert_true(index.ntotal == 120, f"{index_type}: ntotal={index.ntotal}")
+            assert_true(not index_factory.contains_ids(index, before["f1"]).any(), f"{index_type}: deleted ids left")
+            for file_id in ("f0", "f2"):
+                ids = store.doc_map.ids_of_file(file_id)
+                assert_true(np.array_equal(ids, before[file_id]), f"{index_type}: {file_id} ids changed")
+                assert_true(index_factory.contains_ids(index, ids).all(), f"{index_type}: {file_id} ids missing")
+
+            hit = store.search(files["f2"][:1], top_k=1, nprobe=config.ivf_nlist)[0]
+            assert_true(hit["chunk_id"] == int(before["f2"][0]), f"{index_type}: hit={hit}")
+            store.close()
+
+
+def test_legacy_positional_index_upgraded():
+    """按位置编号的旧 Flat 索引升级为 IDMap2：chunk_id 即原位置"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat")
+        vectors = random_vectors(30, config.dimension)
+
+        legacy = faiss.IndexFlatIP(config.dimension)
+        legacy.add(vectors)
+
+        upgraded = index_factory.upgrade_legacy_index(config, legacy)
+        assert_true(index_factory.has_stable_ids(upgraded), "upgraded index has no stable ids")
+        assert_true(np.array_equal(index_factory.index_ids(upgraded), np.arange(30)), "ids differ from positions")
+
+        upgraded.remove_ids(index_factory.remove_selector(upgraded, np.array([3, 4], dtype="int64")))
+        _, found = upgraded.search(vectors[10:11], 1)
+        assert_true(upgraded.ntotal == 28 and int(found[0, 0]) == 10, f"ntotal={upgraded.ntotal} found={found}")
+
+
+if __name__ == "__main__":
+    try:
+        print("[TEST] test_delete_keeps_other_ids ...", flush=True)
+        test_delete_keeps_other_ids()
+        print("[TEST] test_delete_keeps_other_ids OK")
+
+        print("[TEST] test_legacy_positional_index_upgraded ...", flush=True)
+        test_legacy_positional_index_upgraded()
+        print("[TEST] test_legacy_positional_index_upgraded OK")
+
+        print("[TEST] ALL DELETION TESTS PASSED")
+    except Exception as e:
+        print(f"[TEST] FAIL: {type(e).__name__}: {e}", file=sys.stderr)
+        sys.exit(1)
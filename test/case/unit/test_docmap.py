@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+列式映射表单元测试
+在临时目录中直接读写 ColumnarDocMap（不启动服务）
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from common.assertions import assert_true
+
+from rag_app.vector_store.raw_faiss.docmap import ColumnarDocMap, migrate_json_map
+from rag_app.vector_store.types import ChunkMeta, DocMap, SearchFilter
+
+
+def make_metas(file_id, n, start=0, day=1):
+    """不同长度的 article_ids（含空）、多字节文本、创建时间"""
+    return [
+        ChunkMeta(
+            chunk_id=start + i,
+            file_id=file_id,
+            article_ids=[f"{file_id}-a{j}" for j in range(i % 3)],
+            offset=i * 10,
+            length=10,
+            created_at=datetime(2024, 1, day, 12, 0, i),
+            text=f"{file_id} 第{i}条 📄" if i % 2 else "",
+        )
+        for i in range(n)
+    ]
+
+
+def build_map():
+    """f0 / f1 / f2 三个文件，删除 f1 的部分 chunk，f2 整体为墓碑"""
+    doc_map = ColumnarDocMap()
+    doc_map.add(np.arange(0, 10, dtype="int64"), make_metas("f0", 10, 0, day=1))
+    doc_map.add(np.arange(10, 16, dtype="int64"), make_metas("f1", 6, 10, day=2))
+    doc_map.add(np.arange(16, 20, dtype="int64"), make_metas("f2", 4, 16, day=3))
+
+    doc_map.remove(np.array([11, 13], dtype="int64"))
+    doc_map.remove(np.arange(16, 20, dtype="int64"))
+    doc_map.add_tombstones(np.arange(16, 20, dtype="int64"))
+    doc_map.checkpoint_lsn = 7
+
+    return doc_map
+
+
+def snapshot(doc_map):
+    """可比较的映射表内容"""
+    return {
+        "next_id": doc_map.next_id,
+        "checkpoint_lsn": doc_map.checkpoint_lsn,
+        "len": len(doc_map),
+        "tombstones": doc_map.tombstones.tolist(),
+        "files": sorted(doc_map.live_file_ids()),
+        "stats": {fid: doc_map.file_stats(fid) for fid in ("f0", "f1", "f2")},
+        "chunks": [meta.model_dump() for meta in doc_map.iter_chunks()],
+    }
+
+
+def test_lookup_and_remove():
+    """get / lookup_file_ids / ids_of_file / select_ids 与删除一致"""
+    doc_map = build_map()
+
+    assert_true(len(doc_map) == 14, f"len={len(doc_map)}")
+    assert_true(doc_map.next_id == 20, f"next_id={doc_map.next_id}")
+
+    meta = doc_map.get(5)
+    assert_true(meta.file_id == "f0" and meta.article_ids == ["f0-a0", "f0-a1"], f"meta={meta}")
+    assert_true(meta.text == "f0 第5条 📄", f"text={meta.text!r}")
+    assert_true(doc_map.get(11) is None and 11 not in doc_map, "removed chunk still visible")
+
+    # 不存在 / 已删除 / 越界的 id 为 None
+    ids = np.array([0, 11, 12, 17, 19, 20, 10 ** 9, -1], dtype="int64")
+    expected = ["f0", None, "f1", None, None, None, None, None]
+    assert_true(doc_map.lookup_file_ids(ids) == expected, f"lookup={doc_map.lookup_file_ids(ids)}")
+
+    assert_true(doc_map.ids_of_file("f1").tolist() == [10, 12, 14, 15], f"f1={doc_map.ids_of_file('f1')}")
+    assert_true(not len(doc_map.ids_of_file("f2")), "tombstoned file still has chunks")
+    assert_true(doc_map.file_stats("f2") == {"chunks": 0, "bytes": 0}, f"f2 stats={doc_map.file_stats('f2')}")
+
+    selected = doc_map.select_ids(SearchFilter(file_ids=["f1", "missing"]))
+    assert_true(selected.tolist() == [10, 12, 14, 15], f"selected={selected}")
+    selected = doc_map.select_ids(SearchFilter(created_after=datetime(2024, 1, 2)))
+    assert_true(selected.tolist() == [10, 12, 14, 15], f"selected after={selected}")
+
+
+def test_copy_on_write():
+    """副本上的增删不影响原映射表"""
+    doc_map = build_map()
+    before = snapshot(doc_map)
+
+    copy = doc_map.copy()
+    copy.add(np.arange(20, 23, dtype="int64"), make_metas("f3", 3, 20))
+    copy.remove(np.arange(0, 5, dtype="int64"))
+    copy.drop_tombstones(np.arange(16, 20, dtype="int64"))
+
+    assert_true(snapshot(doc_map) == before, "copy modified the original")
+    assert_true(len(copy) == 12 and not len(copy.tombstones), f"copy len={len(copy)}")
+    assert_true(copy.lookup_file_ids(np.array([21]))[0] == "f3", "copy missing new chunk")
+
+
+def test_save_load_roundtrip():
+    """落盘（压缩为一段）后 mmap 加载，内容与统计一致；空映射表同样可读写"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "doc_map.bin")
+
+        doc_map = build_map()
+        before = snapshot(doc_map)
+        doc_map.save(path)
+
+        loaded = ColumnarDocMap.load(path)
+        assert_true(snapshot(loaded) == before, "loaded map differs")
+        assert_true(len(loaded._segments) == 1, f"segments={len(loaded._segments)}")
+
+        # 加载后继续追加、再次落盘
+        loaded.add(np.arange(20, 22, dtype="int64"), make_metas("f3", 2, 20))
+        loaded.save(path)
+        reloaded = ColumnarDocMap.load(path)
+        assert_true(len(reloaded) == 16 and reloaded.get(21).file_id == "f3", f"len={len(reloaded)}")
+
+        empty_path = os.path.join(directory, "empty.bin")
+        ColumnarDocMap().save(empty_path)
+        empty = ColumnarDocMap.load(empty_path)
+        assert_true(len(empty) == 0 and empty.next_id == 0, "empty map roundtrip")
+
+        # 全部文本为空（原文在内容存储中）时末尾数组为空
+        offsets = ColumnarDocMap()
+        offsets.add(np.arange(3, dtype="int64"), [m.model_copy(update={"text": ""}) for m in make_metas("f0", 3)])
+        offsets.save(empty_path)
+        assert_true(snapshot(ColumnarDocMap.load(empty_path)) == snapshot(offsets), "offset-only map roundtrip")
+
+
+def test_migrate_json_map():
+    """旧版 doc_map.json 迁移为列式格式，原文件保留为备份"""
+    with tempfile.TemporaryDirectory() as directory:
+        json_path = os.path.join(directory, "doc_map.json")
+        bin_path = os.path.join(directory, "doc_map.bin")
+
+        metas = make_metas("f0", 5)
+        legacy = DocMap(next_id=8, checkpoint_lsn=3, chunks={m.chunk_id: m for m in metas if m.chunk_id != 2})
+        with open(json_path, "w", encoding="utf-8") as f:
+            f.write(legacy.model_dump_json())
+
+        doc_map = migrate_json_map(json_path, bin_path)
+        assert_true(os.path.exists(json_path + ".migrated") and not os.path.exists(json_path), "json not backed up")
+
+        loaded = ColumnarDocMap.load(bin_path)
+        assert_true(loaded.next_id == 8 and loaded.checkpoint_lsn == 3, f"next_id={loaded.next_id}")
+        assert_true([m.model_dump() for m in loaded.iter_chunks()] == [m.model_dump() for m in doc_map.iter_chunks()], "migrated map differs")
+        assert_true(loaded.get(4) == metas[4] and loaded.get(2) is None, f"chunk 4={loaded.get(4)}")
+
+
+if __name__ == "__main__":
+    try:
+        print("[TEST] test_lookup_and_remove ...", flush=True)
+        test_lookup_and_remove()
+        print("[TEST] test_lookup_and_remove OK")
+
+        print("[TEST] test_copy_on_write ...", flush=True)
+        test_copy_on_write()
+        print("[TEST] test_copy_on_write OK")
+
+        print("[TEST] test_save_load_roundtrip ...", flush=True)
+        test_save_load_roundtrip()
+        print("[TEST] test_save_load_roundtrip OK")
+
+        print("[TEST] test_migrate_json_map ...", flush=True)
+        test_migrate_json_map()
+        print("[TEST] test_migrate_json_map OK")
+
+        print("[TEST] ALL DOC MAP TESTS PASSED")
+    except Exception as e:
+        print(f"[TEST] FAIL: {type(e).__name__}: {e}", file=sys.stderr)
+        sys.exit(1)
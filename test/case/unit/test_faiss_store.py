@@ -0,0 +1,365 @@
+#!/usr/bin/env python3
+"""
+FAISS 向量库单元测试
+直接在临时目录中构造 FaissVectorStore（不启动服务）
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from common.assertions import assert_true
+from common.vdb_store import configure, random_vectors, chunk_metas
+
+from rag_app.vector_store.raw_faiss.store import FaissVectorStore
+from rag_app.vector_store.raw_faiss import index_factory
+
+
+def crash(store):
+    """模拟进程崩溃：日志已落盘，不 checkpoint、不关闭"""
+    store.compactor.stop()
+    store.sync()
+
+
+def count_migrations(store):
+    """包装 _migrate_index，返回调用计数"""
+    calls = {"count": 0}
+    migrate = store._migrate_index
+
+    def counted(index, doc_map):
+        calls["count"] += 1
+        return migrate(index, doc_map)
+
+    store._migrate_index = counted
+    return calls
+
+
+def test_transform_migrates_once():
+    """flat + 降维：达到阈值后只迁移一次，之后的写入不再迁移"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat", vector_transform="pca", transform_dim=8, train_threshold=200)
+        store = FaissVectorStore()
+        calls = count_migrations(store)
+
+        store.add(chunk_metas("f0", 250), random_vectors(250, config.dimension, seed=0))
+        assert_true(calls["count"] == 1, f"expected 1 migration, got {calls['count']}")
+        assert_true(index_factory.index_transform(store.index) == "pca8", f"transform={index_factory.index_transform(store.index)}")
+
+        for i in range(1, 4):
+            store.add(chunk_metas(f"f{i}", 50), random_vectors(50, config.dimension, seed=i))
+        assert_true(calls["count"] == 1, f"expected 1 migration after more adds, got {calls['count']}")
+        assert_true(store.ntotal == 400, f"ntotal={store.ntotal}")
+
+        store.close()
+
+
+def test_migration_keeps_ids():
+    """Flat 过渡索引达到阈值后迁移为 IVF-Flat：chunk_id 不变，墓碑向量随迁移丢弃，重启后仍为目标索引"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="ivf_flat", train_threshold=200)
+        store = FaissVectorStore()
+        calls = count_migrations(store)
+
+        store.add(chunk_metas("f0", 100), random_vectors(100, config.dimension, seed=0))
+        kept = random_vectors(80, config.dimension, seed=1)
+        store.add(chunk_metas("f1", 80), kept.copy())
+        store.delete_by_file("f0")
+        assert_true(index_factory.index_kind(store.index) == index_factory.INDEX_FLAT, "migrated before threshold")
+        kept_ids = store.doc_map.ids_of_file("f1").tolist()
+
+        store.add(chunk_metas("f2", 150), random_vectors(150, config.dimension, seed=2))
+        assert_true(calls["count"] == 1, f"migrations={calls['count']}")
+        assert_true(index_factory.index_kind(store.index) == index_factory.INDEX_IVF_FLAT, f"kind={index_factory.index_kind(store.index)}")
+        assert_true(store.index.ntotal == 230 and not len(store.doc_map.tombstones), f"ntotal={store.index.ntotal}")
+        assert_true(store.doc_map.ids_of_file("f1").tolist() == kept_ids, "chunk ids changed by migration")
+
+        hits = store.search(kept[:1], top_k=1, nprobe=config.ivf_nlist)
+        assert_true(hits[0]["chunk_id"] == kept_ids[0], f"hits={hits}")
+        store.close()
+
+        store = FaissVectorStore()
+        assert_true(index_factory.index_kind(store.index) == index_factory.INDEX_IVF_FLAT, "reopened as flat")
+        assert_true(store.index.ntotal == 230 and len(store.doc_map) == 230, f"reopened ntotal={store.index.ntotal}")
+        store.close()
+
+
+def test_ivf_retrains_when_nlist_outgrown():
+    """迁移时收敛的 nlist 在数据量增长到 ivf_retrain_growth 倍后重新训练，chunk_id 不变"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="ivf_flat", train_threshold=100, ivf_nlist=64, ivf_retrain_growth=2.0)
+        store = FaissVectorStore()
+        calls = count_migrations(store)
+
+        store.add(chunk_metas("f0", 100), random_vectors(100, config.dimension, seed=0))
+        assert_true(calls["count"] == 1 and store.index.nlist == 2, f"nlist={store.index.nlist}")
+
+        # effective_nlist(150) = 3 < 2 * 2
+        store.add(chunk_metas("f1", 50), random_vectors(50, config.dimension, seed=1))
+        assert_true(calls["count"] == 1, f"retrained early: migrations={calls['count']}")
+
+        late = random_vectors(20, config.dimension, seed=2)
+        store.add(chunk_metas("f2", 20), late.copy())
+        assert_true(calls["count"] == 2 and store.index.nlist == 4, f"migrations={calls['count']} nlist={store.index.nlist}")
+        assert_true(store.ntotal == 170, f"ntotal={store.ntotal}")
+
+        hit = store.search(late[:1], top_k=1, nprobe=config.ivf_nlist)[0]
+        assert_true(hit["chunk_id"] == store.doc_map.ids_of_file("f2")[0], f"hit={hit}")
+        store.close()
+
+
+def test_flat_pq_reports_flat():
+    """flat + PQ 以单聚类 IVF 存储，info 仍报告 flat"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat", vector_codec="pq", pq_m=4, pq_nbits=4, train_threshold=100)
+        store = FaissVectorStore()
+        store.add(chunk_metas("f0", 120), random_vectors(120, config.dimension, seed=0))
+
+        info = store.info()
+        assert_true(info["index_type"] == "flat" and info["codec"] == "pq", f"info={info}")
+        store.close()
+
+
+def test_add_leaves_published_index():
+    """追加进入 delta 而不修改已发布的索引；旧快照检索不到新增的 chunk，checkpoint 在副本上并入"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat")
+        store = FaissVectorStore()
+
+        store.add(chunk_metas("f0", 100), random_vectors(100, config.dimension, seed=0))
+        store.checkpoint()
+        index, old = store.index, store._snapshot
+
+        added = random_vectors(50, config.dimension, seed=1)
+        store.add(chunk_metas("f1", 50), added.copy())
+        assert_true(store.index is index and index.ntotal == 100, f"published index modified: ntotal={index.ntotal}")
+        assert_true(store.ntotal == 150 and len(store._snapshot.delta) == 50, f"ntotal={store.ntotal}")
+
+        hits = store.search(added[:1], top_k=5)
+        assert_true(hits[0]["file_id"] == "f1", f"new chunk not found: {hits}")
+
+        # 旧快照没有新增的 delta
+        current, store._snapshot = store._snapshot, old
+        hits = store.search(added[:1], top_k=5)
+        assert_true(all(hit["file_id"] == "f0" for hit in hits), f"old snapshot saw new chunks: {hits}")
+        store._snapshot = current
+
+        store.checkpoint()
+        assert_true(store.index is not index and index.ntotal == 100, "checkpoint modified the published index")
+        assert_true(store.index.ntotal == 150 and not len(store._snapshot.delta), f"ntotal={store.index.ntotal}")
+        assert_true(store.search(added[:1], top_k=1)[0]["file_id"] == "f1", "folded chunk not found")
+
+        store.close()
+
+
+def test_concurrent_search_during_add():
+    """检索与原地追加并发时结果一致"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="hnsw")
+        store = FaissVectorStore()
+
+        probe = random_vectors(1, config.dimension, seed=99)
+        store.add(chunk_metas("probe", 1), probe.copy())
+
+        errors = []
+        stop = threading.Event()
+
+        def search():
+            while not stop.is_set():
+                try:
+                    hits = store.search(probe, top_k=5)
+                    if not hits or hits[0]["file_id"] != "probe":
+                        errors.append(hits)
+                except Exception as e:
+                    errors.append(e)
+
+        readers = [threading.Thread(target=search) for _ in range(4)]
+        for reader in readers:
+            reader.start()
+
+        for i in range(20):
+            store.add(chunk_metas(f"f{i}", 100), random_vectors(100, config.dimension, seed=i))
+
+        stop.set()
+        for reader in readers:
+            reader.join()
+
+        assert_true(not errors, f"search errors: {errors[:3]}")
+        assert_true(store.ntotal == 2001, f"ntotal={store.ntotal}")
+        store.close()
+
+
+def test_binary_index_not_modified():
+    """二值索引不被追加修改（新向量在 delta 中精确计算），压缩在副本上移除"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat", binary_prefilter=True)
+        store = FaissVectorStore()
+
+        store.add(chunk_metas("f0", 100), random_vectors(100, config.dimension, seed=0))
+        store.checkpoint()
+        binary = store._snapshot.binary
+
+        added = random_vectors(20, config.dimension, seed=1)
+        store.add(chunk_metas("f1", 20), added.copy())
+        assert_true(store._snapshot.binary is binary, "add replaced the binary index")
+        assert_true(binary.ntotal == 100, f"binary ntotal={binary.ntotal}")
+
+        hits = store.search(added[:1], top_k=3)
+        assert_true(hits[0]["file_id"] == "f1", f"new chunk not found: {hits}")
+
+        store.delete_by_file("f1")
+        store.compact()
+        assert_true(store._snapshot.binary is not binary, "compaction modified the live binary index")
+        assert_true(store._snapshot.binary.ntotal == 100, f"binary ntotal={store._snapshot.binary.ntotal}")
+
+        hits = store.search(added[:1], top_k=3)
+        assert_true(all(hit["file_id"] == "f0" for hit in hits), f"deleted chunk returned: {hits}")
+        store.close()
+
+
+def test_compaction_reclaims_tombstones():
+    """压缩物理移除墓碑向量，回收字节数大于 0，其余 chunk_id 不变，期间写入补到新索引"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat")
+        store = FaissVectorStore()
+
+        store.add(chunk_metas("f0", 100), random_vectors(100, config.dimension, seed=0))
+        kept = random_vectors(50, config.dimension, seed=1)
+        store.add(chunk_metas("f1", 50), kept.copy())
+        kept_ids = store.doc_map.ids_of_file("f1").tolist()
+
+        store.delete_by_file("f0")
+        assert_true(len(store.doc_map.tombstones) == 100, f"tombstones={len(store.doc_map.tombstones)}")
+        assert_true(all(hit["file_id"] == "f1" for hit in store.search(kept[:1], top_k=10)), "tombstone returned")
+
+        # 压缩期间（移除阶段在写锁外）写入
+        late = random_vectors(10, config.dimension, seed=2)
+
+        def progress(phase, done, total):
+            if phase == "remove" and not done:
+                store.add(chunk_metas("f2", 10), late.copy())
+
+        result = store.compact(progress)
+        assert_true(result["reclaimed_vectors"] == 100, f"result={result}")
+        assert_true(result["reclaimed_bytes"] > 0, f"result={result}")
+        assert_true(not len(store.doc_map.tombstones), "tombstones left after compaction")
+        assert_true(store.index.ntotal == 60, f"ntotal={store.index.ntotal}")
+        assert_true(store.doc_map.ids_of_file("f1").tolist() == kept_ids, "chunk ids changed")
+        assert_true(store.search(late[:1], top_k=1)[0]["file_id"] == "f2", "add during compaction lost")
+
+        store.close()
+        store = FaissVectorStore()
+        assert_true(store.index.ntotal == 60 and len(store.doc_map) == 60, f"reopened ntotal={store.index.ntotal}")
+        store.close()
+
+
+def test_wal_replay_after_crash():
+    """崩溃后重启：在最近一次 checkpoint 之上回放日志中的新增与删除"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat", wal_checkpoint_records=1000)
+        store = FaissVectorStore()
+
+        store.add(chunk_metas("f0", 30), random_vectors(30, config.dimension, seed=0))
+        store.checkpoint()
+
+        added = random_vectors(20, config.dimension, seed=1)
+        store.add(chunk_metas("f1", 20), added.copy())
+        store.add(chunk_metas("f2", 10), random_vectors(10, config.dimension, seed=2))
+        store.delete_by_file("f0")
+        assert_true(store.wal.records == 3, f"wal records={store.wal.records}")
+        crash(store)
+
+        store = FaissVectorStore()
+        assert_true(store.index.ntotal == 60, f"ntotal={store.index.ntotal}")
+        assert_true(len(store.doc_map) == 30, f"chunks={len(store.doc_map)}")
+        assert_true(len(store.doc_map.tombstones) == 30, f"tombstones={len(store.doc_map.tombstones)}")
+        assert_true(sorted(store.file_ids()) == ["f1", "f2"], f"files={store.file_ids()}")
+
+        meta = store.get(30)
+        assert_true(meta.file_id == "f1" and meta.article_ids == ["f1-a0"], f"meta={meta}")
+        assert_true(store.search(added[:1], top_k=1)[0]["chunk_id"] == 30, "replayed vector not found")
+
+        # 回放后继续写入，chunk_id 不复用
+        store.add(chunk_metas("f3", 1), random_vectors(1, config.dimension, seed=3))
+        assert_true(store.doc_map.ids_of_file("f3").tolist() == [60], "chunk id reused after replay")
+        store.close()
+
+
+def test_wal_torn_tail():
+    """日志尾部记录写了一半：回放到最后一条完整记录，截掉损坏部分"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat", wal_checkpoint_records=1000)
+        store = FaissVectorStore()
+
+        store.add(chunk_metas("f0", 10), random_vectors(10, config.dimension, seed=0))
+        store.add(chunk_metas("f1", 10), random_vectors(10, config.dimension, seed=1))
+        crash(store)
+
+        # 截掉最后一条记录的后半部分
+        size = os.path.getsize(config.wal_path)
+        with open(config.wal_path, "r+b") as f:
+            f.truncate(size - 100)
+
+        store = FaissVectorStore()
+        assert_true(store.file_ids() == ["f0"], f"files={store.file_ids()}")
+        assert_true(store.index.ntotal == 10, f"ntotal={store.index.ntotal}")
+
+        # 截断后的日志可继续追加并回放
+        store.add(chunk_metas("f2", 5), random_vectors(5, config.dimension, seed=2))
+        crash(store)
+
+        store = FaissVectorStore()
+        assert_true(sorted(store.file_ids()) == ["f0", "f2"], f"files={store.file_ids()}")
+        assert_true(store.index.ntotal == 15, f"ntotal={store.index.ntotal}")
+        store.close()
+
+
+if __name__ == "__main__":
+    try:
+        print("[TEST] test_transform_migrates_once ...", flush=True)
+        test_transform_migrates_once()
+        print("[TEST] test_transform_migrates_once OK")
+
+        print("[TEST] test_migration_keeps_ids ...", flush=True)
+        test_migration_keeps_ids()
+        print("[TEST] test_migration_keeps_ids OK")
+
+        print("[TEST] test_ivf_retrains_when_nlist_outgrown ...", flush=True)
+        test_ivf_retrains_when_nlist_outgrown()
+        print("[TEST] test_ivf_retrains_when_nlist_outgrown OK")
+
+        print("[TEST] test_flat_pq_reports_flat ...", flush=True)
+        test_flat_pq_reports_flat()
+        print("[TEST] test_flat_pq_reports_flat OK")
+
+        print("[TEST] test_add_leaves_published_index ...", flush=True)
+        test_add_leaves_published_index()
+        print("[TEST] test_add_leaves_published_index OK")
+
+        print("[TEST] test_concurrent_search_during_add ...", flush=True)
+        test_concurrent_search_during_add()
+        print("[TEST] test_concurrent_search_during_add OK")
+
+        print("[TEST] test_binary_index_not_modified ...", flush=True)
+        test_binary_index_not_modified()
+        print("[TEST] test_binary_index_not_modified OK")
+
+        print("[TEST] test_compaction_reclaims_tombstones ...", flush=True)
+        test_compaction_reclaims_tombstones()
+        print("[TEST] test_compaction_reclaims_tombstones OK")
+
+        print("[TEST] test_wal_replay_after_crash ...", flush=True)
+        test_wal_replay_after_crash()
+        print("[TEST] test_wal_replay_after_crash OK")
+
+        print("[TEST] test_wal_torn_tail ...", flush=True)
+        test_wal_torn_tail()
+        print("[TEST] test_wal_torn_tail OK")
+
+        print("[TEST] ALL FAISS STORE TESTS PASSED")
+    except Exception as e:
+        print(f"[TEST] FAIL: {type(e).__name__}: {e}", file=sys.stderr)
+        sys.exit(1)
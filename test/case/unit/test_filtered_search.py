@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+过滤检索单元测试
+按 file_id / created_at 过滤：候选少时精确计算，否则由 IDSelector 在 FAISS 内过滤；
+两条路径（含未并入索引的追加向量）都与精确计算的参考结果一致，且返回完整 top_k
+"""
+
+import os
+import sys
+import tempfile
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from common.assertions import assert_true
+from common.vdb_store import configure, random_vectors, chunk_metas
+
+from rag_app.vector_store.raw_faiss.store import FaissVectorStore
+from rag_app.vector_store.types import SearchFilter
+
+
+DAY0 = datetime(2026, 1, 1)
+
+
+def build_store(config, files=6, per_file=40):
+    """每个文件的 chunk 依次晚一天创建；最后一个文件留在 delta 中。返回 (store, 全部向量)"""
+    store = FaissVectorStore()
+    vectors = []
+
+    for i in range(files):
+        metas = chunk_metas(f"f{i}", per_file)
+        for meta in metas:
+            meta.created_at = DAY0 + timedelta(days=i)
+        batch = random_vectors(per_file, config.dimension, seed=i)
+        vectors.append(batch)
+        store.add(metas, batch.copy())
+        if i == files - 2:
+            store.checkpoint()
+
+    return store, np.concatenate(vectors)
+
+
+def reference(vectors, query, allowed, top_k):
+    scores = vectors[allowed] @ query
+    return allowed[np.argsort(-scores, kind="stable")[:top_k]].tolist()
+
+
+def check_filters(store, vectors, top_k=5):
+    query = random_vectors(1, vectors.shape[1], seed=99)[0]
+    per_file = len(vectors) // 6
+
+    cases = [
+        (SearchFilter(file_ids=["f1", "f5"]), [1, 5]),
+        (SearchFilter(created_after=DAY0 + timedelta(days=2), created_before=DAY0 + timedelta(days=3)), [2, 3]),
+        (SearchFilter(file_ids=["f0", "f4"], created_after=DAY0 + timedelta(days=1)), [4]),
+    ]
+
+    for search_filter, files in cases:
+        allowed = np.concatenate([np.arange(f * per_file, (f + 1) * per_file) for f in files])
+        hits = store.search(query, top_k=top_k, search_filter=search_filter)
+
+        assert_true(len(hits) == top_k, f"{files}: incomplete top_k {len(hits)}")
+        assert_true(all(hit["file_id"] in {f"f{f}" for f in files} for hit in hits), f"{files}: hits={hits}")
+        expected = reference(vectors, query, allowed, top_k)
+        assert_true([hit["chunk_id"] for hit in hits] == expected, f"{files}: {[hit['chunk_id'] for hit in hits]} != {expected}")
+
+    hits = store.search(query, top_k=top_k, search_filter=SearchFilter(file_ids=["missing"]))
+    assert_true(hits == [], f"unknown file matched: {hits}")
+
+
+def test_brute_force_path():
+    """候选数不超过 filter_brute_force_max：取回候选向量精确计算"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat", filter_brute_force_max=2048)
+        store, vectors = build_store(config)
+        check_filters(store, vectors)
+        store.close()
+
+
+def test_id_selector_path():
+    """候选数超过阈值：IDSelector 下推到 FAISS（Flat / HNSW）"""
+    for index_type in ("flat", "hnsw"):
+        with tempfile.TemporaryDirectory() as directory:
+            config = configure(directory, index_type=index_type, filter_brute_force_max=0, hnsw_ef_search=256)
+            store, vectors = build_store(config)
+            check_filters(store, vectors)
+            store.close()
+
+
+def test_filter_excludes_deleted():
+    """删除的文件即使在过滤条件中也不返回"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat", filter_brute_force_max=0)
+        store, vectors = build_store(config)
+        store.delete_by_file("f1")
+
+        query = vectors[45]
+        hits = store.search(query, top_k=5, search_filter=SearchFilter(file_ids=["f1", "f2"]))
+        assert_true(hits and all(hit["file_id"] == "f2" for hit in hits), f"hits={hits}")
+        store.close()
+
+
+if __name__ == "__main__":
+    try:
+        print("[TEST] test_brute_force_path ...", flush=True)
+        test_brute_force_path()
+        print("[TEST] test_brute_force_path OK")
+
+        print("[TEST] test_id_selector_path ...", flush=True)
+        test_id_selector_path()
+        print("[TEST] test_id_selector_path OK")
+
+        print("[TEST] test_filter_excludes_deleted ...", flush=True)
+        test_filter_excludes_deleted()
+        print("[TEST] test_filter_excludes_deleted OK")
+
+        print("[TEST] ALL FILTERED SEARCH TESTS PASSED")
+    except Exception as e:
+        print(f"[TEST] FAIL: {type(e).__name__}: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+组提交协议单元测试
+在临时目录中直接构造 GroupCommitter（不启动服务）
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from common.assertions import assert_true
+
+from rag_app.vector_store.commit import GroupCommitter, load_manifest
+
+# 注入的提交失败会打印异常栈
+logging.getLogger("VDB").setLevel(logging.CRITICAL)
+
+
+class FakeParticipant:
+    """只在内存中修改、save_as 写出全部内容的参与方"""
+
+    def __init__(self):
+        self.items = []
+        self.dirty = False
+
+    def save_as(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.items, f)
+        self.dirty = False
+
+
+class FlakySync:
+    """前 failures 次调用抛出 OSError"""
+
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise OSError("injected sync failure")
+
+
+def make_committer(directory, sync, participant=None):
+    participant = participant or FakeParticipant()
+    committer = GroupCommitter(
+        os.path.join(directory, "commit_manifest.json"),
+        {"meta": (participant, os.path.join(directory, "metadata.json"))},
+        sync=sync,
+    )
+    return committer, participant
+
+
+def write(committer, participant, item):
+    """业务写入：写锁内修改参与方并暂存"""
+    with committer.lock:
+        participant.items.append(item)
+        participant.dirty = True
+        return committer.stage()
+
+
+def wait_async(committer, generation):
+    """在线程中等待提交，返回 (线程, 结果)"""
+    result = {}
+
+    def run():
+        try:
+            committer.wait(generation)
+            result["ok"] = True
+        except Exception as e:
+            result["error"] = e
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread, result
+
+
+def wait_for_failure(committer, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not committer.status()["failed"]:
+        assert_true(time.monotonic() < deadline, "commit failure not observed")
+        time.sleep(0.01)
+
+
+def test_retry_after_failure():
+    """提交失败后重试成功，等待方正常返回"""
+    with tempfile.TemporaryDirectory() as directory:
+        sync = FlakySync(failures=1)
+        committer, participant = make_committer(directory, sync)
+
+        generation = write(committer, participant, "a")
+        thread, result = wait_async(committer, generation)
+        thread.join(timeout=10)
+
+        assert_true(not thread.is_alive(), "waiter still blocked after retry")
+        assert_true(result.get("ok"), f"waiter failed: {result.get('error')}")
+        assert_true(sync.calls == 2, f"sync calls={sync.calls}")
+
+        status = committer.status()
+        assert_true(status["generation"] == generation and not status["failed"], f"status={status}")
+
+        # 之后的提交不受上一次失败影响
+        committer.wait(write(committer, participant, "b"))
+
+        manifest = load_manifest(committer.manifest_path)
+        with open(os.path.join(directory, manifest["files"]["meta"]), encoding="utf-8") as f:
+            assert_true(json.load(f) == ["a", "b"], "committed file content mismatch")
+
+        committer.close()
+
+
+def test_abandoned_failure_raises():
+    """停止时仍未提交（放弃重试），等待方抛出 RuntimeError"""
+    with tempfile.TemporaryDirectory() as directory:
+        committer, participant = make_committer(directory, FlakySync(failures=10 ** 6))
+
+        generation = write(committer, participant, "a")
+        thread, result = wait_async(committer, generation)
+
+        wait_for_failure(committer)
+        assert_true(thread.is_alive(), "waiter raised while retry pending")
+
+        committer.close()
+        thread.join(timeout=10)
+
+        error = result.get("error")
+        assert_true(isinstance(error, RuntimeError) and "commit failed" in str(error), f"result={result}")
+
+
+def test_restart_discards_uncommitted():
+    """崩溃（版本文件已写出、清单未替换）后重启：回到上一次提交，清理未提交的版本文件"""
+    with tempfile.TemporaryDirectory() as directory:
+        committer, participant = make_committer(directory, FlakySync(failures=0))
+        committer.wait(write(committer, participant, "a"))
+        committed = load_manifest(committer.manifest_path)
+        committer.close()
+
+        # 后续提交始终失败：版本文件留在磁盘上
+        committer, participant = make_committer(directory, FlakySync(failures=10 ** 6), participant)
+        write(committer, participant, "b")
+        wait_for_failure(committer)
+        committer.close()
+
+        stale = [name for name in os.listdir(directory) if name.startswith("metadata.g")]
+        assert_true(len(stale) == 2, f"version files before restart: {stale}")
+
+        committer, _ = make_committer(directory, FlakySync(failures=0))
+        assert_true(committer.generation == committed["generation"], f"generation={committer.generation}")
+
+        files = sorted(name for name in os.listdir(directory) if name.startswith("metadata.g"))
+        assert_true(files == [committed["files"]["meta"]], f"version files after restart: {files}")
+        with open(committer.committed_files()["meta"], encoding="utf-8") as f:
+            assert_true(json.load(f) == ["a"], "uncommitted change survived restart")
+
+        committer.close()
+
+
+if __name__ == "__main__":
+    try:
+        print("[TEST] test_retry_after_failure ...", flush=True)
+        test_retry_after_failure()
+        print("[TEST] test_retry_after_failure OK")
+
+        print("[TEST] test_abandoned_failure_raises ...", flush=True)
+        test_abandoned_failure_raises()
+        print("[TEST] test_abandoned_failure_raises OK")
+
+        print("[TEST] test_restart_discards_uncommitted ...", flush=True)
+        test_restart_discards_uncommitted()
+        print("[TEST] test_restart_discards_uncommitted OK")
+
+        print("[TEST] ALL GROUP COMMIT TESTS PASSED")
+    except Exception as e:
+        print(f"[TEST] FAIL: {type(e).__name__}: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+零拷贝写入单元测试
+embedding 输出的 float32 缓冲区经归一化、变更日志、原始向量文件直到 delta 始终是同一块内存；
+已是连续 float32 / 已归一化时不分配新数组，只读数组仍会复制
+"""
+
+import os
+import sys
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from common.assertions import assert_true
+from common.vdb_store import configure, random_vectors, chunk_metas
+
+from rag_app.vector_store.raw_faiss.store import FaissVectorStore
+from rag_app.vector_store.raw_faiss.vectors import as_matrix, normalize_rows, embed_matrix
+
+
+class ArrayEmbedder:
+    """直接返回数组的嵌入模型"""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def embed_documents_array(self, texts):
+        return self.vectors[:len(texts)]
+
+
+class ListEmbedder:
+    """只提供 embed_documents（嵌套列表）的嵌入模型"""
+
+    def __init__(self, vectors):
+        self.vectors = vectors
+
+    def embed_documents(self, texts):
+        return self.vectors[:len(texts)].tolist()
+
+
+def test_conversions_do_not_copy():
+    """as_matrix / normalize_rows / embed_matrix 在输入已满足要求时原样返回"""
+    unit = random_vectors(10, 16)
+    assert_true(as_matrix(unit) is unit, "as_matrix copied a contiguous float32 array")
+    assert_true(as_matrix(unit.astype("float64")).dtype == np.float32, "float64 not converted")
+    assert_true(normalize_rows(unit) is unit, "normalize_rows copied unit-norm rows")
+
+    raw = unit * 3
+    normalized = normalize_rows(raw, copy=False)
+    assert_true(normalized is raw and np.allclose(np.linalg.norm(raw, axis=1), 1), "copy=False did not normalize in place")
+
+    raw = unit * 3
+    normalized = normalize_rows(raw)
+    assert_true(not np.shares_memory(normalized, raw) and np.allclose(raw, unit * 3), "copy=True modified the input")
+
+    frozen = unit * 3
+    frozen.flags.writeable = False
+    normalized = normalize_rows(frozen, copy=False)
+    assert_true(not np.shares_memory(normalized, frozen), "read-only input modified")
+
+    assert_true(embed_matrix(ArrayEmbedder(unit), ["a"] * 4).base is unit, "array embedder output copied")
+    assert_true(np.array_equal(embed_matrix(ListEmbedder(unit), ["a"] * 4), unit[:4]), "list embedder fallback")
+
+
+def test_add_keeps_caller_buffer():
+    """add 交出的缓冲区原地归一化并直接成为 delta；变更日志回放得到相同向量"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat", refine=True)
+        store = FaissVectorStore()
+
+        buffer = random_vectors(200, config.dimension, seed=0) * 2
+        expected = buffer / 2
+        store.add(chunk_metas("f0", 200), buffer)
+
+        delta = store._snapshot.delta
+        assert_true(np.shares_memory(delta.vectors, buffer), "delta copied the ingest buffer")
+        assert_true(np.allclose(buffer, expected, atol=1e-6), "buffer not normalized in place")
+        assert_true(np.allclose(store.raw_vectors.take(np.arange(200)), expected, atol=1e-6), "raw vectors differ")
+
+        store.sync()
+        records = list(store.wal.replay(0))
+        assert_true(len(records) == 1 and np.array_equal(records[0].vectors, buffer), "logged vectors differ")
+        store.close()
+
+
+def test_add_allocation_bounded():
+    """写入一批向量时 Python 侧峰值分配远小于向量缓冲区本身"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat", dimension=1024)
+        store = FaissVectorStore()
+        metas = chunk_metas("f0", 4000, text=False)
+        buffer = random_vectors(4000, config.dimension, seed=0)
+
+        tracemalloc.start()
+        store.add(metas, buffer)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert_true(peak < buffer.nbytes // 2, f"peak={peak} buffer={buffer.nbytes}")
+        store.close()
+
+
+if __name__ == "__main__":
+    try:
+        print("[TEST] test_conversions_do_not_copy ...", flush=True)
+        test_conversions_do_not_copy()
+        print("[TEST] test_conversions_do_not_copy OK")
+
+        print("[TEST] test_add_keeps_caller_buffer ...", flush=True)
+        test_add_keeps_caller_buffer()
+        print("[TEST] test_add_keeps_caller_buffer OK")
+
+        print("[TEST] test_add_allocation_bounded ...", flush=True)
+        test_add_allocation_bounded()
+        print("[TEST] test_add_allocation_bounded OK")
+
+        print("[TEST] ALL INGEST TESTS PASSED")
+    except Exception as e:
+        print(f"[TEST] FAIL: {type(e).__name__}: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+mmap 只读加载单元测试
+写入方 checkpoint 后以 index_load_mode=mmap 打开：零拷贝映射、只读、检索结果与写入方一致；
+变更日志尾部不为空时退回读入私有内存并回放
+"""
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from common.assertions import assert_true
+from common.vdb_store import configure, random_vectors, chunk_metas
+
+from rag_app.vector_store.raw_faiss.store import FaissVectorStore
+
+
+def hit_ids(store, queries, **kwargs):
+    return [[hit["chunk_id"] for hit in hits] for hits in store.search_batch(queries, top_k=5, **kwargs)]
+
+
+def test_mmap_matches_writer():
+    """Flat / IVF 索引映射加载后检索结果与写入方相同，写入被拒绝"""
+    for index_type in ("flat", "ivf_flat"):
+        with tempfile.TemporaryDirectory() as directory:
+            config = configure(directory, index_type=index_type, train_threshold=100)
+            queries = random_vectors(4, config.dimension, seed=9)
+
+            writer = FaissVectorStore()
+            writer.add(chunk_metas("f0", 150), random_vectors(150, config.dimension, seed=0))
+            expected = hit_ids(writer, queries, nprobe=config.ivf_nlist)
+            writer.close()
+
+            configure(directory, index_type=index_type, train_threshold=100, index_load_mode="mmap")
+            reader = FaissVectorStore()
+            assert_true(reader.mmapped and reader.read_only, f"{index_type}: mmapped={reader.mmapped} read_only={reader.read_only}")
+            assert_true(reader.ntotal == 150 and reader.file_ids() == ["f0"], f"{index_type}: ntotal={reader.ntotal}")
+            assert_true(hit_ids(reader, queries, nprobe=config.ivf_nlist) == expected, f"{index_type}: results differ")
+
+            try:
+                reader.add(chunk_metas("f1", 1), random_vectors(1, config.dimension))
+                raise AssertionError("add accepted by mmap reader")
+            except RuntimeError:
+                pass
+            reader.close()
+
+
+def test_wal_tail_falls_back_to_private_memory():
+    """日志尾部不为空时不映射：读入私有内存并回放，不修改写入方的文件"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat")
+
+        writer = FaissVectorStore()
+        writer.add(chunk_metas("f0", 20), random_vectors(20, config.dimension, seed=0))
+        writer.checkpoint()
+        late = random_vectors(5, config.dimension, seed=1)
+        writer.add(chunk_metas("f1", 5), late.copy())
+        writer.sync()
+        wal_size = os.path.getsize(config.wal_path)
+
+        configure(directory, index_type="flat", index_load_mode="mmap")
+        reader = FaissVectorStore()
+        assert_true(not reader.mmapped and reader.read_only, f"mmapped={reader.mmapped}")
+        assert_true(reader.ntotal == 25, f"ntotal={reader.ntotal}")
+        assert_true(reader.search(late[:1], top_k=1)[0]["file_id"] == "f1", "wal tail not replayed")
+        reader.close()
+
+        assert_true(os.path.getsize(config.wal_path) == wal_size, "reader modified the writer's log")
+        writer.close()
+
+
+if __name__ == "__main__":
+    try:
+        print("[TEST] test_mmap_matches_writer ...", flush=True)
+        test_mmap_matches_writer()
+        print("[TEST] test_mmap_matches_writer OK")
+
+        print("[TEST] test_wal_tail_falls_back_to_private_memory ...", flush=True)
+        test_wal_tail_falls_back_to_private_memory()
+        print("[TEST] test_wal_tail_falls_back_to_private_memory OK")
+
+        print("[TEST] ALL MMAP LOAD TESTS PASSED")
+    except Exception as e:
+        print(f"[TEST] FAIL: {type(e).__name__}: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+范围检索单元测试
+min_score 给出时返回 score 不低于阈值的全部结果（top_k 为上限），数量随查询变化；
+覆盖 Flat / IVF / HNSW 的 range_search、未并入索引的追加向量与墓碑
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from common.assertions import assert_true
+from common.vdb_store import configure, random_vectors, chunk_metas
+
+from rag_app.vector_store.raw_faiss.store import FaissVectorStore
+
+
+MIN_SCORE = 0.5
+
+
+def build_store(config):
+    """f0 已 checkpoint，f1 留在 delta，f2 已删除。返回 (store, 存活向量, 存活 id)"""
+    store = FaissVectorStore()
+    vectors = [random_vectors(150, config.dimension, seed=i) for i in range(3)]
+
+    store.add(chunk_metas("f0", 150), vectors[0].copy())
+    store.add(chunk_metas("f2", 150), vectors[2].copy())
+    store.checkpoint()
+    store.add(chunk_metas("f1", 150), vectors[1].copy())
+    store.delete_by_file("f2")
+
+    ids = np.concatenate([store.doc_map.ids_of_file("f0"), store.doc_map.ids_of_file("f1")])
+    return store, np.concatenate([vectors[0], vectors[1]]), ids
+
+
+def check_range(store, vectors, ids, top_k):
+    queries = random_vectors(6, vectors.shape[1], seed=7)
+
+    counts = set()
+    for query, hits in zip(queries, store.search_batch(queries, top_k=top_k, min_score=MIN_SCORE)):
+        scores = vectors @ query
+        expected = ids[scores >= MIN_SCORE]
+        expected = expected[np.argsort(-scores[scores >= MIN_SCORE], kind="stable")][:top_k]
+
+        got = [hit["chunk_id"] for hit in hits]
+        assert_true(sorted(got) == sorted(expected.tolist()), f"got={got} expected={expected.tolist()}")
+        assert_true(all(hit["score"] >= MIN_SCORE for hit in hits), f"below threshold: {hits}")
+        assert_true([h["score"] for h in hits] == sorted((h["score"] for h in hits), reverse=True), "unsorted")
+        counts.add(len(hits))
+
+    return counts
+
+
+def test_range_search_returns_all_above_threshold():
+    """Flat / IVF（全部探测）/ HNSW：结果即阈值以上的全部存活 chunk"""
+    for index_type in ("flat", "ivf_flat", "hnsw"):
+        with tempfile.TemporaryDirectory() as directory:
+            config = configure(directory, index_type=index_type, train_threshold=100, hnsw_ef_search=512)
+            store, vectors, ids = build_store(config)
+            counts = check_range(store, vectors, ids, top_k=300)
+            assert_true(len(counts) > 1, f"{index_type}: result counts do not vary: {counts}")
+            store.close()
+
+
+def test_top_k_caps_results():
+    """top_k 为上限：只保留得分最高的 top_k 个"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat")
+        store, vectors, ids = build_store(config)
+        assert_true(check_range(store, vectors, ids, top_k=3) == {3}, "top_k not applied")
+
+        # 没有足够相似的 chunk 时返回空列表
+        hits = store.search(random_vectors(1, config.dimension, seed=42)[0], top_k=10, min_score=0.999)
+        assert_true(hits == [], f"hits={hits}")
+        store.close()
+
+
+if __name__ == "__main__":
+    try:
+        print("[TEST] test_range_search_returns_all_above_threshold ...", flush=True)
+        test_range_search_returns_all_above_threshold()
+        print("[TEST] test_range_search_returns_all_above_threshold OK")
+
+        print("[TEST] test_top_k_caps_results ...", flush=True)
+        test_top_k_caps_results()
+        print("[TEST] test_top_k_caps_results OK")
+
+        print("[TEST] ALL RANGE SEARCH TESTS PASSED")
+    except Exception as e:
+        print(f"[TEST] FAIL: {type(e).__name__}: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+启动修复单元测试
+checkpoint 写出索引后、写出映射表前崩溃：按变更日志中的 checkpoint 记录只核对该区间的 id；
+孤儿向量 / 失效墓碑 / 缺失向量的修复
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from common.assertions import assert_true
+from common.vdb_store import configure, random_vectors, chunk_metas
+
+from rag_app.vector_store.raw_faiss import recovery
+from rag_app.vector_store.raw_faiss.docmap import ColumnarDocMap
+from rag_app.vector_store.raw_faiss.store import FaissVectorStore
+
+
+def crash_before_map_save(store, action):
+    """执行 action，其中的 checkpoint 在写出索引后、写出映射表时崩溃（日志已落盘，不关闭）"""
+    save = ColumnarDocMap.save
+
+    def failing(self, path, fsync=False):
+        raise OSError("injected crash")
+
+    ColumnarDocMap.save = failing
+    try:
+        action()
+        raise AssertionError("checkpoint did not reach the map save")
+    except OSError:
+        pass
+    finally:
+        ColumnarDocMap.save = save
+
+    store.compactor.stop()
+    store.sync()
+
+
+def test_restart_skips_recovery():
+    """正常 checkpoint / 回放日志后重启不触发修复"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat")
+        store = FaissVectorStore()
+        store.add(chunk_metas("f0", 10), random_vectors(10, config.dimension, seed=0))
+        store.checkpoint()
+        store.add(chunk_metas("f1", 5), random_vectors(5, config.dimension, seed=1))
+        store.close()
+
+        store = FaissVectorStore()
+        assert_true(store.recovery_report is None, f"report={store.recovery_report}")
+        assert_true(store.ntotal == 15, f"ntotal={store.ntotal}")
+        store.close()
+
+
+def test_crash_between_index_and_map():
+    """压缩后的 checkpoint 写出索引后崩溃：回放不重复追加，已移除的墓碑按日志范围清除"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat")
+        store = FaissVectorStore()
+        store.add(chunk_metas("f0", 10), random_vectors(10, config.dimension, seed=0))
+        store.add(chunk_metas("f1", 10), random_vectors(10, config.dimension, seed=1))
+        store.checkpoint()
+
+        store.delete_by_file("f1")
+        late = random_vectors(5, config.dimension, seed=2)
+        store.add(chunk_metas("f2", 5), late.copy())
+        crash_before_map_save(store, store.compact)
+
+        store = FaissVectorStore()
+        report = store.recovery_report
+        assert_true(report is not None and report["scope"] == "wal", f"report={report}")
+        assert_true(report["tombstones_dropped"] == 10 and report["orphans_removed"] == 0, f"report={report}")
+        assert_true(store.file_ids() == ["f0", "f2"], f"files={store.file_ids()}")
+        assert_true(store.ntotal == 15 and not len(store.doc_map.tombstones), f"ntotal={store.ntotal}")
+        assert_true(store.search(late[:1], top_k=1)[0]["file_id"] == "f2", "logged chunk not searchable")
+        store.close()
+
+        # 修复后已 checkpoint，再次重启不再修复
+        store = FaissVectorStore()
+        assert_true(store.recovery_report is None, f"report={store.recovery_report}")
+        store.close()
+
+
+def damage(store):
+    """在索引中移除 chunk 3（缺失向量）、加入孤儿 id 1000，并加入不在索引中的墓碑 999；索引总数不变"""
+    store.index.remove_ids(np.array([3], dtype="int64"))
+    store.index.add_with_ids(random_vectors(1, store.dim, seed=9), np.array([1000], dtype="int64"))
+    store.doc_map.add_tombstones(np.array([999], dtype="int64"))
+
+
+def test_recover_orphan_stale_missing():
+    """限定范围与全量比较都修复孤儿、失效墓碑与缺失向量（重新 embedding）"""
+    for candidates in (np.array([1000, 3, 999, 7], dtype="int64"), None):
+        with tempfile.TemporaryDirectory() as directory:
+            config = configure(directory, index_type="flat")
+            vectors = random_vectors(20, config.dimension, seed=0)
+
+            store = FaissVectorStore()
+            store.add(chunk_metas("f0", 20), vectors.copy())
+            store.checkpoint()
+            damage(store)
+
+            reembed = lambda metas: vectors[[m.chunk_id for m in metas]].copy()
+            report = recovery.recover(store, reembed, candidates)
+
+            scope = "full" if candidates is None else "wal"
+            assert_true(report["scope"] == scope, f"report={report}")
+            assert_true(report["orphans_removed"] == 1, f"report={report}")
+            assert_true(report["tombstones_dropped"] == 1, f"report={report}")
+            assert_true(report["reembedded"] == 1 and report["files_affected"] == ["f0"], f"report={report}")
+
+            assert_true(store.ntotal == 20 and not len(store.doc_map.tombstones), f"ntotal={store.ntotal}")
+            hit = store.search(vectors[3:4], top_k=1)[0]
+            assert_true(hit["chunk_id"] == 3, f"hit={hit}")
+            store.close()
+
+
+if __name__ == "__main__":
+    try:
+        print("[TEST] test_restart_skips_recovery ...", flush=True)
+        test_restart_skips_recovery()
+        print("[TEST] test_restart_skips_recovery OK")
+
+        print("[TEST] test_crash_between_index_and_map ...", flush=True)
+        test_crash_between_index_and_map()
+        print("[TEST] test_crash_between_index_and_map OK")
+
+        print("[TEST] test_recover_orphan_stale_missing ...", flush=True)
+        test_recover_orphan_stale_missing()
+        print("[TEST] test_recover_orphan_stale_missing OK")
+
+        print("[TEST] ALL RECOVERY TESTS PASSED")
+    except Exception as e:
+        print(f"[TEST] FAIL: {type(e).__name__}: {e}", file=sys.stderr)
+        sys.exit(1)
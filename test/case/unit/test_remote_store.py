@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+远程向量存储单元测试
+RemoteVectorStore 的 HTTP 会话经适配器转发到进程内的 vdb_service（不启动服务进程）
+"""
+
+import io
+import os
+import sys
+import tarfile
+import importlib
+import tempfile
+
+import requests
+from requests.adapters import BaseAdapter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from common.assertions import assert_true
+from common.vdb_store import configure, random_vectors, chunk_metas
+
+from rag_app.vector_store.remote import VectorServiceClient, RemoteVectorStore
+from rag_app.vector_store.snapshot import MANIFEST_NAME, read_manifest
+
+
+class InProcessAdapter(BaseAdapter):
+    """把 requests 的请求交给 TestClient，响应转换为 requests.Response"""
+
+    def __init__(self, client):
+        super().__init__()
+        self.client = client
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        result = self.client.request(request.method, request.url, content=request.body, headers=dict(request.headers))
+
+        response = requests.Response()
+        response.status_code = result.status_code
+        response.headers.update(result.headers)
+        response.raw = io.BytesIO(result.content)
+        response.url = request.url
+        response.request = request
+        return response
+
+    def close(self):
+        pass
+
+
+def run_with_service(check):
+    """临时目录中启动进程内 vdb_service，以 RemoteVectorStore 调用 check(store, config)"""
+    from fastapi.testclient import TestClient
+
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat", type="faiss")
+
+        # 服务模块在导入时读取配置、创建容器：每次重新加载以使用本次的临时目录
+        import vdb_service.main
+        module = importlib.reload(vdb_service.main)
+
+        with TestClient(module.app, base_url="http://vdb") as service:
+            client = VectorServiceClient("http://vdb", timeout=10)
+            client._session.mount("http://vdb", InProcessAdapter(service))
+
+            store = RemoteVectorStore(client)
+            try:
+                check(store, config)
+            finally:
+                store.close()
+
+
+def check_protocol(store, config):
+    store.add(chunk_metas("f0", 3), random_vectors(3, config.dimension, seed=1))
+    store.add(chunk_metas("f1", 2), random_vectors(2, config.dimension, seed=2))
+
+    assert_true(sorted(store.file_ids()) == ["f0", "f1"], f"file_ids={store.file_ids()}")
+
+    # 检索附带的元数据进入缓存，未知 / 已删除的 chunk 与本地存储一致返回 None
+    hits = store.search(random_vectors(1, config.dimension, seed=1)[0], 5)
+    assert_true(len(hits) == 5, f"hits={hits}")
+    assert_true(store.get(0).file_id == "f0", f"chunk 0={store.get(0)}")
+    assert_true(store.get(10 ** 6) is None, "missing chunk not None")
+
+    store.delete_by_file("f1")
+    store.sync()
+    assert_true(store.file_ids() == ["f0"], f"file_ids after delete={store.file_ids()}")
+    assert_true(store.get(4) is None, "deleted chunk still visible")
+
+
+def check_snapshot(store, config):
+    store.add(chunk_metas("f0", 4), random_vectors(4, config.dimension))
+
+    with tempfile.TemporaryDirectory() as directory:
+        # 整份快照：服务端导出，manifest 为第一个成员
+        path = os.path.join(directory, "kb.tar")
+        manifest = store.export_snapshot(path)
+        assert_true(read_manifest(path) == manifest, "manifest mismatch")
+        with tarfile.open(path) as tar:
+            names = tar.getnames()
+        assert_true(names[0] == MANIFEST_NAME, f"members={names}")
+
+        # link_files 取出其中的向量库文件
+        linked = store.link_files(os.path.join(directory, "store"))
+        expected = sorted(name[len("vector_store/"):] for name in names if name.startswith("vector_store/"))
+        assert_true(sorted(linked) == expected and "index" in linked, f"linked={sorted(linked)}")
+        for name, (dst, size) in linked.items():
+            assert_true(os.path.getsize(dst) == size, f"{name} size mismatch")
+        assert_true(sorted(os.listdir(os.path.join(directory, "store"))) == sorted(expected), "stray files left")
+
+
+def test_store_protocol():
+    """add / search / get / file_ids / delete_by_file / sync 经 HTTP 与服务端一致"""
+    run_with_service(check_protocol)
+
+
+def test_snapshot_forwarded():
+    """快照导出转发到服务端 GET /snapshot"""
+    run_with_service(check_snapshot)
+
+
+if __name__ == "__main__":
+    try:
+        print("[TEST] test_store_protocol ...", flush=True)
+        test_store_protocol()
+        print("[TEST] test_store_protocol OK")
+
+        print("[TEST] test_snapshot_forwarded ...", flush=True)
+        test_snapshot_forwarded()
+        print("[TEST] test_snapshot_forwarded OK")
+
+        print("[TEST] ALL REMOTE STORE TESTS PASSED")
+    except Exception as e:
+        print(f"[TEST] FAIL: {type(e).__name__}: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+批量检索单元测试
+search_batch 的结果与逐条 search 一致（索引 + 未并入的追加向量 + 墓碑）；search_many 只做一次 embedding 与一次检索
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from common.assertions import assert_true
+from common.vdb_store import configure, random_vectors, chunk_metas
+
+from rag_app.vector_store.raw_faiss.store import FaissVectorStore
+from rag_app.vector_store.metadata import MetadataRepository
+from rag_app.vector_store.service import VectorStoreService
+
+
+class TableEmbedder:
+    """按文本查表的嵌入模型，记录调用次数"""
+
+    def __init__(self, table):
+        self.table = table
+        self.calls = 0
+
+    def embed_documents_array(self, texts):
+        self.calls += 1
+        return np.stack([self.table[text] for text in texts])
+
+
+def hit_ids(results):
+    return [[hit["chunk_id"] for hit in hits] for hits in results]
+
+
+def test_batch_matches_single():
+    """索引中、delta 中与已删除的向量混合时，批量与逐条检索结果相同"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat")
+        store = FaissVectorStore()
+
+        store.add(chunk_metas("f0", 50), random_vectors(50, config.dimension, seed=0))
+        store.add(chunk_metas("f1", 50), random_vectors(50, config.dimension, seed=1))
+        store.checkpoint()
+        store.add(chunk_metas("f2", 30), random_vectors(30, config.dimension, seed=2))
+        store.delete_by_file("f1")
+        assert_true(len(store._snapshot.delta) == 30, f"delta={len(store._snapshot.delta)}")
+
+        queries = random_vectors(8, config.dimension, seed=3)
+        batched = store.search_batch(queries, top_k=5)
+        single = [store.search(query, top_k=5) for query in queries]
+
+        assert_true(hit_ids(batched) == hit_ids(single), f"batched={hit_ids(batched)} single={hit_ids(single)}")
+        assert_true(all(hit["file_id"] != "f1" for hits in batched for hit in hits), "deleted chunk returned")
+        for hits_b, hits_s in zip(batched, single):
+            scores_b = [hit["score"] for hit in hits_b]
+            assert_true(np.allclose(scores_b, [hit["score"] for hit in hits_s], atol=1e-5), "score mismatch")
+            assert_true(scores_b == sorted(scores_b, reverse=True), f"unsorted scores={scores_b}")
+
+        store.close()
+
+
+def test_service_search_many():
+    """search_many 一次 embedding，结果与逐条 search 对应"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat")
+        store = FaissVectorStore()
+
+        vectors = random_vectors(40, config.dimension, seed=0)
+        store.add(chunk_metas("f0", 40), vectors.copy())
+
+        texts = [f"q{i}" for i in range(4)]
+        embedder = TableEmbedder({text: vectors[i * 10] for i, text in enumerate(texts)})
+        service = VectorStoreService(
+            store=store, metadata=MetadataRepository(config.meta_path), embedder=embedder, embed_path=config.embed_path,
+        )
+
+        results = service.search_many(texts, top_k=3)
+        assert_true(embedder.calls == 1, f"embed calls={embedder.calls}")
+        assert_true([hits[0]["chunk_id"] for hits in results] == [0, 10, 20, 30], f"results={hit_ids(results)}")
+        assert_true(hit_ids(results) == hit_ids([service.search(text, top_k=3) for text in texts]), "search_many differs")
+        assert_true(service.search_many([]) == [], "empty query list")
+
+        service.close()
+        store.close()
+
+
+if __name__ == "__main__":
+    try:
+        print("[TEST] test_batch_matches_single ...", flush=True)
+        test_batch_matches_single()
+        print("[TEST] test_batch_matches_single OK")
+
+        print("[TEST] test_service_search_many ...", flush=True)
+        test_service_search_many()
+        print("[TEST] test_service_search_many OK")
+
+        print("[TEST] ALL SEARCH BATCH TESTS PASSED")
+    except Exception as e:
+        print(f"[TEST] FAIL: {type(e).__name__}: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+检索合批单元测试
+窗口内的并发查询合并为一次 search_batch，结果与单独检索一致；检索参数不同的查询分组，
+批大小不超过 max_batch，异常分发给该组的每个调用方，过滤查询与关闭后的查询直接检索
+"""
+
+import os
+import sys
+import tempfile
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from common.assertions import assert_true
+from common.vdb_store import configure, random_vectors, chunk_metas
+
+from rag_app.vector_store.batcher import SearchBatcher
+from rag_app.vector_store.raw_faiss.store import FaissVectorStore
+from rag_app.vector_store.types import SearchFilter
+
+
+class RecordingStore:
+    """转发到向量库并记录每次 search_batch 的查询数与 top_k；fail 为真时抛出异常"""
+
+    def __init__(self, store):
+        self.store = store
+        self.batches = []
+        self.fail = False
+
+    def search_batch(self, queries, top_k, **kwargs):
+        self.batches.append((queries.shape[0], top_k))
+        if self.fail:
+            raise ValueError("injected search failure")
+        return self.store.search_batch(queries, top_k, **kwargs)
+
+    def search(self, query_vector, top_k, **kwargs):
+        self.batches.append(("single", top_k))
+        return self.store.search(query_vector, top_k, **kwargs)
+
+
+def run_concurrently(batcher, queries, top_ks):
+    """每个查询一个线程同时提交，返回 (结果, 异常) 列表"""
+    barrier = threading.Barrier(len(queries))
+    outcomes = [None] * len(queries)
+
+    def worker(i):
+        barrier.wait()
+        try:
+            outcomes[i] = (batcher.search(queries[i], top_ks[i]), None)
+        except Exception as e:
+            outcomes[i] = (None, e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(len(queries))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return outcomes
+
+
+def with_store(check):
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat")
+        store = FaissVectorStore()
+        store.add(chunk_metas("f0", 100), random_vectors(100, config.dimension, seed=0))
+        try:
+            check(store, config)
+        finally:
+            store.close()
+
+
+def check_coalesced(store, config):
+    recording = RecordingStore(store)
+    batcher = SearchBatcher(recording, window_ms=200, max_batch=32)
+
+    queries = random_vectors(8, config.dimension, seed=1)
+    top_ks = [5, 5, 5, 5, 3, 3, 3, 3]
+    outcomes = run_concurrently(batcher, queries, top_ks)
+    batcher.close()
+
+    for query, top_k, (result, error) in zip(queries, top_ks, outcomes):
+        assert_true(error is None, f"error={error}")
+        expected = [hit["chunk_id"] for hit in store.search(query, top_k)]
+        assert_true([hit["chunk_id"] for hit in result] == expected, f"top_k={top_k}: result differs")
+
+    # 每组参数一次 search_batch
+    assert_true(sorted(recording.batches) == [(4, 3), (4, 5)], f"batches={recording.batches}")
+    metrics = batcher.metrics()
+    assert_true(metrics["queries"] == 8 and metrics["max_batch_size"] == 8, f"metrics={metrics}")
+
+
+def check_max_batch(store, config):
+    recording = RecordingStore(store)
+    batcher = SearchBatcher(recording, window_ms=200, max_batch=3)
+
+    queries = random_vectors(10, config.dimension, seed=2)
+    outcomes = run_concurrently(batcher, queries, [5] * 10)
+    batcher.close()
+
+    assert_true(all(error is None and len(result) == 5 for result, error in outcomes), "failed queries")
+    assert_true(all(size <= 3 for size, _ in recording.batches), f"batches={recording.batches}")
+    assert_true(sum(size for size, _ in recording.batches) == 10, f"batches={recording.batches}")
+
+
+def check_errors_and_bypass(store, config):
+    recording = RecordingStore(store)
+    batcher = SearchBatcher(recording, window_ms=100, max_batch=32)
+
+    recording.fail = True
+    outcomes = run_concurrently(batcher, random_vectors(3, config.dimension, seed=3), [5] * 3)
+    assert_true(all(isinstance(error, ValueError) for _, error in outcomes), f"outcomes={outcomes}")
+    recording.fail = False
+
+    # 过滤查询不合批
+    query = random_vectors(1, config.dimension, seed=4)[0]
+    hits = batcher.search(query, 5, search_filter=SearchFilter(file_ids=["f0"]))
+    assert_true(len(hits) == 5 and recording.batches[-1] == ("single", 5), f"batches={recording.batches}")
+
+    # 关闭后直接检索
+    batcher.close()
+    assert_true(len(batcher.search(query, 4)) == 4 and recording.batches[-1] == ("single", 4), "search after close")
+
+
+def test_concurrent_queries_coalesced():
+    """窗口内的 8 个并发查询按 top_k 分为两组，各一次 search_batch"""
+    with_store(check_coalesced)
+
+
+def test_max_batch_respected():
+    """单批不超过 max_batch"""
+    with_store(check_max_batch)
+
+
+def test_errors_and_bypass():
+    """异常分发给每个调用方；过滤查询与关闭后的查询直接检索"""
+    with_store(check_errors_and_bypass)
+
+
+if __name__ == "__main__":
+    try:
+        print("[TEST] test_concurrent_queries_coalesced ...", flush=True)
+        test_concurrent_queries_coalesced()
+        print("[TEST] test_concurrent_queries_coalesced OK")
+
+        print("[TEST] test_max_batch_respected ...", flush=True)
+        test_max_batch_respected()
+        print("[TEST] test_max_batch_respected OK")
+
+        print("[TEST] test_errors_and_bypass ...", flush=True)
+        test_errors_and_bypass()
+        print("[TEST] test_errors_and_bypass OK")
+
+        print("[TEST] ALL SEARCH BATCHER TESTS PASSED")
+    except Exception as e:
+        print(f"[TEST] FAIL: {type(e).__name__}: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+分片向量库单元测试
+chunk_id 高位为分片号（id_base = shard << 40），get 按 id 路由；并行检索合并后与精确 top_k 一致；
+按大小分片时同一文件留在同一分片
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from common.assertions import assert_true
+from common.vdb_store import configure, random_vectors, chunk_metas
+
+from rag_app.vector_store.raw_faiss.sharded import ShardedVectorStore, _SHARD_ID_BITS
+
+
+def add_files(store, dim, files=8, per_file=20):
+    """返回 {file_id: 向量}"""
+    vectors = {}
+    for i in range(files):
+        vectors[f"f{i}"] = random_vectors(per_file, dim, seed=i)
+        store.add(chunk_metas(f"f{i}", per_file), vectors[f"f{i}"].copy())
+    return vectors
+
+
+def test_ids_route_to_shard():
+    """每个 chunk_id 的高位即所在分片，get 直接路由；重启后不变"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat", shards=3, shard_strategy="hash")
+        store = ShardedVectorStore()
+        add_files(store, config.dimension)
+
+        used = set()
+        for i, shard in enumerate(store.shards):
+            assert_true(shard.id_base == i << _SHARD_ID_BITS, f"shard {i} id_base={shard.id_base}")
+            for file_id in shard.file_ids():
+                ids = shard.doc_map.ids_of_file(file_id)
+                assert_true(np.all(ids >> _SHARD_ID_BITS == i), f"{file_id}: ids outside shard {i}")
+                assert_true(store.get(int(ids[0])).file_id == file_id, f"{file_id}: get routed wrong")
+                used.add(i)
+        assert_true(len(used) > 1, "all files hashed to one shard")
+        assert_true(sorted(store.file_ids()) == [f"f{i}" for i in range(8)], f"files={store.file_ids()}")
+        assert_true(store.get(5 << _SHARD_ID_BITS) is None, "chunk of a missing shard")
+
+        first = {shard.file_ids()[0]: int(shard.doc_map.ids_of_file(shard.file_ids()[0])[0]) for shard in store.shards if shard.file_ids()}
+        store.close()
+
+        store = ShardedVectorStore()
+        for file_id, chunk_id in first.items():
+            assert_true(store.get(chunk_id).file_id == file_id, f"{file_id}: id changed after reopen")
+        store.close()
+
+
+def test_scatter_gather_matches_exact():
+    """各分片结果按 score 合并后与全部向量上的精确 top_k 一致；删除只影响所在分片"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat", shards=3, shard_strategy="hash")
+        store = ShardedVectorStore()
+        vectors = add_files(store, config.dimension)
+
+        queries = random_vectors(5, config.dimension, seed=99)
+        results = store.search_batch(queries, top_k=7)
+
+        everything = np.concatenate(list(vectors.values()))
+        for query, hits in zip(queries, results):
+            expected = np.sort(everything @ query)[::-1][:7]
+            assert_true(np.allclose([hit["score"] for hit in hits], expected, atol=1e-5), f"scores={hits}")
+
+        store.delete_by_file("f3")
+        hits = store.search(vectors["f3"][0], top_k=20)
+        assert_true(all(hit["file_id"] != "f3" for hit in hits), "deleted file returned")
+        assert_true(store.info()["total_vectors"] == 140, f"info={store.info()['total_vectors']}")
+        store.close()
+
+
+def test_size_strategy_keeps_files_together():
+    """按大小分片：新文件进入最小的分片，同一文件的后续写入留在原分片"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat", shards=2, shard_strategy="size")
+        store = ShardedVectorStore()
+
+        store.add(chunk_metas("big", 30), random_vectors(30, config.dimension, seed=0))
+        store.add(chunk_metas("small", 5), random_vectors(5, config.dimension, seed=1))
+        store.add(chunk_metas("big", 10), random_vectors(10, config.dimension, seed=2))
+
+        owners = {file_id: i for i, shard in enumerate(store.shards) for file_id in shard.file_ids()}
+        assert_true(owners["big"] != owners["small"], f"owners={owners}")
+        assert_true(store.shards[owners["big"]].ntotal == 40, f"big shard ntotal={store.shards[owners['big']].ntotal}")
+        store.close()
+
+
+if __name__ == "__main__":
+    try:
+        print("[TEST] test_ids_route_to_shard ...", flush=True)
+        test_ids_route_to_shard()
+        print("[TEST] test_ids_route_to_shard OK")
+
+        print("[TEST] test_scatter_gather_matches_exact ...", flush=True)
+        test_scatter_gather_matches_exact()
+        print("[TEST] test_scatter_gather_matches_exact OK")
+
+        print("[TEST] test_size_strategy_keeps_files_together ...", flush=True)
+        test_size_strategy_keeps_files_together()
+        print("[TEST] test_size_strategy_keeps_files_together OK")
+
+        print("[TEST] ALL SHARDED STORE TESTS PASSED")
+    except Exception as e:
+        print(f"[TEST] FAIL: {type(e).__name__}: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+快照在线导入单元测试
+在临时目录中直接构造 VectorStoreService（不启动服务）：导入期间拒绝写入，
+替换文件后旧实例继续检索、关闭时不覆盖导入的文件
+"""
+
+import os
+import sys
+import hashlib
+import tempfile
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from common.assertions import assert_true
+from common.vdb_store import configure, random_vectors, chunk_metas
+
+from rag_app.vector_store import snapshot
+from rag_app.vector_store.raw_faiss.store import FaissVectorStore
+from rag_app.vector_store.metadata import MetadataRepository
+from rag_app.vector_store.service import VectorStoreService
+from rag_app.vector_store.types import FileMeta
+
+
+def make_service(config):
+    store = FaissVectorStore()
+    service = VectorStoreService(
+        store=store,
+        metadata=MetadataRepository(config.meta_path),
+        embedder=None,
+        embed_path=config.embed_path,
+    )
+    return service, store
+
+
+def add_file(service, store, file_id, n, seed):
+    """直接写入向量库与文件元数据（不经 embedding）"""
+    vectors = random_vectors(n, store.dim, seed=seed)
+    store.add(chunk_metas(file_id, n), vectors.copy())
+    service.metadata.add_file(FileMeta(
+        file_id=file_id, filename=f"{file_id}.txt", chunks=n, size=n, article_ids=[], created_at=datetime.now()
+    ))
+    return vectors
+
+
+def digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def test_frozen_rejects_writes():
+    """导入期间增删抛出 RuntimeError；导入失败退出后恢复写入"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat")
+        service, store = make_service(config)
+        add_file(service, store, "f0", 10, seed=0)
+
+        try:
+            with service.frozen():
+                try:
+                    service.delete_file("f0")
+                    raise AssertionError("delete accepted during import")
+                except RuntimeError:
+                    pass
+                raise ValueError("injected validation failure")
+        except ValueError:
+            pass
+
+        assert_true(service.delete_file("f0"), "delete rejected after failed import")
+        assert_true(store.file_ids() == [], f"files={store.file_ids()}")
+
+        service.close()
+        store.close()
+
+
+def test_detached_store_keeps_imported_files():
+    """替换文件后旧实例照常检索，关闭时不 checkpoint；重新加载得到快照内容"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = configure(directory, index_type="flat")
+        service, store = make_service(config)
+
+        add_file(service, store, "f0", 20, seed=0)
+        path = os.path.join(directory, "kb.tar")
+        service.export_snapshot(path)
+
+        # 导出之后的修改只在变更日志中
+        late = add_file(service, store, "f1", 20, seed=1)
+        assert_true(store.wal.records > 0, "no pending wal records")
+
+        with service.frozen():
+            snapshot.import_snapshot(path, config, before_commit=lambda manifest: service.detach())
+
+        imported = digest(config.index_path)
+        assert_true(store.read_only, "store still writable after detach")
+        assert_true(store.search(late[:1], top_k=1)[0]["file_id"] == "f1", "old instance stopped serving")
+
+        service.close()
+        store.close()
+        assert_true(digest(config.index_path) == imported, "closing the old instance overwrote the imported index")
+
+        store = FaissVectorStore()
+        assert_true(store.file_ids() == ["f0"] and store.ntotal == 20, f"files={store.file_ids()} ntotal={store.ntotal}")
+        store.close()
+
+
+if __name__ == "__main__":
+    try:
+        print("[TEST] test_frozen_rejects_writes ...", flush=True)
+        test_frozen_rejects_writes()
+        print("[TEST] test_frozen_rejects_writes OK")
+
+        print("[TEST] test_detached_store_keeps_imported_files ...", flush=True)
+        test_detached_store_keeps_imported_files()
+        print("[TEST] test_detached_store_keeps_imported_files OK")
+
+        print("[TEST] ALL SNAPSHOT IMPORT TESTS PASSED")
+    except Exception as e:
+        print(f"[TEST] FAIL: {type(e).__name__}: {e}", file=sys.stderr)
+        sys.exit(1)
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+向量压缩编码单元测试
+SQ8 / FP16 / PQ 编码的索引开启 refine 时，候选由原始向量文件（RawVectorFile）精排：
+返回的 score 为原始向量的精确内积，top_k 与精确检索基本一致；已有数据的库开启 refine 时补齐原始向量
+"""
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from common.assertions import assert_true
+from common.vdb_store import configure, random_vectors, chunk_metas
+
+from rag_app.vector_store.raw_faiss.store import FaissVectorStore
+from rag_app.vector_store.raw_faiss import index_factory
+
+
+CODECS = ("sq8", "fp16", "pq")
+
+
+def codec_config(directory, codec, **overrides):
+    return configure(
+        directory, index_type="flat", vector_codec=codec, pq_m=4, pq_nbits=4,
+        train_threshold=200, refine_k_factor=10, **overrides,
+    )
+
+
+def test_refine_scores_are_exact():
+    """精排后的 score 等于原始向量内积，top_k 召回不低于 0.9"""
+    for codec in CODECS:
+        with tempfile.TemporaryDirectory() as directory:
+            config = codec_config(directory, codec, refine=True)
+            store = FaissVectorStore()
+
+            vectors = random_vectors(400, config.dimension, seed=0)
+            store.add(chunk_metas("f0", 400), vectors.copy())
+            store.checkpoint()
+
+            info = store.info()
+            assert_true(info["codec"] == codec and info["refine"], f"{codec}: info={info}")
+            ids = np.arange(400, dtype="int64")
+            assert_true(np.allclose(store.raw_vectors.take(ids), vectors, atol=1e-6), f"{codec}: raw vectors differ")
+
+            queries = random_vectors(10, config.dimension, seed=1)
+            exact = np.argsort(-(queries @ vectors.T), axis=1)[:, :5]
+            recall = 0
+            for query, hits, expected in zip(queries, store.search_batch(queries, top_k=5), exact):
+                for hit in hits:
+                    score = float(vectors[hit["chunk_id"]] @ query)
+                    assert_true(abs(hit["score"] - score) < 1e-5, f"{codec}: refined score {hit['score']} != {score}")
+                recall += len({hit["chunk_id"] for hit in hits} & set(expected.tolist()))
+            assert_true(recall / exact.size >= 0.9, f"{codec}: recall={recall / exact.size}")
+            store.close()
+
+
+def test_compressed_index_is_smaller():
+    """压缩编码的索引占用小于未压缩的 Flat"""
+    sizes = {}
+    for codec in ("none",) + CODECS:
+        with tempfile.TemporaryDirectory() as directory:
+            config = codec_config(directory, codec)
+            store = FaissVectorStore()
+            store.add(chunk_metas("f0", 400), random_vectors(400, config.dimension, seed=0))
+            store.checkpoint()
+            assert_true(index_factory.index_codec(store.index) == codec, f"codec={index_factory.index_codec(store.index)}")
+            sizes[codec] = index_factory.memory_bytes(store.index)
+            store.close()
+
+    assert_true(all(sizes[codec] < sizes["none"] for codec in CODECS), f"sizes={sizes}")
+
+
+def test_refine_backfills_raw_vectors():
+    """已有压缩索引的库开启 refine：从索引导出（解码后的）向量补齐原始向量文件"""
+    with tempfile.TemporaryDirectory() as directory:
+        config = codec_config(directory, "sq8")
+        store = FaissVectorStore()
+        vectors = random_vectors(300, config.dimension, seed=0)
+        store.add(chunk_metas("f0", 300), vectors.copy())
+        store.close()
+        assert_true(not os.path.exists(config.vectors_path), "raw vectors written without refine")
+
+        config = codec_config(directory, "sq8", refine=True)
+        store = FaissVectorStore()
+        assert_true(store.raw_vectors.nbytes() == 300 * config.dimension * 4, f"raw bytes={store.raw_vectors.nbytes()}")
+
+        decoded = store.raw_vectors.take(np.arange(300, dtype="int64"))
+        assert_true(np.abs(decoded - vectors).max() < 0.05, "backfilled vectors far from originals")
+        assert_true(store.search(vectors[7], top_k=1)[0]["chunk_id"] == 7, "search after backfill")
+        store.close()
+
+
+if __name__ == "__main__":
+    try:
+        print("[TEST] test_refine_scores_are_exact ...", flush=True)
+        test_refine_scores_are_exact()
+        print("[TEST] test_refine_scores_are_exact OK")
+
+        print("[TEST] test_compressed_index_is_smaller ...", flush=True)
+        test_compressed_index_is_smaller()
+        print("[TEST] test_compressed_index_is_smaller OK")
+
+        print("[TEST] test_refine_backfills_raw_vectors ...", flush=True)
+        test_refine_backfills_raw_vectors()
+        print("[TEST] test_refine_backfills_raw_vectors OK")
+
+        print("[TEST] ALL VECTOR CODEC TESTS PASSED")
+    except Exception as e:
+        print(f"[TEST] FAIL: {type(e).__name__}: {e}", file=sys.stderr)
+        sys.exit(1)
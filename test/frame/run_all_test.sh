@@ -23,6 +23,17 @@ print_report() {
   echo "$*" | tee -a "${REPORT_FILE}"
 }
 
+run_all_unit_tests() {
+  print_report "========== Unit Tests =========="
+
+  if bash "${SCRIPT_DIR}/run_unit_test.sh" 2>&1 | tee -a "${REPORT_FILE}"; then
+    print_report "[PASS] Unit tests"
+  else
+    print_report "[FAIL] Unit tests"
+    return 1
+  fi
+}
+
 run_all_api_tests() {
   print_report "========== API Tests =========="
   
@@ -81,6 +92,10 @@ main() {
   
   local failed=0
   
+  if ! run_all_unit_tests; then
+    failed=1
+  fi
+  
   if ! run_all_api_tests; then
     failed=1
   fi
@@ -0,0 +1,27 @@
+#!/bin/bash
+# ============================ run_unit_test.sh 说明 ============================
+#
+# - 作用：单元测试框架，直接在临时目录中构造存储，不启动任何组件
+# - 用法：bash run_unit_test.sh
+#
+# ==============================================================================
+
+set -euo pipefail
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+source "${SCRIPT_DIR}/common.sh"
+
+main() {
+  cd "${PROJECT_ROOT_DIR}"
+  export PYTHONPATH="${PROJECT_ROOT_DIR}"
+  mkdir -p "${TEST_ROOT_DIR}/log/unit"
+
+  local test_file
+  for test_file in "${TEST_ROOT_DIR}"/case/unit/test_*.py; do
+    run_python_test "${test_file}" "${TEST_ROOT_DIR}/log/unit/$(basename "${test_file}" .py).log"
+  done
+
+  print "unit tests completed successfully"
+}
+
+main "$@"
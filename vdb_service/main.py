@@ -0,0 +1,362 @@
+"""
+Vector store service: FAISS index, chunk/file/article metadata and article embeddings
+behind a batched HTTP API, used by rag_app when vector_store.type is remote.
+"""
+
+import os
+import uuid
+import tempfile
+import threading
+from contextlib import asynccontextmanager
+
+import numpy as np
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, FileResponse
+from starlette.background import BackgroundTask
+
+from libs.utils.logger import init_component_logger
+from libs.protocols.store_contract import (
+    StoreSearchRequest, StoreSearchResponse, StoreAddRequest, ChunkIdsRequest, ChunkMetasResponse,
+    IdsRequest, ArticlesRequest, EmbeddingBatch, StoreResponse
+)
+from rag_app.core.container import DIContainer
+from rag_app.vector_store import snapshot
+from rag_app.vector_store.remote import encode_vectors, decode_vectors
+from rag_app.vector_store.service import reconcile_committed
+from rag_app.vector_store.types import FileMeta, ArticleMeta, ChunkMeta, SearchFilter
+from shared.config import get_app_config, get_llm_config, get_rag_config, get_vdb_config
+
+logger = init_component_logger("VDB")
+
+app_config = get_app_config()
+vdb_config = get_vdb_config()
+
+# 只使用容器中的向量库与元数据（嵌入模型仅在崩溃恢复需要重新 embedding 时加载）
+container = DIContainer(
+    app_config=app_config,
+    llm_config=get_llm_config(),
+    rag_config=get_rag_config(),
+    vdb_config=vdb_config
+)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info("op=vdb_service_begin")
+
+    if vdb_config.type != "faiss":
+        raise Exception("vdb_service serves a local index, vector_store.type must be faiss")
+
+    app.state.store = container.get_vector_store()
+    app.state.metadata = container.get_metadata_repository()
+    app.state.articles = container.get_article_store()
+    app.state.committer = container.get_committer()
+    # 文件原文（rag_app 远程写入时文本内联；快照导入的本地知识库按位置引用原文）
+    app.state.content = container.get_content_store()
+
+    # 元数据 / 文章向量的写入串行化，导出快照时与向量库一致（与提交协议共用）
+    committer = app.state.committer
+    app.state.write_lock = committer.lock if committer is not None else threading.RLock()
+
+    # 崩溃前未完成的文件增删（rag_app 分多个请求写入）：按文件对齐
+    if app.state.committer is not None:
+        reconcile_committed(
+            app.state.store,
+            app.state.metadata,
+            app.state.articles,
+            app.state.committer,
+            app.state.write_lock,
+            content=app.state.content,
+        )
+
+    # 服务实例标识：chunk_id 在实例内不复用，客户端据此失效元数据缓存
+    app.state.epoch = uuid.uuid4().hex[:12]
+
+    logger.info(
+        "op=vdb_service_initialized "
+        f"epoch={app.state.epoch} "
+        f"info={app.state.store.info()}"
+    )
+
+    yield
+
+    container.close()
+    logger.info("op=vdb_service_finish")
+
+app = FastAPI(
+    title=f"{app_config.app_name} Vector Store",
+    description=app_config.app_description,
+    version=app_config.app_version,
+    lifespan=lifespan
+)
+
+# 参数错误返回 400，其余 500；客户端按状态码抛出异常
+@app.exception_handler(ValueError)
+async def value_error_handler(request: Request, exc: ValueError):
+    logger.warning(
+        "op=vdb_request_invalid "
+        f"path={request.url.path} "
+        f"error={exc}"
+    )
+    return JSONResponse(status_code=400, content={"status": "error", "error": str(exc)})
+
+@app.exception_handler(Exception)
+async def error_handler(request: Request, exc: Exception):
+    logger.exception(
+        "op=vdb_request_exception "
+        f"path={request.url.path} "
+        f"exception={type(exc).__name__}"
+    )
+    return JSONResponse(status_code=500, content={"status": "error", "error": f"{type(exc).__name__}: {exc}"})
+
+def commit(request: Request, apply):
+    """
+    在写锁内执行一次修改并暂存为一个版本，写锁外等待组提交落盘
+    （每个请求原子提交；跨请求的文件增删不构成一个版本）
+    """
+    state = request.app.state
+    with state.write_lock:
+        apply()
+        generation = state.committer.stage() if state.committer is not None else None
+
+    if generation is not None:
+        state.committer.wait(generation)
+
+def chunk_metas(state, chunk_ids, with_text=False) -> dict:
+    metas = {}
+    for chunk_id in chunk_ids:
+        meta = state.store.get(chunk_id)
+        if with_text and meta is not None:
+            meta = state.content.materialize(meta)
+        metas[chunk_id] = meta.model_dump(mode="json") if meta is not None else None
+    return metas
+
+# 测试
+@app.get("/health")
+def check_health():
+    logger.debug("op=health_check")
+    return {"status": "healthy"}
+
+# ======================
+# 向量库
+# ======================
+
+@app.get("/info", response_model=StoreResponse)
+def get_info(request: Request):
+    return StoreResponse(data=request.app.state.store.info())
+
+@app.get("/stats", response_model=StoreResponse)
+def get_stats(request: Request, file_id: str = None):
+    return StoreResponse(data=request.app.state.store.stats(file_id))
+
+# 批量检索（附带命中 chunk 的元数据）
+@app.post("/search", response_model=StoreSearchResponse)
+def search(body: StoreSearchRequest, request: Request):
+    store = request.app.state.store
+    queries = decode_vectors(body.vectors, body.shape)
+
+    logger.info(
+        "op=vdb_search_start "
+        f"queries={len(queries)} "
+        f"k={body.top_k}"
+    )
+
+    search_filter = None
+    if body.search_filter is not None:
+        search_filter = SearchFilter.model_validate(body.search_filter)
+
+    results = store.search_batch(
+        queries,
+        body.top_k,
+        nprobe=body.nprobe,
+        ef_search=body.ef_search,
+        search_filter=search_filter,
+        min_score=body.min_score,
+    )
+    results = [
+        [{"chunk_id": int(r["chunk_id"]), "file_id": r["file_id"], "score": float(r["score"])} for r in hits]
+        for hits in results
+    ]
+
+    metas = {}
+    if body.with_meta:
+        metas = chunk_metas(request.app.state, {r["chunk_id"] for hits in results for r in hits}, body.with_text)
+
+    return StoreSearchResponse(results=results, metas=metas, epoch=request.app.state.epoch)
+
+# 添加向量
+@app.post("/chunks", response_model=StoreResponse)
+def add_chunks(body: StoreAddRequest, request: Request):
+    metas = [ChunkMeta.model_validate(meta) for meta in body.metas]
+    vectors = decode_vectors(body.vectors, body.shape)
+
+    logger.info(f"op=vdb_add_chunks chunks={len(metas)}")
+
+    commit(request, lambda: request.app.state.store.add(metas, vectors))
+
+    return StoreResponse()
+
+# 批量获取 chunk 元数据
+@app.post("/chunks/get", response_model=ChunkMetasResponse)
+def get_chunks(body: ChunkIdsRequest, request: Request):
+    return ChunkMetasResponse(
+        metas=chunk_metas(request.app.state, body.chunk_ids, body.with_text),
+        epoch=request.app.state.epoch,
+    )
+
+# 按文件删除向量
+@app.delete("/files/{file_id}/chunks", response_model=StoreResponse)
+def delete_chunks(file_id: str, request: Request):
+    logger.info(f"op=vdb_delete_chunks file_id={file_id}")
+
+    commit(request, lambda: request.app.state.store.delete_by_file(file_id))
+
+    return StoreResponse()
+
+# 存有 chunk 的 file_id
+@app.get("/files", response_model=StoreResponse)
+def list_chunk_files(request: Request):
+    return StoreResponse(data={"file_ids": request.app.state.store.file_ids()})
+
+# 落盘已追加的变更日志
+@app.post("/sync", response_model=StoreResponse)
+def sync_store(request: Request):
+    request.app.state.store.sync()
+    return StoreResponse()
+
+# ======================
+# 元数据
+# ======================
+
+@app.get("/meta/files", response_model=StoreResponse)
+def list_files(request: Request):
+    files = request.app.state.metadata.list_all_files()
+    return StoreResponse(data={"files": {k: v.model_dump(mode="json") for k, v in files.items()}})
+
+@app.get("/meta/files/{file_id}", response_model=StoreResponse)
+def get_file(file_id: str, request: Request):
+    meta = request.app.state.metadata.get_file(file_id)
+    return StoreResponse(data={"file": meta.model_dump(mode="json") if meta is not None else None})
+
+@app.post("/meta/files", response_model=StoreResponse)
+def add_file(body: dict, request: Request):
+    meta = FileMeta.model_validate(body)
+    commit(request, lambda: request.app.state.metadata.add_file(meta))
+    return StoreResponse()
+
+@app.delete("/meta/files/{file_id}", response_model=StoreResponse)
+def remove_file(file_id: str, request: Request):
+    commit(request, lambda: request.app.state.metadata.remove_file(file_id))
+    # 提交后删除原文（若有）
+    request.app.state.content.delete(file_id)
+    return StoreResponse()
+
+@app.post("/meta/articles", response_model=StoreResponse)
+def add_articles(body: ArticlesRequest, request: Request):
+    metas = [ArticleMeta.model_validate(meta) for meta in body.articles]
+    commit(request, lambda: request.app.state.metadata.add_articles(metas))
+    return StoreResponse()
+
+@app.post("/meta/articles/get", response_model=StoreResponse)
+def get_articles(body: IdsRequest, request: Request):
+    metadata = request.app.state.metadata
+    articles = {}
+    for article_id in body.ids:
+        meta = request.app.state.content.materialize(metadata.get_article(article_id))
+        if meta is not None:
+            articles[article_id] = meta.model_dump(mode="json")
+    return StoreResponse(data={"articles": articles})
+
+@app.post("/meta/articles/delete", response_model=StoreResponse)
+def remove_articles(body: IdsRequest, request: Request):
+    commit(request, lambda: request.app.state.metadata.remove_articles(body.ids))
+    return StoreResponse()
+
+@app.get("/meta/counts", response_model=StoreResponse)
+def count_meta(request: Request):
+    metadata = request.app.state.metadata
+    return StoreResponse(data={"files": metadata.count_files(), "articles": metadata.count_articles()})
+
+# ======================
+# 文章向量
+# ======================
+
+@app.post("/embeddings", response_model=StoreResponse)
+def save_embeddings(body: EmbeddingBatch, request: Request):
+    vectors = decode_vectors(body.vectors, body.shape)
+    if len(body.ids) != len(vectors):
+        raise ValueError(f"ids {len(body.ids)} mismatch vectors {len(vectors)}")
+
+    commit(request, lambda: request.app.state.articles.save_matrix(body.ids, vectors))
+    return StoreResponse()
+
+@app.post("/embeddings/get", response_model=StoreResponse)
+def get_embeddings(body: IdsRequest, request: Request):
+    found = request.app.state.articles.get_batch(body.ids)
+    if not found:
+        return StoreResponse(data={"ids": [], "vectors": "", "shape": [0, 0]})
+
+    ids = list(found)
+    return StoreResponse(data={"ids": ids, **encode_vectors(np.stack([found[i] for i in ids]))})
+
+@app.post("/embeddings/delete", response_model=StoreResponse)
+def delete_embeddings(body: IdsRequest, request: Request):
+    commit(request, lambda: request.app.state.articles.delete_batch(body.ids))
+    return StoreResponse()
+
+@app.get("/embeddings/count", response_model=StoreResponse)
+def count_embeddings(request: Request):
+    return StoreResponse(data={"count": request.app.state.articles.count()})
+
+# 导出知识库快照（格式与 rag_app GET /snapshot 相同）
+@app.get("/snapshot")
+def export_snapshot(request: Request):
+    logger.info("op=export_snapshot_start")
+
+    fd, path = tempfile.mkstemp(
+        prefix=".export-", suffix=".tar",
+        dir=os.path.dirname(os.path.abspath(vdb_config.index_path))
+    )
+    os.close(fd)
+
+    try:
+        committer = request.app.state.committer
+        manifest = snapshot.export_snapshot(
+            request.app.state.store,
+            vdb_config,
+            path,
+            lock=request.app.state.write_lock,
+            files=committer.current_files if committer is not None else None,
+            content=request.app.state.content,
+        )
+    except Exception:
+        os.remove(path)
+        raise
+
+    logger.info(
+        "op=export_snapshot_end "
+        f"files={len(manifest['files'])}"
+    )
+    return FileResponse(
+        path,
+        media_type="application/x-tar",
+        filename=f"kb-snapshot-{manifest['created_at'][:19].replace(':', '')}.tar",
+        background=BackgroundTask(os.remove, path),
+    )
+
+if __name__ == "__main__":
+    import uvicorn
+
+    host = vdb_config.host
+    port = vdb_config.port
+    logger.info(
+        "op=uvicorn_start "
+        f"host={host} "
+        f"port={port}"
+    )
+    uvicorn.run(
+        app,
+        host=host,
+        port=port,
+        log_level=app_config.log_level.lower()
+    )